@@ -0,0 +1,72 @@
+"""Benchmark the per-call overhead of BaseLogger in synchronous and async modes.
+
+Measures how long the calling thread spends inside ``logger.info`` (the hot
+path) when writing JSON records to a rotating log file, then how long the
+writer thread needs to drain the queue in async mode.
+
+Usage:
+    python benchmarks/bench_logging.py [--records N] [--batch-size N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tools.base_logger import BaseLogger, LogConfig  # noqa: E402
+
+
+def run(mode: str, records: int, batch_size: int, log_dir: str) -> dict:
+    """Log ``records`` messages and return timing results for one mode."""
+    config = LogConfig(
+        log_file=f"bench_{mode}.log",
+        log_dir=log_dir,
+        console_output=False,
+        async_mode=(mode == "async"),
+        queue_size=records + 1,
+        batch_size=batch_size,
+        max_bytes=0,
+    )
+    logger = BaseLogger(f"bench.{mode}", config=config)
+
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info("benchmark record", step=i, workflow_id="bench", agent="bench-agent")
+    call_time = time.perf_counter() - start
+
+    logger.flush(timeout=60)
+    total_time = time.perf_counter() - start
+    stats = logger.get_queue_stats()
+    logger.close()
+
+    return {
+        "mode": mode,
+        "us_per_call": call_time / records * 1e6,
+        "total_s": total_time,
+        "batches": stats.get("batches", "-"),
+        "dropped": stats.get("dropped", 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = [run(mode, args.records, args.batch_size, log_dir) for mode in ("sync", "async")]
+
+    print(f"{'mode':<6} {'us/call':>9} {'total s':>9} {'batches':>8} {'dropped':>8}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['us_per_call']:>9.2f} {r['total_s']:>9.3f} "
+              f"{r['batches']:>8} {r['dropped']:>8}")
+    speedup = results[0]["us_per_call"] / results[1]["us_per_call"]
+    print(f"hot-path speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark StreamProcessor throughput in tokens/sec for each output mode.
+
+Streams synthetic LLM tokens (a few characters each) through the processor
+as fast as the source can produce them and measures tokens/sec, frames sent
+and bytes on the wire for per-token and coalesced modes.
+
+Usage:
+    python benchmarks/bench_streaming.py [--tokens N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.streaming import StreamCompression, StreamFormat, StreamProcessor, StreamingConfig  # noqa: E402
+
+MODES = {
+    "json": dict(format=StreamFormat.JSON),
+    "sse": dict(format=StreamFormat.SSE),
+    "json+coalesce": dict(format=StreamFormat.JSON, coalesce=True),
+    "sse+coalesce": dict(format=StreamFormat.SSE, coalesce=True),
+    "sse+coalesce+gzip": dict(format=StreamFormat.SSE, coalesce=True, compression=StreamCompression.GZIP),
+    "binary+coalesce": dict(format=StreamFormat.BINARY, coalesce=True, binary_framing="length_prefixed"),
+}
+
+WORDS = ("the ", "quick ", "brown ", "fox ", "jumps ", "over ", "a ", "lazy ", "dog", ".\n")
+
+
+async def token_source(count: int):
+    """Yield ``count`` short tokens without delay."""
+    for i in range(count):
+        yield WORDS[i % len(WORDS)]
+
+
+async def run(name: str, tokens: int) -> dict:
+    """Stream ``tokens`` tokens through one mode and return timing results."""
+    processor = StreamProcessor(StreamingConfig(**MODES[name]))
+
+    start = time.perf_counter()
+    async for _ in processor.process_stream(token_source(tokens)):
+        pass
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": name,
+        "tokens_per_s": tokens / elapsed,
+        "frames": processor.frames_sent,
+        "bytes": processor.bytes_out,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=200_000)
+    args = parser.parse_args()
+
+    results = [asyncio.run(run(name, args.tokens)) for name in MODES]
+
+    print(f"{'mode':<20} {'tokens/s':>12} {'frames':>9} {'bytes':>11}")
+    for r in results:
+        print(f"{r['mode']:<20} {r['tokens_per_s']:>12,.0f} {r['frames']:>9} {r['bytes']:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,11 @@ except ImportError:
     MCP_AVAILABLE = False
 from pydantic import BaseModel
 from core.config_loader import load_config, validate_playbook_configuration
+from core.condition_evaluator import evaluate_condition
+from core.workflow_context import WorkflowContext, ContextBudget, ContextMetrics
+from core.llm_cache import LLMCache, LLMCachePolicy, get_llm_cache, report_llm_usage, usage_tokens
+from core.cost_meter import DEFAULT_PLAYBOOK_BUDGET_WINDOW, BudgetAction, get_cost_meter
+from core.llm_scheduler import LLMPriority, get_llm_scheduler
 
 # Define dependency and output types
 T = TypeVar('T')  # For dependencies
@@ -58,7 +63,11 @@ class AgentWrapper(Generic[T, O]):
                 instructions: str,
                 dependencies: Optional[T] = None,
                 tools: Optional[List[str]] = None,
-                mcp_servers: Optional[List[Union[MCPServerHTTP, MCPServerStdio]]] = None):
+                mcp_servers: Optional[List[Union[MCPServerHTTP, MCPServerStdio]]] = None,
+                cache_policy: Optional[LLMCachePolicy] = None,
+                llm_cache: Optional[LLMCache] = None,
+                fallback_model: Optional[str] = None,
+                priority: LLMPriority = LLMPriority.INTERACTIVE):
         """Initialize a Pydantic-AI agent
         
         Args:
@@ -68,8 +77,22 @@ class AgentWrapper(Generic[T, O]):
             dependencies: Optional dependencies for the agent
             tools: Optional list of tool names that the agent can use
             mcp_servers: Optional list of MCP servers to attach to the agent
+            cache_policy: Optional response cache policy (caching is off by default)
+            llm_cache: Cache to use instead of the process-wide one
+            fallback_model: Model to use when the primary model's dispatch queue is saturated
+            priority: Dispatch priority of this agent's LLM calls
         """
         self.role = role
+        self.model = model
+        self.instructions = instructions
+        self.cache_policy = cache_policy or LLMCachePolicy()
+        self.llm_cache = llm_cache
+        self.fallback_model = fallback_model
+        self.priority = priority
+        
+        # Workflow and execution the agent's LLM costs are attributed to
+        self.workflow: Optional[str] = None
+        self.execution_id: Optional[str] = None
         self.state = {}
         self.assigned_tools = tools or []
         self.mcp_servers = mcp_servers or []
@@ -173,21 +196,85 @@ class AgentWrapper(Generic[T, O]):
         Args:
             input_data: The input data to process
             message_history: Optional message history to provide conversation context
+            
+        Raises:
+            LLMCacheMiss: If the cache policy is in replay mode and the call was not recorded
+            BudgetExceededError: If an aborting cost budget for this call is exceeded
+        """
+        if not self.cache_policy.active:
+            return await self._dispatch(input_data, message_history)
+        
+        # Serve identical calls (same model, prompt, messages and tools) from the cache;
+        # responses from a fallback model are stored under the fallback's key
+        cache = self.llm_cache or get_llm_cache()
+        served = {"model": self.model}
+        result, hit = await cache.run(
+            lambda: self._dispatch(input_data, message_history, served),
+            self.cache_policy,
+            model=self.model,
+            system_prompt=self.instructions,
+            messages={"input": input_data, "history": message_history or []},
+            tools=self.assigned_tools,
+            served_model=lambda: served["model"]
+        )
+        report_llm_usage(self.cache_policy, served["model"], result, hit, cache)
+        return result
+    
+    async def _dispatch(self, input_data: Dict[str, Any], message_history=None,
+                        served: Optional[Dict[str, str]] = None):
+        """Run the agent once cost budgets and the LLM scheduler admit the request
+        
+        Args:
+            input_data: The input data to process
+            message_history: Optional message history to provide conversation context
+            served: Optional mapping updated with the model the scheduler dispatched to
         """
+        meter = get_cost_meter()
+        await meter.admit(workflow=self.workflow, execution_id=self.execution_id,
+                          agent=self.role, model=self.model)
+        
+        async def metered_run(model: str):
+            if served is not None:
+                served["model"] = model
+            result = await self._run(input_data, message_history, model)
+            prompt_tokens, completion_tokens = usage_tokens(result)
+            meter.record_llm(model, prompt_tokens, completion_tokens, workflow=self.workflow,
+                             execution_id=self.execution_id, agent=self.role)
+            return result
+        
+        return await get_llm_scheduler().run(
+            metered_run,
+            self.model,
+            prompt=[self.instructions, input_data, message_history or []],
+            priority=self.priority,
+            fallback=self.fallback_model
+        )
+    
+    async def _run(self, input_data: Dict[str, Any], message_history=None, model: Optional[str] = None):
+        """Run the underlying agent, with MCP servers if attached
+        
+        Args:
+            input_data: The input data to process
+            message_history: Optional message history
+            model: Model to use instead of the agent's own (e.g. a fallback)
+        """
+        overrides = {"model": model} if model and model != self.model else {}
         if self.mcp_servers and MCP_AVAILABLE:
             # Run with MCP servers if available
             async with self.agent.run_mcp_servers(*self.mcp_servers):
                 return await self.agent.run(
                     self.dependencies, 
                     input_data, 
-                    message_history=message_history
+                    message_history=message_history,
+                    **overrides
                 )
         else:
             # Run without MCP servers
             return await self.agent.run(
                 self.dependencies, 
                 input_data, 
-                message_history=message_history
+                message_history=message_history,
+                **overrides
             )
         
     async def process_stream(self, input_data: Dict[str, Any], message_history=None):
@@ -226,13 +313,18 @@ class AgentWrapper(Generic[T, O]):
 class AgentManager:
     """Factory and orchestrator for agent instances"""
     
-    def __init__(self, config_dir: str = "core/configs"):
+    def __init__(self, config_dir: str = "core/configs",
+                 context_budget: Optional[ContextBudget] = None):
         """Initialize the agent manager with configuration"""
         self.config_dir = config_dir
         self.agents = {}
         self.tool_registry = None  # Will be set by the system
         self.bayesian_engine = None  # Will be set by the system
         
+        # Budget for contexts sent to agents and per-step context size metrics
+        self.context_budget = context_budget or ContextBudget()
+        self.context_metrics: Dict[str, ContextMetrics] = {}
+        
         # Load configurations
         self.agent_configs = load_config(os.path.join(config_dir, "agents.yaml"))
         self.playbook_configs = load_config(os.path.join(config_dir, "playbooks.yaml"))
@@ -301,6 +393,7 @@ class AgentManager:
         
         # Check for LLM override from agent-LLM mapping
         model = role_config['model']
+        fallback_model = None
         try:
             # Import here to avoid circular imports
             from core.agents.agent_llm_mapping import agent_llm_manager
@@ -309,6 +402,7 @@ class AgentManager:
                 # Override the model with the mapped LLM
                 model = llm_id
                 logging.info(f"Using LLM '{llm_id}' for agent with role '{role_name}' (from mapping)")
+            fallback_model = agent_llm_manager.get_fallback_llm(role_name)
         except ImportError:
             # If the mapping module is not available, use default model
             pass
@@ -319,7 +413,8 @@ class AgentManager:
             model=model,
             instructions=role_config['system_prompt'],
             dependencies=dependencies,
-            mcp_servers=attached_mcp_servers
+            mcp_servers=attached_mcp_servers,
+            fallback_model=fallback_model
         )
         
         # Store the agent
@@ -376,9 +471,16 @@ class AgentManager:
             model=role_config['model'],
             instructions=role_config['system_prompt'],
             dependencies=agent.dependencies,
-            tools=list(final_tool_names)
+            tools=list(final_tool_names),
+            cache_policy=agent.cache_policy,
+            llm_cache=agent.llm_cache,
+            fallback_model=agent.fallback_model,
+            priority=agent.priority
         )
         
+        new_agent.workflow = agent.workflow
+        new_agent.execution_id = agent.execution_id
+        
         # Replace the agent in the registry
         self.agents[agent_id] = new_agent
         
@@ -423,30 +525,83 @@ class AgentManager:
         except ImportError:
             logging.warning("Agent-LLM mapping module not available")
         
+        # Response caching is opt-in per playbook
+        cache_policy = LLMCachePolicy.from_config(playbook.get('llm_cache'), namespace=playbook_name)
+        cache_policy.execution_id = input_data.get('execution_id') if isinstance(input_data, dict) else None
+        
+        # Playbooks marked as batch yield the LLM dispatch queues to interactive work
+        priority = LLMPriority.from_config(playbook.get('llm_priority'))
+        
+        # Optional cost budget, for this run (per_run, needs an execution_id) or the playbook
+        # overall; playbook budgets restart every window (a day unless configured, null for never)
+        execution_id = cache_policy.execution_id
+        budget = playbook.get('cost_budget')
+        if isinstance(budget, (int, float)):
+            budget = {'limit': budget}
+        if budget:
+            per_run = budget.get('per_run', False) and execution_id
+            get_cost_meter().set_budget(
+                'execution' if per_run else 'workflow',
+                execution_id if per_run else playbook_name,
+                budget['limit'],
+                action=BudgetAction(budget.get('action', 'abort')),
+                throttle_delay=budget.get('throttle_delay', 1.0),
+                window=None if per_run else budget.get('window', DEFAULT_PLAYBOOK_BUDGET_WINDOW)
+            )
+        
         # Initialize agents required for this playbook
         workflow_agents = {}
         for agent_role in playbook['agents']:
             agent = self.initialize_agent(agent_role)
+            agent.cache_policy = cache_policy
+            agent.priority = priority
+            agent.workflow = playbook_name
+            agent.execution_id = execution_id
             workflow_agents[agent_role] = agent
             
             # Assign tools to the agent
             self.assign_tools_to_agent(id(agent), playbook['tools_allowed'])
         
         # Execute workflow steps
-        current_step = self._get_initial_step(playbook)
-        while current_step:
-            # Execute the step
-            step_result = await self._execute_step(current_step, context, workflow_agents)
-            
-            # Update context with step result
-            context['state'][current_step['step_id']] = step_result
-            
-            # Get the next step
-            current_step = self._get_next_step(playbook, current_step, context)
+        try:
+            current_step = self._get_initial_step(playbook)
+            while current_step:
+                # Execute the step
+                step_result = await self._execute_step(current_step, context, workflow_agents)
+                
+                # Update context with step result
+                context['state'][current_step['step_id']] = step_result
+                
+                # Get the next step
+                current_step = self._get_next_step(playbook, current_step, context)
+        finally:
+            # The run's own budget ends with it
+            if execution_id:
+                get_cost_meter().end_execution(execution_id)
         
         # Return the final output
         return context['output']
     
+    def _step_context(self, step: Dict[str, Any], context: Dict[str, Any]) -> WorkflowContext:
+        """Wrap the workflow context for a step, without copying it
+        
+        Args:
+            step: The workflow step definition.
+            context: The current workflow context.
+        
+        Returns:
+            A layered WorkflowContext that records context bytes for the step.
+        """
+        step_id = step.get('step_id', step.get('type', 'standard'))
+        metrics = self.context_metrics.get(step_id)
+        if metrics is None:
+            metrics = self.context_metrics[step_id] = ContextMetrics(step_id=step_id)
+        return WorkflowContext(context, budget=self.context_budget, metrics=metrics)
+    
+    def get_context_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get context bytes sent to agents, per workflow step"""
+        return {step_id: metrics.to_dict() for step_id, metrics in self.context_metrics.items()}
+    
     def _get_initial_step(self, playbook: Dict[str, Any]) -> Dict[str, Any]:
         """Get the initial step of a playbook"""
         # For now, just return the first step
@@ -523,7 +678,7 @@ class AgentManager:
         # Prepare input data for this step
         step_input = {
             "operation": step['operation'],
-            "context": context,
+            "context": self._step_context(step, context).to_prompt(),
             "step": step
         }
         
@@ -548,6 +703,8 @@ class AgentManager:
                                        A dictionary containing the aggregated results from all agents, either as a combined dictionary or a list, depending on the aggregation strategy.
                                    """
         tasks = []
+        # Materialize the context once and share it across all agents
+        prompt_context = self._step_context(step, context).to_prompt()
         for agent_spec in step['agents']:
             # Parse agent spec (format: "AgentName:operation")
             parts = agent_spec.split(':')
@@ -559,7 +716,7 @@ class AgentManager:
             # Prepare input for this agent
             agent_input = {
                 "operation": operation,
-                "context": context,
+                "context": prompt_context,
                 "step": step
             }
             
@@ -596,14 +753,14 @@ class AgentManager:
                                       workflow_agents: Mapping of agent identifiers to agent instances.
                                   
                                   Returns:
-                                      A dictionary containing the results of each iteration and the final state after completion or early termination.
+                                      A dictionary containing the results of each iteration, the final state after completion or early termination, and the state deltas written by the loop.
                                   """
         iterations = step.get('iterations', 3)
         agents = step['agents']
         operations = step['operations']
         
         results = []
-        current_state = context.copy()
+        current_state = self._step_context(step, context)
         
         for i in range(iterations):
             iteration_results = {}
@@ -617,7 +774,7 @@ class AgentManager:
                 # Prepare input for this role
                 role_input = {
                     "operation": operation_name,
-                    "context": current_state,
+                    "context": current_state.to_prompt(),
                     "iteration": i,
                     "step": step
                 }
@@ -626,8 +783,8 @@ class AgentManager:
                 result = await agent.process(role_input)
                 iteration_results[role] = result
                 
-                # Update the state for the next role
-                current_state = {**current_state, "previous_result": result}
+                # Update the state for the next role with a delta overlay
+                current_state = current_state.child(previous_result=result)
             
             results.append(iteration_results)
             
@@ -639,7 +796,8 @@ class AgentManager:
         
         return {
             "iterations": results,
-            "final_state": current_state
+            "final_state": current_state.to_dict(),
+            "state_deltas": current_state.deltas()
         }
     
     async def _execute_process_step(self, step: Dict[str, Any],
@@ -662,7 +820,7 @@ class AgentManager:
         process = step['process']
         
         results = {}
-        current_state = context.copy()
+        current_state = self._step_context(step, context)
         
         for operation in process:
             # Check condition if present
@@ -673,15 +831,15 @@ class AgentManager:
             # Execute operation
             operation_input = {
                 "operation": operation['operation'],
-                "context": current_state,
+                "context": current_state.to_prompt(),
                 "step": step
             }
             
             result = await agent.process(operation_input)
             results[operation['operation']] = result
             
-            # Update state
-            current_state = {**current_state, "previous_result": result}
+            # Update state with a delta overlay
+            current_state = current_state.child(previous_result=result)
         
         return results
     
@@ -694,25 +852,32 @@ class AgentManager:
                                   The method first executes the primary operation with the designated agent. It then evaluates each handoff condition; if a condition is met, it invokes the specified operation on the target agent using the updated context. If a completion action is defined, it is executed by the primary agent after all handoffs. Returns a dictionary containing results from the primary operation, any handoff operations, and the completion action if present.
                                   """
         primary_agent = workflow_agents[step['primary_agent']]
+        step_context = self._step_context(step, context)
         
         # Execute primary operation
         primary_result = await primary_agent.process({
             "operation": step['operation'],
-            "context": context,
+            "context": step_context.to_prompt(),
             "step": step
         })
         
         results = {"primary": primary_result}
         
+        # Overlay the primary result once and reuse it for every handoff
+        handoff_context = step_context.child(primary_result)
+        handoff_prompt = None
+        
         # Check handoff conditions
         for handoff in step.get('handoff_conditions', []):
-            if self._evaluate_condition(handoff['condition'], {**context, **primary_result}):
+            if self._evaluate_condition(handoff['condition'], handoff_context):
                 target_agent = workflow_agents[handoff['target_agent']]
+                if handoff_prompt is None:
+                    handoff_prompt = handoff_context.to_prompt()
                 
                 # Execute handoff operation
                 handoff_result = await target_agent.process({
                     "operation": handoff['operation'],
-                    "context": {**context, **primary_result},
+                    "context": handoff_prompt,
                     "step": step
                 })
                 
@@ -722,7 +887,7 @@ class AgentManager:
         if 'completion_action' in step:
             completion_result = await primary_agent.process({
                 "operation": step['completion_action'],
-                "context": {**context, **results},
+                "context": step_context.child(results).to_prompt(),
                 "step": step
             })
             results['completion'] = completion_result
@@ -1,16 +1,21 @@
 """Agent-LLM mapping system for WrenchAI.
 
 This module manages the mapping between agents and their assigned LLMs,
-allowing dynamic assignment based on playbook specifications.
+allowing dynamic assignment based on playbook specifications. Calls made
+through ``AgentLLMManager.dispatch`` go through the central LLM scheduler,
+which spills to the mapping's fallback LLM when the primary queue is saturated.
 """
 
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Awaitable, TypeVar
 from pydantic import BaseModel, Field
 from enum import Enum
 
+from core.llm_scheduler import LLMPriority, LLMScheduler, get_llm_scheduler
 from .agent_definitions import Agent, LLMProvider, AGENTS
 
+T = TypeVar("T")
+
 logger = logging.getLogger(__name__)
 
 class AgentLLMMapping(BaseModel):
@@ -31,12 +36,16 @@ class LLMAvailability(BaseModel):
 class AgentLLMManager:
     """Manager for agent-LLM mappings."""
     
-    def __init__(self):
+    def __init__(self, scheduler: Optional[LLMScheduler] = None):
         """
         Initializes the AgentLLMManager with empty mappings and LLM availability, and loads default agent-LLM mappings.
+        
+        Args:
+            scheduler: LLM scheduler for dispatched calls (defaults to the process-wide scheduler)
         """
         self.mappings: Dict[str, List[AgentLLMMapping]] = {}
         self.llm_availability: Dict[str, LLMAvailability] = {}
+        self.scheduler = scheduler
         self._initialize_default_mappings()
         
     def _initialize_default_mappings(self):
@@ -138,6 +147,58 @@ class AgentLLMManager:
         
         return None
     
+    def get_fallback_llm(self, agent_name: str) -> Optional[str]:
+        """
+        Returns the available fallback LLM of the agent's highest priority mapping that declares one.
+        
+        Args:
+            agent_name: The name of the agent.
+        
+        Returns:
+            The fallback LLM ID, or None if no available fallback is mapped.
+        """
+        for mapping in self.mappings.get(agent_name, []):
+            if mapping.fallback_llm_id:
+                if self.check_llm_availability(mapping.fallback_llm_id):
+                    return mapping.fallback_llm_id
+                return None
+        return None
+    
+    async def dispatch(self,
+                       agent_name: str,
+                       call: Callable[[str], Awaitable[T]],
+                       prompt: Any = None,
+                       priority: LLMPriority = LLMPriority.INTERACTIVE) -> T:
+        """
+        Runs an LLM call for an agent through the LLM scheduler.
+        
+        The call waits for its provider's concurrency and rate budgets and is routed to the agent's fallback LLM when the primary LLM's queue is saturated.
+        
+        Args:
+            agent_name: The name of the agent.
+            call: Coroutine function taking the LLM ID to call.
+            prompt: The prompt, used to estimate the request's token usage.
+            priority: Priority class of the request.
+        
+        Returns:
+            The result of the call.
+        
+        Raises:
+            ValueError: If no LLM is mapped for the agent.
+        """
+        llm_id = self.get_agent_llm(agent_name)
+        if llm_id is None:
+            raise ValueError(f"No LLM mapped for agent: {agent_name}")
+        
+        scheduler = self.scheduler or get_llm_scheduler()
+        return await scheduler.run(
+            call,
+            llm_id,
+            prompt=prompt,
+            priority=priority,
+            fallback=self.get_fallback_llm(agent_name)
+        )
+    
     def update_llm_availability(self, llm_id: str, available: bool, error: Optional[str] = None):
         """
         Updates the availability status and error message for a specified LLM.
@@ -6,20 +6,26 @@ This module provides improved functionality to:
 - Share state between agents with context isolation
 - Manage workflow-level state
 - Support serialization of complex types
+- Persist entries incrementally through an append-only, compacted change log
 """
 
 import logging
 import asyncio
+import atexit
+import heapq
+import itertools
 from typing import Dict, Any, Optional, List, Set, Union, Tuple
 # Using Pydantic v2 validators according to Pydantic AI guidelines
 # Reference: https://ai.pydantic.dev/agents/
 from pydantic import BaseModel, Field, create_model, validator, model_validator
 from datetime import datetime
+from dataclasses import dataclass, field
 import json
 from pathlib import Path
 import os
 import threading
 import uuid
+import weakref
 import pickle
 import base64
 import hashlib
@@ -122,7 +128,15 @@ class AgentState(BaseModel):
     last_updated: datetime = Field(default_factory=datetime.utcnow, description="When the state was last updated")
     version: int = Field(default=1, description="State version counter")
     workflow_data: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Workflow-specific data indexed by workflow ID")
-    tags: Dict[str, List[str]] = Field(default_factory=dict, description="Tags for categorizing state entries")
+    tags: Dict[str, Set[str]] = Field(default_factory=dict, description="Tag -> keys index, derived from entry tags")
+    
+    @model_validator(mode='after')
+    def build_tag_index(self) -> 'AgentState':
+        """Build the tag index from the entries' own tags."""
+        for key, entry in self.entries.items():
+            for tag in entry.tags:
+                self.tags.setdefault(tag, set()).add(key)
+        return self
     
     def add_operation(self, operation: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """Add an operation to the history with timestamp and metadata."""
@@ -149,14 +163,21 @@ class AgentState(BaseModel):
                 self.entries[key].tags.append(tag)
             
             # Update the tag index
-            if tag not in self.tags:
-                self.tags[tag] = []
-            if key not in self.tags[tag]:
-                self.tags[tag].append(key)
+            self.tags.setdefault(tag, set()).add(key)
             
             return True
         return False
     
+    def untag_entry(self, key: str) -> None:
+        """Remove a key from the tag index. Call before the entry is replaced or removed."""
+        entry = self.entries.get(key)
+        for tag in entry.tags if entry else ():
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+    
     def get_entries_by_tag(self, tag: str) -> Dict[str, Any]:
         """Get all entries with a specific tag."""
         result = {}
@@ -213,6 +234,7 @@ class StateTransaction:
         )
         self.committed = False
         self.rolled_back = False
+        manager.transaction_logs[self.transaction_id] = self.log
     
     async def set(self, key: str, value: Any, **kwargs) -> None:
         """Set a value in the transaction."""
@@ -257,15 +279,191 @@ class StateTransaction:
         return True
 
 
+# Owner of a set of entries: ("private", agent_id), ("shared", "") or ("global", "")
+StateOwner = Tuple[str, str]
+SHARED_OWNER: StateOwner = ("shared", "")
+GLOBAL_OWNER: StateOwner = ("global", "")
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _utc_seconds(timestamp: datetime) -> float:
+    """Convert a naive UTC datetime to seconds since the epoch."""
+    return (timestamp - _EPOCH).total_seconds()
+
+
+class StateQuotaExceededError(Exception):
+    """Raised when setting an entry would exceed the state memory cap."""
+    pass
+
+
+class StateIndex:
+    """Secondary indexes over state entries.
+    
+    Maintained on every set/delete so that expiry, tag lookups and memory
+    accounting do not need to scan the private, shared and global stores:
+    - an expiry min-heap of (expires_at, owner, key), lazily invalidated
+    - an inverted tag -> keys index per owner
+    - the encoded size of every entry and the running total per owner
+    """
+    
+    def __init__(self):
+        self.expiry_heap: List[Tuple[float, int, StateOwner, str]] = []
+        self.tags: Dict[StateOwner, Dict[str, Set[str]]] = {}
+        self.entry_tags: Dict[StateOwner, Dict[str, List[str]]] = {}
+        self.sizes: Dict[StateOwner, Dict[str, int]] = {}
+        self.bytes: Dict[StateOwner, int] = {}
+        self._seq = itertools.count()
+    
+    @staticmethod
+    def entry_size(entry: AgentStateEntry) -> int:
+        """Estimate the bytes an entry occupies, as encoded for persistence."""
+        return len(entry.key) + len(json.dumps(entry.value, default=str))
+    
+    @staticmethod
+    def expires_at(entry: AgentStateEntry) -> Optional[float]:
+        """Get the expiry time of an entry in epoch seconds, if it has a TTL."""
+        if entry.ttl is None:
+            return None
+        return _utc_seconds(entry.timestamp) + entry.ttl
+    
+    def owner_bytes_after(self, owner: StateOwner, key: str, entry: AgentStateEntry) -> int:
+        """Get the owner's total bytes if ``entry`` replaced the current value of ``key``."""
+        previous = self.sizes.get(owner, {}).get(key, 0)
+        return self.bytes.get(owner, 0) - previous + self.entry_size(entry)
+    
+    def add(self, owner: StateOwner, key: str, entry: AgentStateEntry) -> None:
+        """Index an entry, replacing any previous entry for the key."""
+        self.remove(owner, key)
+        size = self.entry_size(entry)
+        self.sizes.setdefault(owner, {})[key] = size
+        self.bytes[owner] = self.bytes.get(owner, 0) + size
+        
+        if entry.tags:
+            owner_tags = self.tags.setdefault(owner, {})
+            for tag in entry.tags:
+                owner_tags.setdefault(tag, set()).add(key)
+            self.entry_tags.setdefault(owner, {})[key] = list(entry.tags)
+        
+        expires_at = self.expires_at(entry)
+        if expires_at is not None:
+            heapq.heappush(self.expiry_heap, (expires_at, next(self._seq), owner, key))
+    
+    def remove(self, owner: StateOwner, key: str) -> None:
+        """Drop a key from the indexes. Heap items are invalidated lazily."""
+        size = self.sizes.get(owner, {}).pop(key, None)
+        if size is None:
+            return
+        self.bytes[owner] -= size
+        owner_tags = self.tags.get(owner, {})
+        for tag in self.entry_tags.get(owner, {}).pop(key, ()):
+            keys = owner_tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del owner_tags[tag]
+    
+    def clear_owner(self, owner: StateOwner) -> None:
+        """Drop every key of an owner from the indexes."""
+        self.sizes.pop(owner, None)
+        self.bytes.pop(owner, None)
+        self.tags.pop(owner, None)
+        self.entry_tags.pop(owner, None)
+    
+    def keys_with_tags(self, owner: StateOwner, tags: List[str]) -> Set[str]:
+        """Get the keys of an owner that carry all the given tags."""
+        owner_tags = self.tags.get(owner, {})
+        result: Optional[Set[str]] = None
+        for tag in tags:
+            keys = owner_tags.get(tag, set())
+            result = set(keys) if result is None else result & keys
+            if not result:
+                return set()
+        return result or set()
+    
+    def next_expiry(self) -> Optional[float]:
+        """Get the earliest pending expiry time."""
+        return self.expiry_heap[0][0] if self.expiry_heap else None
+    
+    def pop_expired(self, now: float) -> List[Tuple[float, StateOwner, str]]:
+        """Pop every heap item due at or before ``now``."""
+        expired = []
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            expires_at, _, owner, key = heapq.heappop(self.expiry_heap)
+            expired.append((expires_at, owner, key))
+        return expired
+
+
+@dataclass
+class _DirtyAgentState:
+    """Changes to an agent's state that have not been persisted yet."""
+    keys: Set[str] = field(default_factory=set)
+    deleted: Set[str] = field(default_factory=set)
+    workflows: Set[str] = field(default_factory=set)
+    
+    def merge(self, newer: "_DirtyAgentState") -> None:
+        """Fold in changes made after this set was taken; newer changes win."""
+        self.keys -= newer.deleted
+        self.deleted -= newer.keys
+        self.keys |= newer.keys
+        self.deleted |= newer.deleted
+        self.workflows |= newer.workflows
+
+
+# Write-behind managers still alive, flushed once at exit without keeping them alive
+_write_behind_managers: "weakref.WeakSet[AsyncAgentStateManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_write_behind_managers() -> None:
+    """Persist the pending changes of every live write-behind manager."""
+    for manager in list(_write_behind_managers):
+        manager.flush_sync()
+
+
 class AsyncAgentStateManager:
-    """Enhanced async manager for agent state."""
+    """Enhanced async manager for agent state.
+    
+    Each agent has its own lock, so busy agents do not serialize each other.
+    Agent state is persisted as a compacted ``<agent_id>.json`` snapshot plus an
+    append-only ``<agent_id>.log`` of changes. Changes are tracked in a dirty set
+    and appended in one write per flush; the log is folded back into the
+    snapshot once it exceeds ``compact_threshold`` records.
     
-    def __init__(self, persistence_dir: Optional[str] = None):
+    Durability modes:
+    - "immediate": changes are appended before the call returns (default)
+    - "write_behind": a background flusher appends changes every ``flush_interval``
+    
+    In both modes, changes made inside a transaction are flushed on commit, and
+    ``flush()`` forces all pending changes to disk.
+    
+    Entries are indexed in a StateIndex: a background sweeper driven by the
+    expiry heap removes expired entries, tag lookups go through the inverted tag
+    index, and ``get_memory_usage()`` reports (and ``max_state_bytes`` caps) the
+    bytes held per agent and by the shared and global stores.
+    """
+    
+    def __init__(self, persistence_dir: Optional[str] = None,
+                 durability: str = "immediate",
+                 flush_interval: float = 0.05,
+                 compact_threshold: int = 1000,
+                 fsync: bool = False,
+                 max_state_bytes: Optional[int] = None,
+                 sweep_interval: float = 1.0):
         """Initialize the async agent state manager.
         
         Args:
             persistence_dir: Directory for state persistence (optional)
+            durability: Persistence mode ("immediate" or "write_behind")
+            flush_interval: Seconds between background flushes in write_behind mode
+            compact_threshold: Log records per agent before the log is compacted
+            fsync: Whether to fsync the log after every flush
+            max_state_bytes: Optional cap on entry bytes per agent (and for the
+                             shared and global stores)
+            sweep_interval: Maximum seconds between expiry sweeps
         """
+        if durability not in ("immediate", "write_behind"):
+            raise ValueError(f"Unknown durability mode: {durability}")
+        
         self.agent_states: Dict[str, AgentState] = {}
         self.shared_state: Dict[str, AgentStateEntry] = {}
         self.global_state: Dict[str, AgentStateEntry] = {}
@@ -273,7 +471,23 @@ class AsyncAgentStateManager:
         self.context_snapshots: Dict[str, ContextSnapshot] = {}
         self.persistence_dir = persistence_dir or os.path.join("data", "agent_states")
         self.transaction_logs: Dict[str, TransactionLog] = {}
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.max_state_bytes = max_state_bytes
+        self.sweep_interval = sweep_interval
+        self.index = StateIndex()
+        
+        # Guards workflows, snapshots and transactions; agent entries use per-agent locks.
+        # Lock order: _lock may be held while taking an agent lock, never the reverse.
         self._lock = asyncio.Lock()
+        self._agent_locks: Dict[str, asyncio.Lock] = {}
+        self._dirty: Dict[str, _DirtyAgentState] = {}
+        self._persisted_ops: Dict[str, int] = {}
+        self._log_records: Dict[str, int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._sweep_task: Optional[asyncio.Task] = None
         
         # Create persistence directory if it doesn't exist
         if self.persistence_dir:
@@ -281,6 +495,17 @@ class AsyncAgentStateManager:
             os.makedirs(os.path.join(self.persistence_dir, "workflows"), exist_ok=True)
             os.makedirs(os.path.join(self.persistence_dir, "snapshots"), exist_ok=True)
             os.makedirs(os.path.join(self.persistence_dir, "transactions"), exist_ok=True)
+        
+        # Don't lose coalesced writes when the process exits
+        if durability == "write_behind":
+            _write_behind_managers.add(self)
+    
+    def _get_agent_lock(self, agent_id: str) -> asyncio.Lock:
+        """Get the lock guarding an agent's state."""
+        lock = self._agent_locks.get(agent_id)
+        if lock is None:
+            lock = self._agent_locks[agent_id] = asyncio.Lock()
+        return lock
     
     async def get_agent_state(self, agent_id: str) -> AgentState:
         """Get the state for an agent, creating it if it doesn't exist.
@@ -291,16 +516,39 @@ class AsyncAgentStateManager:
         Returns:
             Agent state
         """
-        async with self._lock:
-            if agent_id not in self.agent_states:
-                # Try to load from persistence
-                state = await self._load_state(agent_id)
-                if not state:
-                    # Create new state
-                    state = AgentState(agent_id=agent_id, agent_name=agent_id)
-                self.agent_states[agent_id] = state
-                
+        if agent_id in self.agent_states:
             return self.agent_states[agent_id]
+        async with self._get_agent_lock(agent_id):
+            return await self._ensure_state(agent_id)
+    
+    async def _ensure_state(self, agent_id: str) -> AgentState:
+        """Get or load an agent's state. The caller must hold the agent lock.
+        
+        Args:
+            agent_id: ID of the agent
+            
+        Returns:
+            Agent state
+        """
+        if agent_id not in self.agent_states:
+            # Try to load from persistence
+            state = await self._load_state(agent_id)
+            if not state:
+                # Create new state
+                state = AgentState(agent_id=agent_id, agent_name=agent_id)
+            self.agent_states[agent_id] = state
+            self._persisted_ops[agent_id] = len(state.operation_history)
+            self._reindex_owner(("private", agent_id))
+            
+        return self.agent_states[agent_id]
+    
+    def _state_path(self, agent_id: str) -> str:
+        """Get the path of an agent's compacted state file."""
+        return os.path.join(self.persistence_dir, f"{agent_id}.json")
+    
+    def _log_path(self, agent_id: str) -> str:
+        """Get the path of an agent's append-only change log."""
+        return os.path.join(self.persistence_dir, f"{agent_id}.log")
     
     async def _load_state(self, agent_id: str) -> Optional[AgentState]:
         """Load agent state from persistence.
@@ -313,21 +561,215 @@ class AsyncAgentStateManager:
         """
         if not self.persistence_dir:
             return None
-            
-        state_path = os.path.join(self.persistence_dir, f"{agent_id}.json")
-        if not os.path.exists(state_path):
-            return None
-            
+        
+        loop = asyncio.get_running_loop()
         try:
-            with open(state_path, 'r') as f:
-                state_dict = json.load(f)
-                return AgentState.parse_obj(state_dict)
+            return await loop.run_in_executor(None, self._read_state, agent_id)
         except Exception as e:
             logger.error(f"Error loading state for agent {agent_id}: {e}")
             return None
     
+    def _read_state(self, agent_id: str) -> Optional[AgentState]:
+        """Read the compacted state and replay the change log (blocking)."""
+        state_path = self._state_path(agent_id)
+        log_path = self._log_path(agent_id)
+        if not os.path.exists(state_path) and not os.path.exists(log_path):
+            return None
+        
+        if os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                state = AgentState.parse_obj(json.load(f))
+        else:
+            state = AgentState(agent_id=agent_id, agent_name=agent_id)
+        
+        records = 0
+        if os.path.exists(log_path):
+            with open(log_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final write; everything before it is intact
+                        logger.warning(f"Skipping corrupt state log record for agent {agent_id}")
+                        continue
+                    self._apply_record(state, record)
+                    records += 1
+        self._log_records[agent_id] = records
+        return state
+    
+    @staticmethod
+    def _apply_record(state: AgentState, record: Dict[str, Any]) -> None:
+        """Apply a change log record to an agent state."""
+        op = record.get("op")
+        if op == "set":
+            entry = AgentStateEntry.parse_obj(record["entry"])
+            state.untag_entry(record["key"])
+            state.entries[record["key"]] = entry
+            for tag in entry.tags:
+                state.tag_entry(record["key"], tag)
+        elif op == "delete":
+            state.untag_entry(record["key"])
+            state.entries.pop(record["key"], None)
+        elif op == "workflow":
+            state.workflow_data[record["workflow_id"]] = record["data"]
+        elif op == "operations":
+            # Records carry their start index so replaying them is idempotent
+            del state.operation_history[record["start"]:]
+            state.operation_history.extend(record["items"])
+        elif op == "meta":
+            state.agent_name = record["agent_name"]
+            state.version = record["version"]
+            state.last_updated = record["last_updated"]
+    
+    def _mark_dirty(self, agent_id: str, key: Optional[str] = None,
+                    deleted: bool = False, workflow_id: Optional[str] = None) -> None:
+        """Record a change to an agent's state that needs to be persisted."""
+        dirty = self._dirty.get(agent_id)
+        if dirty is None:
+            dirty = self._dirty[agent_id] = _DirtyAgentState()
+        if key is not None:
+            if deleted:
+                dirty.keys.discard(key)
+                dirty.deleted.add(key)
+            else:
+                dirty.deleted.discard(key)
+                dirty.keys.add(key)
+        if workflow_id is not None:
+            dirty.workflows.add(workflow_id)
+    
+    async def _persist_change(self, agent_id: str, _transaction_id: Optional[str] = None) -> None:
+        """Persist a change according to the durability mode. The caller must hold the agent lock."""
+        if self.durability == "immediate" and _transaction_id is None:
+            await self._flush_agent(agent_id)
+        elif self.durability == "write_behind":
+            self._schedule_flush()
+    
+    def _schedule_flush(self) -> None:
+        """Start the background flusher if it isn't running."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+    
+    async def _flush_loop(self) -> None:
+        """Periodically flush dirty agent states until nothing is dirty."""
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error in state flusher: {e}")
+    
+    async def flush(self, agent_id: Optional[str] = None) -> None:
+        """Persist all pending changes.
+        
+        Args:
+            agent_id: Optional agent to flush. If None, all agents are flushed.
+        """
+        agent_ids = [agent_id] if agent_id is not None else list(self._dirty)
+        for dirty_id in agent_ids:
+            if dirty_id in self._dirty:
+                async with self._get_agent_lock(dirty_id):
+                    await self._flush_agent(dirty_id)
+    
+    def flush_sync(self) -> None:
+        """Persist all pending changes without an event loop (e.g. at exit)."""
+        for agent_id in list(self._dirty):
+            batch = self._build_log_payload(agent_id)
+            if batch:
+                try:
+                    self._append_log(agent_id, batch[0])
+                except Exception as e:
+                    self._restore_dirty(agent_id, batch[1])
+                    logger.error(f"Error flushing state for agent {agent_id}: {e}")
+                else:
+                    self._commit_log_batch(agent_id, batch)
+    
+    def _build_log_payload(self, agent_id: str) -> Optional[Tuple[str, _DirtyAgentState, int, int]]:
+        """Take an agent's dirty set and encode it as change log records.
+        
+        The dirty set is detached so changes made while the records are being
+        written start a new one. The caller must call ``_commit_log_batch`` once
+        the records are written, or ``_restore_dirty`` if writing them fails.
+        
+        Returns:
+            (payload, detached dirty set, persisted operation count, record count),
+            or None if there is nothing to persist
+        """
+        dirty = self._dirty.pop(agent_id, None)
+        state = self.agent_states.get(agent_id)
+        if dirty is None or state is None or not self.persistence_dir:
+            return None
+        
+        records: List[Dict[str, Any]] = []
+        for key in dirty.keys:
+            if key in state.entries:
+                records.append({"op": "set", "key": key, "entry": state.entries[key].dict()})
+        for key in dirty.deleted:
+            records.append({"op": "delete", "key": key})
+        for workflow_id in dirty.workflows:
+            records.append({
+                "op": "workflow",
+                "workflow_id": workflow_id,
+                "data": state.workflow_data.get(workflow_id, {})
+            })
+        persisted_ops = self._persisted_ops.get(agent_id, 0)
+        if len(state.operation_history) != persisted_ops:
+            records.append({
+                "op": "operations",
+                "start": persisted_ops,
+                "items": state.operation_history[persisted_ops:]
+            })
+        records.append({
+            "op": "meta",
+            "agent_name": state.agent_name,
+            "version": state.version,
+            "last_updated": state.last_updated
+        })
+        
+        payload = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        return payload, dirty, len(state.operation_history), len(records)
+    
+    def _commit_log_batch(self, agent_id: str, batch: Tuple[str, _DirtyAgentState, int, int]) -> None:
+        """Record that a batch built by ``_build_log_payload`` was written."""
+        _, _, persisted_ops, record_count = batch
+        self._persisted_ops[agent_id] = persisted_ops
+        self._log_records[agent_id] = self._log_records.get(agent_id, 0) + record_count
+    
+    def _restore_dirty(self, agent_id: str, dirty: _DirtyAgentState) -> None:
+        """Put back a dirty set whose changes failed to persist, so the next flush retries them."""
+        newer = self._dirty.get(agent_id)
+        if newer is not None:
+            dirty.merge(newer)
+        self._dirty[agent_id] = dirty
+    
+    def _append_log(self, agent_id: str, payload: str) -> None:
+        """Append encoded records to an agent's change log (blocking)."""
+        with open(self._log_path(agent_id), 'a') as f:
+            f.write(payload)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    
+    async def _flush_agent(self, agent_id: str) -> None:
+        """Append an agent's pending changes in one write. The caller must hold the agent lock."""
+        if self._log_records.get(agent_id, 0) >= self.compact_threshold:
+            await self._save_state(agent_id)
+            return
+        
+        batch = self._build_log_payload(agent_id)
+        if not batch:
+            return
+        
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._append_log, agent_id, batch[0])
+        except Exception as e:
+            self._restore_dirty(agent_id, batch[1])
+            logger.error(f"Error saving state for agent {agent_id}: {e}")
+        else:
+            self._commit_log_batch(agent_id, batch)
+    
     async def _save_state(self, agent_id: str):
-        """Save agent state to persistence.
+        """Save the full agent state to persistence, compacting its change log.
         
         Args:
             agent_id: ID of the agent
@@ -338,13 +780,182 @@ class AsyncAgentStateManager:
         state = self.agent_states.get(agent_id)
         if not state:
             return
-            
-        state_path = os.path.join(self.persistence_dir, f"{agent_id}.json")
+        
+        # The snapshot supersedes any pending changes, unless it fails to write
+        dirty = self._dirty.pop(agent_id, None)
+        persisted_ops = len(state.operation_history)
+        # The tag index is rebuilt from the entries' tags on load
+        data = json.dumps(state.dict(exclude={"tags"}), default=str)
+        
+        loop = asyncio.get_running_loop()
         try:
-            with open(state_path, 'w') as f:
-                json.dump(state.dict(), f, default=str, indent=2)
+            await loop.run_in_executor(None, self._write_snapshot, agent_id, data)
         except Exception as e:
+            if dirty is not None:
+                self._restore_dirty(agent_id, dirty)
             logger.error(f"Error saving state for agent {agent_id}: {e}")
+        else:
+            self._persisted_ops[agent_id] = persisted_ops
+            self._log_records[agent_id] = 0
+    
+    def _write_snapshot(self, agent_id: str, data: str) -> None:
+        """Atomically replace an agent's compacted state and truncate its log (blocking)."""
+        state_path = self._state_path(agent_id)
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, state_path)
+        
+        log_path = self._log_path(agent_id)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+    
+    def _entries_for(self, owner: StateOwner) -> Dict[str, AgentStateEntry]:
+        """Get the entry store of an owner."""
+        kind, agent_id = owner
+        if kind == "shared":
+            return self.shared_state
+        if kind == "global":
+            return self.global_state
+        state = self.agent_states.get(agent_id)
+        return state.entries if state else {}
+    
+    def _put_entry(self, owner: StateOwner, key: str, entry: AgentStateEntry) -> None:
+        """Store and index an entry, enforcing the memory cap."""
+        if self.max_state_bytes is not None:
+            new_bytes = self.index.owner_bytes_after(owner, key, entry)
+            if new_bytes > self.max_state_bytes:
+                raise StateQuotaExceededError(
+                    f"Setting '{key}' would use {new_bytes} bytes of {owner[0]} state "
+                    f"{owner[1]}, above the {self.max_state_bytes} byte limit"
+                )
+        entries = self._entries_for(owner)
+        if owner[0] == "private" and key in entries:
+            # Drop the replaced entry's tags; the caller tags the new entry
+            self.agent_states[owner[1]].untag_entry(key)
+        entries[key] = entry
+        self.index.add(owner, key, entry)
+        if entry.ttl is not None:
+            self._schedule_sweep()
+    
+    def _remove_entry(self, owner: StateOwner, key: str) -> bool:
+        """Remove an entry and its index data. Private owners need the agent lock."""
+        entries = self._entries_for(owner)
+        if key not in entries:
+            return False
+        kind, agent_id = owner
+        if kind == "private":
+            self.agent_states[agent_id].untag_entry(key)
+        del entries[key]
+        self.index.remove(owner, key)
+        if kind == "private":
+            self._mark_dirty(agent_id, key=key, deleted=True)
+        return True
+    
+    def _reindex_owner(self, owner: StateOwner) -> None:
+        """Rebuild the index data of an owner from its entry store."""
+        self.index.clear_owner(owner)
+        for key, entry in self._entries_for(owner).items():
+            self.index.add(owner, key, entry)
+        if owner[0] == "private":
+            state = self.agent_states[owner[1]]
+            state.tags = {}
+            state.build_tag_index()
+        if self.index.expiry_heap:
+            self._schedule_sweep()
+    
+    def _schedule_sweep(self) -> None:
+        """Start the background expiry sweeper if it isn't running."""
+        if self._sweep_task is None or self._sweep_task.done():
+            self._sweep_task = asyncio.get_running_loop().create_task(self._sweep_loop())
+    
+    async def _sweep_loop(self) -> None:
+        """Sleep until the next expiry is due and sweep, until no TTL entries remain."""
+        while True:
+            next_expiry = self.index.next_expiry()
+            if next_expiry is None:
+                return
+            delay = next_expiry - _utc_seconds(datetime.utcnow())
+            await asyncio.sleep(min(max(delay, 0), self.sweep_interval))
+            try:
+                await self.sweep_expired()
+            except Exception as e:
+                logger.error(f"Error in state expiry sweeper: {e}")
+    
+    async def sweep_expired(self) -> int:
+        """Remove every entry whose TTL has elapsed.
+        
+        Returns:
+            Number of entries removed
+        """
+        now = _utc_seconds(datetime.utcnow())
+        
+        def is_due(owner: StateOwner, key: str) -> bool:
+            # The key may have been deleted or replaced by an entry with a later expiry
+            entry = self._entries_for(owner).get(key)
+            if entry is None or entry.ttl is None:
+                return False
+            return StateIndex.expires_at(entry) <= now
+        
+        removed = 0
+        for _, owner, key in self.index.pop_expired(now):
+            kind, agent_id = owner
+            if kind != "private":
+                if is_due(owner, key):
+                    removed += self._remove_entry(owner, key)
+                continue
+            async with self._get_agent_lock(agent_id):
+                if is_due(owner, key):
+                    removed += self._remove_entry(owner, key)
+                    await self._persist_change(agent_id)
+        if removed:
+            logger.debug(f"Expired {removed} state entries")
+        return removed
+    
+    def get_memory_usage(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get the bytes held by state entries.
+        
+        Sizes are the JSON-encoded size of each entry's key and value; operation
+        history and workflow data are not included.
+        
+        Args:
+            agent_id: Optional agent to report on. If None, every agent plus the
+                      shared and global stores are reported.
+            
+        Returns:
+            Dictionary with bytes and entry counts
+        """
+        def usage(owner: StateOwner) -> Dict[str, int]:
+            return {
+                "bytes": self.index.bytes.get(owner, 0),
+                "entries": len(self.index.sizes.get(owner, {}))
+            }
+        
+        if agent_id is not None:
+            return {"agent_id": agent_id, **usage(("private", agent_id)), "limit": self.max_state_bytes}
+        
+        return {
+            "agents": {owner[1]: usage(owner) for owner in self.index.sizes if owner[0] == "private"},
+            "shared": usage(SHARED_OWNER),
+            "global": usage(GLOBAL_OWNER),
+            "total_bytes": sum(self.index.bytes.values()),
+            "limit": self.max_state_bytes
+        }
+    
+    async def close(self) -> None:
+        """Stop background tasks and flush pending changes."""
+        for task in (self._sweep_task, self._flush_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self.flush()
+        _write_behind_managers.discard(self)
     
     async def set_state_entry(self, agent_id: str, key: str, value: Any, 
                          scope: str = "agent", visibility: str = "private",
@@ -364,47 +975,59 @@ class AsyncAgentStateManager:
             workflow_id: Optional workflow ID for workflow-scoped entries
             _transaction_id: Internal parameter for transaction tracking
         """
-        async with self._lock:
-            # Add type info to support better serialization/deserialization
-            type_info = type(value).__name__ if value is not None else "None"
-            
-            entry = AgentStateEntry(
-                key=key,
-                value=value,
-                timestamp=datetime.utcnow(),
-                scope=scope,
-                visibility=visibility,
-                ttl=ttl,
-                tags=tags or []
-            )
+        # Add type info to support better serialization/deserialization
+        type_info = type(value).__name__ if value is not None else "None"
+        
+        entry = AgentStateEntry(
+            key=key,
+            value=value,
+            timestamp=datetime.utcnow(),
+            scope=scope,
+            visibility=visibility,
+            ttl=ttl,
+            tags=tags or []
+        )
+        
+        # Determine where to store based on visibility
+        if visibility == "global":
+            self._put_entry(GLOBAL_OWNER, key, entry)
+            return
+        if visibility == "shared":
+            self._put_entry(SHARED_OWNER, key, entry)
+            return
+        
+        # Private to the agent
+        async with self._get_agent_lock(agent_id):
+            state = await self._ensure_state(agent_id)
+            
+            # Add to agent state
+            self._put_entry(("private", agent_id), key, entry)
+            state.last_updated = datetime.utcnow()
+            state.version += 1
+            
+            # Tag the entry if tags provided
+            if tags:
+                for tag in tags:
+                    state.tag_entry(key, tag)
+            
+            # Add to workflow context if workflow_id provided
+            if workflow_id and scope == "workflow":
+                if workflow_id not in state.workflow_data:
+                    state.workflow_data[workflow_id] = {}
+                state.workflow_data[workflow_id][key] = value
+                self._mark_dirty(agent_id, workflow_id=workflow_id)
             
-            # Determine where to store based on visibility
-            if visibility == "global":
-                self.global_state[key] = entry
-            elif visibility == "shared":
-                self.shared_state[key] = entry
-            else:
-                # Private to the agent
-                state = await self.get_agent_state(agent_id)
-                
-                # Add to agent state
-                state.entries[key] = entry
-                state.last_updated = datetime.utcnow()
-                state.version += 1
-                
-                # Tag the entry if tags provided
-                if tags:
-                    for tag in tags:
-                        state.tag_entry(key, tag)
-                
-                # Add to workflow context if workflow_id provided
-                if workflow_id and scope == "workflow":
-                    if workflow_id not in state.workflow_data:
-                        state.workflow_data[workflow_id] = {}
-                    state.workflow_data[workflow_id][key] = value
-                
-                # Save to persistence
-                await self._save_state(agent_id)
+            # Save to persistence
+            self._mark_dirty(agent_id, key=key)
+            await self._persist_change(agent_id, _transaction_id)
+    
+    @staticmethod
+    def _is_expired(entry: AgentStateEntry) -> bool:
+        """Check whether an entry has outlived its TTL."""
+        if entry.ttl is None:
+            return False
+        age = (datetime.utcnow() - entry.timestamp).total_seconds()
+        return age > entry.ttl
     
     async def get_state_entry(self, agent_id: str, key: str, default: Any = None,
                         workflow_id: Optional[str] = None) -> Any:
@@ -419,54 +1042,47 @@ class AsyncAgentStateManager:
         Returns:
             Entry value or default if not found
         """
-        async with self._lock:
+        async with self._get_agent_lock(agent_id):
+            state = await self._ensure_state(agent_id)
+            
             # Check if we want a workflow-specific entry
             if workflow_id:
-                state = await self.get_agent_state(agent_id)
                 if workflow_id in state.workflow_data and key in state.workflow_data[workflow_id]:
                     return state.workflow_data[workflow_id][key]
             
             # Check in order: agent state, shared state, global state
-            state = await self.get_agent_state(agent_id)
-            
             # First check agent's private state
             if key in state.entries:
                 entry = state.entries[key]
                 # Check TTL
-                if entry.ttl is not None:
-                    age = (datetime.utcnow() - entry.timestamp).total_seconds()
-                    if age > entry.ttl:
-                        # Entry expired
-                        del state.entries[key]
-                        await self._save_state(agent_id)
-                        return default
+                if self._is_expired(entry):
+                    # Entry expired
+                    self._remove_entry(("private", agent_id), key)
+                    await self._persist_change(agent_id)
+                    return default
                 return entry.deserialize_value()
-            
-            # Check shared state
-            if key in self.shared_state:
-                entry = self.shared_state[key]
-                # Check TTL
-                if entry.ttl is not None:
-                    age = (datetime.utcnow() - entry.timestamp).total_seconds()
-                    if age > entry.ttl:
-                        # Entry expired
-                        del self.shared_state[key]
-                        return default
-                return entry.deserialize_value()
-            
-            # Check global state
-            if key in self.global_state:
-                entry = self.global_state[key]
-                # Check TTL
-                if entry.ttl is not None:
-                    age = (datetime.utcnow() - entry.timestamp).total_seconds()
-                    if age > entry.ttl:
-                        # Entry expired
-                        del self.global_state[key]
-                        return default
-                return entry.deserialize_value()
-            
-            return default
+        
+        # Check shared state
+        if key in self.shared_state:
+            entry = self.shared_state[key]
+            # Check TTL
+            if self._is_expired(entry):
+                # Entry expired
+                self._remove_entry(SHARED_OWNER, key)
+                return default
+            return entry.deserialize_value()
+        
+        # Check global state
+        if key in self.global_state:
+            entry = self.global_state[key]
+            # Check TTL
+            if self._is_expired(entry):
+                # Entry expired
+                self._remove_entry(GLOBAL_OWNER, key)
+                return default
+            return entry.deserialize_value()
+        
+        return default
     
     async def delete_state_entry(self, agent_id: str, key: str, visibility: Optional[str] = None,
                            workflow_id: Optional[str] = None,
@@ -483,37 +1099,37 @@ class AsyncAgentStateManager:
         Returns:
             Whether the entry was deleted
         """
-        async with self._lock:
-            deleted = False
-            
-            # Handle workflow-specific deletion
-            if workflow_id:
-                state = await self.get_agent_state(agent_id)
-                if workflow_id in state.workflow_data and key in state.workflow_data[workflow_id]:
-                    del state.workflow_data[workflow_id][key]
-                    deleted = True
-                    await self._save_state(agent_id)
-            
-            # Check based on visibility
-            if visibility in [None, "private"]:
-                state = await self.get_agent_state(agent_id)
-                if key in state.entries:
-                    del state.entries[key]
+        deleted = False
+        
+        if workflow_id or visibility in [None, "private"]:
+            async with self._get_agent_lock(agent_id):
+                state = await self._ensure_state(agent_id)
+                changed = False
+                
+                # Handle workflow-specific deletion
+                if workflow_id:
+                    if workflow_id in state.workflow_data and key in state.workflow_data[workflow_id]:
+                        del state.workflow_data[workflow_id][key]
+                        self._mark_dirty(agent_id, workflow_id=workflow_id)
+                        deleted = changed = True
+                
+                # Check based on visibility
+                if visibility in [None, "private"] and self._remove_entry(("private", agent_id), key):
                     state.last_updated = datetime.utcnow()
                     state.version += 1
-                    deleted = True
-                    # Save to persistence
-                    await self._save_state(agent_id)
-            
-            if visibility in [None, "shared"] and key in self.shared_state:
-                del self.shared_state[key]
-                deleted = True
-            
-            if visibility in [None, "global"] and key in self.global_state:
-                del self.global_state[key]
-                deleted = True
+                    deleted = changed = True
                 
-            return deleted
+                # Save to persistence
+                if changed:
+                    await self._persist_change(agent_id, _transaction_id)
+        
+        if visibility in [None, "shared"] and self._remove_entry(SHARED_OWNER, key):
+            deleted = True
+        
+        if visibility in [None, "global"] and self._remove_entry(GLOBAL_OWNER, key):
+            deleted = True
+            
+        return deleted
     
     async def register_operation(self, agent_id: str, operation: str, metadata: Optional[Dict[str, Any]] = None):
         """Register an operation in the agent's history.
@@ -523,12 +1139,13 @@ class AsyncAgentStateManager:
             operation: Operation name
             metadata: Additional metadata about the operation
         """
-        async with self._lock:
-            state = await self.get_agent_state(agent_id)
+        async with self._get_agent_lock(agent_id):
+            state = await self._ensure_state(agent_id)
             state.add_operation(operation, metadata)
             
             # Save to persistence
-            await self._save_state(agent_id)
+            self._mark_dirty(agent_id)
+            await self._persist_change(agent_id)
     
     async def get_operations_history(self, agent_id: str) -> List[Dict[str, Any]]:
         """Get the operation history for an agent.
@@ -539,9 +1156,8 @@ class AsyncAgentStateManager:
         Returns:
             List of operation details
         """
-        async with self._lock:
-            state = await self.get_agent_state(agent_id)
-            return state.operation_history.copy()
+        state = await self.get_agent_state(agent_id)
+        return state.operation_history.copy()
     
     async def get_all_entries(self, agent_id: str, visibility: Optional[str] = None,
                         scope: Optional[str] = None, tags: Optional[List[str]] = None,
@@ -558,45 +1174,48 @@ class AsyncAgentStateManager:
         Returns:
             Dictionary of key-value pairs
         """
-        async with self._lock:
-            # Check if we want workflow-specific entries
-            if workflow_id:
-                state = await self.get_agent_state(agent_id)
-                if workflow_id in state.workflow_data:
-                    return state.workflow_data[workflow_id].copy()
-                return {}
-            
-            result = {}
-            
-            def add_matching_entries(entries):
-                for key, entry in entries.items():
-                    # Check filters
-                    if scope and entry.scope != scope:
-                        continue
-                    if tags and not all(tag in entry.tags for tag in tags):
-                        continue
-                    
-                    # Check TTL
-                    if entry.ttl is not None:
-                        age = (datetime.utcnow() - entry.timestamp).total_seconds()
-                        if age > entry.ttl:
-                            # Entry expired, skip
-                            continue
-                    
-                    result[key] = entry.deserialize_value()
-            
-            # Add entries from appropriate sources based on visibility
-            if visibility in [None, "private"]:
-                state = await self.get_agent_state(agent_id)
-                add_matching_entries(state.entries)
-            
-            if visibility in [None, "shared"]:
-                add_matching_entries(self.shared_state)
+        state = await self.get_agent_state(agent_id)
+        
+        # Check if we want workflow-specific entries
+        if workflow_id:
+            if workflow_id in state.workflow_data:
+                return state.workflow_data[workflow_id].copy()
+            return {}
+        
+        result = {}
+        
+        def add_matching_entries(owner):
+            entries = self._entries_for(owner)
+            # Narrow candidates through the tag index instead of scanning
+            if tags:
+                keys = self.index.keys_with_tags(owner, tags)
+                candidates = ((key, entries[key]) for key in keys if key in entries)
+            else:
+                candidates = entries.items()
             
-            if visibility in [None, "global"]:
-                add_matching_entries(self.global_state)
+            for key, entry in candidates:
+                # Check filters
+                if scope and entry.scope != scope:
+                    continue
+                
+                # Check TTL
+                if self._is_expired(entry):
+                    # Entry expired, skip
+                    continue
                 
-            return result
+                result[key] = entry.deserialize_value()
+        
+        # Add entries from appropriate sources based on visibility
+        if visibility in [None, "private"]:
+            add_matching_entries(("private", agent_id))
+        
+        if visibility in [None, "shared"]:
+            add_matching_entries(SHARED_OWNER)
+        
+        if visibility in [None, "global"]:
+            add_matching_entries(GLOBAL_OWNER)
+            
+        return result
     
     async def get_entries_by_tag(self, agent_id: str, tag: str) -> Dict[str, Any]:
         """Get all entries with a specific tag.
@@ -608,9 +1227,7 @@ class AsyncAgentStateManager:
         Returns:
             Dictionary of key-value pairs
         """
-        async with self._lock:
-            state = await self.get_agent_state(agent_id)
-            return state.get_entries_by_tag(tag)
+        return await self.get_all_entries(agent_id, visibility="private", tags=[tag])
     
     async def clear_agent_state(self, agent_id: str):
         """Clear all state for an agent.
@@ -618,11 +1235,12 @@ class AsyncAgentStateManager:
         Args:
             agent_id: ID of the agent
         """
-        async with self._lock:
+        async with self._get_agent_lock(agent_id):
             if agent_id in self.agent_states:
                 # Create a fresh state
                 agent_name = self.agent_states[agent_id].agent_name
                 self.agent_states[agent_id] = AgentState(agent_id=agent_id, agent_name=agent_name)
+                self.index.clear_owner(("private", agent_id))
                 
                 # Save to persistence
                 await self._save_state(agent_id)
@@ -635,11 +1253,15 @@ class AsyncAgentStateManager:
             self.global_state.clear()
             self.workflow_states.clear()
             self.context_snapshots.clear()
+            self._dirty.clear()
+            self._persisted_ops.clear()
+            self._log_records.clear()
+            self.index = StateIndex()
             
             # Clear persistence files
             if self.persistence_dir:
                 for file in os.listdir(self.persistence_dir):
-                    if file.endswith('.json'):
+                    if file.endswith('.json') or file.endswith('.log'):
                         os.remove(os.path.join(self.persistence_dir, file))
     
     # Workflow state management
@@ -697,21 +1319,25 @@ class AsyncAgentStateManager:
             Workflow state or None if not found
         """
         async with self._lock:
-            if workflow_id not in self.workflow_states:
-                # Try to load from persistence
-                workflow_path = os.path.join(self.persistence_dir, "workflows", f"{workflow_id}.json")
-                if os.path.exists(workflow_path):
-                    try:
-                        with open(workflow_path, 'r') as f:
-                            workflow_dict = json.load(f)
-                            self.workflow_states[workflow_id] = WorkflowState.parse_obj(workflow_dict)
-                    except Exception as e:
-                        logger.error(f"Error loading workflow state {workflow_id}: {e}")
-                        return None
-                else:
+            return self._load_workflow_state(workflow_id)
+    
+    def _load_workflow_state(self, workflow_id: str) -> Optional[WorkflowState]:
+        """Get or load a workflow state. The caller must hold the manager lock."""
+        if workflow_id not in self.workflow_states:
+            # Try to load from persistence
+            workflow_path = os.path.join(self.persistence_dir, "workflows", f"{workflow_id}.json")
+            if os.path.exists(workflow_path):
+                try:
+                    with open(workflow_path, 'r') as f:
+                        workflow_dict = json.load(f)
+                        self.workflow_states[workflow_id] = WorkflowState.parse_obj(workflow_dict)
+                except Exception as e:
+                    logger.error(f"Error loading workflow state {workflow_id}: {e}")
                     return None
-            
-            return self.workflow_states[workflow_id]
+            else:
+                return None
+        
+        return self.workflow_states[workflow_id]
     
     async def update_workflow_state(self, workflow_id: str, 
                              status: Optional[str] = None,
@@ -729,7 +1355,7 @@ class AsyncAgentStateManager:
             Updated workflow state or None if not found
         """
         async with self._lock:
-            workflow_state = await self.get_workflow_state(workflow_id)
+            workflow_state = self._load_workflow_state(workflow_id)
             if not workflow_state:
                 return None
             
@@ -823,21 +1449,25 @@ class AsyncAgentStateManager:
             Context snapshot or None if not found
         """
         async with self._lock:
-            if snapshot_id not in self.context_snapshots:
-                # Try to load from persistence
-                snapshot_path = os.path.join(self.persistence_dir, "snapshots", f"{snapshot_id}.json")
-                if os.path.exists(snapshot_path):
-                    try:
-                        with open(snapshot_path, 'r') as f:
-                            snapshot_dict = json.load(f)
-                            self.context_snapshots[snapshot_id] = ContextSnapshot.parse_obj(snapshot_dict)
-                    except Exception as e:
-                        logger.error(f"Error loading context snapshot {snapshot_id}: {e}")
-                        return None
-                else:
+            return self._load_context_snapshot(snapshot_id)
+    
+    def _load_context_snapshot(self, snapshot_id: str) -> Optional[ContextSnapshot]:
+        """Get or load a context snapshot. The caller must hold the manager lock."""
+        if snapshot_id not in self.context_snapshots:
+            # Try to load from persistence
+            snapshot_path = os.path.join(self.persistence_dir, "snapshots", f"{snapshot_id}.json")
+            if os.path.exists(snapshot_path):
+                try:
+                    with open(snapshot_path, 'r') as f:
+                        snapshot_dict = json.load(f)
+                        self.context_snapshots[snapshot_id] = ContextSnapshot.parse_obj(snapshot_dict)
+                except Exception as e:
+                    logger.error(f"Error loading context snapshot {snapshot_id}: {e}")
                     return None
-            
-            return self.context_snapshots[snapshot_id]
+            else:
+                return None
+        
+        return self.context_snapshots[snapshot_id]
     
     async def restore_context_snapshot(self, agent_id: str, snapshot_id: str,
                                 scope: str = "agent") -> bool:
@@ -852,33 +1482,39 @@ class AsyncAgentStateManager:
             Whether the restore was successful
         """
         async with self._lock:
-            snapshot = await self.get_context_snapshot(snapshot_id)
+            snapshot = self._load_context_snapshot(snapshot_id)
             if not snapshot:
                 return False
             
             # Restore entries based on scope
             if scope == "agent":
-                state = await self.get_agent_state(agent_id)
-                state.entries = {k: v for k, v in snapshot.entries.items() if v.visibility == "private"}
-                await self._save_state(agent_id)
+                async with self._get_agent_lock(agent_id):
+                    state = await self._ensure_state(agent_id)
+                    state.entries = {k: v for k, v in snapshot.entries.items() if v.visibility == "private"}
+                    self._reindex_owner(("private", agent_id))
+                    await self._save_state(agent_id)
             elif scope == "shared":
                 self.shared_state = {k: v for k, v in snapshot.entries.items() if v.visibility == "shared"}
+                self._reindex_owner(SHARED_OWNER)
             elif scope == "global":
                 self.global_state = {k: v for k, v in snapshot.entries.items() if v.visibility == "global"}
+                self._reindex_owner(GLOBAL_OWNER)
             elif scope == "all":
-                state = await self.get_agent_state(agent_id)
-                
                 # Split entries by visibility
                 private_entries = {k: v for k, v in snapshot.entries.items() if v.visibility == "private"}
                 shared_entries = {k: v for k, v in snapshot.entries.items() if v.visibility == "shared"}
                 global_entries = {k: v for k, v in snapshot.entries.items() if v.visibility == "global"}
                 
                 # Restore
-                state.entries = private_entries
                 self.shared_state = shared_entries
                 self.global_state = global_entries
-                
-                await self._save_state(agent_id)
+                self._reindex_owner(SHARED_OWNER)
+                self._reindex_owner(GLOBAL_OWNER)
+                async with self._get_agent_lock(agent_id):
+                    state = await self._ensure_state(agent_id)
+                    state.entries = private_entries
+                    self._reindex_owner(("private", agent_id))
+                    await self._save_state(agent_id)
             
             return True
     
@@ -922,6 +1558,9 @@ class AsyncAgentStateManager:
             transaction = self.transaction_logs[transaction_id]
             transaction.mark_complete()
             
+            # Changes made inside the transaction are durable once committed
+            await self.flush(transaction.agent_id)
+            
             # Save transaction log
             await self._save_transaction_log(transaction_id)
             
@@ -944,13 +1583,20 @@ class AsyncAgentStateManager:
             
             # Perform rollback operations in reverse order
             for op in reversed(transaction.operations):
-                if op["operation"] == "set":
+                if op["operation"] == "set" and op["previous_value"] is None:
+                    # The key didn't exist before the transaction
+                    await self.delete_state_entry(
+                        transaction.agent_id,
+                        op["key"],
+                        _transaction_id=transaction_id
+                    )
+                elif op["operation"] == "set":
                     # Restore previous value
                     await self.set_state_entry(
                         transaction.agent_id,
                         op["key"],
                         op["previous_value"],
-                        _transaction_id=None
+                        _transaction_id=transaction_id
                     )
                 elif op["operation"] == "delete" and op["previous_value"] is not None:
                     # Restore deleted value
@@ -958,10 +1604,11 @@ class AsyncAgentStateManager:
                         transaction.agent_id,
                         op["key"],
                         op["previous_value"],
-                        _transaction_id=None
+                        _transaction_id=transaction_id
                     )
             
             transaction.mark_rolled_back()
+            await self.flush(transaction.agent_id)
             
             # Save transaction log
             await self._save_transaction_log(transaction_id)
@@ -989,5 +1636,5 @@ class AsyncAgentStateManager:
             logger.error(f"Error saving transaction log {transaction_id}: {e}")
 
 
-# Global instance
-async_agent_state_manager = AsyncAgentStateManager()
\ No newline at end of file
+# Global instance; coalesces writes from busy agents (use flush() or transactions for durability)
+async_agent_state_manager = AsyncAgentStateManager(durability="write_behind")
\ No newline at end of file
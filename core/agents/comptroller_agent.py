@@ -9,6 +9,7 @@ import json
 from pathlib import Path
 from datetime import datetime, timedelta
 
+from core.cost_meter import budget_variance, summarize_costs
 from .journey_agent import JourneyAgent
 
 class Comptroller(JourneyAgent):
@@ -75,44 +76,39 @@ class Comptroller(JourneyAgent):
         Returns:
             Cost analysis
         """
+        # Totals, breakdown and budget variance are plain arithmetic
+        total_cost, breakdown = summarize_costs(usage_data)
         analysis = {
             "timestamp": asyncio.get_event_loop().time(),
             "period": period,
-            "total_cost": 0,
-            "breakdown": {},
+            "total_cost": total_cost,
+            "breakdown": breakdown,
+            "budget_variance": budget_variance(total_cost, breakdown, self.budget, period),
             "trends": [],
             "anomalies": []
         }
         
-        # Create analysis prompt
+        # Only the judgement calls (trends and anomalies) are left to the LLM
         usage_text = json.dumps(usage_data, indent=2)
-        budget_text = json.dumps(self.budget, indent=2)
+        figures_text = json.dumps({
+            "total_cost": total_cost,
+            "breakdown": breakdown,
+            "budget_variance": analysis["budget_variance"]
+        }, indent=2)
         
         analysis_prompt = f"""
         Analyze the following {period} cost and usage data:
         {usage_text}
         
-        Budget information:
-        {budget_text}
+        Computed totals and budget variance (already exact, do not recalculate):
+        {figures_text}
         
         Please provide:
-        1. Total cost calculation
-        2. Cost breakdown by service/resource
-        3. Cost trends (increasing, decreasing, stable)
-        4. Anomalies or unexpected costs
-        5. Budget variance analysis
+        1. Cost trends (increasing, decreasing, stable)
+        2. Anomalies or unexpected costs
         
         Format your response as JSON with the following structure:
         {{
-            "total_cost": 8245.67,
-            "breakdown": {{
-                "compute": 3621.45,
-                "storage": 1825.30,
-                "network": 952.10,
-                "licenses": 1250.00,
-                "support": 416.67,
-                "misc": 180.15
-            }},
             "trends": [
                 {{
                     "category": "compute",
@@ -128,26 +124,7 @@ class Comptroller(JourneyAgent):
                     "estimated_cost": 35.40,
                     "recommendation": "Investigate large storage increase, may be log files"
                 }}
-            ],
-            "budget_variance": {{
-                "total": {{
-                    "budget": 8333.33,
-                    "actual": 8245.67,
-                    "variance": -87.66,
-                    "variance_percent": -1.05,
-                    "status": "under budget"
-                }},
-                "categories": [
-                    {{
-                        "category": "compute",
-                        "budget": 3333.33,
-                        "actual": 3621.45,
-                        "variance": 288.12,
-                        "variance_percent": 8.64,
-                        "status": "over budget"
-                    }}
-                ]
-            }}
+            ]
         }}
         """
         
@@ -158,11 +135,8 @@ class Comptroller(JourneyAgent):
         if isinstance(analysis_result, dict) and "output" in analysis_result:
             try:
                 parsed_result = json.loads(analysis_result["output"])
-                analysis["total_cost"] = parsed_result.get("total_cost", 0)
-                analysis["breakdown"] = parsed_result.get("breakdown", {})
                 analysis["trends"] = parsed_result.get("trends", [])
                 analysis["anomalies"] = parsed_result.get("anomalies", [])
-                analysis["budget_variance"] = parsed_result.get("budget_variance", {})
             except json.JSONDecodeError:
                 logging.error("Failed to parse cost analysis result")
                 analysis["error"] = "Failed to parse result"
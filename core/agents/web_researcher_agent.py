@@ -9,7 +9,8 @@ from pathlib import Path
 import json
 
 from .journey_agent import JourneyAgent
-from ..tools.web_search import web_search, sync_web_search
+from ..tools.web_search import web_search, sync_web_search, get_search_service
+from ..tools.research_store import ResearchStore, open_research_store
 
 class WebResearcher(JourneyAgent):
     """
@@ -35,7 +36,8 @@ class WebResearcher(JourneyAgent):
             tools: List of tool names
             playbook_path: Path to the playbook file
             research_sources: Optional list of preferred research sources
-            knowledge_base_path: Optional path to knowledge base file
+            knowledge_base_path: Optional path to the knowledge base; a legacy .json
+                knowledge base is migrated to a sibling .db file
             max_sources_per_query: Maximum number of sources to use per query
         """
         super().__init__(name, llm, tools, playbook_path)
@@ -52,27 +54,27 @@ class WebResearcher(JourneyAgent):
         if "web_search" not in tools:
             logging.warning("WebResearcher agent should have 'web_search' tool")
     
-    def _load_knowledge_base(self) -> Dict[str, Any]:
-        """Load the knowledge base from file if it exists.
+    def _load_knowledge_base(self) -> ResearchStore:
+        """Open the knowledge base store, falling back to an in-memory one.
         
         Returns:
-            Knowledge base dictionary
+            Knowledge base store
         """
         try:
-            kb_path = Path(self.knowledge_base_path)
-            if kb_path.exists():
-                with open(kb_path, 'r') as f:
-                    return json.load(f)
-            return {"topics": {}, "sources": {}, "citations": []}
+            return open_research_store(self.knowledge_base_path)
         except Exception as e:
             logging.warning(f"Error loading knowledge base: {e}")
-            return {"topics": {}, "sources": {}, "citations": []}
+            return ResearchStore(":memory:")
     
-    def _save_knowledge_base(self) -> None:
-        """Save the knowledge base to file."""
+    def _save_knowledge_base(self, query: str, findings: Dict[str, Any]) -> None:
+        """Upsert one topic with its sources and citation into the knowledge base.
+        
+        Args:
+            query: Research query
+            findings: Findings for the query
+        """
         try:
-            with open(self.knowledge_base_path, 'w') as f:
-                json.dump(self.knowledge_base, f, indent=2)
+            self.knowledge_base.upsert_topic(query, findings)
         except Exception as e:
             logging.error(f"Error saving knowledge base: {e}")
     
@@ -94,11 +96,12 @@ class WebResearcher(JourneyAgent):
             "recommendations": []
         }
         
-        # Check if this query has been researched before
-        if query in self.knowledge_base["topics"]:
+        # Check if this query (or a near-duplicate of it) has been researched before
+        existing = self.knowledge_base.find_topic(query)
+        if existing is not None:
             logging.info(f"Found existing research for '{query}'")
-            findings["from_knowledge_base"] = True
-            return self.knowledge_base["topics"][query]
+            existing["from_knowledge_base"] = True
+            return existing
         
         # Perform initial search
         try:
@@ -170,15 +173,20 @@ class WebResearcher(JourneyAgent):
             
             # If we need deeper research and have multiple sources
             if depth > 1 and len(findings["sources"]) > 1:
-                # Follow-up research on key points
-                for point in findings["information"][:3]:  # Limit to top 3 points for efficiency
-                    follow_up_query = f"{query} {point}"
-                    follow_up_results = await web_search(follow_up_query, 2)
-                    
+                # Follow-up research on key points, searched concurrently
+                follow_up_queries = [
+                    f"{query} {point}"
+                    for point in findings["information"][:3]  # Limit to top 3 points for efficiency
+                ]
+                follow_up_batches = await get_search_service().search_many(follow_up_queries, 2)
+                seen_urls = {src["url"] for src in findings["sources"]}
+                
+                for follow_up_query, follow_up_results in zip(follow_up_queries, follow_up_batches):
                     # Add new sources
                     for result in follow_up_results:
                         # Check if this source is already included
-                        if not any(src["url"] == result.url for src in findings["sources"]):
+                        if result.url not in seen_urls:
+                            seen_urls.add(result.url)
                             findings["sources"].append({
                                 "title": result.title,
                                 "url": result.url,
@@ -186,29 +194,8 @@ class WebResearcher(JourneyAgent):
                                 "follow_up_query": follow_up_query
                             })
             
-            # Update knowledge base
-            self.knowledge_base["topics"][query] = findings
-            
-            # Add sources to knowledge base
-            for source in findings["sources"]:
-                if source["url"] not in self.knowledge_base["sources"]:
-                    self.knowledge_base["sources"][source["url"]] = {
-                        "title": source["title"],
-                        "used_for": [query]
-                    }
-                else:
-                    if query not in self.knowledge_base["sources"][source["url"]]["used_for"]:
-                        self.knowledge_base["sources"][source["url"]]["used_for"].append(query)
-            
-            # Add citation
-            self.knowledge_base["citations"].append({
-                "query": query,
-                "timestamp": asyncio.get_event_loop().time(),
-                "source_count": len(findings["sources"])
-            })
-            
-            # Save updated knowledge base
-            self._save_knowledge_base()
+            # Update knowledge base (topic, sources and citation in one transaction)
+            self._save_knowledge_base(query, findings)
             
             return findings
             
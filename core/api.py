@@ -22,6 +22,8 @@ from core.agents.super_agent import SuperAgent, TaskRequest
 from core.agents.inspector_agent import InspectorAgent
 from core.agents.journey_agent import JourneyAgent, JourneyStep
 from core.tools.secrets_manager import secrets
+from core.connection_manager import ConnectionManager
+from core.backplane import get_backplane
 
 # Import standardized response and request schemas
 from core.schemas.responses import (
@@ -41,7 +43,7 @@ from core.schemas.requests import (
 )
 
 # Import standardized API routers
-from core.api_routes import agents_router, playbooks_router, tools_router
+from core.api_routes import agents_router, playbooks_router, tools_router, costs_router
 
 # Configure logging
 logging.basicConfig(
@@ -76,6 +78,7 @@ add_exception_handlers(app)
 app.include_router(agents_router)
 app.include_router(playbooks_router)
 app.include_router(tools_router)
+app.include_router(costs_router)
 
 # Initialize systems
 CONFIG_DIR = os.getenv("CONFIG_DIR", "core/configs")
@@ -89,27 +92,7 @@ super_agent = SuperAgent()
 inspector_agent = InspectorAgent()
 journey_agent = JourneyAgent()
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        if client_id not in self.active_connections:
-            self.active_connections[client_id] = []
-        self.active_connections[client_id].append(websocket)
-
-    async def disconnect(self, websocket: WebSocket, client_id: str):
-        self.active_connections[client_id].remove(websocket)
-        if not self.active_connections[client_id]:
-            del self.active_connections[client_id]
-
-    async def broadcast(self, message: Dict[str, Any], client_id: str):
-        if client_id in self.active_connections:
-            for connection in self.active_connections[client_id]:
-                await connection.send_json(message)
-
+# WebSocket connection manager (bounded per-connection send queues)
 manager = ConnectionManager()
 
 # OAuth2 configuration
@@ -146,6 +129,10 @@ async def startup_event():
         bayesian_tools.set_bayesian_engine(bayesian_engine)
         logging.info("Registered Bayesian engine with tools")
         
+        # Route WebSocket broadcasts between API workers
+        await manager.attach_backplane(get_backplane())
+        logging.info("Attached WebSocket manager to backplane")
+        
     except Exception as e:
         logging.error(f"Error initializing system: {e}")
         raise
@@ -431,6 +418,17 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     finally:
         await manager.disconnect(websocket, client_id)
 
+@app.get("/ws/stats", tags=["System"], response_model=Dict[str, Any])
+async def websocket_stats() -> JSONResponse:
+    """Get per-connection WebSocket queue depth and send latency."""
+    return JSONResponse(
+        content=create_response(
+            success=True,
+            message="WebSocket connection statistics",
+            data=manager.get_stats()
+        )
+    )
+
 async def execute_workflow_and_log(run_id: str, playbook_name: str, input_data: Dict[str, Any]):
     """Execute a workflow and log the results"""
     try:
@@ -655,7 +653,8 @@ async def shutdown_event():
     """Cleanup resources on shutdown."""
     try:
         logger.info("Cleaning up API resources...")
-        # Cleanup any resources here
+        await manager.close_all()
+        await get_backplane().close()
     except Exception as e:
         logger.error(f"Shutdown cleanup failed: {str(e)}")
         raise
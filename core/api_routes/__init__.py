@@ -3,5 +3,6 @@
 from core.api_routes.agents import router as agents_router
 from core.api_routes.playbooks import router as playbooks_router
 from core.api_routes.tools import router as tools_router
+from core.api_routes.costs import router as costs_router
 
-__all__ = ["agents_router", "playbooks_router", "tools_router"]
\ No newline at end of file
+__all__ = ["agents_router", "playbooks_router", "tools_router", "costs_router"]
\ No newline at end of file
@@ -6,10 +6,11 @@ including creation, configuration, status management, and task assignment.
 """
 
 import os
+import asyncio
 import logging
 import json
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
 from datetime import datetime
 import time
@@ -20,6 +21,7 @@ from core.schemas.requests import AgentCreateRequest, Project, AgentType
 from core.agents.agent_definitions import get_agent, get_agents_by_type, get_agents_by_capability
 from core.agents.agent_factory import AgentFactory
 from core.agents.agent_state import agent_state_manager
+from core.shared_registry import SharedRegistry
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -30,9 +32,10 @@ router = APIRouter(prefix="/api/agents", tags=["agents"])
 # Configuration directory
 CONFIG_DIR = os.getenv("CONFIG_DIR", "core/configs")
 
-# In-memory agent registry
-# In production, this should be replaced with a database
-agent_registry: Dict[str, Dict[str, Any]] = {}
+# Agent and agent task registries, shared by all API workers
+# Agents are long-lived, so none of their statuses lets the in-memory store expire them
+agent_registry = SharedRegistry("agent_registry", index_fields={"kind": "type"}, terminal_statuses=())
+agent_tasks = SharedRegistry("agent_tasks", index_fields={"owner": "agent_id"})
 
 class AgentValidator:
     """Dependency for agent validation operations."""
@@ -226,7 +229,7 @@ async def create_agent(
         agent_id = f"agent_{uuid.uuid4().hex[:8]}_{int(time.time())}"
         
         # Register agent in registry
-        agent_registry[agent_id] = {
+        await agent_registry.aset(agent_id, {
             "id": agent_id,
             "name": request.name,
             "type": request.type,
@@ -236,13 +239,13 @@ async def create_agent(
             "status": "created",
             "created_at": datetime.utcnow().isoformat(),
             "metadata": request.metadata
-        }
+        })
         
         # Initialize agent in background
         background_tasks.add_task(
             _initialize_agent_background,
             agent_id=agent_id,
-            agent_data=agent_registry[agent_id]
+            agent_data=await agent_registry.aget(agent_id)
         )
         
         return JSONResponse(
@@ -274,44 +277,33 @@ async def create_agent(
 @router.get("/list", response_model=Dict[str, Any])
 async def list_agents(
     type: Optional[AgentType] = None,
-    status: Optional[str] = None,
+    agent_status: Optional[str] = Query(None, alias="status"),
     page: int = 1,
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = None
 ) -> JSONResponse:
     """List registered agents with optional filtering.
     
     Args:
         type: Filter by agent type
-        status: Filter by agent status
-        page: Page number for pagination
+        agent_status: Filter by agent status
+        page: Page number for pagination (ignored when a cursor is given)
         limit: Number of items per page
+        cursor: Cursor from the previous page's metadata (keyset pagination)
         
     Returns:
-        List of agents
+        List of agents, newest first
     """
     try:
-        # Filter agents
-        filtered_agents = agent_registry.values()
-        
-        if type:
-            filtered_agents = [a for a in filtered_agents if a["type"] == type]
-            
-        if status:
-            filtered_agents = [a for a in filtered_agents if a["status"] == status]
-            
-        # Sort by creation time (newest first)
-        sorted_agents = sorted(
-            filtered_agents,
-            key=lambda a: a.get("created_at", ""),
-            reverse=True
+        # Filtered, newest-first page straight from the registry index
+        paginated_agents, next_cursor, total_count = await agent_registry.apage_with_count(
+            limit=limit,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            kind=type,
+            status=agent_status
         )
         
-        # Paginate results
-        total_count = len(sorted_agents)
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_agents = sorted_agents[start_idx:end_idx]
-        
         return JSONResponse(
             content=paginated_response(
                 success=True,
@@ -319,10 +311,20 @@ async def list_agents(
                 items=paginated_agents,
                 total_count=total_count,
                 page=page,
-                page_size=limit
+                page_size=limit,
+                next_cursor=next_cursor,
+                cursor=cursor
             )
         )
         
+    except ValueError as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=error_response(
+                message=str(e),
+                code="INVALID_CURSOR"
+            )
+        )
     except Exception as e:
         logger.error(f"Error listing agents: {str(e)}")
         return JSONResponse(
@@ -346,7 +348,7 @@ async def get_agent(agent_id: str) -> JSONResponse:
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -360,7 +362,7 @@ async def get_agent(agent_id: str) -> JSONResponse:
             content=create_response(
                 success=True,
                 message="Agent found",
-                data=agent_registry[agent_id]
+                data=await agent_registry.aget(agent_id)
             )
         )
         
@@ -393,7 +395,7 @@ async def update_agent(
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -402,7 +404,7 @@ async def update_agent(
                 )
             )
             
-        agent_data = agent_registry[agent_id]
+        agent_data = await agent_registry.aget(agent_id)
         
         # Check if agent is in a state that allows updates
         if agent_data["status"] not in ["created", "ready", "idle", "error"]:
@@ -456,6 +458,7 @@ async def update_agent(
                 
         # Update last modified timestamp
         agent_data["updated_at"] = datetime.utcnow().isoformat()
+        await agent_registry.asave(agent_id)
         
         return JSONResponse(
             content=create_response(
@@ -492,7 +495,7 @@ async def delete_agent(
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -501,7 +504,7 @@ async def delete_agent(
                 )
             )
             
-        agent_data = agent_registry[agent_id]
+        agent_data = await agent_registry.aget(agent_id)
         
         # Check if agent is in a state that allows deletion
         if agent_data["status"] not in ["created", "ready", "idle", "error"]:
@@ -520,7 +523,7 @@ async def delete_agent(
         )
         
         # Mark as deleting
-        agent_data["status"] = "deleting"
+        await agent_registry.apatch(agent_id, status="deleting")
         
         return JSONResponse(
             content=create_response(
@@ -560,7 +563,7 @@ async def start_agent(
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -569,7 +572,7 @@ async def start_agent(
                 )
             )
             
-        agent_data = agent_registry[agent_id]
+        agent_data = await agent_registry.aget(agent_id)
         
         # Check if agent is in a state that allows starting
         if agent_data["status"] not in ["ready", "idle", "stopped"]:
@@ -588,7 +591,7 @@ async def start_agent(
         )
         
         # Mark as starting
-        agent_data["status"] = "starting"
+        await agent_registry.apatch(agent_id, status="starting")
         
         return JSONResponse(
             content=create_response(
@@ -628,7 +631,7 @@ async def stop_agent(
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -637,7 +640,7 @@ async def stop_agent(
                 )
             )
             
-        agent_data = agent_registry[agent_id]
+        agent_data = await agent_registry.aget(agent_id)
         
         # Check if agent is in a state that allows stopping
         if agent_data["status"] not in ["running", "idle"]:
@@ -656,7 +659,7 @@ async def stop_agent(
         )
         
         # Mark as stopping
-        agent_data["status"] = "stopping"
+        await agent_registry.apatch(agent_id, status="stopping")
         
         return JSONResponse(
             content=create_response(
@@ -698,7 +701,7 @@ async def execute_agent_task(
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -707,7 +710,7 @@ async def execute_agent_task(
                 )
             )
             
-        agent_data = agent_registry[agent_id]
+        agent_data = await agent_registry.aget(agent_id)
         
         # Check if agent is in a state that allows task execution
         if agent_data["status"] != "running":
@@ -732,17 +735,14 @@ async def execute_agent_task(
         # Generate task ID
         task_id = f"task_{uuid.uuid4().hex[:8]}_{int(time.time())}"
         
-        # Initialize task in agent's task list (create if not exists)
-        if "tasks" not in agent_data:
-            agent_data["tasks"] = {}
-            
-        agent_data["tasks"][task_id] = {
+        # Register the task
+        await agent_tasks.aset(task_id, {
             "id": task_id,
             "agent_id": agent_id,
             "details": request["task"],
             "status": "pending",
             "created_at": datetime.utcnow().isoformat()
-        }
+        })
         
         # Schedule task execution in background
         background_tasks.add_task(
@@ -778,24 +778,26 @@ async def execute_agent_task(
 @router.get("/{agent_id}/tasks", response_model=Dict[str, Any])
 async def list_agent_tasks(
     agent_id: str,
-    status: Optional[str] = None,
+    task_status: Optional[str] = Query(None, alias="status"),
     page: int = 1,
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = None
 ) -> JSONResponse:
     """List tasks for an agent.
     
     Args:
         agent_id: Agent ID
-        status: Filter by task status
-        page: Page number for pagination
+        task_status: Filter by task status
+        page: Page number for pagination (ignored when a cursor is given)
         limit: Number of items per page
+        cursor: Cursor from the previous page's metadata (keyset pagination)
         
     Returns:
-        List of tasks
+        List of tasks, newest first
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -804,29 +806,14 @@ async def list_agent_tasks(
                 )
             )
             
-        agent_data = agent_registry[agent_id]
-        
-        # Get tasks
-        tasks = []
-        if "tasks" in agent_data:
-            tasks = list(agent_data["tasks"].values())
-            
-            # Filter by status if provided
-            if status:
-                tasks = [t for t in tasks if t["status"] == status]
-                
-            # Sort by creation time (newest first)
-            tasks = sorted(
-                tasks,
-                key=lambda t: t.get("created_at", ""),
-                reverse=True
-            )
-            
-        # Paginate results
-        total_count = len(tasks)
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_tasks = tasks[start_idx:end_idx]
+        # Filtered, newest-first page straight from the registry index
+        paginated_tasks, next_cursor, total_count = await agent_tasks.apage_with_count(
+            limit=limit,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            owner=agent_id,
+            status=task_status
+        )
         
         return JSONResponse(
             content=paginated_response(
@@ -835,10 +822,20 @@ async def list_agent_tasks(
                 items=paginated_tasks,
                 total_count=total_count,
                 page=page,
-                page_size=limit
+                page_size=limit,
+                next_cursor=next_cursor,
+                cursor=cursor
             )
         )
         
+    except ValueError as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=error_response(
+                message=str(e),
+                code="INVALID_CURSOR"
+            )
+        )
     except Exception as e:
         logger.error(f"Error listing tasks for agent {agent_id}: {str(e)}")
         return JSONResponse(
@@ -866,7 +863,7 @@ async def get_agent_task(
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -875,20 +872,9 @@ async def get_agent_task(
                 )
             )
             
-        agent_data = agent_registry[agent_id]
-        
-        # Check if tasks exist for agent
-        if "tasks" not in agent_data:
-            return JSONResponse(
-                status_code=status.HTTP_404_NOT_FOUND,
-                content=error_response(
-                    message=f"No tasks for agent: {agent_id}",
-                    code="NO_TASKS_FOUND"
-                )
-            )
-            
-        # Check if specific task exists
-        if task_id not in agent_data["tasks"]:
+        # Check if specific task exists for this agent
+        task_data = await agent_tasks.aget(task_id)
+        if task_data is None or task_data.get("agent_id") != agent_id:
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -902,7 +888,7 @@ async def get_agent_task(
             content=create_response(
                 success=True,
                 message="Task found",
-                data=agent_data["tasks"][task_id]
+                data=task_data
             )
         )
         
@@ -935,7 +921,7 @@ async def cancel_agent_task(
     """
     try:
         # Check if agent exists
-        if agent_id not in agent_registry:
+        if not await agent_registry.acontains(agent_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -944,20 +930,9 @@ async def cancel_agent_task(
                 )
             )
             
-        agent_data = agent_registry[agent_id]
-        
-        # Check if tasks exist for agent
-        if "tasks" not in agent_data:
-            return JSONResponse(
-                status_code=status.HTTP_404_NOT_FOUND,
-                content=error_response(
-                    message=f"No tasks for agent: {agent_id}",
-                    code="NO_TASKS_FOUND"
-                )
-            )
-            
-        # Check if specific task exists
-        if task_id not in agent_data["tasks"]:
+        # Check if specific task exists for this agent
+        task_data = await agent_tasks.aget(task_id)
+        if task_data is None or task_data.get("agent_id") != agent_id:
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -966,8 +941,6 @@ async def cancel_agent_task(
                 )
             )
             
-        task_data = agent_data["tasks"][task_id]
-        
         # Check if task is in a state that allows cancellation
         if task_data["status"] not in ["pending", "running"]:
             return JSONResponse(
@@ -986,7 +959,7 @@ async def cancel_agent_task(
         )
         
         # Mark as cancelling
-        task_data["status"] = "cancelling"
+        await agent_tasks.apatch(task_id, status="cancelling")
         
         return JSONResponse(
             content=create_response(
@@ -1022,23 +995,21 @@ async def _initialize_agent_background(agent_id: str, agent_data: Dict[str, Any]
     """
     try:
         # Update status to initializing
-        agent_registry[agent_id]["status"] = "initializing"
+        await agent_registry.apatch(agent_id, status="initializing")
         
         # Simulate initialization steps
         await asyncio.sleep(2)
         
-        # Set to ready status
-        agent_registry[agent_id]["status"] = "ready"
-        
-        # Add initialization timestamp
-        agent_registry[agent_id]["initialized_at"] = datetime.utcnow().isoformat()
+        # Set to ready status and add initialization timestamp
+        await agent_registry.apatch(
+            agent_id,
+            status="ready",
+            initialized_at=datetime.utcnow().isoformat()
+        )
         
     except Exception as e:
         logger.error(f"Error initializing agent {agent_id}: {str(e)}")
-        
-        if agent_id in agent_registry:
-            agent_registry[agent_id]["status"] = "error"
-            agent_registry[agent_id]["error"] = str(e)
+        await agent_registry.apatch(agent_id, status="error", error=str(e))
 
 async def _shutdown_agent_background(agent_id: str) -> None:
     """Shut down and remove agent in background.
@@ -1051,15 +1022,11 @@ async def _shutdown_agent_background(agent_id: str) -> None:
         await asyncio.sleep(2)
         
         # Remove from registry
-        if agent_id in agent_registry:
-            del agent_registry[agent_id]
+        await agent_registry.adelete(agent_id)
             
     except Exception as e:
         logger.error(f"Error shutting down agent {agent_id}: {str(e)}")
-        
-        if agent_id in agent_registry:
-            agent_registry[agent_id]["status"] = "error"
-            agent_registry[agent_id]["error"] = str(e)
+        await agent_registry.apatch(agent_id, status="error", error=str(e))
 
 async def _start_agent_background(agent_id: str) -> None:
     """Start agent in background.
@@ -1072,16 +1039,15 @@ async def _start_agent_background(agent_id: str) -> None:
         await asyncio.sleep(1)
         
         # Update status
-        if agent_id in agent_registry:
-            agent_registry[agent_id]["status"] = "running"
-            agent_registry[agent_id]["started_at"] = datetime.utcnow().isoformat()
+        await agent_registry.apatch(
+            agent_id,
+            status="running",
+            started_at=datetime.utcnow().isoformat()
+        )
             
     except Exception as e:
         logger.error(f"Error starting agent {agent_id}: {str(e)}")
-        
-        if agent_id in agent_registry:
-            agent_registry[agent_id]["status"] = "error"
-            agent_registry[agent_id]["error"] = str(e)
+        await agent_registry.apatch(agent_id, status="error", error=str(e))
 
 async def _stop_agent_background(agent_id: str) -> None:
     """Stop agent in background.
@@ -1094,16 +1060,15 @@ async def _stop_agent_background(agent_id: str) -> None:
         await asyncio.sleep(1)
         
         # Update status
-        if agent_id in agent_registry:
-            agent_registry[agent_id]["status"] = "stopped"
-            agent_registry[agent_id]["stopped_at"] = datetime.utcnow().isoformat()
+        await agent_registry.apatch(
+            agent_id,
+            status="stopped",
+            stopped_at=datetime.utcnow().isoformat()
+        )
             
     except Exception as e:
         logger.error(f"Error stopping agent {agent_id}: {str(e)}")
-        
-        if agent_id in agent_registry:
-            agent_registry[agent_id]["status"] = "error"
-            agent_registry[agent_id]["error"] = str(e)
+        await agent_registry.apatch(agent_id, status="error", error=str(e))
 
 async def _execute_agent_task_background(agent_id: str, task_id: str) -> None:
     """Execute agent task in background.
@@ -1113,63 +1078,61 @@ async def _execute_agent_task_background(agent_id: str, task_id: str) -> None:
         task_id: Task ID
     """
     try:
-        # Check if agent and task still exist
-        if agent_id not in agent_registry:
-            logger.error(f"Agent {agent_id} not found for task execution")
-            return
-            
-        agent_data = agent_registry[agent_id]
-        
-        if "tasks" not in agent_data or task_id not in agent_data["tasks"]:
+        # Update status to running (also checks the task still exists)
+        task_data = await agent_tasks.apatch(
+            task_id,
+            status="running",
+            started_at=datetime.utcnow().isoformat()
+        )
+        if task_data is None:
             logger.error(f"Task {task_id} not found for agent {agent_id}")
             return
-            
-        task_data = agent_data["tasks"][task_id]
-        
-        # Update status to running
-        task_data["status"] = "running"
-        task_data["started_at"] = datetime.utcnow().isoformat()
         
         # Simulate task execution
         total_steps = 3
         for i in range(total_steps):
-            # Check for cancellation
-            if task_data["status"] == "cancelling":
-                task_data["status"] = "cancelled"
-                task_data["error"] = "Task was cancelled"
-                task_data["completed_at"] = datetime.utcnow().isoformat()
-                return
-                
-            # Update progress
-            task_data["progress"] = {
+            # Update progress; the fresh read also picks up cancellation from any worker
+            task_data = await agent_tasks.apatch(task_id, progress={
                 "steps_total": total_steps,
                 "steps_completed": i,
                 "current_step": f"Step {i+1}",
                 "percentage_complete": int((i / total_steps) * 100)
-            }
+            })
+            
+            # Check for cancellation
+            if task_data is None or task_data["status"] == "cancelling":
+                await agent_tasks.apatch(
+                    task_id,
+                    status="cancelled",
+                    error="Task was cancelled",
+                    completed_at=datetime.utcnow().isoformat()
+                )
+                return
             
             # Simulate step execution
             await asyncio.sleep(1)
             
         # Mark as completed
-        task_data["status"] = "completed"
-        task_data["completed_at"] = datetime.utcnow().isoformat()
-        task_data["result"] = {
-            "success": True,
-            "output": "Task completed successfully (mock)"
-        }
+        await agent_tasks.apatch(
+            task_id,
+            status="completed",
+            completed_at=datetime.utcnow().isoformat(),
+            result={
+                "success": True,
+                "output": "Task completed successfully (mock)"
+            }
+        )
         
     except Exception as e:
         logger.error(f"Error executing task {task_id} for agent {agent_id}: {str(e)}")
         
         # Update task status
-        if (agent_id in agent_registry and 
-            "tasks" in agent_registry[agent_id] and 
-            task_id in agent_registry[agent_id]["tasks"]):
-            
-            agent_registry[agent_id]["tasks"][task_id]["status"] = "failed"
-            agent_registry[agent_id]["tasks"][task_id]["error"] = str(e)
-            agent_registry[agent_id]["tasks"][task_id]["completed_at"] = datetime.utcnow().isoformat()
+        await agent_tasks.apatch(
+            task_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.utcnow().isoformat()
+        )
 
 async def _cancel_agent_task_background(agent_id: str, task_id: str) -> None:
     """Cancel agent task in background.
@@ -1179,34 +1142,25 @@ async def _cancel_agent_task_background(agent_id: str, task_id: str) -> None:
         task_id: Task ID
     """
     try:
-        # Check if agent and task still exist
-        if agent_id not in agent_registry:
-            logger.error(f"Agent {agent_id} not found for task cancellation")
-            return
-            
-        agent_data = agent_registry[agent_id]
+        # Simulate cancellation process
+        await asyncio.sleep(1)
         
-        if "tasks" not in agent_data or task_id not in agent_data["tasks"]:
+        # If task is still in cancelling state, set it to cancelled
+        agent_tasks.invalidate(task_id)
+        task_data = await agent_tasks.aget(task_id)
+        if task_data is None:
             logger.error(f"Task {task_id} not found for agent {agent_id}")
             return
             
-        task_data = agent_data["tasks"][task_id]
-        
-        # If task is in cancelling state, set it to cancelled
         if task_data["status"] == "cancelling":
-            # Simulate cancellation process
-            await asyncio.sleep(1)
-            
-            task_data["status"] = "cancelled"
-            task_data["cancelled_at"] = datetime.utcnow().isoformat()
+            await agent_tasks.apatch(
+                task_id,
+                status="cancelled",
+                cancelled_at=datetime.utcnow().isoformat()
+            )
             
     except Exception as e:
         logger.error(f"Error cancelling task {task_id} for agent {agent_id}: {str(e)}")
         
         # Update task status
-        if (agent_id in agent_registry and 
-            "tasks" in agent_registry[agent_id] and 
-            task_id in agent_registry[agent_id]["tasks"]):
-            
-            agent_registry[agent_id]["tasks"][task_id]["status"] = "error"
-            agent_registry[agent_id]["tasks"][task_id]["error"] = str(e)
\ No newline at end of file
+        await agent_tasks.apatch(task_id, status="error", error=str(e))
@@ -0,0 +1,145 @@
+"""
+API routes for cost metering.
+
+This module exposes the running cost aggregates kept by the cost meter
+(per workflow, execution, agent, model and tool) for the dashboard, and
+lets budgets be inspected, set and removed.
+"""
+
+import logging
+from typing import Dict, Any
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from core.cost_meter import BudgetAction, DIMENSIONS, get_cost_meter
+from core.schemas.responses import create_response, error_response
+from core.schemas.requests import CostBudgetRequest
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter(prefix="/api/costs", tags=["costs"])
+
+@router.get("", response_model=Dict[str, Any])
+async def get_cost_summary(top: int = 10) -> JSONResponse:
+    """Get total cost, the most expensive keys per dimension, budgets and recent calls.
+
+    Args:
+        top: Number of keys per dimension and recent calls to include
+
+    Returns:
+        Cost summary
+    """
+    return JSONResponse(
+        content=create_response(
+            success=True,
+            message="Cost summary retrieved",
+            data=get_cost_meter().get_summary(top=top)
+        )
+    )
+
+@router.get("/budgets", response_model=Dict[str, Any])
+async def list_budgets() -> JSONResponse:
+    """List cost budgets with their current spend.
+
+    Returns:
+        List of budgets
+    """
+    return JSONResponse(
+        content=create_response(
+            success=True,
+            message="Budgets retrieved",
+            data=get_cost_meter().get_budgets()
+        )
+    )
+
+@router.put("/budgets", response_model=Dict[str, Any])
+async def set_budget(request: CostBudgetRequest) -> JSONResponse:
+    """Set or replace a cost budget.
+
+    Args:
+        request: Budget definition
+
+    Returns:
+        The budget with its current spend
+    """
+    try:
+        meter = get_cost_meter()
+        budget = meter.set_budget(
+            request.scope,
+            request.key,
+            request.limit,
+            action=BudgetAction(request.action),
+            throttle_delay=request.throttle_delay,
+            window=request.window
+        )
+        return JSONResponse(
+            content=create_response(
+                success=True,
+                message=f"Budget set for {budget.scope} '{budget.key}'",
+                data=budget.to_dict(meter.budget_spent(budget))
+            )
+        )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=error_response(
+                message=str(e),
+                code="INVALID_BUDGET"
+            )
+        )
+
+@router.delete("/budgets/{scope}/{key}", response_model=Dict[str, Any])
+async def remove_budget(scope: str, key: str) -> JSONResponse:
+    """Remove a cost budget.
+
+    Args:
+        scope: Budget scope
+        key: Budget key
+
+    Returns:
+        Removal status
+    """
+    if not get_cost_meter().remove_budget(scope, key):
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content=error_response(
+                message=f"Budget not found: {scope} '{key}'",
+                code="BUDGET_NOT_FOUND"
+            )
+        )
+    return JSONResponse(
+        content=create_response(
+            success=True,
+            message=f"Budget removed for {scope} '{key}'"
+        )
+    )
+
+@router.get("/{dimension}", response_model=Dict[str, Any])
+async def get_cost_aggregates(dimension: str, limit: int = 50) -> JSONResponse:
+    """Get cost aggregates for one dimension, most expensive first.
+
+    Args:
+        dimension: workflow, execution, agent, model or tool
+        limit: Maximum number of keys to return
+
+    Returns:
+        Aggregates keyed by workflow, execution, agent, model or tool
+    """
+    if dimension not in DIMENSIONS:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content=error_response(
+                message=f"Unknown cost dimension: {dimension}",
+                code="UNKNOWN_DIMENSION",
+                details={"dimensions": list(DIMENSIONS)}
+            )
+        )
+    return JSONResponse(
+        content=create_response(
+            success=True,
+            message=f"Cost aggregates by {dimension}",
+            data=get_cost_meter().get_aggregates(dimension, limit)
+        )
+    )
@@ -6,20 +6,22 @@ including validation, execution, and status checking.
 """
 
 import os
+import asyncio
 import logging
 import json
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
 from datetime import datetime
 import time
 import yaml
 import uuid
 
-from core.schemas.responses import create_response, error_response
+from core.schemas.responses import create_response, error_response, paginated_response
 from core.schemas.requests import PlaybookExecuteRequest, Project
 from core.playbook_validator import validate_playbook_from_yaml, perform_full_validation
 from core.condition_evaluator import analyze_playbook_conditions
+from core.shared_registry import SharedRegistry
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -30,9 +32,12 @@ router = APIRouter(prefix="/api/playbooks", tags=["playbooks"])
 # Configuration directory
 CONFIG_DIR = os.getenv("CONFIG_DIR", "core/configs")
 
-# In-memory task status storage
-# In production, this should be replaced with a database
-playbook_runs: Dict[str, Dict[str, Any]] = {}
+# Run status storage, shared by all API workers
+playbook_runs = SharedRegistry(
+    "playbook_runs",
+    index_fields={"kind": "playbook"},
+    created_field="start_time"
+)
 
 class PlaybookValidator:
     """Dependency for playbook validation operations."""
@@ -253,14 +258,14 @@ async def execute_playbook(
         run_id = f"run_{int(time.time())}_{uuid.uuid4().hex[:8]}"
         
         # Initialize run status
-        playbook_runs[run_id] = {
+        await playbook_runs.aset(run_id, {
             "run_id": run_id,
             "status": "pending",
             "playbook": request.playbook_name,
             "parameters": request.parameters,
             "start_time": datetime.utcnow().isoformat(),
             "project": request.project.dict()
-        }
+        })
         
         # Schedule background execution (mock for now)
         background_tasks.add_task(
@@ -309,7 +314,7 @@ async def get_execution_status(run_id: str) -> JSONResponse:
     """
     try:
         # Check if run exists
-        if run_id not in playbook_runs:
+        if not await playbook_runs.acontains(run_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -323,7 +328,7 @@ async def get_execution_status(run_id: str) -> JSONResponse:
             content=create_response(
                 success=True,
                 message="Execution status retrieved",
-                data=playbook_runs[run_id]
+                data=await playbook_runs.aget(run_id)
             )
         )
         
@@ -338,6 +343,67 @@ async def get_execution_status(run_id: str) -> JSONResponse:
             )
         )
 
+@router.get("/runs", response_model=Dict[str, Any])
+async def list_runs(
+    playbook: Optional[str] = None,
+    run_status: Optional[str] = Query(None, alias="status"),
+    page: int = 1,
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> JSONResponse:
+    """List playbook runs, newest first.
+    
+    Args:
+        playbook: Filter by playbook name
+        run_status: Filter by run status
+        page: Page number for pagination (ignored when a cursor is given)
+        limit: Number of items per page
+        cursor: Cursor from the previous page's metadata (keyset pagination)
+        
+    Returns:
+        List of runs
+    """
+    try:
+        runs, next_cursor, total_count = await playbook_runs.apage_with_count(
+            limit=limit,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            kind=playbook,
+            status=run_status
+        )
+        
+        return JSONResponse(
+            content=paginated_response(
+                success=True,
+                message=f"Found {total_count} runs",
+                items=runs,
+                total_count=total_count,
+                page=page,
+                page_size=limit,
+                next_cursor=next_cursor,
+                cursor=cursor
+            )
+        )
+        
+    except ValueError as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=error_response(
+                message=str(e),
+                code="INVALID_CURSOR"
+            )
+        )
+    except Exception as e:
+        logger.error(f"Error listing playbook runs: {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content=error_response(
+                message="Failed to list runs",
+                code="RUN_LIST_ERROR",
+                details={"error": str(e)}
+            )
+        )
+
 async def _execute_playbook_background(
     run_id: str,
     playbook_name: str,
@@ -356,35 +422,40 @@ async def _execute_playbook_background(
     """
     try:
         # Update status to running
-        playbook_runs[run_id]["status"] = "running"
+        await playbook_runs.apatch(run_id, status="running")
         
         # Simulate execution steps
         total_steps = 5
         for i in range(total_steps):
             # Update progress
-            playbook_runs[run_id]["progress"] = {
+            await playbook_runs.apatch(run_id, progress={
                 "steps_total": total_steps,
                 "steps_completed": i,
                 "current_step": f"Step {i+1}",
                 "percentage_complete": int((i / total_steps) * 100)
-            }
+            })
             
             # Simulate step execution
             await asyncio.sleep(1)
             
         # Mark as completed
-        playbook_runs[run_id]["status"] = "completed"
-        playbook_runs[run_id]["end_time"] = datetime.utcnow().isoformat()
-        playbook_runs[run_id]["result"] = {
-            "success": True,
-            "output": "Playbook execution completed successfully (mock)"
-        }
+        await playbook_runs.apatch(
+            run_id,
+            status="completed",
+            end_time=datetime.utcnow().isoformat(),
+            result={
+                "success": True,
+                "output": "Playbook execution completed successfully (mock)"
+            }
+        )
         
     except Exception as e:
         logger.error(f"Error executing playbook: {str(e)}")
         
         # Mark as failed
-        if run_id in playbook_runs:
-            playbook_runs[run_id]["status"] = "failed"
-            playbook_runs[run_id]["end_time"] = datetime.utcnow().isoformat()
-            playbook_runs[run_id]["error"] = str(e)
\ No newline at end of file
+        await playbook_runs.apatch(
+            run_id,
+            status="failed",
+            end_time=datetime.utcnow().isoformat(),
+            error=str(e)
+        )
\ No newline at end of file
@@ -10,7 +10,7 @@ import os
 import logging
 import json
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
 from datetime import datetime
 import time
@@ -18,6 +18,7 @@ import uuid
 
 from core.schemas.responses import create_response, error_response, paginated_response
 from core.schemas.requests import ToolExecuteRequest, Project
+from core.shared_registry import SharedRegistry
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -29,9 +30,10 @@ router = APIRouter(prefix="/api/tools", tags=["tools"])
 CONFIG_DIR = os.getenv("CONFIG_DIR", "core/configs")
 
 # In-memory tool registry
-# In production, this should be replaced with a database
 tool_registry: Dict[str, Dict[str, Any]] = {}
-tool_executions: Dict[str, Dict[str, Any]] = {}
+
+# Execution records, shared by all API workers
+tool_executions = SharedRegistry("tool_executions", index_fields={"kind": "tool_id"})
 
 class ToolValidator:
     """Dependency for tool validation operations."""
@@ -173,6 +175,67 @@ async def list_tools(
             )
         )
 
+@router.get("/executions", response_model=Dict[str, Any])
+async def list_executions(
+    tool_id: Optional[str] = None,
+    execution_status: Optional[str] = Query(None, alias="status"),
+    page: int = 1,
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> JSONResponse:
+    """List tool executions, newest first.
+    
+    Args:
+        tool_id: Filter by tool ID
+        execution_status: Filter by execution status
+        page: Page number for pagination (ignored when a cursor is given)
+        limit: Number of items per page
+        cursor: Cursor from the previous page's metadata (keyset pagination)
+        
+    Returns:
+        List of executions
+    """
+    try:
+        executions, next_cursor, total_count = await tool_executions.apage_with_count(
+            limit=limit,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            kind=tool_id,
+            status=execution_status
+        )
+        
+        return JSONResponse(
+            content=paginated_response(
+                success=True,
+                message=f"Found {total_count} executions",
+                items=executions,
+                total_count=total_count,
+                page=page,
+                page_size=limit,
+                next_cursor=next_cursor,
+                cursor=cursor
+            )
+        )
+        
+    except ValueError as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=error_response(
+                message=str(e),
+                code="INVALID_CURSOR"
+            )
+        )
+    except Exception as e:
+        logger.error(f"Error listing tool executions: {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content=error_response(
+                message="Failed to list executions",
+                code="EXECUTION_LIST_ERROR",
+                details={"error": str(e)}
+            )
+        )
+
 @router.get("/{tool_id}", response_model=Dict[str, Any])
 async def get_tool(tool_id: str) -> JSONResponse:
     """Get tool details by ID.
@@ -315,14 +378,14 @@ async def execute_tool(
         execution_id = f"exec_{uuid.uuid4().hex[:8]}_{int(time.time())}"
         
         # Initialize execution record
-        tool_executions[execution_id] = {
+        await tool_executions.aset(execution_id, {
             "id": execution_id,
             "tool_id": tool_id,
             "input": request.input,
             "status": "pending",
             "created_at": datetime.utcnow().isoformat(),
             "metadata": request.metadata
-        }
+        })
         
         # Schedule execution in background
         background_tasks.add_task(
@@ -369,7 +432,7 @@ async def get_execution_status(execution_id: str) -> JSONResponse:
     """
     try:
         # Check if execution exists
-        if execution_id not in tool_executions:
+        if not await tool_executions.acontains(execution_id):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content=error_response(
@@ -383,7 +446,7 @@ async def get_execution_status(execution_id: str) -> JSONResponse:
             content=create_response(
                 success=True,
                 message="Execution found",
-                data=tool_executions[execution_id]
+                data=await tool_executions.aget(execution_id)
             )
         )
         
@@ -414,9 +477,11 @@ async def _execute_tool_background(
     """
     try:
         # Update status to running
-        if execution_id in tool_executions:
-            tool_executions[execution_id]["status"] = "running"
-            tool_executions[execution_id]["started_at"] = datetime.utcnow().isoformat()
+        await tool_executions.apatch(
+            execution_id,
+            status="running",
+            started_at=datetime.utcnow().isoformat()
+        )
         
         # Simulate tool execution
         # In a real implementation, this would invoke the actual tool
@@ -425,22 +490,18 @@ async def _execute_tool_background(
         # Simulate processing with different steps
         total_steps = 3
         for i in range(total_steps):
-            if execution_id in tool_executions:
-                tool_executions[execution_id]["progress"] = {
-                    "steps_total": total_steps,
-                    "steps_completed": i,
-                    "current_step": f"Step {i+1}",
-                    "percentage_complete": int((i / total_steps) * 100)
-                }
+            await tool_executions.apatch(execution_id, progress={
+                "steps_total": total_steps,
+                "steps_completed": i,
+                "current_step": f"Step {i+1}",
+                "percentage_complete": int((i / total_steps) * 100)
+            })
             
             # Simulate step execution
             await asyncio.sleep(1)
         
         # Finalize execution
-        if execution_id in tool_executions:
-            tool_executions[execution_id]["status"] = "completed"
-            tool_executions[execution_id]["completed_at"] = datetime.utcnow().isoformat()
-            
+        if await tool_executions.acontains(execution_id):
             # Generate mock result based on tool type
             tool_data = tool_registry.get(tool_id, {})
             tool_type = tool_data.get("type", "generic")
@@ -470,13 +531,20 @@ async def _execute_tool_background(
                     }
                 }
             
-            tool_executions[execution_id]["result"] = result
+            await tool_executions.apatch(
+                execution_id,
+                status="completed",
+                completed_at=datetime.utcnow().isoformat(),
+                result=result
+            )
     
     except Exception as e:
         logger.error(f"Error executing tool {tool_id}: {str(e)}")
         
         # Update execution status
-        if execution_id in tool_executions:
-            tool_executions[execution_id]["status"] = "failed"
-            tool_executions[execution_id]["error"] = str(e)
-            tool_executions[execution_id]["completed_at"] = datetime.utcnow().isoformat()
\ No newline at end of file
+        await tool_executions.apatch(
+            execution_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.utcnow().isoformat()
+        )
\ No newline at end of file
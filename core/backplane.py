@@ -0,0 +1,275 @@
+# MIT License - Copyright (c) 2024 Wrench AI
+# For full license information, see the LICENSE file in the repo root.
+
+"""Cross-process pub/sub backplane.
+
+With several API workers a WebSocket lives in one process while the workflow
+reporting progress for it may run in another. Components publish events on a
+named channel and every worker subscribed to that channel receives them, so the
+worker holding the socket can deliver the message.
+
+Key components:
+- Backplane: Interface for publishing and subscribing to channels
+- InMemoryBackplane: Single-process backplane, also used as a stand-in in tests
+- RedisBackplane: Redis pub/sub backplane for multi-worker deployments
+- get_backplane: Process-wide backplane configured from BACKPLANE_URL
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional dependency
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+# Handlers receive the decoded message
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Identifies this process in published messages so workers can skip their own
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Encode a message for the wire."""
+    return json.dumps(message, separators=(",", ":"), default=str)
+
+
+class Backplane:
+    """Interface for cross-process publish/subscribe."""
+
+    def __init__(self, worker_id: str = WORKER_ID):
+        """Initialize the backplane.
+
+        Args:
+            worker_id: ID of this worker, attached to published messages
+        """
+        self.worker_id = worker_id
+        self._handlers: Dict[str, List[MessageHandler]] = defaultdict(list)
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        """Publish a message to every subscriber of a channel.
+
+        Args:
+            channel: Channel name
+            message: JSON-serializable message
+        """
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        """Register a handler for a channel.
+
+        Args:
+            channel: Channel name
+            handler: Coroutine function called with each decoded message
+        """
+        self._handlers[channel].append(handler)
+
+    async def unsubscribe(self, channel: str, handler: MessageHandler):
+        """Remove a handler from a channel.
+
+        Args:
+            channel: Channel name
+            handler: Previously registered handler
+        """
+        handlers = self._handlers.get(channel, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self._handlers.pop(channel, None)
+
+    async def close(self):
+        """Release backplane resources."""
+        self._handlers.clear()
+
+    async def _dispatch(self, channel: str, data: str):
+        """Decode a message and hand it to the channel's handlers."""
+        message = json.loads(data)
+        for handler in list(self._handlers.get(channel, [])):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"Backplane handler for channel {channel} failed: {e}")
+
+
+class InMemoryBackplane(Backplane):
+    """Backplane for a single process.
+
+    Messages are JSON round-tripped like they would be over Redis, so code
+    tested against this backplane only publishes what a real one can carry.
+    Several managers sharing one instance behave like several workers.
+    """
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        """Publish a message to every subscriber of a channel.
+
+        Args:
+            channel: Channel name
+            message: JSON-serializable message
+        """
+        await self._dispatch(channel, encode_message(message))
+
+
+class RedisBackplane(Backplane):
+    """Backplane backed by Redis pub/sub."""
+
+    def __init__(self,
+                 url: str,
+                 worker_id: str = WORKER_ID,
+                 prefix: str = "wrenchai:",
+                 reconnect_delay: float = 0.5,
+                 max_reconnect_delay: float = 30.0):
+        """Initialize the backplane.
+
+        Args:
+            url: Redis connection URL
+            worker_id: ID of this worker
+            prefix: Prefix applied to channel names
+            reconnect_delay: Seconds before the first reconnect after the reader fails
+            max_reconnect_delay: Upper bound of the doubling reconnect delay
+
+        Raises:
+            ValueError: If the redis package is not installed
+        """
+        if redis_asyncio is None:
+            raise ValueError("The Redis backplane requires the 'redis' package")
+        super().__init__(worker_id)
+        self.prefix = prefix
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+        self._redis = redis_asyncio.from_url(url)
+        self._pubsub = self._redis.pubsub()
+        self._reader: Optional[asyncio.Task] = None
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        """Publish a message to every subscriber of a channel.
+
+        Args:
+            channel: Channel name
+            message: JSON-serializable message
+        """
+        await self._redis.publish(self.prefix + channel, encode_message(message))
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        """Register a handler for a channel.
+
+        Args:
+            channel: Channel name
+            handler: Coroutine function called with each decoded message
+        """
+        first = channel not in self._handlers
+        await super().subscribe(channel, handler)
+        if first:
+            await self._pubsub.subscribe(self.prefix + channel)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_loop())
+
+    async def unsubscribe(self, channel: str, handler: MessageHandler):
+        """Remove a handler from a channel.
+
+        Args:
+            channel: Channel name
+            handler: Previously registered handler
+        """
+        await super().unsubscribe(channel, handler)
+        if channel not in self._handlers:
+            await self._pubsub.unsubscribe(self.prefix + channel)
+
+    async def close(self):
+        """Stop reading and close the Redis connection."""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+        await self._pubsub.close()
+        await self._redis.close()
+        await super().close()
+
+    async def _read_loop(self):
+        """Deliver messages received from Redis to local handlers.
+
+        If the connection fails, the reader resubscribes with exponential
+        backoff. It returns once no channels are subscribed.
+        """
+        delay = self.reconnect_delay
+        reconnect = False
+        while True:
+            try:
+                if reconnect:
+                    await self._resubscribe()
+                    reconnect = False
+                async for message in self._pubsub.listen():
+                    delay = self.reconnect_delay
+                    if message.get("type") != "message":
+                        continue
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    await self._dispatch(channel[len(self.prefix):], message["data"])
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Redis backplane reader failed, reconnecting in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                reconnect = True
+
+    async def _resubscribe(self):
+        """Replace the pub/sub connection and subscribe to every channel with handlers."""
+        self.reconnects += 1
+        try:
+            await self._pubsub.close()
+        except Exception as e:
+            logger.debug(f"Error closing failed Redis pub/sub connection: {e}")
+        self._pubsub = self._redis.pubsub()
+        channels = [self.prefix + channel for channel in self._handlers]
+        if channels:
+            await self._pubsub.subscribe(*channels)
+
+
+def create_backplane(url: Optional[str] = None) -> Backplane:
+    """Create a backplane from a URL.
+
+    Args:
+        url: "memory://" (default) or a redis:// / rediss:// URL
+
+    Returns:
+        The backplane
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    url = url or "memory://"
+    if url.startswith("memory://"):
+        return InMemoryBackplane()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackplane(url)
+    raise ValueError(f"Unsupported backplane URL: {url}")
+
+
+_backplane: Optional[Backplane] = None
+
+
+def get_backplane() -> Backplane:
+    """Get the process-wide backplane, creating it from BACKPLANE_URL on first use."""
+    global _backplane
+    if _backplane is None:
+        _backplane = create_backplane(os.getenv("BACKPLANE_URL"))
+    return _backplane
+
+
+def set_backplane(backplane: Optional[Backplane]):
+    """Replace the process-wide backplane (None resets to BACKPLANE_URL)."""
+    global _backplane
+    _backplane = backplane
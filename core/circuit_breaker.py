@@ -0,0 +1,494 @@
+"""Shared circuit breakers and retry budget for downstream resources.
+
+Circuit breakers used to live on individual retry policies, so every workflow
+tracked its own view of a failing dependency and kept retrying it. This module
+keys breaker state by the resource being protected (an LLM provider/model, a
+tool, an external host) so that all callers in the process share it, and adds
+a process-wide retry budget that caps how many retries may be issued relative
+to first attempts.
+
+Key components:
+- CircuitBreaker: Closed/open/half-open breaker with a bounded number of probes
+- RetryBudget: Token bucket that caps the process-wide retry ratio
+- CircuitBreakerRegistry: Sharded registry of breakers keyed by resource
+- Resource key helpers: llm_resource, tool_resource, host_resource, step_resource
+"""
+
+import logging
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """States of a circuit breaker."""
+    CLOSED = "closed"                # Requests flow normally
+    OPEN = "open"                    # Requests are rejected until the recovery time passes
+    HALF_OPEN = "half_open"          # A limited number of probe requests are let through
+
+
+# Numeric encoding used for the state gauge
+_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state per resource (0=closed, 1=half_open, 2=open)",
+    labelnames=["resource"],
+)
+BREAKER_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total",
+    "Circuit breaker state transitions",
+    labelnames=["resource", "state"],
+)
+BREAKER_REJECTIONS = Counter(
+    "circuit_breaker_rejections_total",
+    "Requests rejected by an open circuit breaker",
+    labelnames=["resource"],
+)
+RETRY_BUDGET_EVENTS = Counter(
+    "retry_budget_events_total",
+    "Retry budget deposits and withdrawals",
+    labelnames=["outcome"],
+)
+RETRY_BUDGET_TOKENS = Gauge(
+    "retry_budget_tokens",
+    "Retry tokens currently available in the process-wide budget",
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its resource's breaker is open."""
+
+    def __init__(self, resource: str, retry_after: float = 0.0):
+        """Initialize the error.
+
+        Args:
+            resource: The resource whose breaker rejected the call
+            retry_after: Seconds until the breaker will allow a probe
+        """
+        super().__init__(f"Circuit breaker open for {resource} (retry after {retry_after:.1f}s)")
+        self.resource = resource
+        self.retry_after = retry_after
+
+
+def llm_resource(provider: str, model: Optional[str] = None) -> str:
+    """Build the resource key for an LLM provider or model."""
+    return f"llm:{provider}/{model}" if model else f"llm:{provider}"
+
+
+def tool_resource(tool_id: str) -> str:
+    """Build the resource key for a tool."""
+    return f"tool:{tool_id}"
+
+
+def step_resource(workflow_id: str, step_id: str) -> str:
+    """Build the resource key for a workflow step that names no downstream resource."""
+    return f"step:{workflow_id}/{step_id}"
+
+
+def host_resource(url_or_host: str) -> str:
+    """Build the resource key for an external host from a URL or host name."""
+    host = urlsplit(url_or_host).netloc if "//" in url_or_host else url_or_host
+    return f"host:{host.lower()}"
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """Configuration for a circuit breaker."""
+    failure_threshold: int = 5       # Consecutive failures that open the circuit
+    recovery_time_ms: int = 60000    # Time the circuit stays open before probing
+    half_open_max_probes: int = 1    # Concurrent probe requests allowed while half-open
+    success_threshold: int = 1       # Successful probes needed to close the circuit
+
+
+class CircuitBreaker:
+    """Circuit breaker protecting a single downstream resource."""
+
+    def __init__(self,
+                 resource: str,
+                 config: CircuitBreakerConfig = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize a circuit breaker.
+
+        Args:
+            resource: Key of the protected resource
+            config: Breaker configuration, uses default if not provided
+            clock: Monotonic clock, injectable for tests
+        """
+        self.resource = resource
+        self.config = config or CircuitBreakerConfig()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._probe_successes = 0
+        self._probes_in_flight = 0
+        self._opened_at: Optional[float] = None
+
+        # Counters exported through get_metrics()
+        self.successes = 0
+        self.failures = 0
+        self.rejections = 0
+        self.times_opened = 0
+
+        BREAKER_STATE.labels(resource=resource).set(0)
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving an expired open circuit to half-open."""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Check whether a call to the resource may proceed.
+
+        While half-open, a successful check claims one of the probe slots;
+        the caller must report the outcome with record_success/record_failure.
+
+        Returns:
+            True if the call may proceed, False if it should be rejected
+        """
+        with self._lock:
+            self._refresh_state()
+
+            if self._state == CircuitState.CLOSED:
+                return True
+
+            if (self._state == CircuitState.HALF_OPEN
+                    and self._probes_in_flight < self.config.half_open_max_probes):
+                self._probes_in_flight += 1
+                return True
+
+            self.rejections += 1
+        BREAKER_REJECTIONS.labels(resource=self.resource).inc()
+        return False
+
+    def release(self):
+        """Give back a probe slot claimed by allow_request without recording an outcome."""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit will allow a probe."""
+        with self._lock:
+            if self._state != CircuitState.OPEN or self._opened_at is None:
+                return 0.0
+            elapsed = self._clock() - self._opened_at
+            return max(0.0, self.config.recovery_time_ms / 1000 - elapsed)
+
+    def record_success(self):
+        """Record a successful call to the resource."""
+        with self._lock:
+            self.successes += 1
+            self._consecutive_failures = 0
+
+            if self._state == CircuitState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._probe_successes += 1
+                if self._probe_successes >= self.config.success_threshold:
+                    self._transition(CircuitState.CLOSED)
+
+    def record_failure(self):
+        """Record a failed call to the resource."""
+        with self._lock:
+            self.failures += 1
+            self._consecutive_failures += 1
+
+            if self._state == CircuitState.HALF_OPEN:
+                # A failed probe re-opens the circuit for another recovery period
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._transition(CircuitState.OPEN)
+            elif (self._state == CircuitState.CLOSED
+                  and self._consecutive_failures >= self.config.failure_threshold):
+                self._transition(CircuitState.OPEN)
+
+    def reset(self):
+        """Force the breaker back to the closed state."""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._transition(CircuitState.CLOSED)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get breaker state and counters.
+
+        Returns:
+            Dictionary of breaker metrics
+        """
+        state = self.state
+        return {
+            "resource": self.resource,
+            "state": state.value,
+            "consecutive_failures": self._consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejections": self.rejections,
+            "times_opened": self.times_opened,
+            "retry_after_s": self.retry_after(),
+        }
+
+    def _refresh_state(self):
+        """Move an open circuit to half-open once its recovery time has passed."""
+        if self._state != CircuitState.OPEN or self._opened_at is None:
+            return
+        if self._clock() - self._opened_at >= self.config.recovery_time_ms / 1000:
+            self._transition(CircuitState.HALF_OPEN)
+
+    def _transition(self, state: CircuitState):
+        """Switch to a new state. Must be called with the lock held."""
+        if state == CircuitState.OPEN:
+            self._opened_at = self._clock()
+            self.times_opened += 1
+        elif state == CircuitState.CLOSED:
+            self._opened_at = None
+        self._probe_successes = 0
+        self._probes_in_flight = 0
+
+        if state == self._state:
+            return
+
+        logger.warning(f"Circuit breaker for {self.resource}: {self._state.value} -> {state.value}")
+        self._state = state
+        BREAKER_STATE.labels(resource=self.resource).set(_STATE_VALUES[state])
+        BREAKER_TRANSITIONS.labels(resource=self.resource, state=state.value).inc()
+
+
+class RetryBudget:
+    """Token bucket capping retries to a fraction of first attempts.
+
+    Every first attempt deposits ``retry_ratio`` tokens and every retry
+    withdraws one, so sustained retries cannot exceed ``retry_ratio`` times
+    the request rate. A small ``min_retries_per_second`` floor keeps
+    low-traffic processes able to retry at all.
+    """
+
+    def __init__(self,
+                 retry_ratio: float = 0.2,
+                 min_retries_per_second: float = 1.0,
+                 max_tokens: float = 20.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the retry budget.
+
+        Args:
+            retry_ratio: Retries allowed per first attempt
+            min_retries_per_second: Retries always allowed regardless of traffic
+            max_tokens: Maximum tokens the bucket can hold (burst size)
+            clock: Monotonic clock, injectable for tests
+        """
+        self.retry_ratio = retry_ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = max_tokens
+        self._last_refill = clock()
+
+        # Counters exported through get_metrics()
+        self.requests = 0
+        self.retries_allowed = 0
+        self.retries_rejected = 0
+
+        RETRY_BUDGET_TOKENS.set(self._tokens)
+
+    def record_request(self):
+        """Record a first attempt, depositing retry_ratio tokens."""
+        with self._lock:
+            self.requests += 1
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.retry_ratio)
+            tokens = self._tokens
+        RETRY_BUDGET_EVENTS.labels(outcome="deposit").inc()
+        RETRY_BUDGET_TOKENS.set(tokens)
+
+    def try_acquire(self) -> bool:
+        """Withdraw one token for a retry.
+
+        Returns:
+            True if the retry is within budget, False if it should be skipped
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.retries_allowed += 1
+                allowed = True
+            else:
+                self.retries_rejected += 1
+                allowed = False
+            tokens = self._tokens
+        RETRY_BUDGET_EVENTS.labels(outcome="allowed" if allowed else "rejected").inc()
+        RETRY_BUDGET_TOKENS.set(tokens)
+        return allowed
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get budget consumption counters.
+
+        Returns:
+            Dictionary of budget metrics
+        """
+        tokens = self.tokens
+        return {
+            "tokens": round(tokens, 3),
+            "max_tokens": self.max_tokens,
+            "retry_ratio_limit": self.retry_ratio,
+            "requests": self.requests,
+            "retries_allowed": self.retries_allowed,
+            "retries_rejected": self.retries_rejected,
+            "retry_ratio": self.retries_allowed / self.requests if self.requests else 0.0,
+        }
+
+    def _refill(self):
+        """Add the time-based floor. Must be called with the lock held."""
+        now = self._clock()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if elapsed > 0 and self.min_retries_per_second > 0:
+            self._tokens = min(self.max_tokens, self._tokens + elapsed * self.min_retries_per_second)
+
+
+class CircuitBreakerRegistry:
+    """Process-wide registry of circuit breakers keyed by resource."""
+
+    def __init__(self,
+                 default_config: CircuitBreakerConfig = None,
+                 retry_budget: RetryBudget = None,
+                 shards: int = 16,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the registry.
+
+        Args:
+            default_config: Configuration for breakers without an override
+            retry_budget: Shared retry budget, a default budget is created if not provided
+            shards: Number of lock shards for the breaker map
+            clock: Monotonic clock passed to new breakers
+        """
+        self.default_config = default_config or CircuitBreakerConfig()
+        self.retry_budget = retry_budget or RetryBudget(clock=clock)
+        self._clock = clock
+        self._shards: List[Tuple[threading.Lock, Dict[str, CircuitBreaker]]] = [
+            (threading.Lock(), {}) for _ in range(max(1, shards))
+        ]
+        self._overrides: Dict[str, CircuitBreakerConfig] = {}
+
+    def configure(self, resource: str, config: CircuitBreakerConfig):
+        """Set the configuration for a resource or a family of resources.
+
+        Existing breakers under the prefix switch to it too, unless a more
+        specific prefix is configured for them.
+
+        Args:
+            resource: Resource key, or a prefix such as "llm:" to cover a family
+            config: Breaker configuration to use
+        """
+        self._overrides[resource] = config
+        for lock, breakers in self._shards:
+            with lock:
+                for name, breaker in breakers.items():
+                    if name.startswith(resource):
+                        breaker.config = self._config_for(name)
+
+    def get(self, resource: str, config: Optional[CircuitBreakerConfig] = None) -> CircuitBreaker:
+        """Get the breaker for a resource, creating it on first use.
+
+        Args:
+            resource: Resource key
+            config: Configuration used if the breaker does not exist yet
+
+        Returns:
+            The circuit breaker for the resource
+        """
+        lock, breakers = self._shard(resource)
+        breaker = breakers.get(resource)
+        if breaker is not None:
+            return breaker
+
+        with lock:
+            breaker = breakers.get(resource)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    resource,
+                    self._config_for(resource) or config or self.default_config,
+                    clock=self._clock,
+                )
+                breakers[resource] = breaker
+            return breaker
+
+    def find(self, resource: str) -> Optional[CircuitBreaker]:
+        """Get the breaker for a resource without creating it."""
+        return self._shard(resource)[1].get(resource)
+
+    def allow_request(self, resource: str) -> bool:
+        """Check whether a call to a resource may proceed."""
+        return self.get(resource).allow_request()
+
+    def record_success(self, resource: str):
+        """Record a successful call to a resource."""
+        self.get(resource).record_success()
+
+    def record_failure(self, resource: str):
+        """Record a failed call to a resource."""
+        self.get(resource).record_failure()
+
+    def resources(self) -> List[str]:
+        """List all resources with a breaker."""
+        names = []
+        for lock, breakers in self._shards:
+            with lock:
+                names.extend(breakers)
+        return sorted(names)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get breaker states and retry budget consumption.
+
+        Returns:
+            Dictionary with per-resource breaker metrics and budget metrics
+        """
+        breakers = {}
+        for resource in self.resources():
+            breaker = self.find(resource)
+            if breaker is not None:
+                breakers[resource] = breaker.get_metrics()
+
+        return {
+            "breakers": breakers,
+            "open": sorted(r for r, m in breakers.items() if m["state"] == CircuitState.OPEN.value),
+            "retry_budget": self.retry_budget.get_metrics(),
+        }
+
+    def reset(self):
+        """Drop all breakers."""
+        for lock, breakers in self._shards:
+            with lock:
+                breakers.clear()
+
+    def _shard(self, resource: str) -> Tuple[threading.Lock, Dict[str, CircuitBreaker]]:
+        """Select the shard for a resource."""
+        return self._shards[zlib.crc32(resource.encode("utf-8")) % len(self._shards)]
+
+    def _config_for(self, resource: str) -> Optional[CircuitBreakerConfig]:
+        """Find the most specific configured override for a resource."""
+        best = None
+        for prefix, config in self._overrides.items():
+            if resource.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+                best = (prefix, config)
+        return best[1] if best else None
+
+
+# Global registry shared by retry strategies, tools and LLM callers
+circuit_breakers = CircuitBreakerRegistry()
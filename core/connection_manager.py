@@ -0,0 +1,423 @@
+# MIT License - Copyright (c) 2024 Wrench AI
+# For full license information, see the LICENSE file in the repo root.
+
+"""Backpressure-aware WebSocket fan-out.
+
+Each connection gets a bounded send queue drained by its own writer task, so
+broadcasting only enqueues: a slow or dead browser tab can no longer stall
+delivery to the other tabs or the caller. Messages are serialized once per
+broadcast and the same text frame is queued on every connection.
+
+With an attached backplane, broadcasts are also published to the other API
+workers, and each worker delivers them to the sockets it holds.
+
+Key components:
+- OverflowPolicy: What to do when a connection's queue is full
+- ClientConnection: One WebSocket with its send queue, writer task and stats
+- ConnectionManager: Tracks connections per client and fans messages out
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional
+
+from fastapi import WebSocket
+
+from core.backplane import Backplane
+
+logger = logging.getLogger(__name__)
+
+# WebSocket close code sent to consumers that cannot keep up ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Backplane channel carrying broadcasts between workers
+BROADCAST_CHANNEL = "ws.broadcast"
+
+
+class OverflowPolicy(str, Enum):
+    """Policies applied when a connection's send queue is full."""
+    DROP_OLDEST = "drop_oldest"      # Discard the oldest queued message
+    COALESCE = "coalesce"            # Replace queued messages with the same key, else drop oldest
+    DISCONNECT = "disconnect"        # Close the slow consumer
+
+
+@dataclass
+class OutboundMessage:
+    """A serialized message waiting in a connection's send queue."""
+    payload: str                     # JSON text, shared by every connection in a broadcast
+    key: Optional[str] = None        # Coalescing key (e.g. a progress item ID)
+    enqueued_at: float = 0.0         # Monotonic enqueue time
+
+
+def serialize_message(message: Any) -> str:
+    """Serialize a message the way WebSocket.send_json does."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ClientConnection:
+    """A WebSocket connection with a bounded send queue and a writer task."""
+
+    def __init__(self,
+                 websocket: WebSocket,
+                 client_id: str,
+                 max_queue: int = 256,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+                 send_timeout: float = 10.0,
+                 latency_window: int = 256):
+        """Initialize the connection.
+
+        Args:
+            websocket: The accepted WebSocket
+            client_id: ID of the client that owns the connection
+            max_queue: Maximum queued messages before the overflow policy applies
+            overflow_policy: Policy applied when the queue is full
+            send_timeout: Seconds a single send may take before the connection is dropped
+            latency_window: Number of recent send latencies kept for percentiles
+        """
+        self.websocket = websocket
+        self.client_id = client_id
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.connected_at = time.time()
+
+        self._queue: Deque[OutboundMessage] = deque()
+        self._keyed: Dict[str, OutboundMessage] = {}
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self.closed = False
+        self.close_reason: Optional[str] = None
+
+        # Counters exported through get_stats()
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of messages waiting to be sent."""
+        return len(self._queue)
+
+    def start(self, on_closed=None):
+        """Start the writer task.
+
+        Args:
+            on_closed: Optional callback invoked with this connection when the writer exits
+        """
+        self._writer = asyncio.ensure_future(self._write_loop())
+        if on_closed is not None:
+            self._writer.add_done_callback(lambda _: on_closed(self))
+
+    def enqueue(self, message: OutboundMessage) -> bool:
+        """Queue a message without waiting for the socket.
+
+        Args:
+            message: The serialized message
+
+        Returns:
+            True if the message was queued (or merged), False if the connection is closing
+        """
+        if self.closed:
+            return False
+
+        if (self.overflow_policy == OverflowPolicy.COALESCE and message.key is not None
+                and message.key in self._keyed):
+            # Newer state for the same key replaces the queued one in place
+            queued = self._keyed[message.key]
+            queued.payload = message.payload
+            self.coalesced += 1
+            return True
+
+        if len(self._queue) >= self.max_queue:
+            if self.overflow_policy == OverflowPolicy.DISCONNECT:
+                self._mark_closed("slow consumer")
+                self._ready.set()
+                return False
+            dropped = self._queue.popleft()
+            if dropped.key is not None and self._keyed.get(dropped.key) is dropped:
+                del self._keyed[dropped.key]
+            self.dropped += 1
+
+        self._queue.append(message)
+        if message.key is not None:
+            self._keyed[message.key] = message
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._ready.set()
+        return True
+
+    async def close(self, code: int = 1000, reason: str = "closed"):
+        """Stop the writer and close the socket.
+
+        Args:
+            code: WebSocket close code
+            reason: Reason recorded in the stats
+        """
+        self._mark_closed(reason)
+        if self._writer is not None and not self._writer.done():
+            self._writer.cancel()
+        await self._close_socket(code)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and send latency for this connection.
+
+        Returns:
+            Dictionary of connection statistics
+        """
+        latencies = sorted(self._latencies)
+
+        def percentile(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3)
+
+        return {
+            "client_id": self.client_id,
+            "connected_at": self.connected_at,
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "send_latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "max": percentile(1.0)},
+            "closed": self.closed,
+            "close_reason": self.close_reason,
+            "last_error": self.last_error,
+        }
+
+    async def _write_loop(self):
+        """Drain the queue onto the socket until closed or the socket fails."""
+        try:
+            while True:
+                while not self._queue and not self.closed:
+                    self._ready.clear()
+                    await self._ready.wait()
+
+                if self.closed:
+                    if self.close_reason == "slow consumer":
+                        logger.warning(f"Disconnecting slow WebSocket consumer for client {self.client_id}")
+                        await self._close_socket(SLOW_CONSUMER_CLOSE_CODE)
+                    return
+
+                message = self._queue.popleft()
+                if message.key is not None and self._keyed.get(message.key) is message:
+                    del self._keyed[message.key]
+
+                await asyncio.wait_for(self.websocket.send_text(message.payload), self.send_timeout)
+                self.sent += 1
+                self._latencies.append(time.monotonic() - message.enqueued_at)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Dead or stalled socket: stop writing and let the manager evict it
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.info(f"WebSocket send failed for client {self.client_id}: {self.last_error}")
+            self._mark_closed("send failed")
+            await self._close_socket(1011)
+
+    def _mark_closed(self, reason: str):
+        """Stop accepting messages."""
+        if not self.closed:
+            self.closed = True
+            self.close_reason = reason
+
+    async def _close_socket(self, code: int):
+        """Close the underlying socket, ignoring errors from already-closed sockets."""
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+class ConnectionManager:
+    """Manages WebSocket connections per client and fans messages out to them."""
+
+    def __init__(self,
+                 max_queue: int = 256,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+                 send_timeout: float = 10.0):
+        """Initialize the connection manager.
+
+        Args:
+            max_queue: Maximum queued messages per connection
+            overflow_policy: Default policy when a connection's queue is full
+            send_timeout: Seconds a single send may take before the connection is dropped
+        """
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.connections: Dict[str, List[ClientConnection]] = {}
+        self.evicted = 0
+        self.backplane: Optional[Backplane] = None
+        self.instance_id = uuid.uuid4().hex  # origin tag for backplane messages
+        self.relayed = 0
+
+    @property
+    def active_connections(self) -> Dict[str, List[WebSocket]]:
+        """Open WebSockets per client."""
+        return {
+            client_id: [conn.websocket for conn in conns]
+            for client_id, conns in self.connections.items()
+        }
+
+    async def connect(self,
+                      websocket: WebSocket,
+                      client_id: str,
+                      overflow_policy: Optional[OverflowPolicy] = None) -> ClientConnection:
+        """Accept a WebSocket and start its writer.
+
+        Args:
+            websocket: The WebSocket to accept
+            client_id: ID of the client
+            overflow_policy: Optional policy overriding the manager default
+
+        Returns:
+            The registered connection
+        """
+        await websocket.accept()
+        conn = ClientConnection(
+            websocket,
+            client_id,
+            max_queue=self.max_queue,
+            overflow_policy=overflow_policy or self.overflow_policy,
+            send_timeout=self.send_timeout,
+        )
+        self.connections.setdefault(client_id, []).append(conn)
+        conn.start(on_closed=self._evict)
+        return conn
+
+    async def disconnect(self, websocket: WebSocket, client_id: str):
+        """Remove a WebSocket and stop its writer.
+
+        Args:
+            websocket: The WebSocket to remove
+            client_id: ID of the client
+        """
+        for conn in list(self.connections.get(client_id, [])):
+            if conn.websocket is websocket:
+                self._remove(conn)
+                conn._mark_closed("disconnected")
+                if conn._writer is not None and not conn._writer.done():
+                    conn._writer.cancel()
+
+    async def attach_backplane(self, backplane: Backplane):
+        """Exchange broadcasts with other workers through a backplane.
+
+        Args:
+            backplane: The backplane shared by all workers
+        """
+        if self.backplane is backplane:
+            return
+        if self.backplane is not None:
+            await self.backplane.unsubscribe(BROADCAST_CHANNEL, self._on_remote_broadcast)
+        self.backplane = backplane
+        await backplane.subscribe(BROADCAST_CHANNEL, self._on_remote_broadcast)
+
+    async def broadcast(self, message: Dict[str, Any], client_id: str, key: Optional[str] = None) -> int:
+        """Queue a message for every connection of a client.
+
+        The message is serialized once and queued on each local connection;
+        this does not wait for any socket. With a backplane attached it is
+        also published for connections held by other workers.
+
+        Args:
+            message: The message to send
+            client_id: ID of the client
+            key: Optional coalescing key; a queued message with the same key is replaced
+
+        Returns:
+            Number of local connections the message was queued on
+        """
+        payload = serialize_message(message)
+        if self.backplane is not None:
+            await self.backplane.publish(BROADCAST_CHANNEL, {
+                "origin": self.instance_id,
+                "client_id": client_id,
+                "payload": payload,
+                "key": key,
+            })
+        return self._deliver(client_id, payload, key)
+
+    async def broadcast_all(self, message: Dict[str, Any], key: Optional[str] = None) -> int:
+        """Queue a message for every local connection of every client.
+
+        Args:
+            message: The message to send
+            key: Optional coalescing key
+
+        Returns:
+            Number of connections the message was queued on
+        """
+        payload = serialize_message(message)
+        return sum(self._deliver(client_id, payload, key) for client_id in list(self.connections))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-connection queue depth and send latency.
+
+        Returns:
+            Dictionary with totals and per-client connection statistics
+        """
+        clients = {
+            client_id: [conn.get_stats() for conn in conns]
+            for client_id, conns in self.connections.items()
+        }
+        return {
+            "clients": len(clients),
+            "connections": sum(len(conns) for conns in clients.values()),
+            "evicted": self.evicted,
+            "relayed": self.relayed,
+            "per_client": clients,
+        }
+
+    async def close_all(self):
+        """Close every connection."""
+        for conns in list(self.connections.values()):
+            for conn in list(conns):
+                self._remove(conn)
+                await conn.close(1001, "server shutdown")
+
+    def _deliver(self, client_id: str, payload: str, key: Optional[str]) -> int:
+        """Queue a serialized message on a client's local connections."""
+        conns = self.connections.get(client_id)
+        if not conns:
+            return 0
+
+        now = time.monotonic()
+        queued = 0
+        for conn in list(conns):
+            # Every connection gets its own envelope so coalescing stays per connection
+            if conn.enqueue(OutboundMessage(payload, key, now)):
+                queued += 1
+        return queued
+
+    async def _on_remote_broadcast(self, message: Dict[str, Any]):
+        """Deliver a broadcast published by another worker."""
+        if message.get("origin") == self.instance_id:
+            return
+        if self._deliver(message["client_id"], message["payload"], message.get("key")):
+            self.relayed += 1
+
+    def _evict(self, conn: ClientConnection):
+        """Drop a connection whose writer has stopped."""
+        if self._remove(conn) and conn.close_reason not in ("disconnected", "server shutdown"):
+            self.evicted += 1
+            logger.info(f"Evicted WebSocket for client {conn.client_id}: {conn.close_reason}")
+
+    def _remove(self, conn: ClientConnection) -> bool:
+        """Remove a connection from the registry."""
+        conns = self.connections.get(conn.client_id)
+        if not conns or conn not in conns:
+            return False
+        conns.remove(conn)
+        if not conns:
+            del self.connections[conn.client_id]
+        return True
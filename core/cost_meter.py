@@ -0,0 +1,534 @@
+"""Real-time cost metering for LLM and tool calls.
+
+Cost accounting used to be left to the Comptroller agent, which sent raw usage
+to an LLM to add it up. This module prices every call inline from
+core/configs/pricing_data.yaml, keeps running aggregates per workflow,
+execution, agent, model and tool, and enforces budgets before further calls.
+
+Key components:
+- PricingTable: Prices loaded once and indexed by normalized model/tool id
+- CostAggregate: Running totals for one workflow/execution/agent/model/tool
+- CostBudget: Spending limit, optionally per time window, that warns, throttles or aborts when exceeded
+- CostMeter: Records calls, updates aggregates and admits calls against budgets
+- BudgetExceededError: Raised when an aborting budget is exceeded
+- summarize_costs, budget_variance: Plain arithmetic over cost reports
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Dimensions aggregates are kept for, in the order calls are attributed
+DIMENSIONS = ("workflow", "execution", "agent", "model", "tool")
+
+# Window of playbook-level budgets that do not set one: spend resets daily
+DEFAULT_PLAYBOOK_BUDGET_WINDOW = 24 * 60 * 60.0
+
+
+class BudgetAction(str, Enum):
+    """What happens when a budget is exceeded."""
+    WARN = "warn"           # Log once and keep going
+    THROTTLE = "throttle"   # Delay each further call
+    ABORT = "abort"         # Refuse further calls
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a call is refused because an aborting budget is exceeded."""
+
+    def __init__(self, budget: "CostBudget", spent: float):
+        self.budget = budget
+        self.spent = spent
+        super().__init__(
+            f"Cost budget exceeded for {budget.scope} '{budget.key}': "
+            f"${spent:.4f} spent of ${budget.limit:.4f}"
+        )
+
+
+def normalize_model_id(model: str) -> str:
+    """Normalize a model id for price lookup.
+
+    Drops a pydantic-ai provider prefix ("anthropic:") and treats dots and
+    dashes in version numbers alike, so "anthropic:claude-3-5-sonnet" and
+    "claude-3.5-sonnet" share a price.
+    """
+    name = model.split(":", 1)[1] if ":" in model else model
+    return re.sub(r"(?<=\d)[.-](?=\d)", ".", name.strip().lower())
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """Per-1K-token prices of a model."""
+    input: float = 0.0
+    output: float = 0.0
+
+
+class PricingTable:
+    """Prices indexed by normalized model id and tool name.
+
+    Lookups try the exact id and then the longest priced prefix, so dated or
+    suffixed ids ("claude-3.5-sonnet-20241022") resolve to their base price.
+    Resolved lookups are memoized.
+    """
+
+    def __init__(self, llm_pricing: Optional[Dict[str, Dict[str, float]]] = None,
+                 tool_pricing: Optional[Dict[str, Dict[str, float]]] = None):
+        """Initialize the table.
+
+        Args:
+            llm_pricing: Model id -> {input, output} USD per 1K tokens
+            tool_pricing: Tool name -> {per_call} USD
+        """
+        self.models: Dict[str, ModelPrice] = {
+            normalize_model_id(model): ModelPrice(float(p.get("input", 0)), float(p.get("output", 0)))
+            for model, p in (llm_pricing or {}).items()
+        }
+        self.tools: Dict[str, float] = {
+            tool: float((p or {}).get("per_call", 0)) for tool, p in (tool_pricing or {}).items()
+        }
+        self._prefixes = sorted(self.models, key=len, reverse=True)
+        self._resolved: Dict[str, Optional[ModelPrice]] = {}
+        self.unpriced: set = set()
+
+    @classmethod
+    def load(cls, path: str) -> "PricingTable":
+        """Load a pricing YAML file (``llm_pricing`` and ``tool_pricing`` sections)."""
+        with open(path, "r") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(data.get("llm_pricing"), data.get("tool_pricing"))
+
+    def model_price(self, model: str) -> Optional[ModelPrice]:
+        """Get a model's price, or None if it is not priced."""
+        if model in self._resolved:
+            return self._resolved[model]
+        name = normalize_model_id(model)
+        price = self.models.get(name)
+        if price is None:
+            price = next((self.models[p] for p in self._prefixes if name.startswith(p)), None)
+        if price is None and model not in self.unpriced:
+            self.unpriced.add(model)
+            logger.warning(f"No pricing for model '{model}'; its calls are metered at $0")
+        self._resolved[model] = price
+        return price
+
+    def llm_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Cost in USD of an LLM call."""
+        price = self.model_price(model)
+        if price is None:
+            return 0.0
+        return (prompt_tokens * price.input + completion_tokens * price.output) / 1000.0
+
+    def tool_cost(self, tool: str, calls: int = 1) -> float:
+        """Cost in USD of tool calls."""
+        return self.tools.get(tool, 0.0) * calls
+
+
+@dataclass
+class CostAggregate:
+    """Running totals for one key of one dimension."""
+    cost: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_calls: int = 0
+    tool_calls: int = 0
+    last_updated: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class CostBudget:
+    """Spending limit for a workflow, execution, agent, model or tool ("total" covers everything).
+
+    With a window, only spend since the current window started counts, and the
+    window restarts once it has run for ``window`` seconds.
+    """
+    scope: str
+    key: str
+    limit: float
+    action: BudgetAction = BudgetAction.ABORT
+    throttle_delay: float = 1.0     # Seconds added before each call once a throttling budget is exceeded
+    window: Optional[float] = None  # Seconds per budget window; None means the process lifetime
+    window_start: float = field(default=0.0, repr=False)
+    baseline: float = field(default=0.0, repr=False)   # Aggregate spend when the window started
+    warned: bool = field(default=False, repr=False)
+
+    def to_dict(self, spent: float) -> Dict[str, Any]:
+        return {
+            "scope": self.scope,
+            "key": self.key,
+            "limit": self.limit,
+            "action": self.action.value,
+            "window": self.window,
+            "window_start": self.window_start if self.window else None,
+            "spent": spent,
+            "remaining": max(0.0, self.limit - spent),
+            "exceeded": spent >= self.limit,
+        }
+
+
+@dataclass
+class CostEvent:
+    """One metered call."""
+    timestamp: float
+    kind: str                   # "llm" or "tool"
+    name: str                   # Model id or tool name
+    cost: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    workflow: Optional[str] = None
+    execution: Optional[str] = None
+    agent: Optional[str] = None
+    calls: int = 1
+
+
+class CostMeter:
+    """Prices calls inline and keeps streaming aggregates and budgets."""
+
+    def __init__(self, pricing: Optional[PricingTable] = None, recent_events: int = 200,
+                 max_executions: int = 1000, clock: Callable[[], float] = time.time):
+        """Initialize the meter.
+
+        Args:
+            pricing: Pricing table (defaults to an empty table)
+            recent_events: Number of recent calls kept for the dashboard
+            max_executions: Number of most recently active executions kept in the
+                execution aggregates; older ones are evicted with their budgets
+            clock: Wall clock for events and budget windows
+        """
+        self.pricing = pricing or PricingTable()
+        self.max_executions = max_executions
+        self.clock = clock
+        self.total = CostAggregate()
+        self.aggregates: Dict[str, Dict[str, CostAggregate]] = self._empty_aggregates()
+        self.budgets: Dict[Tuple[str, str], CostBudget] = {}
+        self.events: Deque[CostEvent] = deque(maxlen=recent_events)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty_aggregates() -> Dict[str, Dict[str, CostAggregate]]:
+        """Empty aggregates; executions are kept in least recently updated order."""
+        return {d: OrderedDict() if d == "execution" else {} for d in DIMENSIONS}
+
+    def _apply(self, event: CostEvent, attribution: Dict[str, Optional[str]]) -> None:
+        """Add an event to the total and every attributed aggregate."""
+        evicted = []
+        with self._lock:
+            targets = [self.total]
+            for dimension, key in attribution.items():
+                if key:
+                    targets.append(self.aggregates[dimension].setdefault(key, CostAggregate()))
+            executions = self.aggregates["execution"]
+            if attribution.get("execution"):
+                executions.move_to_end(attribution["execution"])
+                while len(executions) > self.max_executions:
+                    evicted.append(executions.popitem(last=False)[0])
+            for aggregate in targets:
+                aggregate.cost += event.cost
+                aggregate.prompt_tokens += event.prompt_tokens
+                aggregate.completion_tokens += event.completion_tokens
+                if event.kind == "llm":
+                    aggregate.llm_calls += event.calls
+                else:
+                    aggregate.tool_calls += event.calls
+                aggregate.last_updated = event.timestamp
+            self.events.append(event)
+        for execution_id in evicted:
+            self.budgets.pop(("execution", execution_id), None)
+
+    def record_llm(self, model: str, prompt_tokens: int, completion_tokens: int,
+                   workflow: Optional[str] = None, execution_id: Optional[str] = None,
+                   agent: Optional[str] = None) -> float:
+        """Meter an LLM call.
+
+        Args:
+            model: Model id
+            prompt_tokens: Prompt tokens used
+            completion_tokens: Completion tokens used
+            workflow: Workflow/playbook name
+            execution_id: Execution ID
+            agent: Agent role
+
+        Returns:
+            Cost of the call in USD
+        """
+        cost = self.pricing.llm_cost(model, prompt_tokens, completion_tokens)
+        event = CostEvent(self.clock(), "llm", model, cost, prompt_tokens, completion_tokens,
+                          workflow, execution_id, agent)
+        self._apply(event, {"workflow": workflow, "execution": execution_id, "agent": agent, "model": model})
+        return cost
+
+    def record_tool(self, tool: str, calls: int = 1, workflow: Optional[str] = None,
+                    execution_id: Optional[str] = None, agent: Optional[str] = None) -> float:
+        """Meter tool calls.
+
+        Args:
+            tool: Tool name
+            calls: Number of calls
+            workflow: Workflow/playbook name
+            execution_id: Execution ID
+            agent: Agent role or ID
+
+        Returns:
+            Cost of the calls in USD
+        """
+        cost = self.pricing.tool_cost(tool, calls)
+        event = CostEvent(self.clock(), "tool", tool, cost, workflow=workflow,
+                          execution=execution_id, agent=agent, calls=calls)
+        self._apply(event, {"workflow": workflow, "execution": execution_id, "agent": agent, "tool": tool})
+        return cost
+
+    def spent(self, scope: str, key: str) -> float:
+        """Cost so far for a key of a dimension ("total" for everything)."""
+        if scope == "total":
+            return self.total.cost
+        aggregate = self.aggregates.get(scope, {}).get(key)
+        return aggregate.cost if aggregate else 0.0
+
+    def budget_spent(self, budget: CostBudget) -> float:
+        """Cost counted against a budget, restarting its window if it has elapsed."""
+        spent = self.spent(budget.scope, budget.key)
+        if budget.window:
+            now = self.clock()
+            if now - budget.window_start >= budget.window:
+                budget.window_start, budget.baseline, budget.warned = now, spent, False
+            spent -= budget.baseline
+        return spent
+
+    def set_budget(self, scope: str, key: str, limit: float,
+                   action: BudgetAction = BudgetAction.ABORT, throttle_delay: float = 1.0,
+                   window: Optional[float] = None) -> CostBudget:
+        """Set (or replace) a budget.
+
+        Replacing a budget with the same window keeps its current window, so
+        re-applying a playbook's budget on every run does not reset its spend.
+
+        Args:
+            scope: "total" or one of the aggregate dimensions
+            key: Workflow name, execution ID, agent, model or tool ("*" for total)
+            limit: Limit in USD
+            action: What to do once the limit is reached
+            throttle_delay: Delay per call for throttling budgets
+            window: Seconds after which spend against the budget restarts from zero
+                (None counts spend over the process lifetime)
+
+        Returns:
+            The budget
+
+        Raises:
+            ValueError: If the scope is unknown or the window is not positive
+        """
+        if scope != "total" and scope not in DIMENSIONS:
+            raise ValueError(f"Unknown budget scope: {scope}")
+        if window is not None and window <= 0:
+            raise ValueError(f"Budget window must be positive: {window}")
+        budget = CostBudget(scope, key, float(limit), BudgetAction(action), throttle_delay,
+                            float(window) if window else None)
+        previous = self.budgets.get((scope, key))
+        if budget.window and previous is not None and previous.window == budget.window:
+            budget.window_start, budget.baseline = previous.window_start, previous.baseline
+        elif budget.window:
+            budget.window_start, budget.baseline = self.clock(), self.spent(scope, key)
+        self.budgets[(scope, key)] = budget
+        return budget
+
+    def remove_budget(self, scope: str, key: str) -> bool:
+        """Remove a budget; returns False if there was none."""
+        return self.budgets.pop((scope, key), None) is not None
+
+    def end_execution(self, execution_id: str) -> None:
+        """Drop the per-run budget of a finished execution.
+
+        Its aggregate stays visible until newer executions evict it.
+        """
+        self.budgets.pop(("execution", execution_id), None)
+
+    def exceeded_budgets(self, **attribution: Optional[str]) -> List[CostBudget]:
+        """Get the exceeded budgets that apply to a call.
+
+        Args:
+            **attribution: Keys of the call per dimension (workflow=..., model=...)
+
+        Returns:
+            Exceeded budgets, aborting ones first
+        """
+        exceeded = []
+        for (scope, key), budget in list(self.budgets.items()):
+            applies = scope == "total" or attribution.get(scope) == key
+            if applies and self.budget_spent(budget) >= budget.limit:
+                exceeded.append(budget)
+        order = {BudgetAction.ABORT: 0, BudgetAction.THROTTLE: 1, BudgetAction.WARN: 2}
+        return sorted(exceeded, key=lambda b: order[b.action])
+
+    async def admit(self, workflow: Optional[str] = None, execution_id: Optional[str] = None,
+                    agent: Optional[str] = None, model: Optional[str] = None,
+                    tool: Optional[str] = None) -> None:
+        """Check budgets before a call, throttling or refusing it.
+
+        Raises:
+            BudgetExceededError: If an aborting budget that applies is exceeded
+        """
+        delay = 0.0
+        for budget in self.exceeded_budgets(workflow=workflow, execution=execution_id,
+                                            agent=agent, model=model, tool=tool):
+            spent = self.budget_spent(budget)
+            if budget.action == BudgetAction.ABORT:
+                raise BudgetExceededError(budget, spent)
+            if not budget.warned:
+                budget.warned = True
+                logger.warning(f"Cost budget exceeded for {budget.scope} '{budget.key}': "
+                               f"${spent:.4f} of ${budget.limit:.4f} ({budget.action.value})")
+            if budget.action == BudgetAction.THROTTLE:
+                delay = max(delay, budget.throttle_delay)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def get_aggregates(self, dimension: str, limit: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Get the aggregates of a dimension, most expensive first.
+
+        Raises:
+            ValueError: If the dimension is unknown
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown cost dimension: {dimension}")
+        with self._lock:
+            ranked = sorted(self.aggregates[dimension].items(), key=lambda kv: kv[1].cost, reverse=True)
+            return {key: aggregate.to_dict() for key, aggregate in ranked[:limit]}
+
+    def get_budgets(self) -> List[Dict[str, Any]]:
+        """Get every budget with its current spend."""
+        return [budget.to_dict(self.budget_spent(budget)) for budget in list(self.budgets.values())]
+
+    def get_summary(self, top: int = 10) -> Dict[str, Any]:
+        """Get totals, the top keys per dimension, budgets and recent calls."""
+        with self._lock:
+            recent = [asdict(event) for event in self.events]
+            total = self.total.to_dict()
+        return {
+            "total": total,
+            "by": {dimension: self.get_aggregates(dimension, top) for dimension in DIMENSIONS},
+            "budgets": self.get_budgets(),
+            "unpriced_models": sorted(self.pricing.unpriced),
+            "recent": recent[-top:],
+        }
+
+    def reset(self) -> None:
+        """Clear aggregates and recent calls (budgets are kept)."""
+        with self._lock:
+            self.total = CostAggregate()
+            self.aggregates = self._empty_aggregates()
+            self.events.clear()
+        for budget in self.budgets.values():
+            budget.baseline = 0.0
+            budget.warned = False
+
+
+# Fraction of an annual budget that applies to a reporting period
+PERIOD_FRACTIONS = {
+    "daily": 1 / 365,
+    "weekly": 7 / 365,
+    "monthly": 1 / 12,
+    "quarterly": 1 / 4,
+    "annual": 1.0,
+}
+
+
+def _sum_costs(value: Any) -> float:
+    """Sum the numeric leaves of a cost entry (a number, or a nested mapping/list)."""
+    if isinstance(value, bool):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        if isinstance(value.get("cost"), (int, float)):
+            return float(value["cost"])
+        return sum(_sum_costs(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_sum_costs(v) for v in value)
+    return 0.0
+
+
+def summarize_costs(usage_data: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
+    """Total a cost report by top-level category.
+
+    Args:
+        usage_data: Category -> amount, or nested mappings/lists of amounts
+            (a mapping with a numeric ``cost`` counts as that amount)
+
+    Returns:
+        (total, breakdown by category)
+    """
+    breakdown = {category: round(_sum_costs(value), 2) for category, value in (usage_data or {}).items()}
+    return round(sum(breakdown.values()), 2), breakdown
+
+
+def _variance(budget: float, actual: float) -> Dict[str, Any]:
+    variance = actual - budget
+    return {
+        "budget": round(budget, 2),
+        "actual": round(actual, 2),
+        "variance": round(variance, 2),
+        "variance_percent": round(variance / budget * 100, 2) if budget else None,
+        "status": "over budget" if variance > 0 else "under budget",
+    }
+
+
+def budget_variance(total: float, breakdown: Dict[str, float], budget: Dict[str, Any],
+                    period: str = "monthly") -> Dict[str, Any]:
+    """Compare actual costs with a budget prorated to the reporting period.
+
+    Args:
+        total: Total cost for the period
+        breakdown: Cost per category
+        budget: {"total": ..., "allocated": {category: ...}, "period": "annual"}
+        period: Reporting period of the actual costs
+
+    Returns:
+        Total and per-category budget variance
+    """
+    scale = PERIOD_FRACTIONS.get(period, 1.0) / PERIOD_FRACTIONS.get(budget.get("period", "annual"), 1.0)
+    allocated = budget.get("allocated", {})
+    return {
+        "total": _variance(float(budget.get("total", 0)) * scale, total),
+        "categories": [
+            dict(category=category, **_variance(float(amount) * scale, breakdown.get(category, 0.0)))
+            for category, amount in allocated.items()
+        ],
+    }
+
+
+# Pricing is read from PRICING_DATA_PATH, or core/configs/pricing_data.yaml
+DEFAULT_PRICING_PATH = os.path.join(os.path.dirname(__file__), "configs", "pricing_data.yaml")
+
+_cost_meter: Optional[CostMeter] = None
+
+
+def get_cost_meter() -> CostMeter:
+    """Get the process-wide cost meter, loading pricing on first use."""
+    global _cost_meter
+    if _cost_meter is None:
+        path = os.getenv("PRICING_DATA_PATH", DEFAULT_PRICING_PATH)
+        try:
+            pricing = PricingTable.load(path)
+        except (OSError, yaml.YAMLError) as e:
+            logger.warning(f"Could not load pricing from {path}, metering at $0: {e}")
+            pricing = PricingTable()
+        _cost_meter = CostMeter(pricing)
+    return _cost_meter
+
+
+def set_cost_meter(meter: Optional[CostMeter]) -> None:
+    """Replace the process-wide cost meter (None resets to the default)."""
+    global _cost_meter
+    _cost_meter = meter
@@ -295,4 +295,40 @@ class User(Base):
             "is_superuser": self.is_superuser,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat()
-        } 
\ No newline at end of file
+        } 
+
+class RunRecord(Base):
+    """Model for storing run registry records.
+    
+    Backs the shared registries for playbook runs, tool executions and agent
+    tasks. The full record is kept as JSON; the fields used for filtering and
+    keyset pagination are copied into indexed columns.
+    
+    Attributes:
+        namespace: Registry the record belongs to (e.g. "playbook_runs")
+        key: Record ID within the namespace
+        status: Record status
+        owner: Owning entity (e.g. the agent of a task)
+        kind: Record kind (e.g. playbook name or tool ID)
+        created_at: ISO-8601 creation time, used as the sort key
+        updated_at: When the record was last written
+        data: The full record
+    """
+    __tablename__ = "run_records"
+
+    namespace = Column(String(64), primary_key=True)
+    key = Column(String(128), primary_key=True)
+    status = Column(String(50), nullable=True)
+    owner = Column(String(128), nullable=True)
+    kind = Column(String(255), nullable=True)
+    created_at = Column(String(40), nullable=False, default="")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    data = Column(JSON, nullable=False)
+
+    # Indexes serve (filter, newest first) listings with keyset pagination
+    __table_args__ = (
+        Index("ix_run_records_created", "namespace", "created_at", "key"),
+        Index("ix_run_records_status", "namespace", "status", "created_at", "key"),
+        Index("ix_run_records_owner", "namespace", "owner", "created_at", "key"),
+        Index("ix_run_records_kind", "namespace", "kind", "created_at", "key"),
+    )
@@ -27,6 +27,7 @@ from .tools.logger import BaseLogger
 from .progress_tracker import ProgressTracker, ProgressItemType, progress_tracker
 from .state_manager import StateManager, StateScope, state_manager
 from .recovery_system import CheckpointManager, Checkpoint
+from .cost_meter import get_cost_meter
 
 # Configure module logger
 logger = logging.getLogger(__name__)
@@ -115,6 +116,9 @@ class ExecutionRecord:
         self.prompt_tokens: int = 0
         self.completion_tokens: int = 0
         self.total_cost: float = 0.0
+        self.llm_cache_hits: int = 0
+        self.llm_cache_misses: int = 0
+        self.llm_tokens_saved: int = 0
         
         # Detailed event logs
         self.events: List[Dict[str, Any]] = []
@@ -272,8 +276,10 @@ class ExecutionRecord:
         model: str,
         prompt_tokens: int,
         completion_tokens: int,
-        cost: float,
-        context: Optional[Dict[str, Any]] = None
+        cost: Optional[float] = None,
+        context: Optional[Dict[str, Any]] = None,
+        cache_hit: Optional[bool] = None,
+        tokens_saved: int = 0
     ) -> None:
         """Log LLM usage data.
         
@@ -281,13 +287,23 @@ class ExecutionRecord:
             model: LLM model used
             prompt_tokens: Number of prompt tokens
             completion_tokens: Number of completion tokens
-            cost: Estimated cost of the API call
+            cost: Cost of the API call (priced from the pricing table if None)
             context: Additional context about the LLM usage
+            cache_hit: Whether the response came from the LLM cache (None if uncached)
+            tokens_saved: Tokens not spent thanks to a cache hit
         """
+        if cost is None:
+            cost = get_cost_meter().pricing.llm_cost(model, prompt_tokens, completion_tokens)
         self.prompt_tokens += prompt_tokens
         self.completion_tokens += completion_tokens
         self.llm_tokens_used += (prompt_tokens + completion_tokens)
         self.total_cost += cost
+        if cache_hit is not None:
+            if cache_hit:
+                self.llm_cache_hits += 1
+            else:
+                self.llm_cache_misses += 1
+            self.llm_tokens_saved += tokens_saved
         
         self.add_event(
             ExecutionStepType.CUSTOM,
@@ -298,6 +314,8 @@ class ExecutionRecord:
                 "prompt_tokens": prompt_tokens,
                 "completion_tokens": completion_tokens,
                 "cost": cost,
+                "cache_hit": cache_hit,
+                "tokens_saved": tokens_saved,
                 "context": context or {}
             }
         )
@@ -698,6 +716,9 @@ class ExecutionRecord:
             "prompt_tokens": self.prompt_tokens,
             "completion_tokens": self.completion_tokens,
             "total_cost": self.total_cost,
+            "llm_cache_hits": self.llm_cache_hits,
+            "llm_cache_misses": self.llm_cache_misses,
+            "llm_tokens_saved": self.llm_tokens_saved,
             
             # Events
             "events": self.events,
@@ -755,6 +776,9 @@ class ExecutionRecord:
         record.prompt_tokens = data.get("prompt_tokens", 0)
         record.completion_tokens = data.get("completion_tokens", 0)
         record.total_cost = data.get("total_cost", 0.0)
+        record.llm_cache_hits = data.get("llm_cache_hits", 0)
+        record.llm_cache_misses = data.get("llm_cache_misses", 0)
+        record.llm_tokens_saved = data.get("llm_tokens_saved", 0)
         
         # Events
         record.events = data.get("events", [])
@@ -1482,8 +1506,10 @@ class ExecutionLogger(BaseLogger):
         model: str,
         prompt_tokens: int,
         completion_tokens: int,
-        cost: float,
-        context: Optional[Dict[str, Any]] = None
+        cost: Optional[float] = None,
+        context: Optional[Dict[str, Any]] = None,
+        cache_hit: Optional[bool] = None,
+        tokens_saved: int = 0
     ) -> bool:
         """Log LLM API usage in an execution.
         
@@ -1492,8 +1518,10 @@ class ExecutionLogger(BaseLogger):
             model: LLM model used
             prompt_tokens: Number of prompt tokens
             completion_tokens: Number of completion tokens
-            cost: Estimated cost of the API call
+            cost: Cost of the API call (priced from the pricing table if None)
             context: Additional context about the LLM usage
+            cache_hit: Whether the response came from the LLM cache (None if uncached)
+            tokens_saved: Tokens not spent thanks to a cache hit
             
         Returns:
             True if LLM usage was logged, False otherwise
@@ -1503,12 +1531,21 @@ class ExecutionLogger(BaseLogger):
             return False
             
         record = self.active_executions[execution_id]
-        record.log_llm_usage(model, prompt_tokens, completion_tokens, cost, context)
+        if cost is None:
+            cost = get_cost_meter().pricing.llm_cost(model, prompt_tokens, completion_tokens)
+        record.log_llm_usage(model, prompt_tokens, completion_tokens, cost, context,
+                             cache_hit=cache_hit, tokens_saved=tokens_saved)
         
-        self.info(
-            f"[{execution_id}] LLM usage: {model} - {prompt_tokens} prompt, {completion_tokens} completion tokens",
-            {"cost": cost}
-        )
+        if cache_hit:
+            self.info(
+                f"[{execution_id}] LLM cache hit: {model} - {tokens_saved} tokens saved",
+                {"cost": cost}
+            )
+        else:
+            self.info(
+                f"[{execution_id}] LLM usage: {model} - {prompt_tokens} prompt, {completion_tokens} completion tokens",
+                {"cost": cost}
+            )
         return True
     
     def log_decision(
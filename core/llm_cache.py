@@ -0,0 +1,530 @@
+"""Response cache for LLM agent calls.
+
+Identical prompts come up constantly in repeated playbook runs, retries and
+evaluation loops, and each used to pay full model latency and cost. This module
+caches agent results keyed by a normalized hash of everything that determines
+the answer: model id, system prompt, messages and tool schema.
+
+Key components:
+- LLMCacheMode: off / read_write (TTL cache) / record / replay
+- LLMCachePolicy: Per-playbook opt-in, built from a playbook's ``llm_cache`` entry
+- MemoryCacheTier, SQLiteCacheTier: LRU and on-disk storage tiers
+- LLMCache: Tiered cache with hit/miss and saved-token counters
+- CachedRunResult: What a cache hit returns in place of an agent run result
+
+Record/replay makes runs deterministic offline: ``record`` always calls the
+model and stores non-expiring entries, ``replay`` serves only from the cache and
+raises LLMCacheMiss instead of calling the model.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCacheMode(str, Enum):
+    """How an opted-in playbook uses the cache."""
+    OFF = "off"
+    READ_WRITE = "read_write"   # Serve fresh entries, store misses with the TTL
+    RECORD = "record"           # Always call the model, store non-expiring entries
+    REPLAY = "replay"           # Serve from the cache only; a miss is an error
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a call has no recorded response."""
+
+
+@dataclass
+class LLMCachePolicy:
+    """Cache settings for one playbook's agents."""
+    enabled: bool = False
+    mode: LLMCacheMode = LLMCacheMode.READ_WRITE
+    ttl: Optional[float] = 3600.0          # Seconds; None never expires
+    namespace: str = "default"             # Usually the playbook name
+    execution_id: Optional[str] = None     # Execution that usage is reported against
+
+    @property
+    def active(self) -> bool:
+        """Whether calls should go through the cache."""
+        return self.enabled and self.mode != LLMCacheMode.OFF
+
+    @classmethod
+    def from_config(cls, config: Any, namespace: str = "default") -> "LLMCachePolicy":
+        """Build a policy from a playbook's ``llm_cache`` entry.
+
+        Accepts ``true``/``false`` or a mapping with ``enabled``, ``mode`` and
+        ``ttl``. The LLM_CACHE_MODE environment variable overrides the mode of
+        opted-in playbooks, e.g. to record or replay a whole benchmark run.
+
+        Args:
+            config: The ``llm_cache`` value (None means not opted in)
+            namespace: Namespace for the playbook's entries
+
+        Returns:
+            LLMCachePolicy
+        """
+        if isinstance(config, bool):
+            config = {"enabled": config}
+        config = dict(config or {})
+        enabled = bool(config.get("enabled", bool(config)))
+        mode = LLMCacheMode(os.getenv("LLM_CACHE_MODE") or config.get("mode", LLMCacheMode.READ_WRITE))
+        ttl = config.get("ttl", cls.ttl)
+        return cls(
+            enabled=enabled,
+            mode=mode,
+            ttl=float(ttl) if ttl is not None else None,
+            namespace=config.get("namespace", namespace)
+        )
+
+
+def _normalize_text(text: str) -> str:
+    """Strip trailing whitespace per line and surrounding blank lines."""
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+
+def _normalize(value: Any) -> Any:
+    """Convert a prompt component into a canonical JSON-compatible form."""
+    if isinstance(value, str):
+        return _normalize_text(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return to_jsonable(value)
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert an agent output to something json.dumps accepts."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return to_jsonable(dataclasses.asdict(value))
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_jsonable(v) for v in value]
+    return str(value)
+
+
+def make_cache_key(model: str,
+                   system_prompt: Optional[str],
+                   messages: Any,
+                   tools: Optional[Sequence[Any]] = None,
+                   namespace: str = "default") -> str:
+    """Hash everything that determines an LLM response.
+
+    Args:
+        model: Model id
+        system_prompt: System prompt / agent instructions
+        messages: Input payload and message history
+        tools: Tool names or schemas available to the model
+        namespace: Cache namespace (entries never cross namespaces)
+
+    Returns:
+        Hex SHA-256 key
+    """
+    payload = {
+        "namespace": namespace,
+        "model": model,
+        "system_prompt": _normalize(system_prompt or ""),
+        "messages": _normalize(messages),
+        "tools": sorted(json.dumps(_normalize(t), sort_keys=True) for t in (tools or [])),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def usage_tokens(result: Any) -> Tuple[int, int]:
+    """Extract (prompt, completion) token counts from an agent run result."""
+    usage = getattr(result, "usage", None)
+    if callable(usage):
+        try:
+            usage = usage()
+        except Exception:
+            usage = None
+    if usage is None:
+        return 0, 0
+    prompt = getattr(usage, "input_tokens", None) or getattr(usage, "request_tokens", None) or 0
+    completion = getattr(usage, "output_tokens", None) or getattr(usage, "response_tokens", None) or 0
+    return int(prompt), int(completion)
+
+
+@dataclass
+class CacheEntry:
+    """A stored LLM response."""
+    output: Any
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    created_at: float = 0.0
+    expires_at: Optional[float] = None
+
+    def expired(self, now: float) -> bool:
+        return self.expires_at is not None and now >= self.expires_at
+
+
+class CachedRunResult:
+    """Stand-in for an agent run result served from the cache.
+
+    Exposes ``output`` (and the older ``data`` alias) like a pydantic-ai run
+    result. ``usage()`` reports zero tokens, since nothing was spent; the
+    original usage is kept in ``saved_usage``.
+    """
+
+    cached = True
+
+    def __init__(self, entry: CacheEntry):
+        self.output = entry.output
+        self.model = entry.model
+        self.saved_usage = SimpleNamespace(
+            input_tokens=entry.prompt_tokens,
+            output_tokens=entry.completion_tokens,
+            total_tokens=entry.prompt_tokens + entry.completion_tokens
+        )
+
+    @property
+    def data(self) -> Any:
+        return self.output
+
+    def usage(self) -> SimpleNamespace:
+        return SimpleNamespace(input_tokens=0, output_tokens=0, total_tokens=0,
+                               request_tokens=0, response_tokens=0)
+
+    def new_messages(self) -> List[Any]:
+        return []
+
+    def all_messages(self) -> List[Any]:
+        return []
+
+
+class CacheTier:
+    """Storage tier interface."""
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, entry: CacheEntry, namespace: str = "default") -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCacheTier(CacheTier):
+    """Bounded in-process LRU tier."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry, namespace: str = "default") -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier(CacheTier):
+    """On-disk tier; survives restarts and can be shipped for offline replay."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, model TEXT NOT NULL, "
+            "output TEXT NOT NULL, prompt_tokens INTEGER NOT NULL, "
+            "completion_tokens INTEGER NOT NULL, created_at REAL NOT NULL, expires_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_expires ON llm_cache (expires_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output, model, prompt_tokens, completion_tokens, created_at, expires_at "
+                "FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2], row[3], row[4], row[5])
+
+    def set(self, key: str, entry: CacheEntry, namespace: str = "default") -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, namespace, model, output, prompt_tokens, "
+                "completion_tokens, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, namespace, entry.model, json.dumps(entry.output), entry.prompt_tokens,
+                 entry.completion_tokens, entry.created_at, entry.expires_at)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete expired entries; returns the number removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now if now is not None else time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class LLMCacheStats:
+    """Counters for cache effectiveness."""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    replay_misses: int = 0
+    prompt_tokens_saved: int = 0
+    completion_tokens_saved: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.prompt_tokens_saved + self.completion_tokens_saved
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dataclasses.asdict(self)
+        data.update(tokens_saved=self.tokens_saved, hit_rate=self.hit_rate)
+        return data
+
+
+class LLMCache:
+    """Tiered LLM response cache.
+
+    Lookups go through the tiers in order (memory, then disk); a hit in a
+    lower tier is promoted to the tiers above it. Writes go to every tier.
+    """
+
+    def __init__(self, tiers: Optional[List[CacheTier]] = None,
+                 clock: Callable[[], float] = time.time):
+        """Initialize the cache.
+
+        Args:
+            tiers: Storage tiers, fastest first (defaults to one memory tier)
+            clock: Wall-clock function, injectable for tests
+        """
+        self.tiers = tiers if tiers is not None else [MemoryCacheTier()]
+        self.clock = clock
+        self.stats = LLMCacheStats()
+
+    def lookup(self, key: str, honor_ttl: bool = True) -> Optional[CacheEntry]:
+        """Find an entry in the tiers.
+
+        Args:
+            key: Cache key
+            honor_ttl: Treat expired entries as missing
+
+        Returns:
+            CacheEntry or None
+        """
+        now = self.clock()
+        for depth, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is None:
+                continue
+            if honor_ttl and entry.expired(now):
+                tier.delete(key)
+                continue
+            for upper in self.tiers[:depth]:
+                upper.set(key, entry)
+            return entry
+        return None
+
+    def store(self, key: str, entry: CacheEntry, namespace: str = "default") -> None:
+        """Write an entry to every tier."""
+        for tier in self.tiers:
+            tier.set(key, entry, namespace)
+        self.stats.stores += 1
+
+    async def run(self,
+                  call: Callable[[], Awaitable[Any]],
+                  policy: LLMCachePolicy,
+                  model: str,
+                  system_prompt: Optional[str],
+                  messages: Any,
+                  tools: Optional[Sequence[Any]] = None,
+                  served_model: Optional[Callable[[], str]] = None) -> Tuple[Any, bool]:
+        """Run an LLM call through the cache according to a policy.
+
+        Args:
+            call: Zero-argument coroutine function performing the real call
+            policy: Cache policy of the calling playbook
+            model: Model id
+            system_prompt: System prompt / instructions
+            messages: Input payload and message history
+            tools: Tool names or schemas
+            served_model: Returns the model that actually answered the call (e.g. a
+                fallback); the response is stored under that model's key so it is
+                never served as another model's answer
+
+        Returns:
+            (result, hit) where result is the real run result or a CachedRunResult
+
+        Raises:
+            LLMCacheMiss: In replay mode when nothing was recorded for the call
+        """
+        if not policy.active:
+            return await call(), False
+
+        key = make_cache_key(model, system_prompt, messages, tools, policy.namespace)
+
+        if policy.mode != LLMCacheMode.RECORD:
+            entry = self.lookup(key, honor_ttl=policy.mode == LLMCacheMode.READ_WRITE)
+            if entry is not None:
+                self.stats.hits += 1
+                self.stats.prompt_tokens_saved += entry.prompt_tokens
+                self.stats.completion_tokens_saved += entry.completion_tokens
+                return CachedRunResult(entry), True
+            self.stats.misses += 1
+            if policy.mode == LLMCacheMode.REPLAY:
+                self.stats.replay_misses += 1
+                raise LLMCacheMiss(f"No recorded LLM response for {model} in '{policy.namespace}' ({key[:12]})")
+        else:
+            self.stats.misses += 1
+
+        result = await call()
+        answered_by = served_model() if served_model is not None else model
+        if answered_by != model:
+            key = make_cache_key(answered_by, system_prompt, messages, tools, policy.namespace)
+        output = getattr(result, "output", getattr(result, "data", result))
+        prompt_tokens, completion_tokens = usage_tokens(result)
+        now = self.clock()
+        expires_at = None
+        if policy.mode == LLMCacheMode.READ_WRITE and policy.ttl is not None:
+            expires_at = now + policy.ttl
+        try:
+            self.store(key, CacheEntry(to_jsonable(output), answered_by, prompt_tokens,
+                                       completion_tokens, now, expires_at), policy.namespace)
+        except (TypeError, ValueError, sqlite3.Error) as e:
+            logger.warning(f"Could not cache LLM response for {model}: {e}")
+        return result, False
+
+    def clear(self) -> None:
+        """Remove all entries from every tier."""
+        for tier in self.tiers:
+            tier.clear()
+
+
+def report_llm_usage(policy: LLMCachePolicy, model: str, result: Any, hit: bool,
+                     cache: Optional[LLMCache] = None) -> None:
+    """Report a call's usage and cache outcome to the execution logger.
+
+    Does nothing when no execution logger is initialized or the policy has no
+    execution ID.
+
+    Args:
+        policy: Policy the call ran under
+        model: Model id
+        result: Real or cached run result
+        hit: Whether the result came from the cache
+        cache: Cache whose cumulative counters are attached
+    """
+    if not policy.execution_id:
+        return
+    try:
+        from core import execution_logger as execution_logger_module
+    except Exception:
+        return
+    execution_logger = getattr(execution_logger_module, "execution_logger", None)
+    if execution_logger is None:
+        return
+
+    if hit:
+        prompt_tokens, completion_tokens = 0, 0
+        saved = result.saved_usage.total_tokens
+    else:
+        prompt_tokens, completion_tokens = usage_tokens(result)
+        saved = 0
+    context = {"llm_cache": policy.mode.value, "namespace": policy.namespace}
+    if cache is not None:
+        context["cache_stats"] = cache.stats.to_dict()
+    execution_logger.log_llm_usage(
+        policy.execution_id, model, prompt_tokens, completion_tokens, None,
+        context=context, cache_hit=hit, tokens_saved=saved
+    )
+
+
+# Global cache, configured from the environment:
+# LLM_CACHE_PATH         SQLite file for the on-disk tier (memory only if unset)
+# LLM_CACHE_MAX_ENTRIES  Size of the in-memory LRU tier (default 1024)
+# LLM_CACHE_MODE         Mode override for opted-in playbooks (record/replay/...)
+_llm_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    """Get the process-wide LLM cache, creating it on first use."""
+    global _llm_cache
+    if _llm_cache is None:
+        tiers: List[CacheTier] = [MemoryCacheTier(int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")))]
+        path = os.getenv("LLM_CACHE_PATH")
+        if path:
+            tiers.append(SQLiteCacheTier(path))
+        _llm_cache = LLMCache(tiers)
+    return _llm_cache
+
+
+def set_llm_cache(cache: Optional[LLMCache]) -> None:
+    """Replace the process-wide LLM cache (None resets to the default)."""
+    global _llm_cache
+    _llm_cache = cache
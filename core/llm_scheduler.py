@@ -0,0 +1,492 @@
+"""Central dispatch scheduler for LLM requests.
+
+Agents used to call their model as soon as they were ready, so parallel
+workflow steps and concurrent playbook runs could push far more requests and
+tokens at a provider than its limits allow, tripping 429s and burning retries.
+All agent LLM calls now go through one scheduler that admits them per
+provider (or per model, when a model has its own limits).
+
+Key components:
+- LLMPriority: Priority classes; interactive requests are admitted before batch ones
+- ProviderLimits: Concurrency, requests/min, tokens/min and spill threshold
+- TokenBucket: Per-minute rate budget that refills continuously
+- DispatchQueue: Priority queue with a concurrency limit and rate budgets
+- LLMScheduler: Routes requests to queues and spills to a fallback LLM when
+  the primary queue is saturated
+
+Token budgets are charged with an estimate (prompt size plus a completion
+reserve) when a request is admitted and corrected with the reported usage when
+it finishes.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import yaml
+from prometheus_client import Counter, Gauge, Histogram
+
+from core.llm_cache import usage_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+QUEUE_SECONDS = Histogram(
+    "llm_scheduler_queue_seconds",
+    "Time LLM requests waited for admission",
+    labelnames=["queue", "priority"],
+    buckets=(0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+IN_FLIGHT = Gauge(
+    "llm_scheduler_in_flight",
+    "LLM requests currently admitted",
+    labelnames=["queue"],
+)
+QUEUED = Gauge(
+    "llm_scheduler_queued",
+    "LLM requests waiting for admission",
+    labelnames=["queue"],
+)
+SPILLS = Counter(
+    "llm_scheduler_spills_total",
+    "LLM requests routed to a fallback because the primary queue was saturated",
+    labelnames=["queue", "fallback"],
+)
+
+
+class LLMPriority(IntEnum):
+    """Priority classes; lower values are admitted first."""
+    INTERACTIVE = 0     # A user is waiting on the answer
+    BATCH = 1           # Background and bulk work
+
+    @classmethod
+    def from_config(cls, value: Any) -> "LLMPriority":
+        """Parse a playbook's ``llm_priority`` entry (None means interactive).
+
+        Raises:
+            ValueError: If the value names no priority class
+        """
+        if value is None:
+            return cls.INTERACTIVE
+        if isinstance(value, cls):
+            return value
+        try:
+            return cls[str(value).strip().upper()]
+        except KeyError:
+            choices = ", ".join(p.name.lower() for p in cls)
+            raise ValueError(f"Invalid llm_priority {value!r}; expected one of: {choices}") from None
+
+
+@dataclass
+class ProviderLimits:
+    """Dispatch limits for one provider or model."""
+    max_concurrency: int = 8                        # Requests in flight at once
+    requests_per_minute: Optional[float] = None     # None means unlimited
+    tokens_per_minute: Optional[float] = None       # None means unlimited
+    spill_queue_depth: int = 16                     # Queued requests at which calls spill to the fallback
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProviderLimits":
+        """Create limits from a config mapping, ignoring unknown keys."""
+        return cls(**{k: v for k, v in (data or {}).items() if k in cls.__dataclass_fields__})
+
+
+# Provider inferred from a model name prefix when the id has no "provider:" part
+_MODEL_PREFIXES = (
+    ("claude", "anthropic"),
+    ("gpt", "openai"),
+    ("o1", "openai"),
+    ("o3", "openai"),
+    ("gemini", "google"),
+    ("deepseek", "deepseek"),
+)
+
+
+def provider_for_model(model: str) -> str:
+    """Get the provider of a model id.
+
+    Accepts both plain ids ("claude-3-sonnet") and pydantic-ai style ids
+    ("anthropic:claude-3-5-sonnet-latest", "google-gla:gemini-2.5-flash").
+
+    Args:
+        model: Model id
+
+    Returns:
+        Provider name
+    """
+    if ":" in model:
+        provider = model.split(":", 1)[0].lower()
+        return "google" if provider.startswith("google") else provider
+    name = model.lower()
+    for prefix, provider in _MODEL_PREFIXES:
+        if name.startswith(prefix):
+            return provider
+    return name.split("-", 1)[0]
+
+
+def estimate_tokens(prompt: Any) -> int:
+    """Roughly estimate the token count of a prompt (about 4 characters per token)."""
+    if prompt is None:
+        return 0
+    text = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Per-minute rate budget that refills continuously."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the bucket.
+
+        Args:
+            per_minute: Refill rate in units per minute
+            capacity: Maximum burst (defaults to one minute's worth)
+            clock: Monotonic clock function, injectable for tests
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else per_minute)
+        self.clock = clock
+        self.level = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be consumed (0 if it can be now)."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate > 0 else (0.0 if missing <= 0 else float("inf"))
+
+    def consume(self, amount: float) -> None:
+        """Consume ``amount``; requests larger than the capacity drain the bucket."""
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) a correction after the fact."""
+        self._refill()
+        self.level = min(self.capacity, self.level - delta)
+
+
+@dataclass
+class _Waiter:
+    """A request waiting for admission."""
+    future: asyncio.Future
+    tokens: int
+
+
+@dataclass
+class _WaitStats:
+    """Queue-time metrics for one priority class."""
+    admitted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.admitted += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "avg_wait_seconds": self.total_wait / self.admitted if self.admitted else 0.0,
+            "max_wait_seconds": self.max_wait,
+        }
+
+
+class DispatchQueue:
+    """Admission queue for one provider or model.
+
+    Requests are admitted in priority order (FIFO within a class) while
+    fewer than ``max_concurrency`` are in flight and the rate budgets cover
+    the request at the head of the queue.
+    """
+
+    def __init__(self, key: str, limits: ProviderLimits,
+                 clock: Callable[[], float] = time.monotonic):
+        self.key = key
+        self.limits = limits
+        self.clock = clock
+        self.in_flight = 0
+        self.requests = TokenBucket(limits.requests_per_minute, clock=clock) if limits.requests_per_minute else None
+        self.tokens = TokenBucket(limits.tokens_per_minute, clock=clock) if limits.tokens_per_minute else None
+        self._waiters: List[Tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.spilled_out = 0
+        self.spilled_in = 0
+        self.wait_stats: Dict[LLMPriority, _WaitStats] = {p: _WaitStats() for p in LLMPriority}
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for admission."""
+        return sum(1 for _, _, waiter in self._waiters if not waiter.future.done())
+
+    @property
+    def saturated(self) -> bool:
+        """Whether new requests should spill to a fallback."""
+        return self.queued >= self.limits.spill_queue_depth
+
+    def _rate_delay(self, tokens: int) -> float:
+        """Seconds until the rate budgets cover a request of ``tokens``."""
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.wait_time(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.wait_time(tokens))
+        return delay
+
+    def _admit(self, tokens: int) -> None:
+        if self.requests is not None:
+            self.requests.consume(1)
+        if self.tokens is not None:
+            self.tokens.consume(tokens)
+        self.in_flight += 1
+        IN_FLIGHT.labels(queue=self.key).set(self.in_flight)
+
+    async def acquire(self, tokens: int, priority: LLMPriority = LLMPriority.INTERACTIVE) -> float:
+        """Wait for admission.
+
+        Args:
+            tokens: Estimated tokens the request will use
+            priority: Priority class
+
+        Returns:
+            Seconds spent waiting
+        """
+        self.submitted += 1
+        start = self.clock()
+        if not self._waiters and self.in_flight < self.limits.max_concurrency and self._rate_delay(tokens) == 0:
+            self._admit(tokens)
+        else:
+            waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens)
+            heapq.heappush(self._waiters, (int(priority), next(self._sequence), waiter))
+            self._pump()
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Admitted just as the caller was cancelled; hand the slot back
+                    self.release()
+                else:
+                    self._pump()
+                raise
+        waited = self.clock() - start
+        self.wait_stats[LLMPriority(priority)].record(waited)
+        QUEUE_SECONDS.labels(queue=self.key, priority=LLMPriority(priority).name.lower()).observe(waited)
+        return waited
+
+    def release(self) -> None:
+        """Release an admitted request's concurrency slot."""
+        self.in_flight -= 1
+        self.completed += 1
+        IN_FLIGHT.labels(queue=self.key).set(self.in_flight)
+        self._pump()
+
+    def _pump(self) -> None:
+        """Admit waiting requests from the head of the queue."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            waiter = self._waiters[0][2]
+            if waiter.future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self.limits.max_concurrency:
+                break
+            delay = self._rate_delay(waiter.tokens)
+            if delay > 0:
+                # Re-check once the budget has refilled enough for the head request
+                self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+                break
+            heapq.heappop(self._waiters)
+            self._admit(waiter.tokens)
+            waiter.future.set_result(None)
+        QUEUED.labels(queue=self.key).set(self.queued)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue metrics."""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "spilled_out": self.spilled_out,
+            "spilled_in": self.spilled_in,
+            "limits": dict(self.limits.__dict__),
+            "wait": {p.name.lower(): stats.to_dict() for p, stats in self.wait_stats.items()},
+        }
+
+
+@dataclass
+class DispatchTicket:
+    """An admitted request."""
+    model: str                      # Model to call (the fallback if the request spilled)
+    requested_model: str
+    queue: DispatchQueue
+    estimated_tokens: int
+    queue_seconds: float = 0.0
+    settled: bool = field(default=False, repr=False)
+
+    @property
+    def spilled(self) -> bool:
+        return self.model != self.requested_model
+
+    def settle(self, actual_tokens: int) -> None:
+        """Correct the token budget with the request's reported usage."""
+        if self.settled or actual_tokens <= 0:
+            return
+        self.settled = True
+        if self.queue.tokens is not None:
+            self.queue.tokens.adjust(actual_tokens - self.estimated_tokens)
+
+
+class LLMScheduler:
+    """Admits LLM requests per provider or model and spills to fallbacks."""
+
+    def __init__(self, limits: Optional[Dict[str, ProviderLimits]] = None,
+                 default_limits: Optional[ProviderLimits] = None,
+                 completion_reserve: int = 512,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the scheduler.
+
+        Args:
+            limits: Limits keyed by provider name or model id
+            default_limits: Limits for providers without an entry
+            completion_reserve: Completion tokens assumed when estimating a request
+            clock: Monotonic clock function, injectable for tests
+        """
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits or self.limits.pop("default", None) or ProviderLimits()
+        self.completion_reserve = completion_reserve
+        self.clock = clock
+        self.queues: Dict[str, DispatchQueue] = {}
+
+    @classmethod
+    def from_config(cls, path: str) -> "LLMScheduler":
+        """Create a scheduler from a YAML file with an ``llm_limits`` mapping."""
+        with open(path, "r") as f:
+            config = yaml.safe_load(f) or {}
+        limits = {key: ProviderLimits.from_dict(value)
+                  for key, value in (config.get("llm_limits") or {}).items()}
+        return cls(limits)
+
+    def queue_key(self, model: str) -> str:
+        """Get the queue a model's requests go through."""
+        return model if model in self.limits else provider_for_model(model)
+
+    def queue(self, model: str) -> DispatchQueue:
+        """Get (or create) the queue for a model."""
+        key = self.queue_key(model)
+        queue = self.queues.get(key)
+        if queue is None:
+            limits = self.limits.get(key, self.default_limits)
+            queue = self.queues[key] = DispatchQueue(key, limits, clock=self.clock)
+        return queue
+
+    def route(self, model: str, fallback: Optional[str] = None) -> str:
+        """Pick the model to call: the fallback if the primary queue is saturated and the fallback's is not."""
+        if fallback and fallback != model:
+            primary, secondary = self.queue(model), self.queue(fallback)
+            if primary is not secondary and primary.saturated and not secondary.saturated:
+                primary.spilled_out += 1
+                secondary.spilled_in += 1
+                SPILLS.labels(queue=primary.key, fallback=secondary.key).inc()
+                logger.info(f"LLM queue {primary.key} saturated ({primary.queued} queued), spilling to {fallback}")
+                return fallback
+        return model
+
+    @asynccontextmanager
+    async def slot(self, model: str, prompt: Any = None, tokens: Optional[int] = None,
+                   priority: LLMPriority = LLMPriority.INTERACTIVE,
+                   fallback: Optional[str] = None) -> AsyncIterator[DispatchTicket]:
+        """Hold an admission slot for one request.
+
+        Args:
+            model: Primary model id
+            prompt: Prompt used to estimate tokens when ``tokens`` is not given
+            tokens: Estimated prompt tokens
+            priority: Priority class
+            fallback: Fallback model id used when the primary queue is saturated
+
+        Yields:
+            DispatchTicket naming the model to call
+        """
+        chosen = self.route(model, fallback)
+        queue = self.queue(chosen)
+        estimate = (tokens if tokens is not None else estimate_tokens(prompt)) + self.completion_reserve
+        waited = await queue.acquire(estimate, priority)
+        ticket = DispatchTicket(chosen, model, queue, estimate, waited)
+        try:
+            yield ticket
+        finally:
+            queue.release()
+
+    async def run(self, call: Callable[[str], Awaitable[T]], model: str, prompt: Any = None,
+                  tokens: Optional[int] = None, priority: LLMPriority = LLMPriority.INTERACTIVE,
+                  fallback: Optional[str] = None) -> T:
+        """Run an LLM call once admitted.
+
+        Args:
+            call: Coroutine function taking the model id to call
+            model: Primary model id
+            prompt: Prompt used to estimate tokens
+            tokens: Estimated prompt tokens
+            priority: Priority class
+            fallback: Fallback model id used when the primary queue is saturated
+
+        Returns:
+            The call's result
+        """
+        async with self.slot(model, prompt, tokens, priority, fallback) as ticket:
+            result = await call(ticket.model)
+            ticket.settle(sum(usage_tokens(result)))
+            return result
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get metrics for every queue."""
+        return {key: queue.get_stats() for key, queue in self.queues.items()}
+
+
+# Limits are read from LLM_LIMITS_CONFIG, or core/configs/llm_limits.yaml
+DEFAULT_LIMITS_CONFIG = os.path.join(os.path.dirname(__file__), "configs", "llm_limits.yaml")
+
+_llm_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get the process-wide LLM scheduler, creating it on first use."""
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        path = os.getenv("LLM_LIMITS_CONFIG", DEFAULT_LIMITS_CONFIG)
+        try:
+            _llm_scheduler = LLMScheduler.from_config(path)
+        except (OSError, yaml.YAMLError, TypeError) as e:
+            logger.warning(f"Could not load LLM limits from {path}, using defaults: {e}")
+            _llm_scheduler = LLMScheduler()
+    return _llm_scheduler
+
+
+def set_llm_scheduler(scheduler: Optional[LLMScheduler]) -> None:
+    """Replace the process-wide LLM scheduler (None resets to the configured default)."""
+    global _llm_scheduler
+    _llm_scheduler = scheduler
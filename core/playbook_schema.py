@@ -47,6 +47,9 @@ class StepMetadata(BaseModel):
     tools: List[str]
     agents: List[str]
     agent_llms: Dict[str, str]
+    llm_cache: Optional[Union[bool, Dict[str, Any]]] = None
+    llm_priority: Optional[Literal["interactive", "batch"]] = None
+    cost_budget: Optional[Union[float, Dict[str, Any]]] = None
 
 class Operation(BaseModel):
     """Operation definition for partner feedback loops and other multi-operation steps."""
@@ -215,6 +218,9 @@ class Playbook(BaseModel):
     agents: Optional[List[str]] = None
     agent_llms: Optional[Dict[str, str]] = None
     sections: Optional[List[str]] = None
+    llm_cache: Optional[Union[bool, Dict[str, Any]]] = None  # Opt-in LLM response caching
+    llm_priority: Optional[Literal["interactive", "batch"]] = None  # LLM dispatch priority class
+    cost_budget: Optional[Union[float, Dict[str, Any]]] = None  # USD limit, or {limit, action, per_run, window}
     
     class Config:
         schema_extra = {
@@ -255,7 +261,7 @@ class Playbook(BaseModel):
         
         If a metadata step exists within the steps list and contains a 'metadata' field,
         updates the playbook's top-level fields (name, description, tools, agents,
-        agent_llms, sections) with values from the metadata.
+        agent_llms, sections, llm_cache, llm_priority, cost_budget) with values from the metadata.
         """
         steps = values.get('steps', [])
         if isinstance(steps, list) and steps:
@@ -269,6 +275,9 @@ class Playbook(BaseModel):
                 values['agents'] = metadata.get('agents', values.get('agents'))
                 values['agent_llms'] = metadata.get('agent_llms', values.get('agent_llms'))
                 values['sections'] = metadata.get('sections', values.get('sections'))
+                values['llm_cache'] = metadata.get('llm_cache', values.get('llm_cache'))
+                values['llm_priority'] = metadata.get('llm_priority', values.get('llm_priority'))
+                values['cost_budget'] = metadata.get('cost_budget', values.get('cost_budget'))
         return values
 
     def to_api_format(self) -> Dict[str, Any]:
@@ -286,6 +295,9 @@ class Playbook(BaseModel):
                 "agents": self.agents,
                 "agent_llms": self.agent_llms,
                 "sections": self.sections,
+                "llm_cache": self.llm_cache,
+                "llm_priority": self.llm_priority,
+                "cost_budget": self.cost_budget,
                 "steps": [step.dict(exclude_none=True) for step in self.steps]
             },
             "metadata": {
@@ -28,6 +28,7 @@ from typing import Any, Dict, List, Optional, Set, Tuple, Union, Callable
 
 # Import required components from existing system
 from .api import manager as websocket_manager
+from .shared_registry import SharedRegistry
 from .state_manager import StateManager, StateScope, StateVariable, state_manager
 from .recovery_system import CheckpointManager, Checkpoint, CheckpointType
 
@@ -864,7 +865,8 @@ class ProgressTracker:
         self.estimator = ProgressEstimator()
         
         # Active workflows and update queue
-        self.active_workflows: Dict[str, str] = {}  # session_id -> workflow_id
+        # session_id -> {"workflow_id": ...}, shared so any worker can serve a session
+        self.active_workflows = SharedRegistry("progress_sessions")
         self._update_queue: Set[str] = set()  # item_ids with pending updates
         self._lock = Lock()
         
@@ -917,8 +919,7 @@ class ProgressTracker:
             session_id: Client session ID
             workflow_id: ID of the workflow to track
         """
-        with self._lock:
-            self.active_workflows[session_id] = workflow_id
+        await self.active_workflows.aset(session_id, {"workflow_id": workflow_id})
     
     async def unregister_session(self, session_id: str):
         """Unregister a client session.
@@ -926,9 +927,7 @@ class ProgressTracker:
         Args:
             session_id: Client session ID to unregister
         """
-        with self._lock:
-            if session_id in self.active_workflows:
-                del self.active_workflows[session_id]
+        await self.active_workflows.adelete(session_id)
     
     def create_workflow(
         self, 
@@ -1516,6 +1515,9 @@ class ProgressTracker:
                 if not items_to_update:
                     continue
                     
+                # One registry read per tick for all items
+                sessions = await self.active_workflows.aitems()
+                    
                 # Broadcast updates for each item
                 for item_id in items_to_update:
                     item = self.state.get_item(item_id)
@@ -1538,8 +1540,8 @@ class ProgressTracker:
                         
                     # Find sessions for this workflow
                     sessions_to_notify = [
-                        session_id for session_id, wf_id in self.active_workflows.items()
-                        if wf_id == workflow_id
+                        session_id for session_id, session in sessions
+                        if session.get("workflow_id") == workflow_id
                     ]
                     
                     # Broadcast update to relevant sessions
@@ -1578,7 +1580,9 @@ class ProgressTracker:
                             
                         # Broadcast to client
                         try:
-                            await websocket_manager.broadcast(update_message, session_id)
+                            # Queued intermediate updates for the same item are replaced, not piled up
+                            key = item.id if event in (ProgressEvent.UPDATED, ProgressEvent.ESTIMATED) else None
+                            await websocket_manager.broadcast(update_message, session_id, key=key)
                         except Exception as e:
                             logger.warning(f"Error broadcasting to {session_id}: {e}")
         
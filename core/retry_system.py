@@ -6,10 +6,12 @@ focuses specifically on retry logic that can be configured on a per-step basis.
 
 Key components:
 - RetryPolicy: Configurable policy for retry operations
-- RetryStrategies: Different strategies for retrying operations
+- RetryStrategies: Different strategies for retrying operations, including hedging slow attempts
 - RetryManager: Manages retry operations across workflows
 - StepRetryContext: Context for step retry operations
-- Monitors & Reporters: Track and report retry operations
+- Monitors & Reporters: Track and report retry operations from streaming aggregates
+- RetrySegmentStore: Append-only JSONL persistence for retry records
+- Circuit breakers & retry budget: Shared per-resource protection (see circuit_breaker)
 """
 
 import logging
@@ -18,16 +20,25 @@ import json
 import os
 import copy
 import asyncio
+import heapq
 import inspect
+import itertools
+import math
 import random
+import threading
 import traceback
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Set, Type, Union, TypeVar, Generic, Tuple
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Type, Union, TypeVar, Generic, Tuple
 from dataclasses import dataclass, field
 from contextlib import contextmanager, asynccontextmanager
 
+from .circuit_breaker import (
+    CircuitBreaker, CircuitBreakerConfig, CircuitBreakerRegistry, CircuitOpenError, circuit_breakers,
+    step_resource
+)
 from .recovery_system import ErrorCategory, RecoveryAction, RecoveryContext
 from .state_manager import StateManager, StateScope, StatePermission, StateVariable, state_manager
 
@@ -152,6 +163,7 @@ class StepRetryContext:
     attempt_history: List[Dict[str, Any]] = field(default_factory=list)
     retry_state: Dict[str, Any] = field(default_factory=dict)  # State preserved between retries
     additional_info: Dict[str, Any] = field(default_factory=dict)  # Additional context info
+    resource: Optional[str] = None     # Downstream resource key for shared circuit breaking
 
     def record_attempt(self, 
                       attempt_number: int, 
@@ -193,7 +205,8 @@ class StepRetryContext:
             "total_delay_ms": self.total_delay_ms,
             "attempt_history": self.attempt_history,
             "retry_state": self.retry_state,
-            "additional_info": self.additional_info
+            "additional_info": self.additional_info,
+            "resource": self.resource
         }
         return result
 
@@ -208,8 +221,6 @@ class RetryPolicy:
             config: Configuration for the retry policy, uses default if not provided
         """
         self.config = config or RetryPolicyConfig()
-        self._circuit_breaker_failures = 0
-        self._circuit_open_until = None
         
     def should_retry(self, context: StepRetryContext) -> bool:
         """Determine if a retry should be attempted.
@@ -220,10 +231,8 @@ class RetryPolicy:
         Returns:
             True if retry should be attempted, False otherwise
         """
-        # Check if circuit breaker is open (if enabled)
-        if self.config.retry_circuit_breaker and self._is_circuit_open():
-            logger.warning(f"Circuit breaker open - rejecting retry for step {context.step_id}")
-            return False
+        # Circuit breaking is left to the shared breaker of the step's resource,
+        # which strategies check before every attempt
         
         # Check retry count
         if context.retry_count >= self.config.max_retries:
@@ -309,42 +318,55 @@ class RetryPolicy:
             
         return int(delay)
     
-    def record_success(self):
-        """Record a successful operation for circuit breaker."""
-        if self.config.retry_circuit_breaker:
-            self._circuit_breaker_failures = 0
-            self._circuit_open_until = None
-    
-    def record_failure(self):
-        """Record a failed operation for circuit breaker."""
-        if not self.config.retry_circuit_breaker:
-            return
-            
-        self._circuit_breaker_failures += 1
+    def breaker_config(self) -> Optional[CircuitBreakerConfig]:
+        """Get the shared breaker configuration implied by this policy.
         
-        # Open circuit if threshold reached
-        if self._circuit_breaker_failures >= self.config.circuit_breaker_threshold:
-            self._circuit_open_until = datetime.utcnow() + timedelta(
-                milliseconds=self.config.circuit_recovery_time_ms
-            )
-            logger.warning(f"Circuit breaker opened - will recover at {self._circuit_open_until}")
+        Returns:
+            Breaker configuration if the policy enables circuit breaking, otherwise None
+        """
+        if not self.config.retry_circuit_breaker:
+            return None
+        return CircuitBreakerConfig(
+            failure_threshold=self.config.circuit_breaker_threshold,
+            recovery_time_ms=self.config.circuit_recovery_time_ms
+        )
     
-    def _is_circuit_open(self) -> bool:
-        """Check if circuit breaker is open."""
+    def breaker_resource(self, workflow_id: str, step_id: str) -> Optional[str]:
+        """Get the resource key guarding a step that names no downstream resource.
+        
+        Returns:
+            A per-step resource key if the policy enables circuit breaking, otherwise None
+        """
         if not self.config.retry_circuit_breaker:
-            return False
-            
-        if self._circuit_open_until is None:
-            return False
-            
-        # Check if recovery time has passed
-        if datetime.utcnow() > self._circuit_open_until:
-            logger.info("Circuit breaker recovery time reached - resetting to half-open state")
-            self._circuit_breaker_failures = self.config.circuit_breaker_threshold - 1
-            self._circuit_open_until = None
-            return False
-            
-        return True
+            return None
+        return step_resource(workflow_id, step_id)
+
+
+def take_primary_outcome(context: StepRetryContext, default: bool) -> Optional[bool]:
+    """Take the outcome of an attempt's primary call.
+    
+    Hedging strategies record whether the primary call succeeded, failed or
+    never finished (None) because a hedge won first. Other strategies leave
+    nothing, in which case the attempt's overall outcome applies.
+    
+    Args:
+        context: The step retry context
+        default: Outcome of the attempt as a whole
+        
+    Returns:
+        True, False, or None if the primary call did not finish
+    """
+    return context.additional_info.pop("primary_outcome", default)
+
+
+def record_breaker_outcome(breaker: CircuitBreaker, outcome: Optional[bool]):
+    """Record a call outcome on a breaker, releasing its probe slot if the call never finished."""
+    if outcome is None:
+        breaker.release()
+    elif outcome:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
 
 
 class RetryStrategy:
@@ -359,6 +381,76 @@ class RetryStrategy:
         """
         self.name = name
         self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers: CircuitBreakerRegistry = circuit_breakers
+        self.retry_monitor: Optional['RetryMonitor'] = None
+        
+    async def execute_attempt(self,
+                              context: StepRetryContext,
+                              func: Callable,
+                              *args, **kwargs) -> Any:
+        """Run a single attempt of a function.
+        
+        Args:
+            context: The step retry context
+            func: The function to execute
+            *args: Arguments for the function
+            **kwargs: Keyword arguments for the function
+            
+        Returns:
+            The result of the function
+        """
+        if inspect.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        return func(*args, **kwargs)
+        
+    def _admit_attempt(self, context: StepRetryContext, resource: Optional[str] = None,
+                       consume_budget: bool = True) -> bool:
+        """Check the shared breaker and retry budget before a retry attempt.
+        
+        Args:
+            context: The step retry context
+            resource: Resource the attempt will call, defaults to the context resource
+            consume_budget: Whether the attempt withdraws from the retry budget
+            
+        Returns:
+            True if the attempt may proceed, False otherwise
+        """
+        resource = resource or context.resource
+        if resource is None:
+            return True
+            
+        breaker = self.breakers.get(resource, self.retry_policy.breaker_config())
+        if not breaker.allow_request():
+            logger.warning(
+                f"Circuit breaker open for {resource} - skipping retry of step {context.step_id}"
+            )
+            context.additional_info["circuit_open"] = resource
+            return False
+            
+        if consume_budget and not self.breakers.retry_budget.try_acquire():
+            # Hand back any half-open probe slot claimed above
+            breaker.release()
+            logger.warning(
+                f"Retry budget exhausted - skipping retry of step {context.step_id} for {resource}"
+            )
+            context.additional_info["retry_budget_exhausted"] = True
+            return False
+            
+        return True
+        
+    def _record_outcome(self, context: StepRetryContext, success: bool, resource: Optional[str] = None):
+        """Record an attempt outcome on the shared breaker.
+        
+        Args:
+            context: The step retry context
+            success: Whether the attempt succeeded
+            resource: Resource the attempt called, defaults to the context resource
+        """
+        if resource is None:
+            resource = context.resource
+            success = take_primary_outcome(context, success)
+        if resource is not None:
+            record_breaker_outcome(self.breakers.get(resource, self.retry_policy.breaker_config()), success)
         
     async def execute_with_retry(self, 
                                context: StepRetryContext, 
@@ -405,14 +497,15 @@ class StandardRetryStrategy(RetryStrategy):
             Tuple of (result, retry_result)
         """
         while True:
+            # Every call made by the strategy is a retry of the failed first attempt
+            if not self._admit_attempt(context):
+                return None, RetryResult.POLICY_REJECTED
+                
             try:
                 start_time = time.time()
                 
                 # Execute the function
-                if inspect.iscoroutinefunction(func):
-                    result = await func(*args, **kwargs)
-                else:
-                    result = func(*args, **kwargs)
+                result = await self.execute_attempt(context, func, *args, **kwargs)
                     
                 # Calculate duration
                 duration_ms = int((time.time() - start_time) * 1000)
@@ -424,8 +517,8 @@ class StandardRetryStrategy(RetryStrategy):
                     duration_ms=duration_ms
                 )
                 
-                # Record success for circuit breaker
-                self.retry_policy.record_success()
+                # Record success for circuit breakers
+                self._record_outcome(context, True)
                 
                 return result, RetryResult.SUCCESS
                 
@@ -441,8 +534,8 @@ class StandardRetryStrategy(RetryStrategy):
                     duration_ms=duration_ms
                 )
                 
-                # Record failure for circuit breaker
-                self.retry_policy.record_failure()
+                # Record failure for circuit breakers
+                self._record_outcome(context, False)
                 
                 # Increment retry count
                 context.retry_count += 1
@@ -509,6 +602,10 @@ class GradualDegradationRetryStrategy(RetryStrategy):
             Tuple of (result, retry_result)
         """
         while True:
+            # Every call made by the strategy is a retry of the failed first attempt
+            if not self._admit_attempt(context):
+                return None, RetryResult.POLICY_REJECTED
+                
             try:
                 start_time = time.time()
                 
@@ -553,8 +650,8 @@ class GradualDegradationRetryStrategy(RetryStrategy):
                     duration_ms=duration_ms
                 )
                 
-                # Record success for circuit breaker
-                self.retry_policy.record_success()
+                # Record success for circuit breakers
+                self._record_outcome(context, True)
                 
                 return result, RetryResult.SUCCESS
                 
@@ -570,8 +667,8 @@ class GradualDegradationRetryStrategy(RetryStrategy):
                     duration_ms=duration_ms
                 )
                 
-                # Record failure for circuit breaker
-                self.retry_policy.record_failure()
+                # Record failure for circuit breakers
+                self._record_outcome(context, False)
                 
                 # Increment retry count
                 context.retry_count += 1
@@ -605,15 +702,27 @@ class FailoverRetryStrategy(RetryStrategy):
     
     def __init__(self, 
                 retry_policy: RetryPolicy = None,
-                failover_functions: List[Callable] = None):
+                failover_functions: List[Callable] = None,
+                failover_resources: List[Optional[str]] = None):
         """Initialize a failover retry strategy.
         
         Args:
             retry_policy: Policy for retry operations
             failover_functions: List of failover function implementations
+            failover_resources: Resource keys called by each failover function, in the
+                same order; failovers whose breaker is open are skipped without delay
         """
         super().__init__("failover", retry_policy)
         self.failover_functions = failover_functions or []
+        self.failover_resources = failover_resources or []
+        
+    def _resource_for(self, context: StepRetryContext, index: int) -> Optional[str]:
+        """Get the resource called by the implementation at an index (0 is the primary)."""
+        if index == 0:
+            return context.resource
+        if index - 1 < len(self.failover_resources):
+            return self.failover_resources[index - 1]
+        return None
         
     async def execute_with_retry(self, 
                                context: StepRetryContext, 
@@ -638,7 +747,21 @@ class FailoverRetryStrategy(RetryStrategy):
         
         while context.retry_count <= max_retries:
             # Select function to try
-            current_func = all_functions[min(context.retry_count, len(all_functions) - 1)]
+            index = min(context.retry_count, len(all_functions) - 1)
+            current_func = all_functions[index]
+            resource = self._resource_for(context, index)
+            
+            # Only retrying the primary's resource again counts against the retry
+            # budget; moving to a different resource does not add load to it
+            consume_budget = resource is None or resource == context.resource
+            if not self._admit_attempt(context, resource, consume_budget=consume_budget):
+                context.record_attempt(
+                    context.retry_count,
+                    RetryResult.POLICY_REJECTED,
+                    error=CircuitOpenError(resource or "retry budget")
+                )
+                context.retry_count += 1
+                continue
             
             try:
                 start_time = time.time()
@@ -665,6 +788,7 @@ class FailoverRetryStrategy(RetryStrategy):
                     RetryResult.SUCCESS,
                     duration_ms=duration_ms
                 )
+                self._record_outcome(context, True, resource)
                 
                 return result, RetryResult.SUCCESS
                 
@@ -679,6 +803,7 @@ class FailoverRetryStrategy(RetryStrategy):
                     error=e,
                     duration_ms=duration_ms
                 )
+                self._record_outcome(context, False, resource)
                 
                 # Increment retry count
                 context.retry_count += 1
@@ -707,6 +832,209 @@ class FailoverRetryStrategy(RetryStrategy):
         return None, RetryResult.MAX_RETRIES_EXCEEDED
 
 
+class HedgedRetryStrategy(StandardRetryStrategy):
+    """Strategy that races a backup attempt against a slow primary.
+    
+    Each attempt starts the primary; if it has not finished once the learned
+    latency percentile for the step has elapsed, a hedge is launched (the next
+    failover implementation, or the same function again). The first success
+    wins and the other attempts are cancelled. Hedges draw from the shared
+    retry budget, and failures still go through the standard retry loop.
+    """
+    
+    def __init__(self,
+                retry_policy: RetryPolicy = None,
+                hedge_functions: List[Callable] = None,
+                hedge_resources: List[Optional[str]] = None,
+                hedge_percentile: float = 0.95,
+                initial_hedge_delay_ms: int = 2000,
+                min_hedge_delay_ms: int = 50,
+                min_samples: int = 20,
+                latency_window: int = 500,
+                max_hedges: int = 1,
+                max_latency_keys: int = 1000):
+        """Initialize a hedged retry strategy.
+        
+        Args:
+            retry_policy: Policy for retry operations
+            hedge_functions: Implementations used for hedges, in order; the primary
+                function itself is used if none are provided
+            hedge_resources: Resource keys called by each hedge function, in the same order
+            hedge_percentile: Latency percentile (0-1) after which a hedge is launched
+            initial_hedge_delay_ms: Hedge delay used until enough latencies are recorded
+            min_hedge_delay_ms: Lower bound for the learned hedge delay
+            min_samples: Recorded latencies needed before the percentile is trusted
+            latency_window: Number of recent successful latencies kept per step
+            max_hedges: Maximum hedges launched per attempt
+            max_latency_keys: Maximum number of steps whose latencies are kept;
+                the least recently recorded step is evicted first
+        """
+        super().__init__(retry_policy)
+        self.name = "hedged"
+        self.hedge_functions = hedge_functions or []
+        self.hedge_resources = hedge_resources or []
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay_ms = initial_hedge_delay_ms
+        self.min_hedge_delay_ms = min_hedge_delay_ms
+        self.min_samples = min_samples
+        self.latency_window = latency_window
+        self.max_hedges = max_hedges
+        self.max_latency_keys = max_latency_keys
+        self._latencies: "OrderedDict[Tuple[str, str], Deque[float]]" = OrderedDict()
+        
+    def record_latency(self, workflow_id: str, step_id: str, latency_ms: float):
+        """Record a successful attempt latency for a step.
+        
+        Args:
+            workflow_id: ID of the workflow
+            step_id: ID of the step
+            latency_ms: Latency of the attempt in milliseconds
+        """
+        key = (workflow_id, step_id)
+        window = self._latencies.get(key)
+        if window is None:
+            window = self._latencies[key] = deque(maxlen=self.latency_window)
+            while len(self._latencies) > self.max_latency_keys:
+                self._latencies.popitem(last=False)
+        else:
+            self._latencies.move_to_end(key)
+        window.append(latency_ms)
+        
+    def get_hedge_delay_ms(self, workflow_id: str, step_id: str) -> float:
+        """Get the delay after which a hedge is launched for a step.
+        
+        Args:
+            workflow_id: ID of the workflow
+            step_id: ID of the step
+            
+        Returns:
+            The hedge delay in milliseconds
+        """
+        window = self._latencies.get((workflow_id, step_id))
+        if not window or len(window) < self.min_samples:
+            return float(self.initial_hedge_delay_ms)
+            
+        ordered = sorted(window)
+        index = min(len(ordered) - 1, int(self.hedge_percentile * len(ordered)))
+        return max(float(self.min_hedge_delay_ms), ordered[index])
+        
+    async def execute_attempt(self,
+                              context: StepRetryContext,
+                              func: Callable,
+                              *args, **kwargs) -> Any:
+        """Run an attempt, hedging it if the primary is slow.
+        
+        Args:
+            context: The step retry context
+            func: The primary function to execute
+            *args: Arguments for the function
+            **kwargs: Keyword arguments for the function
+            
+        Returns:
+            The result of the first successful attempt
+        
+        The outcome of the primary call (None while it has not finished) is left
+        in ``context.additional_info["primary_outcome"]`` so that callers record
+        it against the primary resource; hedge outcomes are recorded here
+        against the hedge's own resource.
+        """
+        delay_s = self.get_hedge_delay_ms(context.workflow_id, context.step_id) / 1000
+        context.additional_info["primary_outcome"] = None
+        started: Dict[asyncio.Future, Tuple[str, Optional[str], float]] = {}
+        
+        def launch(label: str, target: Callable, resource: Optional[str]) -> asyncio.Future:
+            task = asyncio.ensure_future(self._run(target, *args, **kwargs))
+            started[task] = (label, resource, time.monotonic())
+            return task
+            
+        pending = {launch("primary", func, context.resource)}
+        hedges = 0
+        first_error: Optional[BaseException] = None
+        
+        try:
+            while pending:
+                can_hedge = hedges < self.max_hedges
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=delay_s if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                for task in done:
+                    label, resource, task_start = started[task]
+                    success = task.exception() is None
+                    if label == "primary":
+                        context.additional_info["primary_outcome"] = success
+                    elif resource is not None:
+                        record_breaker_outcome(self.breakers.get(resource), success)
+                        
+                    if success:
+                        latency_ms = (time.monotonic() - task_start) * 1000
+                        self.record_latency(context.workflow_id, context.step_id, latency_ms)
+                        if hedges:
+                            self._record_hedge(context, hedge_won=label != "primary")
+                        return task.result()
+                        
+                    if first_error is None or label == "primary":
+                        first_error = task.exception()
+                        
+                if done or not can_hedge:
+                    continue
+                    
+                # Primary is slower than the learned percentile: launch a hedge
+                hedge_func, hedge_resource = self._hedge_target(context, func, hedges)
+                if not self._admit_hedge(context, hedge_resource):
+                    hedges = self.max_hedges
+                    continue
+                    
+                hedges += 1
+                context.additional_info["hedges"] = context.additional_info.get("hedges", 0) + 1
+                logger.info(
+                    f"Hedging step {context.step_id} in workflow {context.workflow_id} "
+                    f"after {delay_s * 1000:.0f}ms (hedge {hedges}/{self.max_hedges})"
+                )
+                pending.add(launch(f"hedge-{hedges}", hedge_func, hedge_resource))
+                
+            if hedges:
+                self._record_hedge(context, hedge_won=False)
+            raise first_error
+            
+        finally:
+            for task in pending:
+                task.cancel()
+                label, resource, _ = started[task]
+                if resource is not None and label != "primary":
+                    self.breakers.get(resource).release()
+                    
+    def _hedge_target(self, context: StepRetryContext, func: Callable, hedge_index: int) -> Tuple[Callable, Optional[str]]:
+        """Get the function and resource used for a hedge."""
+        if not self.hedge_functions:
+            return func, context.resource
+        index = min(hedge_index, len(self.hedge_functions) - 1)
+        resource = self.hedge_resources[index] if index < len(self.hedge_resources) else None
+        return self.hedge_functions[index], resource
+        
+    def _admit_hedge(self, context: StepRetryContext, resource: Optional[str]) -> bool:
+        """Check the breaker and retry budget before launching a hedge."""
+        if resource is not None:
+            return self._admit_attempt(context, resource)
+        if not self.breakers.retry_budget.try_acquire():
+            logger.info(f"Retry budget exhausted - not hedging step {context.step_id}")
+            return False
+        return True
+        
+    def _record_hedge(self, context: StepRetryContext, hedge_won: bool):
+        """Report the outcome of a hedged attempt to the retry monitor."""
+        if self.retry_monitor is not None:
+            self.retry_monitor.record_hedge(context.workflow_id, context.step_id, hedge_won)
+            
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a function, moving synchronous functions off the event loop so they can be raced."""
+        if inspect.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
 @dataclass
 class RetryMonitorRecord:
     """Record of a retry operation for monitoring."""
@@ -745,21 +1073,330 @@ class RetryMonitorRecord:
         }
 
 
+class QuantileSketch:
+    """Streaming quantile sketch with bounded relative error.
+    
+    Values are counted in logarithmic buckets (DDSketch style), so memory
+    grows with the dynamic range of the data rather than the number of
+    samples, and sketches can be merged.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        """Initialize the sketch.
+        
+        Args:
+            relative_accuracy: Maximum relative error of reported quantiles
+        """
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        
+    def add(self, value: float):
+        """Add a value to the sketch."""
+        if value <= 0:
+            self._zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        
+    def mean(self) -> float:
+        """Get the exact mean of the added values."""
+        return self.sum / self.count if self.count else 0.0
+        
+    def quantile(self, q: float) -> float:
+        """Estimate the value at quantile q (0-1)."""
+        if self.count == 0:
+            return 0.0
+            
+        rank = q * (self.count - 1)
+        if rank < self._zero_count:
+            return max(0.0, self.min)
+            
+        cumulative = self._zero_count
+        for index in sorted(self._buckets):
+            cumulative += self._buckets[index]
+            if cumulative > rank:
+                estimate = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+                
+        return self.max
+        
+    def percentiles(self, quantiles: Tuple[float, ...] = (0.5, 0.9, 0.99)) -> Dict[str, float]:
+        """Get several quantiles keyed as p50, p90, ..."""
+        return {f"p{int(q * 100)}": round(self.quantile(q), 3) for q in quantiles}
+        
+    def merge(self, other: 'QuantileSketch'):
+        """Merge another sketch with the same accuracy into this one."""
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+@dataclass
+class RetryAggregate:
+    """Streaming retry counters for a workflow, a step or the whole process."""
+    total_operations: int = 0          # Operations started
+    completed_operations: int = 0      # Operations with a final result
+    operations_with_retries: int = 0   # Completed operations that retried at least once
+    total_retries: int = 0             # Retries across completed operations
+    successful_operations: int = 0     # Operations that ended in success
+    retried_successes: int = 0         # Operations that succeeded after retrying
+    hedged_attempts: int = 0           # Attempts where a hedge was launched
+    hedge_wins: int = 0                # Hedged attempts won by the hedge rather than the primary
+    results: Dict[str, int] = field(default_factory=dict)  # Final result counts
+    error_categories: Dict[str, int] = field(default_factory=dict)  # Categories of operations that errored
+    delay_sketch: QuantileSketch = field(default_factory=QuantileSketch)  # Total retry delay per operation
+    duration_sketch: QuantileSketch = field(default_factory=QuantileSketch)  # Total duration per operation
+    
+    def apply(self, contribution: Tuple[int, Optional[str], Optional[str]], sign: int = 1):
+        """Add (or with sign=-1 remove) a completed record's counters.
+        
+        Args:
+            contribution: (retry_count, result, error_category) of the record
+            sign: 1 to add, -1 to remove
+        """
+        retry_count, result, error_category = contribution
+        self.completed_operations += sign
+        self.total_retries += sign * retry_count
+        if retry_count > 0:
+            self.operations_with_retries += sign
+        if result == RetryResult.SUCCESS.value:
+            self.successful_operations += sign
+            if retry_count > 0:
+                self.retried_successes += sign
+        if result:
+            self.results[result] = self.results.get(result, 0) + sign
+        if error_category:
+            self.error_categories[error_category] = self.error_categories.get(error_category, 0) + sign
+            
+    def merge(self, other: 'RetryAggregate'):
+        """Merge another aggregate into this one."""
+        self.total_operations += other.total_operations
+        self.completed_operations += other.completed_operations
+        self.operations_with_retries += other.operations_with_retries
+        self.total_retries += other.total_retries
+        self.successful_operations += other.successful_operations
+        self.retried_successes += other.retried_successes
+        self.hedged_attempts += other.hedged_attempts
+        self.hedge_wins += other.hedge_wins
+        for key, count in other.results.items():
+            self.results[key] = self.results.get(key, 0) + count
+        for key, count in other.error_categories.items():
+            self.error_categories[key] = self.error_categories.get(key, 0) + count
+        self.delay_sketch.merge(other.delay_sketch)
+        self.duration_sketch.merge(other.duration_sketch)
+        
+    def to_statistics(self) -> Dict[str, Any]:
+        """Convert to the statistics dictionary returned by RetryMonitor."""
+        total = self.total_operations
+        return {
+            "total_operations": total,
+            "operations_with_retries": self.operations_with_retries,
+            "total_retries": self.total_retries,
+            "total_attempts": self.completed_operations + self.total_retries,
+            "success_rate": self.successful_operations / total if total > 0 else 0,
+            "average_retries": self.total_retries / total if total > 0 else 0,
+            "average_delay_ms": self.delay_sketch.mean(),
+            "delay_percentiles_ms": self.delay_sketch.percentiles(),
+            "duration_percentiles_ms": self.duration_sketch.percentiles(),
+            "hedged_attempts": self.hedged_attempts,
+            "hedge_win_rate": self.hedge_wins / self.hedged_attempts if self.hedged_attempts else 0,
+            "results": {k: v for k, v in self.results.items() if v},
+        }
+
+
+class RetrySegmentStore:
+    """Append-only JSONL segment store for retry monitor records.
+    
+    Records are appended as single lines to the active segment, which is
+    sealed once it exceeds max_segment_bytes. A record may be written more
+    than once as it is updated; compact() rewrites the segments keeping the
+    latest version of each execution.
+    """
+    
+    SEGMENT_PREFIX = "segment-"
+    
+    def __init__(self, directory: str, max_segment_bytes: int = 8 * 1024 * 1024):
+        """Initialize the segment store.
+        
+        Args:
+            directory: Directory holding the segment files
+            max_segment_bytes: Size at which the active segment is sealed
+        """
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        
+        os.makedirs(directory, exist_ok=True)
+        existing = self.segments()
+        self._segment_number = self._number_of(existing[-1]) if existing else 1
+        
+    def segments(self) -> List[str]:
+        """List segment file paths, oldest first."""
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(".jsonl")
+        )
+        return [os.path.join(self.directory, name) for name in names]
+        
+    def append(self, data: Dict[str, Any]):
+        """Append a record to the active segment.
+        
+        Args:
+            data: JSON-serializable record
+        """
+        line = json.dumps(data, default=str, separators=(",", ":")) + "\n"
+        with self._lock:
+            handle = self._active_file()
+            handle.write(line)
+            handle.flush()
+            if handle.tell() >= self.max_segment_bytes:
+                handle.close()
+                self._file = None
+                self._segment_number += 1
+                
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every stored record version, oldest first."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            paths = self.segments()
+        return self._iter_paths(paths)
+        
+    def latest_records(self) -> Dict[str, Dict[str, Any]]:
+        """Get the latest version of every stored record keyed by execution ID."""
+        return self._latest(self.iter_records())
+        
+    def compact(self) -> int:
+        """Rewrite all segments keeping only the latest version of each record.
+        
+        Returns:
+            Number of records kept
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                
+            old_paths = self.segments()
+            latest = self._latest(self._iter_paths(old_paths))
+            
+            self._segment_number = (self._number_of(old_paths[-1]) + 1) if old_paths else 1
+            target = self._segment_path(self._segment_number)
+            temp_path = target + ".tmp"
+            with open(temp_path, "w") as f:
+                for data in latest.values():
+                    f.write(json.dumps(data, default=str, separators=(",", ":")) + "\n")
+            os.replace(temp_path, target)
+            
+            for path in old_paths:
+                os.remove(path)
+                
+        logger.info(f"Compacted {len(old_paths)} retry segments into {len(latest)} records")
+        return len(latest)
+        
+    def close(self):
+        """Close the active segment."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                
+    def _iter_paths(self, paths: List[str]) -> Iterator[Dict[str, Any]]:
+        """Iterate over the records in the given segment files."""
+        for path in paths:
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash; skip it
+                        logger.warning(f"Skipping corrupt retry record line in {path}")
+                        
+    def _latest(self, records: Iterator[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Keep the last version of each record, ordered by last write."""
+        latest: Dict[str, Dict[str, Any]] = {}
+        for data in records:
+            execution_id = data.get("execution_id")
+            if execution_id is not None:
+                latest.pop(execution_id, None)
+                latest[execution_id] = data
+        return latest
+        
+    def _active_file(self):
+        """Open the active segment for appending. Must be called with the lock held."""
+        if self._file is None:
+            self._file = open(self._segment_path(self._segment_number), "a")
+        return self._file
+        
+    def _segment_path(self, number: int) -> str:
+        """Get the path of a segment by number."""
+        return os.path.join(self.directory, f"{self.SEGMENT_PREFIX}{number:06d}.jsonl")
+        
+    def _number_of(self, path: str) -> int:
+        """Get the number of a segment from its path."""
+        return int(os.path.basename(path)[len(self.SEGMENT_PREFIX):-len(".jsonl")])
+
+
 class RetryMonitor:
-    """Monitors retry operations."""
+    """Monitors retry operations.
+    
+    Keeps a bounded window of recent records indexed by workflow and step,
+    streaming aggregates over every operation seen, and persists records to
+    an append-only segment store.
+    """
     
-    def __init__(self, persistence_dir: Optional[str] = None):
+    def __init__(self,
+                persistence_dir: Optional[str] = None,
+                max_records: int = 10000,
+                max_segment_bytes: int = 8 * 1024 * 1024,
+                max_aggregate_keys: int = 1000):
         """Initialize the retry monitor.
         
         Args:
             persistence_dir: Directory for persistence
+            max_records: Maximum number of records kept in memory
+            max_segment_bytes: Size at which a persistence segment is sealed
+            max_aggregate_keys: Maximum number of workflow (and of step) aggregates
+                kept; least recently updated ones without records in the window
+                are evicted first
         """
         self._persistence_dir = persistence_dir or os.path.join("data", "retry_monitor")
-        self._records: Dict[str, RetryMonitorRecord] = {}
-        
-        # Ensure persistence directory exists
-        if self._persistence_dir:
-            os.makedirs(self._persistence_dir, exist_ok=True)
+        self.max_records = max_records
+        self.max_aggregate_keys = max_aggregate_keys
+        self._lock = threading.RLock()
+        
+        # Bounded window of recent records, oldest first
+        self._records: "OrderedDict[str, RetryMonitorRecord]" = OrderedDict()
+        self._by_workflow: Dict[str, Dict[str, None]] = {}
+        self._by_step: Dict[Tuple[str, str], Dict[str, None]] = {}
+        
+        # Streaming aggregates covering every operation, including evicted ones.
+        # Per-workflow and per-step aggregates are LRU-bounded; the totals are not.
+        self._totals = RetryAggregate()
+        self._workflow_aggregates: "OrderedDict[str, RetryAggregate]" = OrderedDict()
+        self._step_aggregates: "OrderedDict[Tuple[str, str], RetryAggregate]" = OrderedDict()
+        self._contributions: Dict[str, Tuple[int, Optional[str], Optional[str]]] = {}
+        
+        self._store = RetrySegmentStore(self._persistence_dir, max_segment_bytes) if self._persistence_dir else None
             
     def start_monitoring(self, context: StepRetryContext) -> RetryMonitorRecord:
         """Start monitoring a retry operation.
@@ -780,7 +1417,10 @@ class RetryMonitor:
             initial_error=str(context.original_error)
         )
         
-        self._records[context.execution_id] = record
+        with self._lock:
+            self._add_record(record)
+            for aggregate in self._aggregates_for(record.workflow_id, record.step_id):
+                aggregate.total_operations += 1
         return record
         
     def update_record(self, context: StepRetryContext, result: RetryResult, final_error: Optional[Exception] = None):
@@ -791,23 +1431,43 @@ class RetryMonitor:
             result: The retry result
             final_error: The final error if failed
         """
-        record = self._records.get(context.execution_id)
-        
-        if record:
+        with self._lock:
+            record = self._records.get(context.execution_id)
+            if not record:
+                return
+                
             record.end_time = datetime.utcnow()
             record.retry_count = context.retry_count
             record.result = result
             record.final_error = str(final_error) if final_error else None
             record.total_delay_ms = context.total_delay_ms
             record.attempt_history = copy.deepcopy(context.attempt_history)
+            record.error_category = context.error_category
+            record.initial_error = str(context.original_error)
             
             # Calculate total duration
             if record.start_time and record.end_time:
                 record.total_duration_ms = int((record.end_time - record.start_time).total_seconds() * 1000)
                 
-            # Persist the record
-            self._persist_record(record)
+            self._aggregate(record)
             
+        # Persist the record
+        self._persist_record(record)
+            
+    def record_hedge(self, workflow_id: str, step_id: str, hedge_won: bool):
+        """Record the outcome of a hedged attempt.
+        
+        Args:
+            workflow_id: The workflow ID
+            step_id: The step ID
+            hedge_won: Whether the hedge finished first rather than the primary
+        """
+        with self._lock:
+            for aggregate in self._aggregates_for(workflow_id, step_id):
+                aggregate.hedged_attempts += 1
+                if hedge_won:
+                    aggregate.hedge_wins += 1
+                    
     def get_record(self, execution_id: str) -> Optional[RetryMonitorRecord]:
         """Get a monitoring record by execution ID.
         
@@ -820,7 +1480,7 @@ class RetryMonitor:
         return self._records.get(execution_id)
         
     def get_records_for_workflow(self, workflow_id: str) -> List[RetryMonitorRecord]:
-        """Get all monitoring records for a workflow.
+        """Get the in-memory monitoring records for a workflow.
         
         Args:
             workflow_id: The workflow ID
@@ -828,10 +1488,11 @@ class RetryMonitor:
         Returns:
             List of monitoring records
         """
-        return [r for r in self._records.values() if r.workflow_id == workflow_id]
+        with self._lock:
+            return [self._records[eid] for eid in self._by_workflow.get(workflow_id, ())]
         
     def get_records_for_step(self, workflow_id: str, step_id: str) -> List[RetryMonitorRecord]:
-        """Get all monitoring records for a specific step.
+        """Get the in-memory monitoring records for a specific step.
         
         Args:
             workflow_id: The workflow ID
@@ -840,10 +1501,51 @@ class RetryMonitor:
         Returns:
             List of monitoring records
         """
-        return [
-            r for r in self._records.values() 
-            if r.workflow_id == workflow_id and r.step_id == step_id
-        ]
+        with self._lock:
+            return [self._records[eid] for eid in self._by_step.get((workflow_id, step_id), ())]
+        
+    def get_records(self) -> List[RetryMonitorRecord]:
+        """Get all in-memory monitoring records, oldest first."""
+        with self._lock:
+            return list(self._records.values())
+        
+    def get_aggregate(self, workflow_id: Optional[str] = None, step_id: Optional[str] = None) -> RetryAggregate:
+        """Get the streaming aggregate for a scope.
+        
+        Args:
+            workflow_id: Optional workflow ID filter
+            step_id: Optional step ID filter
+            
+        Returns:
+            The aggregate; filtering by step alone merges that step across workflows
+        """
+        with self._lock:
+            if workflow_id and step_id:
+                return self._step_aggregates.get((workflow_id, step_id)) or RetryAggregate()
+            if workflow_id:
+                return self._workflow_aggregates.get(workflow_id) or RetryAggregate()
+            if step_id:
+                merged = RetryAggregate()
+                for (_, sid), aggregate in self._step_aggregates.items():
+                    if sid == step_id:
+                        merged.merge(aggregate)
+                return merged
+            return self._totals
+            
+    def get_step_aggregates(self, workflow_id: Optional[str] = None) -> Dict[Tuple[str, str], RetryAggregate]:
+        """Get per-step aggregates, optionally for one workflow.
+        
+        Args:
+            workflow_id: Optional workflow ID filter
+            
+        Returns:
+            Dictionary mapping (workflow_id, step_id) to its aggregate
+        """
+        with self._lock:
+            return {
+                key: aggregate for key, aggregate in self._step_aggregates.items()
+                if workflow_id is None or key[0] == workflow_id
+            }
         
     def get_retry_statistics(self, workflow_id: Optional[str] = None, step_id: Optional[str] = None) -> Dict[str, Any]:
         """Get retry statistics.
@@ -855,72 +1557,123 @@ class RetryMonitor:
         Returns:
             Dictionary of statistics
         """
-        records = self._records.values()
+        return self.get_aggregate(workflow_id, step_id).to_statistics()
         
-        # Apply filters
-        if workflow_id:
-            records = [r for r in records if r.workflow_id == workflow_id]
-        if step_id:
-            records = [r for r in records if r.step_id == step_id]
+    def clear_records(self):
+        """Clear all monitoring records and aggregates."""
+        with self._lock:
+            self._records.clear()
+            self._by_workflow.clear()
+            self._by_step.clear()
+            self._contributions.clear()
+            self._totals = RetryAggregate()
+            self._workflow_aggregates.clear()
+            self._step_aggregates.clear()
             
-        if not records:
-            return {
-                "total_operations": 0,
-                "operations_with_retries": 0,
-                "total_retries": 0,
-                "success_rate": 0,
-                "average_retries": 0,
-                "average_delay_ms": 0,
-                "results": {}
-            }
+    def compact(self) -> int:
+        """Compact the persisted segments.
+        
+        Returns:
+            Number of records kept
+        """
+        return self._store.compact() if self._store else 0
+        
+    def close(self):
+        """Close the persistence store."""
+        if self._store:
+            self._store.close()
+            
+    def _add_record(self, record: RetryMonitorRecord):
+        """Add a record to the window and indexes, evicting the oldest if full."""
+        execution_id = record.execution_id
+        if execution_id in self._records:
+            self._remove_record(execution_id)
             
-        # Calculate statistics
-        total_operations = len(records)
-        operations_with_retries = sum(1 for r in records if r.retry_count > 0)
-        total_retries = sum(r.retry_count for r in records)
-        successful_operations = sum(1 for r in records if r.result == RetryResult.SUCCESS)
-        
-        # Result distribution
-        result_counts = {}
-        for r in records:
-            if r.result:
-                result_counts[r.result.value] = result_counts.get(r.result.value, 0) + 1
-                
-        # Calculate averages
-        average_retries = total_retries / total_operations if total_operations > 0 else 0
-        average_delay_ms = (
-            sum(r.total_delay_ms for r in records if r.total_delay_ms is not None) / 
-            sum(1 for r in records if r.total_delay_ms is not None)
-        ) if any(r.total_delay_ms is not None for r in records) else 0
+        self._records[execution_id] = record
+        self._by_workflow.setdefault(record.workflow_id, {})[execution_id] = None
+        self._by_step.setdefault((record.workflow_id, record.step_id), {})[execution_id] = None
         
-        return {
-            "total_operations": total_operations,
-            "operations_with_retries": operations_with_retries,
-            "total_retries": total_retries,
-            "success_rate": successful_operations / total_operations if total_operations > 0 else 0,
-            "average_retries": average_retries,
-            "average_delay_ms": average_delay_ms,
-            "results": result_counts
-        }
+        while len(self._records) > self.max_records:
+            self._remove_record(next(iter(self._records)))
+            
+    def _remove_record(self, execution_id: str):
+        """Drop a record from the window and indexes; aggregates are kept."""
+        record = self._records.pop(execution_id, None)
+        self._contributions.pop(execution_id, None)
+        if record is None:
+            return
+            
+        for index, key in ((self._by_workflow, record.workflow_id),
+                           (self._by_step, (record.workflow_id, record.step_id))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(execution_id, None)
+                if not ids:
+                    del index[key]
+                    
+    def _aggregates_for(self, workflow_id: str, step_id: str) -> List[RetryAggregate]:
+        """Get the global, workflow and step aggregates a step contributes to."""
+        step_key = (workflow_id, step_id)
+        workflow = self._touch_aggregate(self._workflow_aggregates, self._by_workflow, workflow_id)
+        step = self._touch_aggregate(self._step_aggregates, self._by_step, step_key)
+        return [self._totals, workflow, step]
+        
+    def _touch_aggregate(self, aggregates: "OrderedDict[Any, RetryAggregate]",
+                         index: Dict[Any, Dict[str, None]], key: Any) -> RetryAggregate:
+        """Get or create an aggregate as most recently used, evicting idle ones over the cap.
+        
+        Aggregates whose key still has records in the window are never evicted,
+        since updating those records must subtract their previous counters.
+        """
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = aggregates[key] = RetryAggregate()
+        else:
+            aggregates.move_to_end(key)
+            
+        excess = len(aggregates) - self.max_aggregate_keys
+        if excess > 0:
+            idle = (k for k in aggregates if k != key and k not in index)
+            for stale in list(itertools.islice(idle, excess)):
+                del aggregates[stale]
+        return aggregate
+        
+    def _aggregate(self, record: RetryMonitorRecord):
+        """Fold a completed record into the aggregates.
+        
+        A record can be updated more than once (e.g. a strategy result followed
+        by the final error), so its previous counters are replaced. Sketches
+        only take the first completion.
+        """
+        errored = bool(record.attempt_history) or record.result != RetryResult.SUCCESS
+        contribution = (
+            record.retry_count,
+            record.result.value if record.result else None,
+            record.error_category.value if errored and record.error_category else None,
+        )
+        previous = self._contributions.get(record.execution_id)
         
-    def clear_records(self):
-        """Clear all monitoring records."""
-        self._records.clear()
+        for aggregate in self._aggregates_for(record.workflow_id, record.step_id):
+            if previous is not None:
+                aggregate.apply(previous, sign=-1)
+            aggregate.apply(contribution)
+            if previous is None:
+                aggregate.delay_sketch.add(record.total_delay_ms or 0)
+                aggregate.duration_sketch.add(record.total_duration_ms or 0)
+                
+        self._contributions[record.execution_id] = contribution
         
     def _persist_record(self, record: RetryMonitorRecord):
-        """Persist a monitoring record to disk.
+        """Append a monitoring record to the segment store.
         
         Args:
             record: The record to persist
         """
-        if not self._persistence_dir:
+        if not self._store:
             return
             
-        filepath = os.path.join(self._persistence_dir, f"{record.execution_id}.json")
-        
         try:
-            with open(filepath, 'w') as f:
-                json.dump(record.to_dict(), f, default=str, indent=2)
+            self._store.append(record.to_dict())
         except Exception as e:
             logger.error(f"Error persisting retry monitor record: {e}")
 
@@ -939,7 +1692,7 @@ class RetryReporter:
     def generate_summary_report(self, 
                               workflow_id: Optional[str] = None, 
                               step_id: Optional[str] = None) -> Dict[str, Any]:
-        """Generate a summary report.
+        """Generate a summary report from the monitor's aggregates.
         
         Args:
             workflow_id: Optional workflow ID filter
@@ -948,63 +1701,36 @@ class RetryReporter:
         Returns:
             Dictionary with report data
         """
-        stats = self.retry_monitor.get_retry_statistics(workflow_id, step_id)
+        aggregate = self.retry_monitor.get_aggregate(workflow_id, step_id)
         
-        # Get records based on filters
-        records = []
-        if workflow_id and step_id:
-            records = self.retry_monitor.get_records_for_step(workflow_id, step_id)
-        elif workflow_id:
-            records = self.retry_monitor.get_records_for_workflow(workflow_id)
-        else:
-            records = list(self.retry_monitor._records.values())
-            
-        # Get error categories
-        error_categories = {}
-        for r in records:
-            if r.error_category:
-                category = r.error_category.value
-                error_categories[category] = error_categories.get(category, 0) + 1
-                
         # Get most retried steps
-        step_retries = {}
-        for r in records:
-            key = f"{r.workflow_id}:{r.step_id}"
-            if r.retry_count > 0:
-                if key not in step_retries:
-                    step_retries[key] = {
-                        "workflow_id": r.workflow_id,
-                        "step_id": r.step_id,
-                        "total_retries": 0,
-                        "operations": 0,
-                        "success_rate": 0
-                    }
-                step_retries[key]["total_retries"] += r.retry_count
-                step_retries[key]["operations"] += 1
-                if r.result == RetryResult.SUCCESS:
-                    step_retries[key]["success_rate"] += 1
-        
-        # Calculate success rates
-        for key, data in step_retries.items():
-            if data["operations"] > 0:
-                data["success_rate"] = data["success_rate"] / data["operations"]
+        step_retries = []
+        for (wf_id, s_id), step in self.retry_monitor.get_step_aggregates(workflow_id).items():
+            if step_id and s_id != step_id:
+                continue
+            if step.operations_with_retries == 0:
+                continue
+            step_retries.append({
+                "workflow_id": wf_id,
+                "step_id": s_id,
+                "total_retries": step.total_retries,
+                "operations": step.operations_with_retries,
+                "success_rate": step.retried_successes / step.operations_with_retries
+            })
                 
         # Sort steps by total retries
-        most_retried_steps = sorted(
-            step_retries.values(), 
-            key=lambda x: x["total_retries"], 
-            reverse=True
-        )[:10]  # Top 10
+        most_retried_steps = heapq.nlargest(10, step_retries, key=lambda x: x["total_retries"])  # Top 10
         
         return {
             "timestamp": datetime.utcnow().isoformat(),
             "workflow_id": workflow_id,
             "step_id": step_id,
-            "statistics": stats,
-            "error_categories": error_categories,
+            "statistics": aggregate.to_statistics(),
+            "error_categories": {k: v for k, v in aggregate.error_categories.items() if v},
             "most_retried_steps": most_retried_steps
         }
         
+        
     def generate_detailed_report(self, 
                                workflow_id: str, 
                                step_id: Optional[str] = None) -> Dict[str, Any]:
@@ -1086,10 +1812,14 @@ class RetryManager:
         self._strategy_registry: Dict[str, RetryStrategy] = {
             "standard": StandardRetryStrategy(),
             "gradual_degradation": GradualDegradationRetryStrategy(),
-            "failover": FailoverRetryStrategy()
+            "failover": FailoverRetryStrategy(),
+            "hedged": HedgedRetryStrategy()
         }
         self._step_strategy_mapping: Dict[str, Dict[str, str]] = {}  # workflow_id -> step_id -> strategy_name
         
+        # Shared circuit breakers and retry budget
+        self.breakers: CircuitBreakerRegistry = circuit_breakers
+        
         # Default policy
         self.register_policy("default", RetryPolicy())
         
@@ -1191,7 +1921,9 @@ class RetryManager:
                                func: Callable,
                                error_categorizer: Callable[[Exception], ErrorCategory] = None,
                                max_retries: Optional[int] = None,
-                               *args, **kwargs) -> Tuple[Any, RetryResult]:
+                               *args,
+                               resource: Optional[str] = None,
+                               **kwargs) -> Tuple[Any, RetryResult]:
         """Execute a function with retry logic.
         
         Args:
@@ -1201,17 +1933,27 @@ class RetryManager:
             error_categorizer: Function to categorize errors, uses the default if not provided
             max_retries: Optional maximum retries, uses policy default if not provided
             *args: Arguments for the function
+            resource: Optional downstream resource key (e.g. "llm:openai/gpt-4"); calls are
+                guarded by the shared circuit breaker and retries by the retry budget
             **kwargs: Keyword arguments for the function
             
         Returns:
             Tuple of (result, retry_result)
+            
+        Raises:
+            CircuitOpenError: If the resource's circuit breaker is open
         """
         # Get policy and strategy for this step
         policy = self.get_policy_for_step(workflow_id, step_id)
         strategy = self.get_strategy_for_step(workflow_id, step_id)
         
-        # Ensure strategy uses the correct policy
+        # Ensure strategy uses the correct policy, breakers and monitor
         strategy.retry_policy = policy
+        strategy.breakers = self.breakers
+        strategy.retry_monitor = self.retry_monitor
+        
+        # Steps without a resource still get a shared breaker if the policy asks for one
+        resource = resource or policy.breaker_resource(workflow_id, step_id)
         
         # Create execution ID
         execution_id = f"{workflow_id}_{step_id}_{datetime.utcnow().isoformat()}"
@@ -1230,18 +1972,32 @@ class RetryManager:
             max_retries=max_retries or policy.config.max_retries,
             # These will be populated on first error
             original_error=Exception("Placeholder"),
-            error_category=ErrorCategory.UNKNOWN
+            error_category=ErrorCategory.UNKNOWN,
+            resource=resource
         )
         
         # Start monitoring
         self.retry_monitor.start_monitoring(context)
         
+        if resource is not None:
+            # Fail fast instead of adding load to a resource that is known to be down
+            breaker = self.breakers.get(resource, policy.breaker_config())
+            if not breaker.allow_request():
+                error = CircuitOpenError(resource, breaker.retry_after())
+                context.original_error = error
+                self.retry_monitor.update_record(context, RetryResult.POLICY_REJECTED, error)
+                raise error
+                
+        # Every first attempt earns retry budget
+        self.breakers.retry_budget.record_request()
+        
         try:
-            # Try to execute without retry first
-            if inspect.iscoroutinefunction(func):
-                result = await func(*args, **kwargs)
-            else:
-                result = func(*args, **kwargs)
+            # Try to execute without retry first (hedging strategies may race it)
+            result = await strategy.execute_attempt(context, func, *args, **kwargs)
+                
+            if resource is not None:
+                # A hedge may have won while the primary call failed or was cancelled
+                record_breaker_outcome(breaker, take_primary_outcome(context, True))
                 
             # Update monitor with success
             self.retry_monitor.update_record(context, RetryResult.SUCCESS)
@@ -1249,6 +2005,9 @@ class RetryManager:
             return result, RetryResult.SUCCESS
             
         except Exception as e:
+            if resource is not None:
+                record_breaker_outcome(breaker, take_primary_outcome(context, False))
+                
             # Categorize the error
             error_category = error_categorizer(e)
             
@@ -1449,7 +2208,9 @@ async def with_retry(
     step_id: str,
     retry_manager_instance: RetryManager = None,
     max_retries: Optional[int] = None,
-    *args, **kwargs
+    *args,
+    resource: Optional[str] = None,
+    **kwargs
 ) -> Any:
     """Execute a function with retry logic.
     
@@ -1460,6 +2221,7 @@ async def with_retry(
         retry_manager_instance: The retry manager to use, uses global if not provided
         max_retries: Optional maximum retries
         *args: Arguments for the function
+        resource: Optional downstream resource key guarded by the shared circuit breaker
         **kwargs: Keyword arguments for the function
         
     Returns:
@@ -1478,7 +2240,23 @@ async def with_retry(
         step_id=step_id,
         func=func,
         max_retries=max_retries,
-        *args, **kwargs
+        *args,
+        resource=resource,
+        **kwargs
     )
     
-    return result
\ No newline at end of file
+    return result
+
+
+def get_retry_metrics(retry_manager_instance: RetryManager = None) -> Dict[str, Any]:
+    """Get circuit breaker states and retry budget consumption.
+    
+    Args:
+        retry_manager_instance: The retry manager to report on, uses global if not provided
+        
+    Returns:
+        Dictionary of breaker and budget metrics
+    """
+    rm = retry_manager_instance if retry_manager_instance is not None else retry_manager
+    registry = rm.breakers if rm is not None else circuit_breakers
+    return registry.get_metrics()
@@ -233,6 +233,22 @@ class ToolExecuteRequest(BaseModel):
             raise ValueError("Timeout must be a positive integer")
         return v
 
+class CostBudgetRequest(BaseModel):
+    """Request model for setting a cost budget."""
+    scope: str = Field(..., description="Budget scope: total, workflow, execution, agent, model or tool")
+    key: str = Field("*", description="Workflow name, execution ID, agent, model or tool the budget applies to")
+    limit: float = Field(..., description="Budget limit in USD")
+    action: str = Field("abort", description="Action when exceeded: warn, throttle or abort")
+    throttle_delay: float = Field(1.0, description="Delay in seconds added per call while throttling")
+    window: Optional[float] = Field(None, gt=0, description="Seconds after which spend against the budget restarts; omit for no reset")
+    
+    @field_validator('limit')
+    def validate_limit(cls, v):
+        """Validate budget limit."""
+        if v <= 0:
+            raise ValueError("Budget limit must be positive")
+        return v
+
 # Export key types
 __all__ = [
     'AgentType',
@@ -244,5 +260,6 @@ __all__ = [
     'TaskCreateRequest',
     'AgentCreateRequest',
     'ToolCreateRequest',
-    'ToolExecuteRequest'
+    'ToolExecuteRequest',
+    'CostBudgetRequest'
 ]
\ No newline at end of file
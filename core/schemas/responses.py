@@ -10,6 +10,7 @@ from typing import Generic, TypeVar, Optional, Dict, Any, List, Union
 # Reference: https://ai.pydantic.dev/agents/
 from pydantic import BaseModel, Field, create_model, field_validator
 from datetime import datetime
+from fastapi.encoders import jsonable_encoder
 
 # Type variable for response data
 T = TypeVar('T')
@@ -78,6 +79,7 @@ class PaginatedResponseMetadata(BaseModel):
     pages: int = Field(..., description="Total number of pages")
     has_next: bool = Field(..., description="Whether there is a next page")
     has_prev: bool = Field(..., description="Whether there is a previous page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page (keyset pagination)")
 
 class PaginatedResponse(APIResponse[List[T]], Generic[T]):
     """Paginated API response model.
@@ -105,14 +107,14 @@ def create_response(
         metadata: Additional metadata
         
     Returns:
-        Standardized response dictionary
+        Standardized, JSON-serializable response dictionary
     """
     response = {
         "success": success,
         "message": message,
-        "data": data,
-        "error": ErrorDetails(**error) if error else None,
-        "metadata": ResponseMetadata(**(metadata or {}))
+        "data": jsonable_encoder(data),
+        "error": ErrorDetails(**error).model_dump(mode="json") if error else None,
+        "metadata": ResponseMetadata(**(metadata or {})).model_dump(mode="json")
     }
     
     return response
@@ -124,7 +126,9 @@ def paginated_response(
     total_count: int,
     page: int,
     page_size: int,
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None,
+    next_cursor: Optional[str] = None,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
     """Create a standardized paginated API response.
     
@@ -136,9 +140,12 @@ def paginated_response(
         page: Current page number
         page_size: Number of items per page
         metadata: Additional metadata
+        next_cursor: Cursor for the next page, for keyset-paginated listings
+        cursor: Cursor the page was requested with; when given, ``page`` is not
+            meaningful and only ``next_cursor`` tells whether more pages follow
         
     Returns:
-        Standardized paginated response dictionary
+        Standardized, JSON-serializable paginated response dictionary
     """
     pages = (total_count + page_size - 1) // page_size if page_size > 0 else 0
     
@@ -154,9 +161,10 @@ def paginated_response(
         page_size=page_size,
         page=page,
         pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
-    )
+        has_next=next_cursor is not None if cursor is not None else (next_cursor is not None or page < pages),
+        has_prev=cursor is not None or page > 1,
+        next_cursor=next_cursor
+    ).model_dump(mode="json")
     
     return response
 
@@ -0,0 +1,986 @@
+# MIT License - Copyright (c) 2024 Wrench AI
+# For full license information, see the LICENSE file in the repo root.
+
+"""Shared registries for state that every API worker must see.
+
+Run, execution and agent records used to be module-level dicts, so a status
+request landing on a different worker than the one that created the record
+returned 404, and the dicts grew for the life of the process. SharedRegistry
+keeps the dict interface but stores records in a pluggable backend shared by
+all workers, with a bounded, short-lived local cache (the hot set) in front.
+
+Records are plain dicts. Mutating a record returned by the registry changes
+the cached copy only; call ``save(key)`` or use ``patch(key, ...)`` to publish
+the change to other workers.
+
+Async code uses the ``a``-prefixed methods (``aget``, ``aset``, ``apatch``,
+``apage``, ...), which run calls to network and database stores in a worker
+thread so they do not block the event loop.
+
+Listings use keyset pagination over (created_at, key), newest first, with
+optional filters on the indexed status, owner and kind fields. The SQL and
+Redis stores answer these from indexes; the in-memory store filters in memory.
+
+Key components:
+- RegistryStore: Interface for namespaced record storage
+- InMemoryRegistryStore: Process-local store with TTL eviction of finished records (single worker, tests)
+- RedisRegistryStore: Redis hash per namespace with sorted-set indexes and expiry, for multi-worker deployments
+- SQLRegistryStore: SQLite/Postgres store using the RunRecord model
+- SharedRegistry: Dict-like registry with a read-through local cache
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Any, Callable, Collection, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, create_engine, func, or_, select
+from sqlalchemy.pool import StaticPool
+
+from core.db.models import RunRecord
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Fields copied out of records for filtering and ordering
+INDEX_FIELDS = ("status", "owner", "kind")
+
+# Finished records the Redis store evicts per write, bounding the work a sweep adds
+SWEEP_BATCH = 100
+
+# Default age (seconds) after which finished records leave the in-memory and Redis stores
+DEFAULT_MEMORY_TTL = 24 * 3600
+
+# Record statuses after which a run, task or execution no longer changes
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled", "error"})
+
+
+def encode_cursor(created_at: str, key: str) -> str:
+    """Encode a keyset pagination cursor."""
+    raw = json.dumps([created_at, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a keyset pagination cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, key = json.loads(raw)
+        return str(created_at), str(key)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class RegistryStore:
+    """Interface for namespaced record storage."""
+
+    #: Whether query() and count() with filters are implemented natively
+    supports_query = False
+
+    #: Whether calls block on I/O (async callers then run them in a worker thread)
+    blocking = True
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """Get a record, or None if it does not exist."""
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Dict[str, Any], index: Optional[Dict[str, str]] = None):
+        """Create or replace a record.
+
+        Args:
+            namespace: Registry namespace
+            key: Record key
+            value: The record
+            index: Indexed fields (status, owner, kind, created_at) extracted from the
+                record, and "terminal", whether the record has reached a final status
+        """
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """Delete a record, returning whether it existed."""
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> List[str]:
+        """List record keys in a namespace."""
+        raise NotImplementedError
+
+    def items(self, namespace: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """List (key, record) pairs in a namespace."""
+        raise NotImplementedError
+
+    def count(self, namespace: str, filters: Optional[Dict[str, str]] = None) -> int:
+        """Count records in a namespace (filters need supports_query)."""
+        if filters:
+            raise NotImplementedError
+        return len(self.keys(namespace))
+
+    def patch(self,
+              namespace: str,
+              key: str,
+              fields: Dict[str, Any],
+              index_for: Callable[[Dict[str, Any]], Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """Update fields of a record if it exists.
+
+        Shared stores override this to make the read-modify-write atomic.
+
+        Args:
+            namespace: Registry namespace
+            key: Record key
+            fields: Fields to set
+            index_for: Function extracting the indexed fields of the updated record
+
+        Returns:
+            The updated record, or None if it does not exist
+        """
+        value = self.get(namespace, key)
+        if value is None:
+            return None
+        value.update(fields)
+        self.set(namespace, key, value, index_for(value))
+        return value
+
+    def query(self,
+              namespace: str,
+              filters: Dict[str, str],
+              limit: int,
+              after: Optional[Tuple[str, str]] = None,
+              offset: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+        """List records newest first (needs supports_query).
+
+        Args:
+            namespace: Registry namespace
+            filters: Equality filters on indexed fields
+            limit: Maximum records to return
+            after: Keyset position (created_at, key) to continue after
+            offset: Records to skip (when no keyset position is given)
+
+        Returns:
+            List of (key, record) pairs
+        """
+        raise NotImplementedError
+
+
+class InMemoryRegistryStore(RegistryStore):
+    """Process-local store.
+
+    Records are kept by reference, so in-place mutations are visible without
+    ``save`` — the behaviour the module-level dicts used to have. This store
+    holds the only copy of its records, so the TTL only applies to records in
+    a terminal status: finished records not written for ``ttl`` seconds are
+    evicted, while pending and running records and those of registries
+    without terminal statuses (such as agents) are kept until deleted.
+    """
+
+    blocking = False
+
+    def __init__(self, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """Initialize the store.
+
+        Args:
+            ttl: Seconds after the last write before a finished record is evicted
+                (None keeps records)
+            clock: Monotonic clock, injectable for tests
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Finished records by last write time, oldest first
+        self._expiry: Dict[str, "OrderedDict[str, float]"] = {}
+        self.evicted = 0
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        self._sweep(namespace)
+        return self._data.get(namespace, {}).get(key)
+
+    def set(self, namespace: str, key: str, value: Dict[str, Any], index: Optional[Dict[str, str]] = None):
+        self._data.setdefault(namespace, {})[key] = value
+        expiry = self._expiry.setdefault(namespace, OrderedDict())
+        expiry.pop(key, None)
+        if index and index.get("terminal"):
+            expiry[key] = self._clock()
+        self._sweep(namespace)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        self._expiry.get(namespace, {}).pop(key, None)
+        return self._data.get(namespace, {}).pop(key, None) is not None
+
+    def keys(self, namespace: str) -> List[str]:
+        self._sweep(namespace)
+        return list(self._data.get(namespace, {}))
+
+    def items(self, namespace: str) -> List[Tuple[str, Dict[str, Any]]]:
+        self._sweep(namespace)
+        return list(self._data.get(namespace, {}).items())
+
+    def _sweep(self, namespace: str):
+        """Evict finished records whose last write is older than the TTL."""
+        if self.ttl is None:
+            return
+        expiry = self._expiry.get(namespace)
+        if not expiry:
+            return
+        cutoff = self._clock() - self.ttl
+        records = self._data[namespace]
+        while expiry:
+            key, written_at = next(iter(expiry.items()))
+            if written_at > cutoff:
+                break
+            del expiry[key]
+            records.pop(key, None)
+            self.evicted += 1
+
+
+class RedisRegistryStore(RegistryStore):
+    """Store keeping each namespace in Redis, indexed for keyset pagination.
+
+    Records are JSON values in one hash per namespace, next to a hash of their
+    indexed fields. Listing order lives in sorted sets of ``created_at\\0key``
+    members at equal score, one for the namespace and one per indexed value,
+    so a page is a single ZREVRANGEBYLEX from the cursor. Finished records are
+    also scored by write time in an expiry set, swept on every write once
+    they are older than the TTL. Writes are optimistic transactions on the
+    namespace's index hash, so records and their indexes never disagree.
+    """
+
+    supports_query = True
+
+    def __init__(self,
+                 url: str,
+                 prefix: str = "wrenchai:registry:",
+                 ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        """Initialize the store.
+
+        Args:
+            url: Redis connection URL
+            prefix: Prefix applied to key names
+            ttl: Seconds after the last write before a finished record is evicted
+                (None keeps records)
+            clock: Wall clock shared by all workers, injectable for tests
+
+        Raises:
+            ValueError: If the redis package is not installed
+        """
+        if redis is None:
+            raise ValueError("The Redis registry store requires the 'redis' package")
+        self.prefix = prefix
+        self.ttl = ttl
+        self._clock = clock
+        self._redis = redis.from_url(url)
+        self.evicted = 0
+
+    def _order(self, namespace: str, column: Optional[str] = None, value: Optional[str] = None) -> str:
+        """Name of the sorted set ordering a namespace, or its records with one indexed value."""
+        name = f"{self.prefix}{namespace}:order"
+        return name if column is None else f"{name}:{column}:{value}"
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        raw = self._redis.hget(self.prefix + namespace, key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, namespace: str, key: str, value: Dict[str, Any], index: Optional[Dict[str, str]] = None):
+        self._write(namespace, key, lambda pipe: (value, index or {"created_at": ""}))
+
+    def delete(self, namespace: str, key: str) -> bool:
+        return self._remove(namespace, key)
+
+    def keys(self, namespace: str) -> List[str]:
+        return [_text(k) for k in self._redis.hkeys(self.prefix + namespace)]
+
+    def items(self, namespace: str) -> List[Tuple[str, Dict[str, Any]]]:
+        return [(_text(k), json.loads(v)) for k, v in self._redis.hgetall(self.prefix + namespace).items()]
+
+    def count(self, namespace: str, filters: Optional[Dict[str, str]] = None) -> int:
+        if not filters:
+            return self._redis.hlen(self.prefix + namespace)
+        return self._with_filters(namespace, filters, self._redis.zcard)
+
+    def patch(self,
+              namespace: str,
+              key: str,
+              fields: Dict[str, Any],
+              index_for: Callable[[Dict[str, Any]], Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        def update(pipe):
+            raw = pipe.hget(self.prefix + namespace, key)
+            if raw is None:
+                return None
+            value = json.loads(raw)
+            value.update(fields)
+            return value, index_for(value)
+        return self._write(namespace, key, update)
+
+    def query(self,
+              namespace: str,
+              filters: Dict[str, str],
+              limit: int,
+              after: Optional[Tuple[str, str]] = None,
+              offset: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+        high = "(" + _member(*after) if after is not None else "+"
+        members = self._with_filters(
+            namespace, filters,
+            lambda name: self._redis.zrevrangebylex(name, high, "-", start=0 if after else offset, num=limit)
+        )
+        keys = [_text(member).split("\0", 1)[1] for member in members]
+        if not keys:
+            return []
+        values = self._redis.hmget(self.prefix + namespace, keys)
+        return [(key, json.loads(raw)) for key, raw in zip(keys, values) if raw is not None]
+
+    def _with_filters(self, namespace: str, filters: Dict[str, str], read: Callable[[str], Any]) -> Any:
+        """Read the sorted set of records matching filters (intersected into a temporary set if several)."""
+        names = [self._order(namespace, column, value) for column, value in sorted(filters.items())]
+        if len(names) <= 1:
+            return read(names[0] if names else self._order(namespace))
+        temp = f"{self.prefix}{namespace}:tmp:{uuid.uuid4().hex}"
+        try:
+            self._redis.zinterstore(temp, names)
+            return read(temp)
+        finally:
+            self._redis.delete(temp)
+
+    def _write(self, namespace: str, key: str, update: Callable[[Any], Optional[Tuple[Dict[str, Any], Dict[str, Any]]]]
+               ) -> Optional[Dict[str, Any]]:
+        """Replace a record and its index entries in one optimistic transaction.
+
+        Args:
+            namespace: Registry namespace
+            key: Record key
+            update: Called with the watching pipeline; returns (record, index), or None to abort
+
+        Returns:
+            The written record, or None if update aborted
+        """
+        base = self.prefix + namespace
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(base + ":index")
+                    old_index = pipe.hget(base + ":index", key)
+                    result = update(pipe)
+                    if result is None:
+                        pipe.unwatch()
+                        return None
+                    value, index = result
+                    index = {field: index.get(field) for field in (*INDEX_FIELDS, "created_at", "terminal")}
+                    member = _member(index["created_at"] or "", key)
+                    pipe.multi()
+                    self._unindex(pipe, namespace, key, old_index)
+                    pipe.hset(base, key, json.dumps(value, default=str))
+                    pipe.hset(base + ":index", key, json.dumps(index))
+                    pipe.zadd(self._order(namespace), {member: 0})
+                    for column in INDEX_FIELDS:
+                        if index[column] is not None:
+                            pipe.zadd(self._order(namespace, column, index[column]), {member: 0})
+                    if index["terminal"]:
+                        pipe.zadd(base + ":expiry", {key: self._clock()})
+                    else:
+                        pipe.zrem(base + ":expiry", key)
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    continue
+        self._sweep(namespace)
+        return value
+
+    def _remove(self, namespace: str, key: str, cutoff: Optional[float] = None) -> bool:
+        """Delete a record and its index entries; with a cutoff, only if it finished before then."""
+        base = self.prefix + namespace
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(base + ":index")
+                    if cutoff is not None:
+                        written_at = pipe.zscore(base + ":expiry", key)
+                        if written_at is None or written_at > cutoff:
+                            pipe.unwatch()
+                            return False
+                    old_index = pipe.hget(base + ":index", key)
+                    pipe.multi()
+                    pipe.hdel(base, key)
+                    pipe.hdel(base + ":index", key)
+                    pipe.zrem(base + ":expiry", key)
+                    self._unindex(pipe, namespace, key, old_index)
+                    return bool(pipe.execute()[0])
+                except redis.WatchError:
+                    continue
+
+    def _unindex(self, pipe: Any, namespace: str, key: str, raw_index: Optional[bytes]):
+        """Queue removal of a record's members from the ordering sets."""
+        if raw_index is None:
+            return
+        index = json.loads(raw_index)
+        member = _member(index.get("created_at") or "", key)
+        pipe.zrem(self._order(namespace), member)
+        for column in INDEX_FIELDS:
+            if index.get(column) is not None:
+                pipe.zrem(self._order(namespace, column, index[column]), member)
+
+    def _sweep(self, namespace: str):
+        """Evict a batch of finished records whose last write is older than the TTL."""
+        if self.ttl is None:
+            return
+        cutoff = self._clock() - self.ttl
+        expired = self._redis.zrangebyscore(f"{self.prefix}{namespace}:expiry", "-inf", cutoff,
+                                            start=0, num=SWEEP_BATCH)
+        for key in expired:
+            if self._remove(namespace, _text(key), cutoff):
+                self.evicted += 1
+
+
+def _member(created_at: str, key: str) -> str:
+    """Sorted-set member ordering records by (created_at, key)."""
+    return f"{created_at}\0{key}"
+
+
+def _text(value: Any) -> str:
+    """Decode a Redis reply to str."""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class SQLRegistryStore(RegistryStore):
+    """Store persisting records in the ``run_records`` table (SQLite or Postgres).
+
+    Uses SQLAlchemy Core on the RunRecord table so it does not depend on the
+    ORM mappers of unrelated models. The engine is synchronous; async callers
+    go through SharedRegistry's ``a``-prefixed methods, which run store calls
+    in a worker thread.
+    """
+
+    supports_query = True
+
+    def __init__(self, url: str):
+        """Initialize the store, creating the table if needed.
+
+        Args:
+            url: SQLAlchemy database URL (e.g. sqlite:///runs.db, postgresql://...)
+        """
+        kwargs: Dict[str, Any] = {}
+        if url.startswith("sqlite"):
+            kwargs["connect_args"] = {"check_same_thread": False}
+            if url in ("sqlite://", "sqlite:///:memory:"):
+                # One shared connection, otherwise each connection gets its own database
+                kwargs["poolclass"] = StaticPool
+        self.engine = create_engine(url, **kwargs)
+        self.table = RunRecord.__table__
+        self.table.create(self.engine, checkfirst=True)
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        t = self.table
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(t.c.data).where(t.c.namespace == namespace, t.c.key == key)
+            ).scalar()
+
+    def set(self, namespace: str, key: str, value: Dict[str, Any], index: Optional[Dict[str, str]] = None):
+        t = self.table
+        values = self._values(value, index)
+        with self.engine.begin() as conn:
+            updated = conn.execute(
+                t.update().where(t.c.namespace == namespace, t.c.key == key).values(**values)
+            )
+            if updated.rowcount == 0:
+                conn.execute(t.insert().values(namespace=namespace, key=key, **values))
+
+    def patch(self,
+              namespace: str,
+              key: str,
+              fields: Dict[str, Any],
+              index_for: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # Read and write in one transaction, locking the row where the database supports it
+        t = self.table
+        with self.engine.begin() as conn:
+            value = conn.execute(
+                select(t.c.data).where(t.c.namespace == namespace, t.c.key == key).with_for_update()
+            ).scalar()
+            if value is None:
+                return None
+            value.update(fields)
+            conn.execute(
+                t.update().where(t.c.namespace == namespace, t.c.key == key)
+                .values(**self._values(value, index_for(value)))
+            )
+            return value
+
+    def delete(self, namespace: str, key: str) -> bool:
+        t = self.table
+        with self.engine.begin() as conn:
+            result = conn.execute(t.delete().where(t.c.namespace == namespace, t.c.key == key))
+            return result.rowcount > 0
+
+    def keys(self, namespace: str) -> List[str]:
+        t = self.table
+        with self.engine.connect() as conn:
+            return list(conn.execute(select(t.c.key).where(t.c.namespace == namespace)).scalars())
+
+    def items(self, namespace: str) -> List[Tuple[str, Dict[str, Any]]]:
+        t = self.table
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(t.c.key, t.c.data).where(t.c.namespace == namespace))
+            return [(key, data) for key, data in rows]
+
+    def count(self, namespace: str, filters: Optional[Dict[str, str]] = None) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).select_from(self.table).where(*self._where(namespace, filters))
+            ).scalar()
+
+    def query(self,
+              namespace: str,
+              filters: Dict[str, str],
+              limit: int,
+              after: Optional[Tuple[str, str]] = None,
+              offset: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+        t = self.table
+        conditions = self._where(namespace, filters)
+        if after is not None:
+            created_at, key = after
+            conditions.append(or_(
+                t.c.created_at < created_at,
+                and_(t.c.created_at == created_at, t.c.key < key),
+            ))
+        stmt = (
+            select(t.c.key, t.c.data)
+            .where(*conditions)
+            .order_by(t.c.created_at.desc(), t.c.key.desc())
+            .limit(limit)
+        )
+        if after is None and offset:
+            stmt = stmt.offset(offset)
+        with self.engine.connect() as conn:
+            return [(key, data) for key, data in conn.execute(stmt)]
+
+    def _values(self, value: Dict[str, Any], index: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Column values for a record and its indexed fields."""
+        index = index or {}
+        return {
+            # Round-trip through JSON so values like datetimes are stored as strings
+            "data": json.loads(json.dumps(value, default=str)),
+            "status": index.get("status"),
+            "owner": index.get("owner"),
+            "kind": index.get("kind"),
+            "created_at": index.get("created_at") or "",
+            "updated_at": datetime.utcnow(),
+        }
+
+    def _where(self, namespace: str, filters: Optional[Dict[str, str]]) -> List[Any]:
+        conditions = [self.table.c.namespace == namespace]
+        for field, value in (filters or {}).items():
+            conditions.append(self.table.c[field] == value)
+        return conditions
+
+
+def create_registry_store(url: Optional[str] = None, ttl: Optional[float] = None) -> RegistryStore:
+    """Create a registry store from a URL.
+
+    Args:
+        url: "memory://" (default), a redis:// URL, or a sqlite:// / postgresql:// URL
+        ttl: Seconds before finished records leave the in-memory and Redis stores
+
+    Returns:
+        The store
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    url = url or "memory://"
+    if url.startswith("memory://"):
+        return InMemoryRegistryStore(ttl=ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisRegistryStore(url, ttl=ttl)
+    if url.startswith(("sqlite", "postgresql", "mysql")):
+        return SQLRegistryStore(url)
+    raise ValueError(f"Unsupported registry URL: {url}")
+
+
+_registry_store: Optional[RegistryStore] = None
+
+
+def get_registry_store() -> RegistryStore:
+    """Get the process-wide store, from REGISTRY_URL (or BACKPLANE_URL) on first use."""
+    global _registry_store
+    if _registry_store is None:
+        _registry_store = create_registry_store(
+            os.getenv("REGISTRY_URL") or os.getenv("BACKPLANE_URL"),
+            ttl=float(os.getenv("REGISTRY_TTL", DEFAULT_MEMORY_TTL)),
+        )
+    return _registry_store
+
+
+def set_registry_store(store: Optional[RegistryStore]):
+    """Replace the process-wide store (None resets to the environment default)."""
+    global _registry_store
+    _registry_store = store
+
+
+class SharedRegistry(MutableMapping):
+    """Dict-like registry backed by a shared store with a local cache.
+
+    Reads are served from the cache for ``cache_ttl`` seconds and go to the
+    store after that; writes go to the store and refresh the cache. The cache
+    holds at most ``max_cached`` records and drops expired ones as it goes.
+    """
+
+    def __init__(self,
+                 namespace: str,
+                 store: Optional[RegistryStore] = None,
+                 cache_ttl: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 index_fields: Optional[Dict[str, str]] = None,
+                 created_field: str = "created_at",
+                 max_cached: int = 1024,
+                 terminal_statuses: Collection[str] = TERMINAL_STATUSES):
+        """Initialize the registry.
+
+        Args:
+            namespace: Namespace of the registry's records in the store
+            store: Store to use; defaults to the process-wide store
+            cache_ttl: Seconds a cached record is served without checking the store
+            clock: Monotonic clock, injectable for tests
+            index_fields: Record fields backing the "owner" and "kind" index columns
+            created_field: Record field holding the ISO-8601 creation time
+            max_cached: Maximum records kept in the local cache
+            terminal_statuses: Statuses of finished records, which the in-memory
+                store may expire; empty for registries whose records never finish
+        """
+        self.namespace = namespace
+        self.cache_ttl = cache_ttl
+        self.index_fields = {"status": "status", **(index_fields or {})}
+        self.created_field = created_field
+        self.max_cached = max_cached
+        self.terminal_statuses = frozenset(terminal_statuses)
+        self._store = store
+        self._clock = clock
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def store(self) -> RegistryStore:
+        """The backing store."""
+        return self._store if self._store is not None else get_registry_store()
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        value = self._cached(key)
+        if value is not None:
+            return value
+        value = self.store.get(self.namespace, key)
+        if value is None:
+            self._cache.pop(key, None)
+            raise KeyError(key)
+        self._remember(key, value)
+        return value
+
+    def __setitem__(self, key: str, value: Dict[str, Any]):
+        self.store.set(self.namespace, key, value, self.index_for(value))
+        self._remember(key, value)
+
+    def __delitem__(self, key: str):
+        self._cache.pop(key, None)
+        if not self.store.delete(self.namespace, key):
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.keys(self.namespace))
+
+    def __len__(self) -> int:
+        return self.store.count(self.namespace)
+
+    def values(self) -> List[Dict[str, Any]]:
+        """All records, fetched in one round trip."""
+        return [value for _, value in self.items()]
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """All (key, record) pairs, fetched in one round trip."""
+        return self.store.items(self.namespace)
+
+    def index_for(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the indexed fields of a record.
+
+        Args:
+            value: The record
+
+        Returns:
+            Dictionary of index column values (None for missing fields) and
+            "terminal", whether the record's status is final
+        """
+        index: Dict[str, Any] = {}
+        for column, field in self.index_fields.items():
+            field_value = value.get(field)
+            index[column] = str(getattr(field_value, "value", field_value)) if field_value is not None else None
+        index["created_at"] = str(value.get(self.created_field) or "")
+        index["terminal"] = index.get("status") in self.terminal_statuses
+        return index
+
+    def page(self,
+             limit: int = 10,
+             cursor: Optional[str] = None,
+             offset: int = 0,
+             **filters) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List records newest first with keyset pagination.
+
+        Args:
+            limit: Maximum records to return
+            cursor: Cursor from a previous page; continues after its last record
+            offset: Records to skip when no cursor is given (page-number clients)
+            **filters: Equality filters on status, owner or kind (None values are ignored)
+
+        Returns:
+            Tuple of (records, cursor for the next page or None)
+
+        Raises:
+            ValueError: If a filter is not indexed or the cursor is malformed
+        """
+        return self._page(self._filters(filters), limit, cursor, offset)
+
+    def count(self, **filters) -> int:
+        """Count records matching equality filters on status, owner or kind.
+
+        Raises:
+            ValueError: If a filter is not indexed
+        """
+        filters = self._filters(filters)
+        store = self.store
+        if not filters or store.supports_query:
+            return store.count(self.namespace, filters or None)
+        return len(self._scan(filters))
+
+    def page_with_count(self,
+                        limit: int = 10,
+                        cursor: Optional[str] = None,
+                        offset: int = 0,
+                        **filters) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        """List a page and count all matching records.
+
+        Stores without native queries scan the namespace once for both,
+        instead of once for ``page`` and again for ``count``.
+
+        Returns:
+            Tuple of (records, cursor for the next page or None, total matching records)
+
+        Raises:
+            ValueError: If a filter is not indexed or the cursor is malformed
+        """
+        filters = self._filters(filters)
+        if self.store.supports_query:
+            records, next_cursor = self._page(filters, limit, cursor, offset)
+            return records, next_cursor, self.store.count(self.namespace, filters or None)
+        scanned = self._scan(filters)
+        records, next_cursor = self._page(filters, limit, cursor, offset, scanned)
+        return records, next_cursor, len(scanned)
+
+    def _page(self,
+              filters: Dict[str, str],
+              limit: int,
+              cursor: Optional[str],
+              offset: int,
+              scanned: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+              ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Cut a page from the store's query, or from rows already scanned by ``_scan``."""
+        after = decode_cursor(cursor) if cursor else None
+        store = self.store
+
+        if store.supports_query and scanned is None:
+            rows = store.query(self.namespace, filters, limit + 1, after, offset)
+        else:
+            rows = scanned if scanned is not None else self._scan(filters)
+            if after is not None:
+                rows = [(k, v) for k, v in rows if (self.index_for(v)["created_at"], k) < after]
+            elif offset:
+                rows = rows[offset:]
+            rows = rows[:limit + 1]
+
+        records = [value for _, value in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last_key, last_value = rows[limit - 1]
+            next_cursor = encode_cursor(self.index_for(last_value)["created_at"], last_key)
+        return records, next_cursor
+
+    def save(self, key: str):
+        """Write the locally modified record back to the store.
+
+        Args:
+            key: Record key
+
+        Raises:
+            KeyError: If the record is not cached or stored
+        """
+        # Use the local copy even if it has expired: it holds the edits
+        entry = self._cache.get(key)
+        self[key] = entry[1] if entry is not None else self[key]
+
+    def patch(self, key: str, **fields) -> Optional[Dict[str, Any]]:
+        """Update fields of a record if it exists.
+
+        Args:
+            key: Record key
+            **fields: Fields to set
+
+        Returns:
+            The updated record, or None if it does not exist
+        """
+        self.invalidate(key)
+        value = self.store.patch(self.namespace, key, fields, self.index_for)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop cached records so the next read goes to the store.
+
+        Args:
+            key: Record to drop; drops everything if None
+        """
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """Get a record without blocking the event loop.
+
+        Args:
+            key: Record key
+            default: Value returned if the record does not exist
+
+        Returns:
+            The record, or default
+        """
+        value = self._cached(key)
+        if value is not None:
+            return value
+        value = await self._call(self.store.get, self.namespace, key)
+        if value is None:
+            self._cache.pop(key, None)
+            return default
+        self._remember(key, value)
+        return value
+
+    async def acontains(self, key: str) -> bool:
+        """Check whether a record exists without blocking the event loop."""
+        return await self.aget(key) is not None
+
+    async def aset(self, key: str, value: Dict[str, Any]):
+        """Create or replace a record without blocking the event loop."""
+        await self._call(self.store.set, self.namespace, key, value, self.index_for(value))
+        self._remember(key, value)
+
+    async def adelete(self, key: str) -> bool:
+        """Delete a record without blocking the event loop, returning whether it existed."""
+        self._cache.pop(key, None)
+        return await self._call(self.store.delete, self.namespace, key)
+
+    async def asave(self, key: str):
+        """Async version of ``save``.
+
+        Raises:
+            KeyError: If the record is not cached or stored
+        """
+        entry = self._cache.get(key)
+        value = entry[1] if entry is not None else await self.aget(key)
+        if value is None:
+            raise KeyError(key)
+        await self.aset(key, value)
+
+    async def apatch(self, key: str, **fields) -> Optional[Dict[str, Any]]:
+        """Async version of ``patch``."""
+        self.invalidate(key)
+        value = await self._call(self.store.patch, self.namespace, key, fields, self.index_for)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    async def aitems(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Async version of ``items``."""
+        return await self._call(self.store.items, self.namespace)
+
+    async def apage(self,
+                    limit: int = 10,
+                    cursor: Optional[str] = None,
+                    offset: int = 0,
+                    **filters) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Async version of ``page``."""
+        return await self._call(self.page, limit, cursor, offset, **filters)
+
+    async def acount(self, **filters) -> int:
+        """Async version of ``count``."""
+        return await self._call(self.count, **filters)
+
+    async def apage_with_count(self,
+                               limit: int = 10,
+                               cursor: Optional[str] = None,
+                               offset: int = 0,
+                               **filters) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        """Async version of ``page_with_count``."""
+        return await self._call(self.page_with_count, limit, cursor, offset, **filters)
+
+    async def _call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call a store function, in a worker thread if the store blocks.
+
+        Only store calls and listings run in the thread; the local cache is
+        touched on the event loop.
+        """
+        if not self.store.blocking:
+            return func(*args, **kwargs)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    def _filters(self, filters: Dict[str, Any]) -> Dict[str, str]:
+        """Validate filters and drop unset ones."""
+        unknown = set(filters) - set(INDEX_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot filter {self.namespace} on {sorted(unknown)}")
+        return {
+            field: str(getattr(value, "value", value))
+            for field, value in filters.items() if value is not None
+        }
+
+    def _scan(self, filters: Dict[str, str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Filter and sort all records in memory (stores without native queries)."""
+        rows = []
+        for key, value in self.store.items(self.namespace):
+            index = self.index_for(value)
+            if all(index.get(field) == wanted for field, wanted in filters.items()):
+                rows.append(((index["created_at"], key), key, value))
+        rows.sort(key=lambda row: row[0], reverse=True)
+        return [(key, value) for _, key, value in rows]
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(key)
+        if entry is not None and self._clock() - entry[0] < self.cache_ttl:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        now = self._clock()
+        self._cache[key] = (now, value)
+        self._cache.move_to_end(key)
+        # Entries are ordered by refresh time: evict expired ones and any overflow
+        while self._cache:
+            oldest_key, (cached_at, _) = next(iter(self._cache.items()))
+            if len(self._cache) <= self.max_cached and now - cached_at < self.cache_ttl:
+                break
+            del self._cache[oldest_key]
@@ -0,0 +1,271 @@
+# MIT License - Copyright (c) 2024 Wrench AI
+# For full license information, see the LICENSE file in the repo root.
+
+"""Frame coalescing, compression and binary framing for streaming responses.
+
+High-rate LLM token streams produce many tiny items. Encoding each one as its
+own JSON object or SSE event costs more than the tokens themselves, so the
+streaming service can coalesce items into frames and encode each frame once.
+
+Key components:
+- FrameCoalescer: Batches stream items into frames by size or age
+- StreamCompressor: Incremental gzip/deflate/zstd/brotli compression with per-frame flushes
+- BinaryFrameCodec: Length-prefixed or msgpack framing for WebSocket consumers
+"""
+
+import json
+import struct
+import time
+import zlib
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+
+# Event codes used in binary frames
+FRAME_EVENTS = ("started", "progress", "chunk", "error", "complete", "cancelled")
+_EVENT_CODES = {name: code for code, name in enumerate(FRAME_EVENTS)}
+
+# Payload kinds in length-prefixed frames
+PAYLOAD_TEXT = 0
+PAYLOAD_JSON = 1
+PAYLOAD_BYTES = 2
+
+_HEADER = struct.Struct(">BBI")  # event code, payload kind, payload length
+
+
+def item_size(item: Any) -> int:
+    """Approximate the encoded size of a stream item in bytes."""
+    if isinstance(item, (str, bytes)):
+        return len(item)
+    return 64
+
+
+class FrameCoalescer:
+    """Batches stream items into frames by size or age.
+
+    A frame is released once it holds ``max_bytes`` of data or its first item
+    is ``interval_ms`` old. The caller drives time-based flushes by waiting at
+    most ``time_until_due()`` for the next item.
+    """
+
+    def __init__(self,
+                 interval_ms: float = 16.0,
+                 max_bytes: int = 4096,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the coalescer.
+
+        Args:
+            interval_ms: Maximum age of a frame before it is released
+            max_bytes: Frame size that triggers an immediate release
+            clock: Monotonic clock, injectable for tests
+        """
+        self.interval = interval_ms / 1000
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._items: List[Any] = []
+        self._size = 0
+        self._opened_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: Any) -> Optional[List[Any]]:
+        """Add an item, returning a full frame if one is ready.
+
+        Args:
+            item: The stream item
+
+        Returns:
+            The released frame, or None if the frame is still filling
+        """
+        if not self._items:
+            self._opened_at = self._clock()
+        self._items.append(item)
+        self._size += item_size(item)
+
+        if self._size >= self.max_bytes or self.time_until_due() <= 0:
+            return self.drain()
+        return None
+
+    def time_until_due(self) -> Optional[float]:
+        """Seconds until the open frame must be released, or None if empty."""
+        if not self._items:
+            return None
+        return max(0.0, self._opened_at + self.interval - self._clock())
+
+    def drain(self) -> List[Any]:
+        """Release the open frame."""
+        items = self._items
+        self._items = []
+        self._size = 0
+        self._opened_at = None
+        return items
+
+
+class StreamCompressor:
+    """Incremental compressor producing independently flushed frames.
+
+    Each ``compress`` call ends with a sync flush so the client can decode
+    everything received so far without waiting for the stream to end.
+    """
+
+    def __init__(self, method: str, level: Optional[int] = None):
+        """Initialize the compressor.
+
+        Args:
+            method: One of "gzip", "deflate", "zstd" or "br"
+            level: Optional compression level
+
+        Raises:
+            ValueError: If the method is unknown or its library is not installed
+        """
+        self.method = str(getattr(method, "value", method))
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        if self.method == "gzip":
+            self._compressor = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+        elif self.method == "deflate":
+            # HTTP "deflate" is the zlib format
+            self._compressor = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 15)
+        elif self.method == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd compression requires the 'zstandard' package")
+            self._compressor = zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+        elif self.method == "br":
+            if brotli is None:
+                raise ValueError("brotli compression requires the 'brotli' package")
+            self._compressor = brotli.Compressor(quality=5 if level is None else level)
+        else:
+            raise ValueError(f"Unsupported stream compression: {self.method}")
+
+    @property
+    def content_encoding(self) -> str:
+        """Value for the HTTP Content-Encoding header."""
+        return self.method
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress and flush a frame.
+
+        Args:
+            data: Frame bytes
+
+        Returns:
+            Compressed bytes decodable by the client immediately
+        """
+        self.bytes_in += len(data)
+        if self.method in ("gzip", "deflate"):
+            out = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        elif self.method == "zstd":
+            out = self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        else:
+            out = self._compressor.process(data) + self._compressor.flush()
+        self.bytes_out += len(out)
+        return out
+
+    def finish(self) -> bytes:
+        """End the compressed stream.
+
+        Returns:
+            Trailing bytes (e.g. the gzip footer)
+        """
+        if self.method == "br":
+            out = self._compressor.finish()
+        else:
+            out = self._compressor.flush()
+        self.bytes_out += len(out)
+        return out
+
+
+class BinaryFrameCodec:
+    """Compact binary framing for WebSocket consumers.
+
+    ``length_prefixed`` frames are a 6-byte header (event code, payload kind,
+    big-endian payload length) followed by the payload: UTF-8 text for
+    coalesced token deltas, JSON for structured items, raw bytes otherwise.
+    ``msgpack`` frames are a msgpack map ``{"e": event, "d": data}``.
+    """
+
+    def __init__(self, mode: str = "length_prefixed"):
+        """Initialize the codec.
+
+        Args:
+            mode: "length_prefixed" or "msgpack"
+
+        Raises:
+            ValueError: If the mode is unknown or msgpack is not installed
+        """
+        if mode not in ("length_prefixed", "msgpack"):
+            raise ValueError(f"Unsupported binary framing: {mode}")
+        if mode == "msgpack" and msgpack is None:
+            raise ValueError("msgpack framing requires the 'msgpack' package")
+        self.mode = mode
+
+    def encode(self, event: str, data: Any = None) -> bytes:
+        """Encode one frame.
+
+        Args:
+            event: Stream event name
+            data: Frame data (text, bytes, or any JSON-serializable value)
+
+        Returns:
+            The encoded frame
+        """
+        if self.mode == "msgpack":
+            return msgpack.packb({"e": event, "d": data}, use_bin_type=True)
+
+        if data is None:
+            kind, payload = PAYLOAD_TEXT, b""
+        elif isinstance(data, str):
+            kind, payload = PAYLOAD_TEXT, data.encode("utf-8")
+        elif isinstance(data, (bytes, bytearray)):
+            kind, payload = PAYLOAD_BYTES, bytes(data)
+        else:
+            kind, payload = PAYLOAD_JSON, json.dumps(data, default=str, separators=(",", ":")).encode("utf-8")
+        return _HEADER.pack(_EVENT_CODES.get(event, _EVENT_CODES["chunk"]), kind, len(payload)) + payload
+
+    def decode(self, buffer: bytes) -> Tuple[List[Tuple[str, Any]], bytes]:
+        """Decode all complete frames in a buffer.
+
+        Args:
+            buffer: Received bytes, possibly ending in a partial frame
+
+        Returns:
+            Tuple of (list of (event, data) frames, unconsumed bytes)
+        """
+        if self.mode == "msgpack":
+            unpacker = msgpack.Unpacker(raw=False)
+            unpacker.feed(buffer)
+            return [(frame["e"], frame["d"]) for frame in unpacker], b""
+
+        frames = []
+        offset = 0
+        while len(buffer) - offset >= _HEADER.size:
+            code, kind, length = _HEADER.unpack_from(buffer, offset)
+            end = offset + _HEADER.size + length
+            if end > len(buffer):
+                break
+            payload = buffer[offset + _HEADER.size:end]
+            if kind == PAYLOAD_TEXT:
+                data: Union[str, bytes, Any] = payload.decode("utf-8")
+            elif kind == PAYLOAD_JSON:
+                data = json.loads(payload)
+            else:
+                data = payload
+            frames.append((FRAME_EVENTS[code], data))
+            offset = end
+        return frames, buffer[offset:]
@@ -4,17 +4,19 @@
 import asyncio
 import json
 import logging
+from collections import deque
 from enum import Enum
 from typing import (
-    Any, AsyncGenerator, Callable, Dict, List, Optional, 
+    Any, AsyncGenerator, Callable, Deque, Dict, List, Optional, 
     Union, TypeVar, Generic, AsyncIterable
 )
 
-from fastapi import WebSocket
+from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse, Response
 from sse_starlette.sse import EventSourceResponse
 
 from core.progress_tracker import ProgressTracker, ProgressStatus, ProgressItemType
+from core.stream_framing import BinaryFrameCodec, FrameCoalescer, StreamCompressor
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +46,7 @@ class StreamCompression(str, Enum):
     GZIP = "gzip"
     DEFLATE = "deflate"
     BROTLI = "br"
+    ZSTD = "zstd"
 
 
 class StreamEvent(str, Enum):
@@ -69,6 +72,10 @@ class StreamingConfig:
         chunk_size: int = 1024,
         retry_timeout: int = 5000,
         keep_alive_interval: int = 15,
+        coalesce: bool = False,
+        coalesce_interval_ms: float = 16.0,
+        coalesce_max_bytes: int = 4096,
+        binary_framing: Optional[str] = None,
     ):
         """Initialize streaming configuration.
         
@@ -81,6 +88,10 @@ class StreamingConfig:
             chunk_size: Size of chunks sent to the client in bytes
             retry_timeout: Timeout for SSE retry attempts in milliseconds
             keep_alive_interval: Interval to send keepalive messages in seconds
+            coalesce: Batch stream items into frames instead of encoding each one
+            coalesce_interval_ms: Maximum age of a coalesced frame
+            coalesce_max_bytes: Frame size that releases a coalesced frame immediately
+            binary_framing: "length_prefixed" or "msgpack" framing for the binary format
         """
         self.format = format
         self.encoding = encoding
@@ -89,6 +100,10 @@ class StreamingConfig:
         self.chunk_size = chunk_size
         self.retry_timeout = retry_timeout
         self.keep_alive_interval = keep_alive_interval
+        self.coalesce = coalesce
+        self.coalesce_interval_ms = coalesce_interval_ms
+        self.coalesce_max_bytes = coalesce_max_bytes
+        self.binary_framing = binary_framing
         
         # Auto-detect content type if not provided
         if content_type is None:
@@ -108,10 +123,6 @@ class StreamingConfig:
         # Add encoding to content type for text formats
         if self.format in (StreamFormat.TEXT, StreamFormat.JSON, StreamFormat.SSE):
             self.content_type += f"; charset={self.encoding}"
-            
-        # Add compression to content type if applicable
-        if self.compression != StreamCompression.NONE:
-            self.content_type += f"; {self.compression}"
     
     def get_headers(self) -> Dict[str, str]:
         """Get HTTP headers for the streaming response.
@@ -131,6 +142,11 @@ class StreamingConfig:
                 "Transfer-Encoding": "chunked"
             })
             
+        # Compression is applied by the stream processor, not a middleware
+        if self.compression != StreamCompression.NONE:
+            headers["Content-Encoding"] = self.compression.value
+            headers["Vary"] = "Accept-Encoding"
+            
         return headers
 
 
@@ -354,6 +370,18 @@ class StreamProcessor(Generic[T]):
         self.is_started = False
         self.is_cancelled = False
         self.error = None
+        self.frames_sent = 0
+        self.bytes_out = 0
+        
+        # Optional per-frame compression and binary framing
+        self.compressor = (
+            StreamCompressor(config.compression)
+            if config.compression != StreamCompression.NONE else None
+        )
+        self.codec = (
+            BinaryFrameCodec(config.binary_framing)
+            if config.binary_framing and config.format == StreamFormat.BINARY else None
+        )
     
     async def process_stream(
         self,
@@ -376,40 +404,45 @@ class StreamProcessor(Generic[T]):
                 
             # Mark as started
             self.is_started = True
-            yield await self._format_event(StreamEvent.STARTED)
+            yield self._emit(await self._format_event(StreamEvent.STARTED))
             
-            # Process stream items
-            async for item in source:
-                if self.is_cancelled:
-                    break
-                    
-                # Apply transformation if provided
-                if transform:
-                    result = transform(item)
-                    if isinstance(result, StreamChunk):
-                        chunk = result
+            if self.config.coalesce:
+                # Encode one frame per batch of items
+                async for items in self._coalesce(source):
+                    yield self._emit(await self._format_frame(items, transform))
+            else:
+                # Process stream items
+                async for item in source:
+                    if self.is_cancelled:
+                        break
+                        
+                    # Apply transformation if provided
+                    if transform:
+                        result = transform(item)
+                        if isinstance(result, StreamChunk):
+                            chunk = result
+                        else:
+                            chunk = StreamChunk(delta=result)
                     else:
-                        chunk = StreamChunk(delta=result)
-                else:
-                    # Create chunk directly from item
-                    chunk = StreamChunk(delta=item)
-                
-                # Update progress if available
-                if chunk.progress is not None and self.progress_adapter:
-                    await self.progress_adapter.update(chunk.progress)
+                        # Create chunk directly from item
+                        chunk = StreamChunk(delta=item)
                     
-                # Yield formatted output
-                yield await self._format_chunk(chunk)
-                
-                # Update total processed
-                self.total_processed += 1
+                    # Update progress if available
+                    if chunk.progress is not None and self.progress_adapter:
+                        await self.progress_adapter.update(chunk.progress)
+                        
+                    # Yield formatted output
+                    yield self._emit(await self._format_chunk(chunk))
+                    
+                    # Update total processed
+                    self.total_processed += 1
                 
             # Mark as completed
             self.is_completed = True
             if self.progress_adapter:
                 await self.progress_adapter.complete()
                 
-            yield await self._format_event(StreamEvent.COMPLETE)
+            yield self._emit(await self._format_event(StreamEvent.COMPLETE))
             
         except Exception as e:
             logger.error(f"Error processing stream: {e}")
@@ -418,7 +451,146 @@ class StreamProcessor(Generic[T]):
             if self.progress_adapter:
                 await self.progress_adapter.fail(self.error)
                 
-            yield await self._format_event(StreamEvent.ERROR, error=self.error)
+            yield self._emit(await self._format_event(StreamEvent.ERROR, error=self.error))
+            
+        # End the compressed stream
+        if self.compressor:
+            tail = self.compressor.finish()
+            if tail:
+                self.bytes_out += len(tail)
+                yield tail
+    
+    async def _coalesce(self, source: AsyncIterable[T]) -> AsyncGenerator[List[T], None]:
+        """Group source items into frames by size or age.
+        
+        A reader task drains the source into a buffer so that items are not
+        awaited one by one; the buffer is bounded to keep backpressure on
+        fast producers.
+        
+        Args:
+            source: Async iterable source of data
+            
+        Yields:
+            Lists of items, one per frame
+        """
+        coalescer = FrameCoalescer(self.config.coalesce_interval_ms, self.config.coalesce_max_bytes)
+        buffer: Deque[T] = deque()
+        high_water = max(64, self.config.buffer_size)
+        ready = asyncio.Event()
+        space = asyncio.Event()
+        state: Dict[str, Any] = {"finished": False, "error": None}
+        
+        async def read_source():
+            try:
+                async for item in source:
+                    buffer.append(item)
+                    ready.set()
+                    if len(buffer) >= high_water:
+                        space.clear()
+                        await space.wait()
+            except Exception as e:
+                state["error"] = e
+            finally:
+                state["finished"] = True
+                ready.set()
+                
+        reader = asyncio.ensure_future(read_source())
+        
+        try:
+            while not self.is_cancelled:
+                if not buffer:
+                    if state["finished"]:
+                        break
+                    # Wait for more items, but no longer than the open frame may age
+                    ready.clear()
+                    try:
+                        await asyncio.wait_for(ready.wait(), coalescer.time_until_due())
+                    except asyncio.TimeoutError:
+                        yield coalescer.drain()
+                    continue
+                    
+                while buffer:
+                    frame = coalescer.add(buffer.popleft())
+                    if frame:
+                        space.set()
+                        yield frame
+                space.set()
+                
+            if len(coalescer):
+                yield coalescer.drain()
+                
+            if state["error"] is not None:
+                raise state["error"]
+        finally:
+            reader.cancel()
+    
+    async def _format_frame(
+        self,
+        items: List[T],
+        transform: Optional[Callable[[T], Union[T, StreamChunk[T]]]] = None,
+    ) -> Union[str, bytes]:
+        """Format a coalesced frame of items as a single chunk.
+        
+        Text deltas are concatenated; other items are sent as a list.
+        
+        Args:
+            items: Items in the frame
+            transform: Optional function to transform each item
+            
+        Returns:
+            Formatted frame data
+        """
+        deltas = []
+        progress = None
+        metadata: Dict[str, Any] = {}
+        
+        for item in items:
+            delta = item
+            if transform:
+                result = transform(item)
+                if isinstance(result, StreamChunk):
+                    delta = result.delta
+                    if result.progress is not None:
+                        progress = result.progress
+                    if result.metadata:
+                        metadata.update(result.metadata)
+                else:
+                    delta = result
+            if delta is not None:
+                deltas.append(delta)
+                
+        self.total_processed += len(items)
+        
+        if progress is not None and self.progress_adapter:
+            await self.progress_adapter.update(progress)
+            
+        if deltas and all(isinstance(d, str) for d in deltas):
+            frame_delta: Any = "".join(deltas)
+        elif deltas and all(isinstance(d, bytes) for d in deltas):
+            frame_delta = b"".join(deltas)
+        else:
+            frame_delta = deltas
+            metadata["batch_size"] = len(deltas)
+            
+        return await self._format_chunk(StreamChunk(delta=frame_delta, progress=progress, metadata=metadata))
+    
+    def _emit(self, data: Union[str, bytes]) -> Union[str, bytes]:
+        """Apply compression to formatted output and update counters.
+        
+        Args:
+            data: Formatted chunk or frame
+            
+        Returns:
+            Data ready to send
+        """
+        if self.compressor:
+            if isinstance(data, str):
+                data = data.encode(self.config.encoding)
+            data = self.compressor.compress(data)
+            
+        self.frames_sent += 1
+        self.bytes_out += len(data)
+        return data
     
     async def _format_event(
         self,
@@ -471,6 +643,14 @@ class StreamProcessor(Generic[T]):
             return chunk.to_sse_event()
             
         elif self.config.format == StreamFormat.BINARY:
+            if self.codec:
+                # Compact framing: bare deltas for plain chunks, a dict otherwise
+                if chunk.event == StreamEvent.CHUNK and chunk.delta is not None and not chunk.metadata and chunk.progress is None:
+                    frame_data = chunk.delta
+                else:
+                    frame_data = {k: v for k, v in chunk.to_dict().items() if k != "event"} or None
+                return self.codec.encode(chunk.event.value, frame_data)
+                
             # For binary format, we need binary data
             if isinstance(chunk.delta, bytes):
                 return chunk.delta
@@ -743,7 +923,8 @@ class StreamingService:
             progress_name: Name for progress tracking
             
         Returns:
-            SSE streaming response
+            SSE streaming response; with coalescing or compression enabled, a
+            streaming response of processor-encoded SSE frames ("chunk" events)
         """
         # Create default config if not provided
         if config is None:
@@ -764,6 +945,28 @@ class StreamingService:
         processor = StreamProcessor[Any](config, progress_adapter)
         self.active_streams[id(processor)] = processor
         
+        if config.coalesce or processor.compressor:
+            # EventSourceResponse writes each event as plain text, so coalesced or
+            # compressed streams are formatted and encoded by the processor instead
+            def to_event_data(item: Any) -> Any:
+                if hasattr(item, 'to_dict') and callable(item.to_dict):
+                    return item.to_dict()
+                return item
+            
+            async def processed_generator():
+                try:
+                    async for frame in processor.process_stream(source, to_event_data):
+                        yield frame
+                finally:
+                    if id(processor) in self.active_streams:
+                        del self.active_streams[id(processor)]
+            
+            return StreamingResponse(
+                processed_generator(),
+                media_type=config.content_type,
+                headers=config.get_headers(),
+            )
+        
         async def stream_generator():
             try:
                 # Send initial event
@@ -841,6 +1044,7 @@ class StreamingService:
         format: StreamFormat = StreamFormat.JSON,
         progress_parent_id: Optional[str] = None,
         progress_name: str = "WebSocket stream",
+        config: Optional[StreamingConfig] = None,
     ):
         """Stream data to a WebSocket connection.
         
@@ -850,6 +1054,8 @@ class StreamingService:
             format: Format to use for the stream
             progress_parent_id: Parent ID for progress tracking
             progress_name: Name for progress tracking
+            config: Optional streaming configuration; with coalescing or binary framing
+                enabled, each processed frame is sent as one WebSocket message
         """
         # Create progress adapter if tracking enabled
         progress_adapter = None
@@ -862,7 +1068,9 @@ class StreamingService:
                 type=ProgressItemType.OPERATION,
             )
         
-        config = StreamingConfig(format=format)
+        framed = config is not None and (config.coalesce or config.binary_framing)
+        if config is None:
+            config = StreamingConfig(format=format)
         processor = StreamProcessor[Any](config, progress_adapter)
         self.active_streams[id(processor)] = processor
         
@@ -870,6 +1078,15 @@ class StreamingService:
             # Accept the WebSocket connection
             await websocket.accept()
             
+            if framed:
+                # Frames carry their own started/complete events
+                async for frame in processor.process_stream(source):
+                    if isinstance(frame, bytes):
+                        await websocket.send_bytes(frame)
+                    else:
+                        await websocket.send_text(frame)
+                return
+            
             # Send initial message
             await websocket.send_json({
                 "event": "started",
@@ -981,6 +1198,8 @@ class StreamingService:
                 "completed": processor.is_completed,
                 "cancelled": processor.is_cancelled,
                 "items_processed": processor.total_processed,
+                "frames_sent": processor.frames_sent,
+                "bytes_out": processor.bytes_out,
                 "error": processor.error,
             }
             for stream_id, processor in self.active_streams.items()
@@ -13,6 +13,7 @@ from core.config_loader import load_config
 from core.tools.tool_response import format_success_response, format_error_response, standardize_legacy_response
 from core.tools.tool_authorization import tool_authorization, ToolAuthorizationSystem
 from core.tools.tool_dependency import tool_dependency_manager, ToolDependencyManager
+from core.cost_meter import BudgetExceededError, get_cost_meter
 
 class ToolRegistry:
     """Registry for all available tools"""
@@ -109,7 +110,9 @@ class ToolRegistry:
                 dependencies.append(dependency['requires'])
         return dependencies
         
-    async def execute_tool(self, tool_name: str, agent_role: str, agent_id: str, **kwargs) -> Dict[str, Any]:
+    async def execute_tool(self, tool_name: str, agent_role: str, agent_id: str, *,
+                           workflow: Optional[str] = None, execution_id: Optional[str] = None,
+                           **kwargs) -> Dict[str, Any]:
         """
         Executes a tool with authorization and dependency checks, returning a standardized response.
         
@@ -119,6 +122,8 @@ class ToolRegistry:
             tool_name: The name of the tool to execute.
             agent_role: The role of the agent requesting execution.
             agent_id: The unique identifier of the agent.
+            workflow: The workflow (playbook) the call is made for, used for cost attribution and budgets.
+            execution_id: The workflow execution the call is made for, used for cost attribution and budgets.
             **kwargs: Parameters specific to the tool being executed.
         
         Returns:
@@ -138,6 +143,14 @@ class ToolRegistry:
         if not can_run:
             return format_error_response(f"Dependency check failed: {run_reason}")
         
+        # Check cost budgets for this tool, agent, workflow and run
+        meter = get_cost_meter()
+        try:
+            await meter.admit(workflow=workflow, execution_id=execution_id,
+                              agent=agent_role, tool=tool_name)
+        except BudgetExceededError as e:
+            return format_error_response(str(e))
+        
         # Execute the tool with timing
         tool_func = self.get_tool(tool_name)
         start_time = time.time()
@@ -158,8 +171,9 @@ class ToolRegistry:
             success = False
             result = format_error_response(f"Tool execution error: {str(e)}")
         
-        # Record tool usage
+        # Record tool usage and cost
         execution_time = time.time() - start_time
+        meter.record_tool(tool_name, workflow=workflow, execution_id=execution_id, agent=agent_role)
         self.authorization_system.register_tool_usage(
             tool_id=tool_name,
             agent_id=agent_id,
@@ -7,17 +7,32 @@ like SystemLogger, AgentLogger, etc. It provides:
 - Console output
 - Configurable log levels and handlers
 - Structured logging with extra fields
+- Optional non-blocking mode: records are queued and written in batches by a
+  dedicated writer thread, with DEBUG sampling under backpressure
 """
 
+import atexit
 import json
 import logging
 import logging.handlers
-from datetime import datetime
+import threading
+import weakref
+from collections import deque
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from pydantic import BaseModel
 
+try:
+    import orjson
+
+    def _dumps(data: Dict[str, Any]) -> str:
+        return orjson.dumps(data, default=str).decode("utf-8")
+except ImportError:
+    def _dumps(data: Dict[str, Any]) -> str:
+        return json.dumps(data, default=str)
+
 
 class LogConfig(BaseModel):
     """Configuration for logger settings."""
@@ -30,19 +45,35 @@ class LogConfig(BaseModel):
     backup_count: int = 5
     console_output: bool = True
     json_format: bool = True
+    async_mode: bool = False  # Queue records and write them from a writer thread
+    queue_size: int = 10_000  # Maximum number of queued records
+    batch_size: int = 256  # Maximum records written per batch
+    flush_interval: float = 0.05  # Seconds the writer waits to fill a batch
+    backpressure_ratio: float = 0.8  # Queue fill ratio at which DEBUG is sampled
+    debug_sample_rate: int = 10  # Keep 1 in N DEBUG records under backpressure
 
 
 class JSONFormatter(logging.Formatter):
-    """Custom formatter for JSON log output."""
+    """Custom formatter for JSON log output.
+    
+    Uses orjson when it is installed and falls back to the standard library.
+    """
     
-    def __init__(self, **kwargs):
+    def __init__(self, utc: bool = False, **kwargs):
         super().__init__()
+        self.utc = utc
         self.kwargs = kwargs
 
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        """Get the ISO timestamp of a record (naive UTC if ``utc`` is set)."""
+        if self.utc:
+            return datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None).isoformat()
+        return datetime.fromtimestamp(record.created).isoformat()
+
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON."""
         log_data = {
-            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "timestamp": self._timestamp(record),
             "logger": record.name,
             "level": record.levelname,
             "message": record.getMessage(),
@@ -64,7 +95,226 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, "extra"):
             log_data.update(record.extra)
 
-        return json.dumps(log_data)
+        return _dumps(log_data)
+
+
+class BatchingQueueHandler(logging.Handler):
+    """Non-blocking handler that hands records to a batching writer thread.
+    
+    ``emit`` only appends the record to a bounded deque; formatting and I/O for
+    the wrapped handlers happen on the writer thread, which drains up to
+    ``batch_size`` records at a time and writes each stream handler's output
+    with a single ``write`` call. Records are formatted late, so mutable log
+    arguments should not be changed after the call.
+    
+    Under backpressure (queue fill above ``backpressure_ratio``) only one in
+    ``debug_sample_rate`` DEBUG records is kept. When the queue is full,
+    DEBUG and INFO records are dropped while WARNING and above wait up to
+    ``block_timeout`` seconds for space.
+    """
+
+    _instances: "weakref.WeakSet[BatchingQueueHandler]" = weakref.WeakSet()
+
+    def __init__(
+        self,
+        handlers: List[logging.Handler],
+        queue_size: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        backpressure_ratio: float = 0.8,
+        debug_sample_rate: int = 10,
+        block_timeout: float = 0.1
+    ):
+        """Initialize the handler and start the writer thread.
+        
+        Args:
+            handlers: Handlers the writer thread delivers records to
+            queue_size: Maximum number of queued records
+            batch_size: Maximum records written per batch
+            flush_interval: Seconds the writer waits to fill a batch
+            backpressure_ratio: Queue fill ratio at which DEBUG is sampled
+            debug_sample_rate: Keep 1 in N DEBUG records under backpressure
+            block_timeout: Seconds WARNING+ records wait for queue space
+        """
+        super().__init__()
+        self.handlers = list(handlers)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.debug_sample_rate = max(1, debug_sample_rate)
+        self.block_timeout = block_timeout
+        self._records: "deque[logging.LogRecord]" = deque()
+        self._markers: "deque[Tuple[int, threading.Event]]" = deque()
+        self._wakeup = threading.Event()
+        # WARNING+ emitters wait here for queue space; waiting releases the handler lock
+        self._space = threading.Condition(self.lock)
+        self._space_waiters = 0
+        self._backpressure_depth = int(queue_size * backpressure_ratio)
+        self._debug_seen = 0
+        # Updated under the handler lock (emit) or by the writer thread only
+        self.queued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.max_depth = 0
+        self.written = 0
+        self.filtered = 0
+        self.batches = 0
+        self._drained = 0
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+        BatchingQueueHandler._instances.add(self)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Enqueue a record without formatting it."""
+        if self._closed:
+            return
+        depth = len(self._records)
+        if depth >= self._backpressure_depth and record.levelno <= logging.DEBUG:
+            self._debug_seen += 1
+            if self._debug_seen % self.debug_sample_rate:
+                self.sampled_out += 1
+                return
+        if depth >= self.queue_size:
+            if record.levelno < logging.WARNING or not self._wait_for_space():
+                self.dropped += 1
+                return
+        self._records.append(record)
+        self.queued += 1
+        if depth >= self.max_depth:
+            self.max_depth = depth + 1
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def _wait_for_space(self) -> bool:
+        """Wait up to ``block_timeout`` for the writer to free queue space.
+        
+        Called from ``emit`` with the handler lock held; the wait releases it
+        until the writer thread signals that a batch was taken off the queue.
+        """
+        self._wakeup.set()
+        with self._space:
+            self._space_waiters += 1
+            try:
+                return self._space.wait_for(
+                    lambda: len(self._records) < self.queue_size, self.block_timeout
+                )
+            finally:
+                self._space_waiters -= 1
+
+    def _run(self) -> None:
+        """Writer thread loop: collect batches and write them."""
+        records = self._records
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while records:
+                batch = []
+                while records and len(batch) < self.batch_size:
+                    batch.append(records.popleft())
+                if self._space_waiters:
+                    with self._space:
+                        self._space.notify_all()
+                self._write_batch(batch)
+            while self._markers and self._markers[0][0] <= self._drained:
+                self._markers.popleft()[1].set()
+            if self._closed and not records:
+                return
+
+    def _write_batch(self, batch: List[logging.LogRecord]) -> None:
+        """Deliver a batch of records to every wrapped handler."""
+        delivered = set()
+        for handler in self.handlers:
+            records = [r for r in batch if r.levelno >= handler.level and handler.filter(r)]
+            if not records:
+                continue
+            delivered.update(map(id, records))
+            if isinstance(handler, logging.StreamHandler):
+                self._write_stream(handler, records)
+            else:
+                for record in records:
+                    handler.handle(record)
+        self.written += len(delivered)
+        self.filtered += len(batch) - len(delivered)
+        self._drained += len(batch)
+        self.batches += 1
+
+    @staticmethod
+    def _write_stream(handler: logging.StreamHandler, records: List[logging.LogRecord]) -> None:
+        """Format records and write them to a stream handler in one call.
+        
+        Rotating file handlers roll over at batch granularity, so a file may
+        exceed ``maxBytes`` by at most one batch.
+        """
+        lines = []
+        for record in records:
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+        payload = "".join(lines)
+        handler.acquire()
+        try:
+            if isinstance(handler, logging.FileHandler) and handler.stream is None:
+                handler.stream = handler._open()
+            if isinstance(handler, logging.handlers.RotatingFileHandler) and handler.maxBytes > 0:
+                position = handler.stream.tell()
+                if position and position + len(payload) >= handler.maxBytes:
+                    handler.doRollover()
+            handler.stream.write(payload)
+            handler.flush()
+        except Exception:
+            handler.handleError(records[-1])
+        finally:
+            handler.release()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every record queued so far has been written.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the queue was drained within the timeout
+        """
+        if not self._thread.is_alive():
+            return True
+        marker = threading.Event()
+        self._markers.append((self.queued, marker))
+        self._wakeup.set()
+        return marker.wait(timeout)
+
+    def close(self) -> None:
+        """Drain the queue, stop the writer thread and close wrapped handlers."""
+        if not self._closed:
+            self._closed = True
+            self._wakeup.set()
+            self._thread.join(timeout=5.0)
+            for handler in self.handlers:
+                handler.close()
+        super().close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get queue and drop counters."""
+        return {
+            "queued": self.queued,
+            "written": self.written,
+            "filtered": self.filtered,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "batches": self.batches,
+            "queue_depth": len(self._records),
+            "max_queue_depth": self.max_depth,
+        }
+
+
+@atexit.register
+def _close_queue_handlers() -> None:
+    """Drain all batching handlers at interpreter exit."""
+    for handler in list(BatchingQueueHandler._instances):
+        handler.close()
 
 
 class BaseLogger:
@@ -88,6 +338,7 @@ class BaseLogger:
         self.name = name
         self.config = config or LogConfig()
         self.log_type = log_type
+        self.queue_handler: Optional[BatchingQueueHandler] = None
         self.logger = self._setup_logger(extra_handlers or [])
 
     def _setup_logger(self, extra_handlers: List[logging.Handler]) -> logging.Logger:
@@ -96,6 +347,9 @@ class BaseLogger:
         logger.setLevel(getattr(logging, self.config.log_level))
 
         # Prevent duplicate handlers
+        for handler in logger.handlers:
+            if isinstance(handler, BatchingQueueHandler):
+                handler.close()
         logger.handlers = []
 
         handlers = []
@@ -122,16 +376,48 @@ class BaseLogger:
 
         # Set formatter for all handlers
         formatter = (
-            JSONFormatter() if self.config.json_format 
+            JSONFormatter(utc=True) if self.config.json_format 
             else logging.Formatter(self.config.log_format)
         )
 
         for handler in handlers:
             handler.setFormatter(formatter)
-            logger.addHandler(handler)
+
+        if self.config.async_mode:
+            self.queue_handler = BatchingQueueHandler(
+                handlers,
+                queue_size=self.config.queue_size,
+                batch_size=self.config.batch_size,
+                flush_interval=self.config.flush_interval,
+                backpressure_ratio=self.config.backpressure_ratio,
+                debug_sample_rate=self.config.debug_sample_rate
+            )
+            logger.addHandler(self.queue_handler)
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
 
         return logger
 
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait for queued records to be written (no-op in synchronous mode)."""
+        if self.queue_handler is None:
+            return True
+        return self.queue_handler.flush(timeout)
+
+    def close(self) -> None:
+        """Flush and close the logger's handlers."""
+        for handler in list(self.logger.handlers):
+            handler.close()
+            self.logger.removeHandler(handler)
+        self.queue_handler = None
+
+    def get_queue_stats(self) -> Dict[str, int]:
+        """Get queued/dropped record counters (empty in synchronous mode)."""
+        if self.queue_handler is None:
+            return {}
+        return self.queue_handler.get_stats()
+
     def _log(
         self,
         level: int,
@@ -141,13 +427,14 @@ class BaseLogger:
         duration_ms: Optional[float] = None,
         **kwargs
     ):
-        """Log a message with the specified level and extra data."""
-        extra = extra or {}
-        extra.update({
-            "log_type": self.log_type,
-            "timestamp": datetime.utcnow().isoformat(),
-            **kwargs
-        })
+        """Log a message with the specified level and extra data.
+        
+        The timestamp is taken from the record when it is formatted, so the
+        calling thread does no formatting work.
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        extra = {**extra, "log_type": self.log_type, **kwargs} if extra else {"log_type": self.log_type, **kwargs}
         
         if duration_ms is not None:
             extra["duration_ms"] = duration_ms
@@ -7,10 +7,18 @@ This module provides tools for:
 - Screenshot capture
 - Element selection
 - Browser state management
+
+Captured logs are kept in bounded ring buffers with per-stream sequence
+numbers, so agents can fetch only the events since their last cursor,
+filter them by level, URL pattern and status, and export pages as NDJSON.
 """
 
+import json
 import logging
-from typing import Dict, List, Any, Optional, Union
+from collections import deque
+from fnmatch import fnmatchcase
+from itertools import islice
+from typing import Dict, List, Any, Optional, Union, Iterator, Callable, Deque, Tuple
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel, Field
@@ -62,52 +70,162 @@ class NetworkRequest(BaseModel):
     success: bool = True
     error: Optional[str] = None
 
+class CaptureRing:
+    """Bounded ring buffer of captured entries with sequence numbers.
+    
+    Sequence numbers start at 1 and are contiguous, so the position of any
+    retained entry is computed from the oldest retained sequence number
+    without scanning the buffer.
+    """
+    
+    def __init__(self, maxlen: int):
+        """
+        Initializes an empty ring.
+        
+        Args:
+            maxlen: Maximum number of entries kept; older entries are evicted.
+        """
+        self._entries: Deque[Any] = deque(maxlen=maxlen)
+        self.maxlen = maxlen
+        self.last_seq = 0
+        
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained entry."""
+        return self.last_seq - len(self._entries) + 1
+        
+    def append(self, entry: Any) -> int:
+        """
+        Appends an entry, evicting the oldest one if the ring is full.
+        
+        Returns:
+            The entry's sequence number.
+        """
+        self._entries.append(entry)
+        self.last_seq += 1
+        return self.last_seq
+        
+    def since(self, seq: int = 0) -> Iterator[Tuple[int, Any]]:
+        """
+        Iterates over (sequence number, entry) pairs after the given sequence number.
+        
+        Args:
+            seq: Cursor; only entries with a higher sequence number are returned.
+        """
+        first = self.first_seq
+        start = max(0, seq - first + 1)
+        for offset, entry in enumerate(islice(self._entries, start, None)):
+            yield first + start + offset, entry
+            
+    def clear(self):
+        """
+        Removes all entries. Sequence numbers keep increasing so existing cursors stay valid.
+        """
+        self._entries.clear()
+        
+    def __len__(self) -> int:
+        return len(self._entries)
+        
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._entries)
+        
+    def __getitem__(self, index: int) -> Any:
+        return self._entries[index]
+
+def _status_matches(status: Optional[int], wanted: Union[int, str, List[int]]) -> bool:
+    """
+    Checks a response status against an exact code, a list of codes or a class such as "4xx".
+    """
+    if status is None:
+        return False
+    if isinstance(wanted, str) and len(wanted) == 3 and wanted[1:].lower() == "xx":
+        return str(status)[0] == wanted[0]
+    if isinstance(wanted, (list, tuple, set)):
+        return status in {int(w) for w in wanted}
+    return status == int(wanted)
+
+def _json_default(value: Any) -> Any:
+    """Serializes datetimes and enums for NDJSON export."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
 class BrowserState:
     """Manages browser state and logs."""
     
-    def __init__(self):
+    # Stream names accepted by get_events and export_events
+    STREAMS = ("console", "console_errors", "network", "network_errors")
+    
+    def __init__(self, max_logs: int = 1000):
         """
         Initializes a new BrowserState instance with empty logs and no selected element.
         
-        Sets up lists for console logs, console errors, successful and failed network requests, and initializes the selected element to None. Enforces a maximum log retention limit.
+        Sets up ring buffers for console logs, console errors, successful and failed network requests, and initializes the selected element to None. Each buffer keeps at most max_logs entries.
+        
+        Args:
+            max_logs: Maximum number of entries kept per buffer.
         """
-        self.console_logs: List[ConsoleLog] = []
-        self.console_errors: List[ConsoleLog] = []
-        self.network_success_logs: List[NetworkRequest] = []
-        self.network_error_logs: List[NetworkRequest] = []
+        self._max_logs = max_logs  # Maximum number of logs to keep
+        self.console_logs = CaptureRing(max_logs)
+        self.console_errors = CaptureRing(max_logs)
+        self.network_success_logs = CaptureRing(max_logs)
+        self.network_error_logs = CaptureRing(max_logs)
         self.selected_element: Optional[Dict[str, Any]] = None
-        self._max_logs = 1000  # Maximum number of logs to keep
+        
+        # Requests still waiting for a response, by (success, url), oldest first
+        self._pending: Dict[Tuple[bool, str], Deque[NetworkRequest]] = {}
         
     def add_console_log(self, log: ConsoleLog):
         """
         Adds a console log entry to the browser state.
         
-        If the log entry has an error level, it is also added to the error logs. Maintains a maximum number of stored logs.
+        If the log entry has an error level, it is also added to the error logs. The oldest entries are evicted once a buffer is full.
         """
         self.console_logs.append(log)
         if log.level == LogLevel.ERROR:
             self.console_errors.append(log)
             
-        # Trim logs if needed
-        if len(self.console_logs) > self._max_logs:
-            self.console_logs = self.console_logs[-self._max_logs:]
-        if len(self.console_errors) > self._max_logs:
-            self.console_errors = self.console_errors[-self._max_logs:]
-            
     def add_network_request(self, request: NetworkRequest):
         """
         Adds a network request log to the success or error logs based on its outcome.
         
-        If the number of stored logs exceeds the maximum allowed, only the most recent entries are retained.
+        Requests without a status yet are indexed by URL so their response can be matched without scanning the logs.
         """
         if request.success:
             self.network_success_logs.append(request)
-            if len(self.network_success_logs) > self._max_logs:
-                self.network_success_logs = self.network_success_logs[-self._max_logs:]
         else:
             self.network_error_logs.append(request)
-            if len(self.network_error_logs) > self._max_logs:
-                self.network_error_logs = self.network_error_logs[-self._max_logs:]
+            
+        if request.status is None:
+            key = (request.success, request.url)
+            self._pending.setdefault(key, deque()).append(request)
+            if len(self._pending) > self._max_logs:
+                # Forget the URL that has waited longest for a response
+                del self._pending[next(iter(self._pending))]
+                
+    def pop_pending_request(self, url: str, success: bool = True) -> Optional[NetworkRequest]:
+        """
+        Returns the oldest request to the URL that has no response yet, and stops tracking it.
+        
+        Args:
+            url: Request URL.
+            success: Whether to look among successful or failed requests.
+        
+        Returns:
+            The pending request, or None if there is none.
+        """
+        key = (success, url)
+        pending = self._pending.get(key)
+        while pending:
+            request = pending.popleft()
+            if request.status is None:
+                if not pending:
+                    del self._pending[key]
+                return request
+        self._pending.pop(key, None)
+        return None
                 
     def set_selected_element(self, element: Dict[str, Any]):
         """
@@ -126,6 +244,110 @@ class BrowserState:
         self.console_errors.clear()
         self.network_success_logs.clear()
         self.network_error_logs.clear()
+        self._pending.clear()
+        
+    def _stream(self, stream: str) -> CaptureRing:
+        """Gets the ring buffer for a stream name."""
+        rings = {
+            "console": self.console_logs,
+            "console_errors": self.console_errors,
+            "network": self.network_success_logs,
+            "network_errors": self.network_error_logs
+        }
+        if stream not in rings:
+            raise ValueError(f"Unknown stream: {stream}. Expected one of {', '.join(self.STREAMS)}")
+        return rings[stream]
+        
+    @staticmethod
+    def _filter(level: Optional[str] = None,
+                url: Optional[str] = None,
+                status: Optional[Union[int, str, List[int]]] = None) -> Callable[[Any], bool]:
+        """
+        Builds a predicate for entries matching a level, a URL glob pattern and a status.
+        """
+        levels = {level} if isinstance(level, str) else set(level or [])
+        
+        def matches(entry: Any) -> bool:
+            if levels and getattr(entry, "level", None) not in levels:
+                return False
+            if url and not fnmatchcase(getattr(entry, "url", None) or getattr(entry, "source", None) or "", url):
+                return False
+            if status is not None and not _status_matches(getattr(entry, "status", None), status):
+                return False
+            return True
+            
+        return matches
+        
+    def get_events(self,
+                   stream: str = "console",
+                   since: int = 0,
+                   limit: int = 100,
+                   level: Optional[Union[str, List[str]]] = None,
+                   url: Optional[str] = None,
+                   status: Optional[Union[int, str, List[int]]] = None) -> Dict[str, Any]:
+        """
+        Returns a page of events captured after a cursor, optionally filtered.
+        
+        Only the returned events are serialized, so polling with the previous next_cursor costs time proportional to the new events.
+        
+        Args:
+            stream: One of "console", "console_errors", "network" or "network_errors".
+            since: Cursor; events with a sequence number above it are returned.
+            limit: Maximum number of events to return.
+            level: Console level or levels to keep.
+            url: Glob pattern matched against the request URL (or the console source).
+            status: Response status, list of statuses or class such as "5xx".
+        
+        Returns:
+            A dictionary with the events (each with its "seq"), next_cursor, whether more
+            events follow, and how many events were evicted before they could be read.
+        
+        Raises:
+            ValueError: If the stream is unknown.
+        """
+        ring = self._stream(stream)
+        matches = self._filter(level, url, status)
+        events = []
+        next_cursor = max(since, ring.first_seq - 1)
+        has_more = False
+        for seq, entry in ring.since(since):
+            if len(events) >= limit:
+                has_more = True
+                break
+            next_cursor = seq
+            if matches(entry):
+                events.append(dict(entry.dict(), seq=seq))
+        return {
+            "stream": stream,
+            "events": events,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "dropped": max(0, ring.first_seq - since - 1) if len(ring) else 0
+        }
+        
+    def export_events(self, stream: str = "console", since: int = 0, limit: int = 1000, **filters) -> Dict[str, Any]:
+        """
+        Exports a page of events as newline-delimited JSON.
+        
+        Args:
+            stream: Stream name (see get_events).
+            since: Cursor to export from.
+            limit: Maximum number of events in the page.
+            **filters: level, url and status filters (see get_events).
+        
+        Returns:
+            A dictionary with the NDJSON text, event count, next_cursor and has_more.
+        """
+        page = self.get_events(stream, since=since, limit=limit, **filters)
+        ndjson = "".join(json.dumps(event, default=_json_default) + "\n" for event in page["events"])
+        return {
+            "stream": stream,
+            "format": "ndjson",
+            "data": ndjson,
+            "count": len(page["events"]),
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
+        }
         
     def get_console_logs(self) -> List[Dict[str, Any]]:
         """
@@ -315,6 +537,56 @@ class BrowserTools:
                 "success": False,
                 "error": str(e)
             }
+    
+    @staticmethod
+    async def get_events(stream: str = "console", since: int = 0, limit: int = 100, **filters) -> Dict[str, Any]:
+        """Get captured events after a cursor, optionally filtered.
+        
+        Args:
+            stream: console, console_errors, network or network_errors
+            since: Cursor (next_cursor of the previous call)
+            limit: Maximum number of events
+            **filters: level, url (glob pattern) and status filters
+            
+        Returns:
+            Dictionary containing the events and the next cursor
+        """
+        try:
+            return {
+                "success": True,
+                **browser_state.get_events(stream, since=since, limit=limit, **filters)
+            }
+        except Exception as e:
+            logger.error(f"Error getting events: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    @staticmethod
+    async def export_events(stream: str = "console", since: int = 0, limit: int = 1000, **filters) -> Dict[str, Any]:
+        """Export a page of captured events as NDJSON.
+        
+        Args:
+            stream: console, console_errors, network or network_errors
+            since: Cursor (next_cursor of the previous page)
+            limit: Maximum number of events in the page
+            **filters: level, url (glob pattern) and status filters
+            
+        Returns:
+            Dictionary containing the NDJSON page and the next cursor
+        """
+        try:
+            return {
+                "success": True,
+                **browser_state.export_events(stream, since=since, limit=limit, **filters)
+            }
+        except Exception as e:
+            logger.error(f"Error exporting events: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
 
 # Individual operation functions
 async def get_console_logs() -> Dict[str, Any]:
@@ -381,6 +653,24 @@ async def wipe_logs() -> Dict[str, Any]:
     """
     return await BrowserTools.wipe_logs()
 
+async def get_events(stream: str = "console", since: int = 0, limit: int = 100, **filters) -> Dict[str, Any]:
+    """
+    Retrieves captured events after a cursor, optionally filtered by level, URL pattern and status.
+    
+    Returns:
+        A dictionary with the events, next_cursor and has_more on success, or an error message on failure.
+    """
+    return await BrowserTools.get_events(stream, since=since, limit=limit, **filters)
+
+async def export_events(stream: str = "console", since: int = 0, limit: int = 1000, **filters) -> Dict[str, Any]:
+    """
+    Exports a page of captured events as NDJSON.
+    
+    Returns:
+        A dictionary with the NDJSON data, next_cursor and has_more on success, or an error message on failure.
+    """
+    return await BrowserTools.export_events(stream, since=since, limit=limit, **filters)
+
 # Event handlers for browser events
 def handle_console_log(level: str, message: str, source: str, line_number: Optional[int] = None):
     """
@@ -420,7 +710,7 @@ def handle_network_request(
         type=NetworkRequestType.XHR,
         method=method,
         url=url,
-        request_headers=request_headers
+        request_headers=request_headers or {}
     )
     browser_state.add_network_request(request)
 
@@ -436,12 +726,11 @@ def handle_network_response(
     Searches for the first network request in the success log matching the given URL and without a status, then sets its status, duration, and response headers.
     """
     # Find matching request log
-    for log in browser_state.network_success_logs:
-        if log.url == url and log.status is None:
-            log.status = status
-            log.duration = duration
-            log.response_headers = response_headers
-            break
+    log = browser_state.pop_pending_request(url)
+    if log is not None:
+        log.status = status
+        log.duration = duration
+        log.response_headers = response_headers or {}
 
 def handle_network_error(url: str, error: str):
     """
@@ -452,10 +741,9 @@ def handle_network_error(url: str, error: str):
         error: The error message to associate with the request.
     """
     # Find matching request log
-    for log in browser_state.network_error_logs:
-        if log.url == url and log.status is None:
-            log.error = error
-            break
+    log = browser_state.pop_pending_request(url, success=False)
+    if log is not None:
+        log.error = error
 
 def handle_element_selected(element_info: Dict[str, Any]):
     """
@@ -466,7 +754,7 @@ def handle_element_selected(element_info: Dict[str, Any]):
     """
     browser_state.set_selected_element(element_info) 
 
-async def browser_operation(operation: str) -> Dict[str, Any]:
+async def browser_operation(operation: str, **params) -> Dict[str, Any]:
     """Primary interface for browser operations.
     
     This function is the main entry point for the tool system to interact with browser
@@ -475,7 +763,9 @@ async def browser_operation(operation: str) -> Dict[str, Any]:
     Args:
         operation: Operation to perform (get_console_logs, get_console_errors,
                  get_network_error_logs, get_network_success_logs, take_screenshot,
-                 get_selected_element, wipe_logs)
+                 get_selected_element, wipe_logs, get_events, export_events)
+        **params: Parameters for get_events and export_events (stream, since,
+                 limit, level, url, status)
         
     Returns:
         Dictionary containing operation results
@@ -503,6 +793,12 @@ async def browser_operation(operation: str) -> Dict[str, Any]:
         elif operation == "wipe_logs":
             return await wipe_logs()
             
+        elif operation == "get_events":
+            return await get_events(**params)
+            
+        elif operation == "export_events":
+            return await export_events(**params)
+            
         else:
             return {
                 "success": False,
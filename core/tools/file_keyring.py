@@ -0,0 +1,103 @@
+"""
+File-backed keyring backend for WrenchAI.
+
+This module provides a keyring stand-in that stores credentials in a local
+JSON file, so code paths that go through the secrets manager can run headless
+(CI, containers) where no system keychain is available. Values are stored in
+plain text; do not use it for real credentials.
+
+Enable it either with ``use_file_keyring(path)`` or by setting
+``PYTHON_KEYRING_BACKEND=core.tools.file_keyring.FileKeyring`` together with
+``WRENCHAI_KEYRING_FILE``.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import keyring
+from keyring.backend import KeyringBackend
+from keyring.errors import PasswordDeleteError
+
+logger = logging.getLogger(__name__)
+
+KEYRING_FILE_ENV = "WRENCHAI_KEYRING_FILE"
+DEFAULT_KEYRING_FILE = os.path.join(os.path.expanduser("~"), ".wrenchai", "keyring.json")
+
+
+class FileKeyring(KeyringBackend):
+    """
+    Keyring backend that persists credentials to a JSON file.
+
+    The file maps service names to ``{username: password}`` dictionaries.
+    All operations are guarded by a lock because the secrets manager calls
+    keyring from executor threads.
+    """
+
+    priority = 1
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the file keyring.
+
+        Args:
+            path: Path of the JSON file. Defaults to $WRENCHAI_KEYRING_FILE
+                  or ~/.wrenchai/keyring.json.
+        """
+        super().__init__()
+        self.path = path or os.getenv(KEYRING_FILE_ENV, DEFAULT_KEYRING_FILE)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        """Load all credentials from the file."""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _save(self, data: Dict[str, Dict[str, str]]) -> None:
+        """Atomically write all credentials to the file."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.path)
+
+    def get_password(self, service: str, username: str) -> Optional[str]:
+        with self._lock:
+            return self._load().get(service, {}).get(username)
+
+    def set_password(self, service: str, username: str, password: str) -> None:
+        with self._lock:
+            data = self._load()
+            data.setdefault(service, {})[username] = password
+            self._save(data)
+
+    def delete_password(self, service: str, username: str) -> None:
+        with self._lock:
+            data = self._load()
+            if username not in data.get(service, {}):
+                raise PasswordDeleteError(f"Password not found: {service}/{username}")
+            del data[service][username]
+            self._save(data)
+
+
+def use_file_keyring(path: Optional[str] = None) -> FileKeyring:
+    """
+    Install a FileKeyring as the active keyring backend.
+
+    Args:
+        path: Optional path of the JSON file backing the keyring
+
+    Returns:
+        The installed FileKeyring instance
+    """
+    backend = FileKeyring(path)
+    keyring.set_keyring(backend)
+    logger.info(f"Using file-backed keyring at {backend.path}")
+    return backend
@@ -19,8 +19,11 @@ from concurrent.futures import ThreadPoolExecutor
 import warnings
 import time
 import socket
+import heapq
 from collections import deque
 
+from .timeseries_store import TimeSeriesStore, timeseries_store
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -52,6 +55,7 @@ class MetricConfig(BaseModel):
     labels: Dict[str, str] = Field(default_factory=dict, description="Metric labels")
     buckets: Optional[List[float]] = Field(default=None, description="Histogram buckets")
     aggregation_window: Optional[int] = Field(default=None, description="Window size for aggregation in seconds")
+    database_url: Optional[str] = Field(default=None, description="Database URL overriding the tool's default DSN")
 
 class MetricData(BaseModel):
     """Model for collected metric data"""
@@ -80,19 +84,78 @@ class MetricState:
     last_value: Optional[float] = None
     last_update: Optional[datetime] = None
     values_buffer: deque = None
+    collections: int = 0                # Number of collection attempts
+    errors: int = 0                     # Number of failed collections
+    last_latency_ms: float = 0.0        # Latency of the last collection
+    total_latency_ms: float = 0.0       # Sum of collection latencies
+    max_latency_ms: float = 0.0         # Slowest collection
+
+    def record_collection(self, latency_ms: float, success: bool = True):
+        """Record the latency of one collection of this metric"""
+        self.collections += 1
+        if not success:
+            self.errors += 1
+        self.last_latency_ms = latency_ms
+        self.total_latency_ms += latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+# Self-reported collection latency, exported next to the collected metrics
+COLLECTION_LATENCY = Histogram(
+    "monitoring_collection_seconds",
+    "Time spent collecting a metric",
+    labelnames=["metric"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
 
 class MonitoringTool:
-    """Tool for database and system monitoring"""
+    """Tool for database and system monitoring
     
-    def __init__(self):
+    Collection is driven by a heap of next-due times: the collection thread
+    sleeps until the earliest metric is due, then collects every due metric.
+    Due database metrics that share a DSN are collected together on one
+    pooled connection, combined into a single SELECT when possible. Alerts are
+    kept in a bounded ring and repeats within the suppression window are
+    folded into the first alert instead of being re-dispatched.
+    """
+    
+    def __init__(self,
+                 alert_capacity: int = 1000,
+                 alert_suppression_window: float = 300.0,
+                 batch_queries: bool = True,
+                 max_workers: int = 10,
+                 timeseries: Optional[TimeSeriesStore] = None):
+        """Initialize the monitoring tool
+        
+        Args:
+            alert_capacity: Maximum number of alerts kept in memory
+            alert_suppression_window: Seconds during which a repeat of the same
+                alert (metric, severity, labels) is suppressed
+            batch_queries: Whether to combine due scalar queries on the same
+                DSN into one SELECT round-trip
+            max_workers: Size of the collection thread pool
+            timeseries: Store receiving every collected sample (defaults
+                to the shared store)
+        """
         self.database_url: Optional[str] = None
         self.metrics: Dict[str, MetricState] = {}
-        self.alerts: List[Alert] = []
+        self.timeseries = timeseries if timeseries is not None else timeseries_store
+        self.alerts: deque = deque(maxlen=alert_capacity)
+        self.alert_suppression_window = alert_suppression_window
+        self.alerts_suppressed = 0
+        self.batch_queries = batch_queries
+        self._last_alerts: Dict[tuple, Alert] = {}
+        self._engines: Dict[str, Any] = {}
+        self._engines_lock = threading.Lock()
+        self._schedule: List[tuple] = []
+        self._schedule_lock = threading.Lock()
+        self._schedule_seq = 0
+        self._wakeup = threading.Event()
+        self._last_cleanup = 0.0
         self._collection_thread: Optional[threading.Thread] = None
         self._stop_collection = threading.Event()
         self._metrics_queue = queue.Queue()
         self._alert_handlers: List[callable] = []
-        self._executor = ThreadPoolExecutor(max_workers=10)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
         self._data_retention_days = 30
         
     def configure_database(self, connection_string: str) -> bool:
@@ -104,6 +167,26 @@ class MonitoringTool:
             logger.error(f"Error configuring database: {str(e)}")
             return False
             
+    def _get_engine(self, dsn: str):
+        """Get the pooled engine for a DSN, creating it on first use"""
+        engine = self._engines.get(dsn)
+        if engine is None:
+            with self._engines_lock:
+                engine = self._engines.get(dsn)
+                if engine is None:
+                    import sqlalchemy as sa
+                    engine = sa.create_engine(dsn, pool_pre_ping=True)
+                    self._engines[dsn] = engine
+        return engine
+        
+    def dispose_engines(self):
+        """Close all pooled database connections"""
+        with self._engines_lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
+            
     def add_metric(self, config: MetricConfig) -> bool:
         """Add a new metric to monitor"""
         try:
@@ -126,6 +209,7 @@ class MonitoringTool:
             )
             
             self.metrics[config.name] = state
+            self._schedule_metric(config.name, time.monotonic())
             return True
         except Exception as e:
             logger.error(f"Error adding metric {config.name}: {str(e)}")
@@ -154,75 +238,197 @@ class MonitoringTool:
         """Stop metric collection"""
         if self._collection_thread:
             self._stop_collection.set()
+            self._wakeup.set()
             self._collection_thread.join()
             self._collection_thread = None
             
+    def _schedule_metric(self, metric_name: str, due: float):
+        """Push a metric's next collection time onto the timer heap"""
+        with self._schedule_lock:
+            self._schedule_seq += 1
+            heapq.heappush(self._schedule, (due, self._schedule_seq, metric_name))
+        self._wakeup.set()
+        
+    def _pop_due_metrics(self, now: float) -> List[str]:
+        """Pop every metric due at ``now`` and reschedule it"""
+        due = []
+        with self._schedule_lock:
+            while self._schedule and self._schedule[0][0] <= now:
+                due_at, _, metric_name = heapq.heappop(self._schedule)
+                state = self.metrics.get(metric_name)
+                if state is None:
+                    continue  # Metric was removed
+                due.append(metric_name)
+                # Keep a fixed cadence, but never schedule in the past after a stall
+                next_due = due_at + state.config.interval
+                if next_due <= now:
+                    next_due = now + state.config.interval
+                self._schedule_seq += 1
+                heapq.heappush(self._schedule, (next_due, self._schedule_seq, metric_name))
+        return due
+        
+    def _next_due_in(self, now: float) -> Optional[float]:
+        """Seconds until the earliest scheduled metric (None if nothing is scheduled)"""
+        with self._schedule_lock:
+            if not self._schedule:
+                return None
+            return max(0.0, self._schedule[0][0] - now)
+            
     def _collection_loop(self):
         """Main metric collection loop"""
         while not self._stop_collection.is_set():
-            current_time = datetime.now()
-            
-            # Collect metrics in parallel
-            futures = []
-            for metric_name, state in self.metrics.items():
-                if (not state.last_update or
-                    (current_time - state.last_update).total_seconds() >= state.config.interval):
-                    futures.append(self._executor.submit(self._collect_metric, metric_name))
-                    
-            # Wait for all collections to complete
-            for future in futures:
-                try:
-                    future.result()
-                except Exception as e:
-                    logger.error(f"Error collecting metric: {str(e)}")
-                    
-            # Process queued metrics
-            self._process_metrics_queue()
+            self._wakeup.clear()
+            self.collect_due(time.monotonic())
+            
+            # Clean up old data at most once a minute
+            if time.monotonic() - self._last_cleanup >= 60:
+                self._cleanup_old_data()
+                self._last_cleanup = time.monotonic()
+                
+            # Sleep until the next metric is due or the schedule changes
+            delay = self._next_due_in(time.monotonic())
+            self._wakeup.wait(timeout=60 if delay is None else min(delay, 60))
+            
+    def collect_due(self, now: Optional[float] = None) -> List[str]:
+        """Collect every metric that is due and process the results
+        
+        Args:
+            now: Monotonic time to use (defaults to the current time)
+            
+        Returns:
+            Names of the metrics that were collected
+        """
+        due = self._pop_due_metrics(time.monotonic() if now is None else now)
+        if not due:
+            return []
+            
+        # Group database metrics by DSN so they share one connection
+        db_batches: Dict[str, List[str]] = {}
+        futures = []
+        for metric_name in due:
+            config = self.metrics[metric_name].config
+            if config.query:
+                dsn = config.database_url or self.database_url
+                db_batches.setdefault(dsn, []).append(metric_name)
+            else:
+                futures.append(self._executor.submit(self._collect_metric, metric_name))
+        for dsn, names in db_batches.items():
+            futures.append(self._executor.submit(self._collect_database_batch, dsn, names))
             
-            # Clean up old data
-            self._cleanup_old_data()
+        # Wait for all collections to complete
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error collecting metric: {str(e)}")
+                
+        # Process queued metrics
+        self._process_metrics_queue()
+        return due
             
-            # Sleep until next collection
-            time.sleep(1)
+    def _record_latency(self, metric_name: str, latency_ms: float, success: bool):
+        """Record the collection latency of a metric"""
+        self.metrics[metric_name].record_collection(latency_ms, success)
+        COLLECTION_LATENCY.labels(metric=metric_name).observe(latency_ms / 1000)
+        
+    def _queue_value(self, metric_name: str, value: float, latency_ms: float):
+        """Queue a collected value for processing"""
+        state = self.metrics[metric_name]
+        self._metrics_queue.put(MetricData(
+            timestamp=datetime.now(),
+            metric_name=metric_name,
+            value=value,
+            labels=state.config.labels,
+            metadata={"collection_latency_ms": latency_ms}
+        ))
             
     def _collect_metric(self, metric_name: str):
         """Collect a single metric"""
         state = self.metrics[metric_name]
+        start = time.perf_counter()
         try:
             # Get metric value
             if state.config.query:
-                value = self._collect_database_metric(state.config.query)
+                value = self._collect_database_metric(state.config.query, state.config.database_url)
             else:
                 value = self._collect_system_metric(metric_name)
-                
-            # Update metric state
-            timestamp = datetime.now()
-            metric_data = MetricData(
-                timestamp=timestamp,
-                metric_name=metric_name,
-                value=value,
-                labels=state.config.labels
-            )
+            latency_ms = (time.perf_counter() - start) * 1000
+            self._record_latency(metric_name, latency_ms, True)
             
             # Queue metric for processing
-            self._metrics_queue.put(metric_data)
+            self._queue_value(metric_name, value, latency_ms)
             
         except Exception as e:
+            self._record_latency(metric_name, (time.perf_counter() - start) * 1000, False)
             logger.error(f"Error collecting metric {metric_name}: {str(e)}")
             
-    def _collect_database_metric(self, query: str) -> float:
-        """Collect a metric from the database"""
-        if not self.database_url:
-            raise ValueError("Database not configured")
+    def _collect_database_batch(self, dsn: Optional[str], metric_names: List[str]):
+        """Collect several database metrics on one pooled connection
+        
+        When batching is enabled the queries are combined into a single
+        ``SELECT (q1), (q2), ...`` round-trip. If the combined statement fails
+        (e.g. a query is not a scalar subquery), the queries are run one by
+        one on the same connection.
+        """
+        if not dsn:
+            for metric_name in metric_names:
+                self._record_latency(metric_name, 0.0, False)
+            logger.error(f"Error collecting metrics {metric_names}: Database not configured")
+            return
             
         import sqlalchemy as sa
-        engine = sa.create_engine(self.database_url)
+        queries = [self.metrics[name].config.query.strip().rstrip(";") for name in metric_names]
+        engine = self._get_engine(dsn)
         with engine.connect() as conn:
-            result = conn.execute(sa.text(query))
-            row = result.fetchone()
-            if row:
-                return float(row[0])
-            raise ValueError("Query returned no results")
+            if self.batch_queries and len(queries) > 1:
+                start = time.perf_counter()
+                combined = "SELECT " + ", ".join(
+                    f"({query}) AS m{i}" for i, query in enumerate(queries)
+                )
+                try:
+                    row = conn.execute(sa.text(combined)).fetchone()
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    for i, metric_name in enumerate(metric_names):
+                        if row is None or row[i] is None:
+                            self._record_latency(metric_name, latency_ms, False)
+                            logger.error(f"Error collecting metric {metric_name}: Query returned no results")
+                            continue
+                        self._record_latency(metric_name, latency_ms, True)
+                        self._queue_value(metric_name, float(row[i]), latency_ms)
+                    return
+                except Exception as e:
+                    conn.rollback()
+                    logger.debug(f"Combined metric query failed, collecting individually: {str(e)}")
+                    
+            for metric_name, query in zip(metric_names, queries):
+                start = time.perf_counter()
+                try:
+                    value = self._fetch_scalar(conn, query)
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    self._record_latency(metric_name, latency_ms, True)
+                    self._queue_value(metric_name, value, latency_ms)
+                except Exception as e:
+                    conn.rollback()
+                    self._record_latency(metric_name, (time.perf_counter() - start) * 1000, False)
+                    logger.error(f"Error collecting metric {metric_name}: {str(e)}")
+                    
+    @staticmethod
+    def _fetch_scalar(conn, query: str) -> float:
+        """Run a query and return the first column of the first row"""
+        import sqlalchemy as sa
+        row = conn.execute(sa.text(query)).fetchone()
+        if row:
+            return float(row[0])
+        raise ValueError("Query returned no results")
+            
+    def _collect_database_metric(self, query: str, database_url: Optional[str] = None) -> float:
+        """Collect a metric from the database"""
+        dsn = database_url or self.database_url
+        if not dsn:
+            raise ValueError("Database not configured")
+            
+        with self._get_engine(dsn).connect() as conn:
+            return self._fetch_scalar(conn, query)
             
     def _collect_system_metric(self, metric_name: str) -> float:
         """Collect a system metric"""
@@ -246,17 +452,24 @@ class MonitoringTool:
                 metric_data = self._metrics_queue.get_nowait()
                 state = self.metrics[metric_data.metric_name]
                 
-                # Update Prometheus metric
+                # Update Prometheus metric (unlabelled metrics reject .labels())
+                prom_metric = (
+                    state.prometheus_metric.labels(**metric_data.labels)
+                    if metric_data.labels else state.prometheus_metric
+                )
                 if state.config.metric_type == MetricType.COUNTER:
                     if state.last_value is not None:
                         increment = max(0, metric_data.value - state.last_value)
-                        state.prometheus_metric.inc(increment)
+                        prom_metric.inc(increment)
+                elif state.config.metric_type == MetricType.GAUGE:
+                    prom_metric.set(metric_data.value)
                 else:
-                    state.prometheus_metric.labels(**metric_data.labels).set(metric_data.value)
+                    prom_metric.observe(metric_data.value)
                     
                 # Update metric state
                 state.last_value = metric_data.value
                 state.last_update = metric_data.timestamp
+                self.timeseries.record(metric_data.metric_name, metric_data.value, metric_data.timestamp.timestamp())
                 
                 # Add to buffer if aggregation is enabled
                 if state.values_buffer is not None:
@@ -285,9 +498,30 @@ class MonitoringTool:
                     labels=metric_data.labels,
                     metadata=metric_data.metadata
                 )
+                if self._suppress_alert(alert):
+                    return
                 self.alerts.append(alert)
                 self._handle_alert(alert)
                 
+    def _suppress_alert(self, alert: Alert) -> bool:
+        """Fold a repeat of a recent alert into the original
+        
+        Returns:
+            True if the alert is a duplicate within the suppression window
+        """
+        key = (alert.metric_name, alert.severity, tuple(sorted(alert.labels.items())))
+        previous = self._last_alerts.get(key)
+        if (previous is not None and
+                (alert.timestamp - previous.timestamp).total_seconds() < self.alert_suppression_window):
+            previous.metadata = previous.metadata or {}
+            previous.metadata["repeat_count"] = previous.metadata.get("repeat_count", 0) + 1
+            previous.metadata["last_value"] = alert.value
+            previous.metadata["last_seen"] = alert.timestamp.isoformat()
+            self.alerts_suppressed += 1
+            return True
+        self._last_alerts[key] = alert
+        return False
+                
     def _handle_alert(self, alert: Alert):
         """Handle a new alert"""
         logger.warning(f"Alert: {alert.message} (value: {alert.value}, threshold: {alert.threshold})")
@@ -305,7 +539,7 @@ class MonitoringTool:
                    start_time: Optional[datetime] = None,
                    end_time: Optional[datetime] = None) -> List[Alert]:
         """Get filtered alerts"""
-        filtered = self.alerts
+        filtered = list(self.alerts)
         
         if severity:
             filtered = [a for a in filtered if a.severity == severity]
@@ -323,8 +557,21 @@ class MonitoringTool:
                         end_time: Optional[datetime] = None) -> pd.DataFrame:
         """Get historical metric data"""
         state = self.metrics.get(metric_name)
-        if not state or not state.values_buffer:
+        if not state:
             return pd.DataFrame()
+        if not state.values_buffer:
+            # Fall back to the raw samples held by the time-series store
+            ts, values = self.timeseries.window(
+                metric_name,
+                start_time.timestamp() if start_time else 0.0,
+                end_time.timestamp() if end_time else None
+            )
+            if not ts.size:
+                return pd.DataFrame()
+            return pd.DataFrame({
+                "timestamp": [datetime.fromtimestamp(t) for t in ts],
+                "value": values
+            })
             
         # Convert buffer to DataFrame
         df = pd.DataFrame(list(state.values_buffer), columns=["timestamp", "value"])
@@ -337,6 +584,28 @@ class MonitoringTool:
             
         return df
         
+    def query_metric(self, metric_name: str,
+                     start_time: datetime,
+                     end_time: Optional[datetime] = None) -> Dict[str, float]:
+        """Get min/max/avg/percentile aggregates of a metric over a time range"""
+        return self.timeseries.query(
+            metric_name,
+            start_time.timestamp(),
+            end_time.timestamp() if end_time else None
+        )
+        
+    def fetch_metric_series(self, metric_name: str,
+                            start_time: datetime,
+                            end_time: Optional[datetime] = None,
+                            max_points: int = 500) -> Dict[str, List[float]]:
+        """Get a decimated series of a metric for plotting"""
+        return self.timeseries.fetch(
+            metric_name,
+            start_time.timestamp(),
+            end_time.timestamp() if end_time else None,
+            max_points
+        )
+        
     def generate_report(self, format: str = "html") -> str:
         """Generate a monitoring report"""
         # Create subplots for each metric
@@ -399,8 +668,10 @@ class MonitoringTool:
         """Clean up data older than retention period"""
         cutoff = datetime.now() - timedelta(days=self._data_retention_days)
         
-        # Clean up alerts
-        self.alerts = [a for a in self.alerts if a.timestamp >= cutoff]
+        # Clean up alerts (oldest first in the ring)
+        while self.alerts and self.alerts[0].timestamp < cutoff:
+            self.alerts.popleft()
+        self._last_alerts = {k: a for k, a in self._last_alerts.items() if a.timestamp >= cutoff}
         
         # Clean up metric buffers
         for state in self.metrics.values():
@@ -409,6 +680,19 @@ class MonitoringTool:
                        state.values_buffer[0][0] < cutoff):
                     state.values_buffer.popleft()
                     
+    def get_collection_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get self-reported collection latency and error counts per metric"""
+        return {
+            name: {
+                "collections": state.collections,
+                "errors": state.errors,
+                "last_latency_ms": state.last_latency_ms,
+                "avg_latency_ms": state.total_latency_ms / state.collections if state.collections else 0.0,
+                "max_latency_ms": state.max_latency_ms,
+            }
+            for name, state in self.metrics.items()
+        }
+        
     def get_system_metrics(self) -> Dict[str, float]:
         """Get current system metrics"""
         metrics = {
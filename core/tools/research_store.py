@@ -0,0 +1,442 @@
+# MIT License - Copyright (c) 2024 Wrench AI
+# For full license information, see the LICENSE file in the repo root.
+
+"""
+Embedded knowledge-base store for research agents.
+
+Replaces the single JSON document the WebResearcher used to rewrite after every
+query with a SQLite database that is updated incrementally.
+
+Key components:
+- normalize_research_query: Canonical form used for exact query reuse
+- MinHasher: MinHash signatures and LSH band keys for near-duplicate queries
+- ResearchStore: Topics, sources and citations with upserts, FTS5 full-text
+  search over findings, near-duplicate topic lookup and set-based URL dedup
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no meaning for research-query matching
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from",
+    "how", "in", "is", "it", "of", "on", "or", "the", "to", "what", "which", "with",
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def query_tokens(query: str) -> List[str]:
+    """Split a query into lower-case tokens with stopwords removed.
+
+    Args:
+        query: Free-text research query
+
+    Returns:
+        Tokens in their original order
+    """
+    tokens = [t for t in _TOKEN_RE.findall(query.lower()) if t not in STOPWORDS]
+    # Fold simple plurals so "agents" and "agent" match
+    return [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t for t in tokens]
+
+
+def normalize_research_query(query: str) -> str:
+    """Canonical key for exact reuse: sorted, de-duplicated tokens.
+
+    Args:
+        query: Free-text research query
+
+    Returns:
+        Normalized query key
+    """
+    return " ".join(sorted(set(query_tokens(query))))
+
+
+class MinHasher:
+    """MinHash signatures with LSH banding.
+
+    Two queries whose shingle sets have Jaccard similarity ``s`` share at least
+    one band key with probability ``1 - (1 - s**rows)**bands``, so candidate
+    lookup is an indexed equality match instead of a scan over all topics.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, seed: int = 1):
+        """Initialize the hasher.
+
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            bands: Number of LSH bands; must divide num_perm
+            seed: Seed for the permutation coefficients
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    @staticmethod
+    def shingles(query: str) -> Set[str]:
+        """Token unigrams plus adjacent bigrams of a query."""
+        tokens = query_tokens(query)
+        shingles = set(tokens)
+        shingles.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return shingles
+
+    def signature(self, query: str) -> List[int]:
+        """Compute the MinHash signature of a query.
+
+        Args:
+            query: Free-text research query
+
+        Returns:
+            List of num_perm minimum hash values
+        """
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+            for s in self.shingles(query)
+        ]
+        if not hashes:
+            return [_MERSENNE_PRIME] * self.num_perm
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def band_keys(self, signature: Sequence[int]) -> List[str]:
+        """Hash each band of a signature to a lookup key."""
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(repr(tuple(chunk)).encode(), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    @staticmethod
+    def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """Estimate Jaccard similarity from two signatures."""
+        if not sig_a or len(sig_a) != len(sig_b):
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    query_key TEXT NOT NULL UNIQUE,
+    query TEXT NOT NULL,
+    findings TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS topic_bands (
+    band_key TEXT NOT NULL,
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    PRIMARY KEY (band_key, topic_id)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    url TEXT PRIMARY KEY,
+    title TEXT,
+    first_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS source_topics (
+    url TEXT NOT NULL REFERENCES sources(url) ON DELETE CASCADE,
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    PRIMARY KEY (url, topic_id)
+);
+CREATE TABLE IF NOT EXISTS citations (
+    id INTEGER PRIMARY KEY,
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    query TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    source_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_citations_topic ON citations(topic_id);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS topics_fts USING fts5(query, content);
+"""
+
+
+class ResearchStore:
+    """SQLite-backed knowledge base of research topics, sources and citations.
+
+    Every write is a small transaction touching only the rows for one topic,
+    so saving no longer grows with the size of the knowledge base. Lookups go
+    through the exact normalized key first and then MinHash LSH candidates,
+    so rephrased repeats of earlier research are served from the store.
+    """
+
+    def __init__(self,
+                 path: str = ":memory:",
+                 similarity_threshold: float = 0.6,
+                 hasher: Optional[MinHasher] = None):
+        """Open (or create) the store.
+
+        Args:
+            path: SQLite database file, or ":memory:"
+            similarity_threshold: Minimum estimated Jaccard similarity for a
+                near-duplicate topic to count as a hit
+            hasher: MinHash configuration
+        """
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self.hasher = hasher or MinHasher()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite FTS5 unavailable; full-text topic search disabled")
+            self.fts_enabled = False
+        self._conn.commit()
+
+    # Topics
+
+    def find_topic(self, query: str) -> Optional[Dict[str, Any]]:
+        """Find stored findings for a query or a near-duplicate of it.
+
+        Args:
+            query: Research query
+
+        Returns:
+            Stored findings, or None when nothing similar has been researched
+        """
+        key = normalize_research_query(query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT findings FROM topics WHERE query_key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                return json.loads(row["findings"])
+
+            signature = self.hasher.signature(query)
+            band_keys = self.hasher.band_keys(signature)
+            placeholders = ",".join("?" * len(band_keys))
+            candidates = self._conn.execute(
+                f"SELECT DISTINCT t.query, t.findings, t.signature FROM topic_bands b "
+                f"JOIN topics t ON t.id = b.topic_id WHERE b.band_key IN ({placeholders})",
+                band_keys
+            ).fetchall()
+
+        best, best_score = None, self.similarity_threshold
+        for candidate in candidates:
+            score = self.hasher.similarity(signature, json.loads(candidate["signature"]))
+            if score >= best_score:
+                best, best_score = candidate, score
+        if best is None:
+            return None
+        logger.info(f"Reusing research for '{best['query']}' (similarity {best_score:.2f})")
+        return json.loads(best["findings"])
+
+    def upsert_topic(self, query: str, findings: Dict[str, Any],
+                     timestamp: Optional[float] = None) -> int:
+        """Insert or replace the findings for a query, with its sources and a citation.
+
+        Args:
+            query: Research query
+            findings: Findings dictionary; its "sources" list is indexed by URL
+            timestamp: Citation time (defaults to now)
+
+        Returns:
+            Topic ID
+        """
+        now = timestamp if timestamp is not None else time.time()
+        key = normalize_research_query(query)
+        signature = self.hasher.signature(query)
+        sources = findings.get("sources", [])
+
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM topics WHERE query_key = ?", (key,)).fetchone()
+            if row is None:
+                topic_id = self._conn.execute(
+                    "INSERT INTO topics (query_key, query, findings, signature, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, query, json.dumps(findings), json.dumps(signature), now, now)
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO topic_bands (band_key, topic_id) VALUES (?, ?)",
+                    [(band_key, topic_id) for band_key in self.hasher.band_keys(signature)]
+                )
+            else:
+                topic_id = row["id"]
+                self._conn.execute(
+                    "UPDATE topics SET findings = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(findings), now, topic_id)
+                )
+
+            if self.fts_enabled:
+                self._conn.execute("DELETE FROM topics_fts WHERE rowid = ?", (topic_id,))
+                self._conn.execute(
+                    "INSERT INTO topics_fts (rowid, query, content) VALUES (?, ?, ?)",
+                    (topic_id, query, self._fts_content(findings))
+                )
+
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sources (url, title, first_seen) VALUES (?, ?, ?)",
+                [(s["url"], s.get("title"), now) for s in sources if s.get("url")]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO source_topics (url, topic_id) VALUES (?, ?)",
+                [(s["url"], topic_id) for s in sources if s.get("url")]
+            )
+            self._conn.execute(
+                "INSERT INTO citations (topic_id, query, timestamp, source_count) VALUES (?, ?, ?, ?)",
+                (topic_id, query, now, len(sources))
+            )
+        return topic_id
+
+    def search_topics(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Full-text search over stored queries and findings.
+
+        Args:
+            text: Search terms
+            limit: Maximum number of topics
+
+        Returns:
+            Matching topics as {"query", "findings"}, best match first
+        """
+        terms = query_tokens(text)
+        if not terms:
+            return []
+        with self._lock:
+            if self.fts_enabled:
+                rows = self._conn.execute(
+                    "SELECT t.query, t.findings FROM topics_fts f JOIN topics t ON t.id = f.rowid "
+                    "WHERE topics_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (" OR ".join(f'"{t}"*' for t in terms), limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT query, findings FROM topics WHERE "
+                    + " OR ".join("query_key LIKE ?" for _ in terms) + " LIMIT ?",
+                    [f"%{t}%" for t in terms] + [limit]
+                ).fetchall()
+        return [{"query": r["query"], "findings": json.loads(r["findings"])} for r in rows]
+
+    # Sources
+
+    def has_source(self, url: str) -> bool:
+        """Check whether a URL has been recorded for any topic."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM sources WHERE url = ?", (url,)
+            ).fetchone() is not None
+
+    def get_source(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get a source with the queries it was used for.
+
+        Args:
+            url: Source URL
+
+        Returns:
+            {"title", "used_for"} or None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT title FROM sources WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            used_for = [r["query"] for r in self._conn.execute(
+                "SELECT t.query FROM source_topics st JOIN topics t ON t.id = st.topic_id "
+                "WHERE st.url = ? ORDER BY t.id", (url,)
+            )]
+        return {"title": row["title"], "used_for": used_for}
+
+    def citations(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent citations, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT query, timestamp, source_count FROM citations ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # Maintenance
+
+    def import_json(self, path: str) -> int:
+        """Import a legacy JSON knowledge base ({"topics", "sources", "citations"}).
+
+        Args:
+            path: Path to the JSON file
+
+        Returns:
+            Number of topics imported
+        """
+        with open(path, "r") as f:
+            data = json.load(f)
+        topics = data.get("topics", {})
+        for query, findings in topics.items():
+            self.upsert_topic(query, findings)
+        return len(topics)
+
+    def stats(self) -> Dict[str, int]:
+        """Row counts per table."""
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("topics", "sources", "citations")
+            }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _fts_content(findings: Dict[str, Any]) -> str:
+        parts: List[str] = []
+        for field in ("information", "patterns", "recommendations"):
+            parts.extend(str(item) for item in findings.get(field, []))
+        parts.extend(s.get("title", "") for s in findings.get("sources", []))
+        return "\n".join(parts)
+
+
+def open_research_store(path: str) -> ResearchStore:
+    """Open a research store, migrating a legacy JSON knowledge base if needed.
+
+    A ``.json`` path is mapped to a sibling ``.db`` file. If the database is
+    new and the JSON file (or, for a ``.db`` path, a sibling ``.json`` file)
+    exists, its topics are imported once.
+
+    Args:
+        path: Knowledge base path (.json legacy or SQLite)
+
+    Returns:
+        Open ResearchStore
+    """
+    legacy: Optional[Path] = None
+    db_path = Path(path)
+    if db_path.suffix == ".json":
+        legacy, db_path = db_path, db_path.with_suffix(".db")
+    elif db_path.suffix == ".db":
+        legacy = db_path.with_suffix(".json")
+
+    is_new = not db_path.exists()
+    store = ResearchStore(str(db_path))
+    if is_new and legacy is not None and legacy.exists():
+        try:
+            count = store.import_json(str(legacy))
+            logger.info(f"Imported {count} topics from {legacy} into {db_path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not import legacy knowledge base {legacy}: {e}")
+    return store
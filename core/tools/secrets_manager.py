@@ -4,21 +4,35 @@ Secrets Manager for WrenchAI.
 This module provides secure credential management using macOS Keychain.
 It follows the project's security standards and provides a clean API for
 managing sensitive information.
+
+Keyring calls are blocking, so they run in a thread executor and successful
+lookups are kept in a TTL-bounded in-memory cache. Set WRENCHAI_KEYRING_FILE
+to use the file-backed keyring stand-in (see file_keyring.py) when no system
+keychain is available, e.g. in CI.
 """
 
 import keyring
+import asyncio
 import logging
 import os
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Callable, Tuple
 from pydantic import BaseModel, SecretStr
-from functools import wraps
+from functools import wraps, partial
+
+from .file_keyring import KEYRING_FILE_ENV, use_file_keyring
 
 logger = logging.getLogger(__name__)
 
 # Constants
 SERVICE_NAME = "mcp-servers"
 DEFAULT_ACCOUNT = "default"
+DEFAULT_CACHE_TTL = 300.0  # Seconds a retrieved secret stays cached
+
+# Use the file-backed keyring for headless runs unless a backend is forced
+if os.getenv(KEYRING_FILE_ENV) and not os.getenv("PYTHON_KEYRING_BACKEND"):
+    use_file_keyring(os.getenv(KEYRING_FILE_ENV))
 
 class SecretNotFoundError(Exception):
     """Raised when a secret is not found in the keychain."""
@@ -56,18 +70,79 @@ class SecretsManager:
     Manages secrets using macOS Keychain.
     
     This class provides a secure interface for storing and retrieving
-    sensitive information like API keys and credentials.
+    sensitive information like API keys and credentials. Retrieved secrets
+    are cached for ``cache_ttl`` seconds and invalidated on every write;
+    concurrent lookups of the same uncached secret share one keyring call.
     """
     
-    def __init__(self, service_name: str = 'mcp-servers'):
+    def __init__(self, service_name: str = 'mcp-servers', cache_ttl: float = DEFAULT_CACHE_TTL):
         """
         Initialize SecretsManager.
         
         Args:
             service_name: The service name to use in keychain.
                         Defaults to 'mcp-servers' as per project rules.
+            cache_ttl: Seconds to cache retrieved secrets. 0 disables caching.
         """
         self.service_name = service_name
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[str, Tuple[str, float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._version = 0  # Bumped on invalidation so stale lookups are not cached
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    async def _run_keyring(self, func: Callable, *args) -> Any:
+        """Run a blocking keyring call in the default thread executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(func, *args))
+    
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        Drop cached secrets.
+        
+        Args:
+            name: The secret to drop. If None, the whole cache is cleared.
+        """
+        self._version += 1
+        if name is None:
+            self._cache.clear()
+            self._inflight.clear()
+        else:
+            self._cache.pop(name, None)
+            self._inflight.pop(name, None)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._cache),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+            "inflight": len(self._inflight),
+        }
+    
+    async def _lookup(self, name: str) -> Optional[str]:
+        """Fetch a secret from the keyring, coalescing concurrent lookups."""
+        future = self._inflight.get(name)
+        if future is not None:
+            return await asyncio.shield(future)
+        
+        version = self._version
+        future = asyncio.ensure_future(
+            self._run_keyring(keyring.get_password, self.service_name, name)
+        )
+        self._inflight[name] = future
+        try:
+            value = await asyncio.shield(future)
+        finally:
+            if self._inflight.get(name) is future:
+                del self._inflight[name]
+        
+        if value is not None and self.cache_ttl > 0 and version == self._version:
+            self._cache[name] = (value, time.monotonic() + self.cache_ttl)
+        return value
         
     @handle_keyring_errors
     async def store_secret(self, name: str, value: str) -> None:
@@ -81,11 +156,14 @@ class SecretsManager:
         Raises:
             SecretStoreError: If storing the secret fails
         """
+        self.invalidate(name)
         try:
-            keyring.set_password(self.service_name, name, value)
+            await self._run_keyring(keyring.set_password, self.service_name, name, value)
             logger.info(f"Successfully stored secret: {name}")
         except Exception as e:
             raise SecretStoreError(f"Failed to store secret {name}: {str(e)}")
+        finally:
+            self.invalidate(name)
     
     @handle_keyring_errors
     async def get_secret(self, name: str) -> str:
@@ -102,7 +180,16 @@ class SecretsManager:
             SecretNotFoundError: If the secret is not found
             SecretStoreError: If accessing the secret fails
         """
-        value = keyring.get_password(self.service_name, name)
+        cached = self._cache.get(name)
+        if cached is not None:
+            value, expires_at = cached
+            if time.monotonic() < expires_at:
+                self.cache_hits += 1
+                return value
+            del self._cache[name]
+        
+        self.cache_misses += 1
+        value = await self._lookup(name)
         if value is None:
             raise SecretNotFoundError(f"Secret not found: {name}")
         return value
@@ -119,11 +206,14 @@ class SecretsManager:
             SecretNotFoundError: If the secret is not found
             SecretStoreError: If deleting the secret fails
         """
+        self.invalidate(name)
         try:
-            keyring.delete_password(self.service_name, name)
+            await self._run_keyring(keyring.delete_password, self.service_name, name)
             logger.info(f"Successfully deleted secret: {name}")
         except keyring.errors.PasswordDeleteError:
             raise SecretNotFoundError(f"Secret not found: {name}")
+        finally:
+            self.invalidate(name)
     
     @handle_keyring_errors
     async def update_secret(self, name: str, value: str) -> None:
@@ -138,8 +228,9 @@ class SecretsManager:
             SecretNotFoundError: If the secret doesn't exist
             SecretStoreError: If updating the secret fails
         """
-        # Check if secret exists first
-        if not keyring.get_password(self.service_name, name):
+        # Check if secret exists first, bypassing the cache
+        self.invalidate(name)
+        if not await self._run_keyring(keyring.get_password, self.service_name, name):
             raise SecretNotFoundError(f"Secret not found: {name}")
         
         await self.store_secret(name, value)
@@ -218,19 +309,18 @@ async def _get_secret(key: str) -> Dict[str, Any]:
         or an 'error' message if not found or if an error occurs.
     """
     try:
-        value = keyring.get_password(SERVICE_NAME, key)
-        if value is None:
-            return {
-                "success": False,
-                "error": f"Secret not found: {key}"
-            }
-            
+        value = await secrets.get_secret(key)
         return {
             "success": True,
             "key": key,
             "value": value
         }
         
+    except SecretNotFoundError:
+        return {
+            "success": False,
+            "error": f"Secret not found: {key}"
+        }
     except Exception as e:
         return {
             "success": False,
@@ -261,7 +351,7 @@ async def _set_secret(key: str, value: str) -> Dict[str, Any]:
                 "error": "Value cannot be empty"
             }
             
-        keyring.set_password(SERVICE_NAME, key, value)
+        await secrets.store_secret(key, value)
         return {
             "success": True,
             "key": key,
@@ -291,20 +381,18 @@ async def _delete_secret(key: str) -> Dict[str, Any]:
             - "error": Error message (on failure).
     """
     try:
-        # Check if secret exists
-        if not keyring.get_password(SERVICE_NAME, key):
-            return {
-                "success": False,
-                "error": f"Secret not found: {key}"
-            }
-            
-        keyring.delete_password(SERVICE_NAME, key)
+        await secrets.delete_secret(key)
         return {
             "success": True,
             "key": key,
             "message": "Secret deleted successfully"
         }
         
+    except SecretNotFoundError:
+        return {
+            "success": False,
+            "error": f"Secret not found: {key}"
+        }
     except Exception as e:
         return {
             "success": False,
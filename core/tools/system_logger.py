@@ -5,6 +5,7 @@ This module implements a specialized logger for system-level monitoring, includi
 - Application events and errors
 - Performance metrics
 - Health checks
+- Non-blocking resource sampling into the shared time-series store
 """
 
 import os
@@ -17,16 +18,28 @@ import time
 import logging
 
 from .base_logger import BaseLogger, LogConfig
+from .timeseries_store import TimeSeriesStore, timeseries_store
 
 
 class SystemMetrics:
-    """System metrics collector."""
+    """System metrics collector.
+    
+    CPU percentages are measured since the previous call (``interval=None``)
+    instead of blocking for a second per sample, so collectors must call
+    ``prime_cpu_counters`` once before the first sample.
+    """
+
+    @staticmethod
+    def prime_cpu_counters() -> None:
+        """Start the CPU measurement interval for non-blocking sampling."""
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
 
     @staticmethod
     def get_cpu_metrics() -> Dict[str, float]:
         """Get CPU usage metrics."""
         return {
-            "cpu_percent": psutil.cpu_percent(interval=1),
+            "cpu_percent": psutil.cpu_percent(interval=None),
             "cpu_count": psutil.cpu_count(),
             "cpu_freq": psutil.cpu_freq().current if psutil.cpu_freq() else 0,
         }
@@ -83,6 +96,56 @@ class SystemMetrics:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
+    @staticmethod
+    def sample() -> Dict[str, float]:
+        """Take a cheap, non-blocking sample of the headline resource metrics."""
+        return {
+            "system.cpu_percent": psutil.cpu_percent(interval=None),
+            "system.memory_percent": psutil.virtual_memory().percent,
+            "system.disk_percent": psutil.disk_usage('/').percent,
+        }
+
+
+class SystemSampler:
+    """Background thread recording resource samples into a time-series store."""
+
+    def __init__(self, interval: float = 1.0, store: Optional[TimeSeriesStore] = None):
+        """Initialize the sampler.
+        
+        Args:
+            interval: Seconds between samples
+            store: Store receiving the samples (defaults to the shared store)
+        """
+        self.interval = interval
+        self.store = store if store is not None else timeseries_store
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        SystemMetrics.prime_cpu_counters()
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.record_many(SystemMetrics.sample())
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"System sampling failed: {e}")
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread."""
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="SystemSampler")
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+
 
 class SystemLogger(BaseLogger):
     """System logger for monitoring and metrics collection."""
@@ -109,6 +172,8 @@ class SystemLogger(BaseLogger):
         self.metrics = SystemMetrics()
         self._monitoring_thread = None
         self._stop_monitoring = threading.Event()
+        self.timeseries = timeseries_store
+        SystemMetrics.prime_cpu_counters()
         
         # Initialize system info
         self.system_info = self._get_system_info()
@@ -142,15 +207,21 @@ class SystemLogger(BaseLogger):
         Returns:
             Dictionary containing resource metrics
         """
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = psutil.cpu_percent(interval=None)
         memory = psutil.virtual_memory()
         disk = psutil.disk_usage('/')
         net_io = psutil.net_io_counters()
         
+        self.timeseries.record_many({
+            "system.cpu_percent": cpu_percent,
+            "system.memory_percent": memory.percent,
+            "system.disk_percent": disk.percent,
+        })
+        
         return {
             "cpu": {
                 "percent": cpu_percent,
-                "per_cpu": psutil.cpu_percent(interval=1, percpu=True)
+                "per_cpu": psutil.cpu_percent(interval=None, percpu=True)
             },
             "memory": {
                 "total": memory.total,
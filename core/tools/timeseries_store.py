@@ -0,0 +1,376 @@
+"""Compact in-memory time-series store for monitoring and dashboard metrics.
+
+Each series keeps its samples in fixed-size NumPy ring buffers instead of
+deques of ``(datetime, value)`` tuples, plus downsampled rollup tiers so long
+windows can be queried without keeping every raw sample:
+
+- RingBuffer: Fixed-capacity ring of float64 columns (timestamps and values)
+- RollupTier: Buckets of a fixed resolution holding count/sum/min/max
+- TimeSeries: Raw samples plus the 1s/1m/1h rollup tiers for one series
+- TimeSeriesStore: Thread-safe collection of series with range queries,
+  decimated fetches for dashboards and snapshots to disk
+
+Timestamps are Unix epoch seconds (``time.time()``).
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (resolution in seconds, number of buckets kept)
+DEFAULT_TIERS: Tuple[Tuple[int, int], ...] = (
+    (1, 3600),      # 1 hour of 1s buckets
+    (60, 1440),     # 1 day of 1m buckets
+    (3600, 720),    # 30 days of 1h buckets
+)
+DEFAULT_RAW_CAPACITY = 4096
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+
+class RingBuffer:
+    """Fixed-capacity ring buffer of parallel float64 columns."""
+
+    def __init__(self, capacity: int, columns: Sequence[str]):
+        """Initialize the buffer.
+
+        Args:
+            capacity: Maximum number of rows kept
+            columns: Column names
+        """
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self._data = np.zeros((len(self.columns), capacity), dtype=np.float64)
+        self._next = 0
+        self.size = 0
+
+    def append(self, *row: float) -> None:
+        """Append a row, overwriting the oldest one when full."""
+        self._data[:, self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def last(self) -> Optional[np.ndarray]:
+        """Get the most recent row."""
+        if not self.size:
+            return None
+        return self._data[:, (self._next - 1) % self.capacity]
+
+    def ordered(self) -> np.ndarray:
+        """Get all rows, oldest first, as a (columns, size) array."""
+        if self.size < self.capacity:
+            return self._data[:, :self.size]
+        return np.concatenate((self._data[:, self._next:], self._data[:, :self._next]), axis=1)
+
+    def window(self, start: float, end: float) -> np.ndarray:
+        """Get the rows whose first column lies in ``[start, end]``."""
+        data = self.ordered()
+        lo = np.searchsorted(data[0], start, side="left")
+        hi = np.searchsorted(data[0], end, side="right")
+        return data[:, lo:hi]
+
+    def oldest(self) -> Optional[float]:
+        """Get the first-column value of the oldest row."""
+        if not self.size:
+            return None
+        index = 0 if self.size < self.capacity else self._next
+        return float(self._data[0, index])
+
+    def covers(self, start: float) -> bool:
+        """Whether the buffer holds every row from ``start`` on."""
+        if self.size < self.capacity:
+            return True
+        return self.oldest() <= start
+
+    def to_array(self) -> np.ndarray:
+        """Get a copy of all rows, oldest first."""
+        return self.ordered().copy()
+
+    @classmethod
+    def from_array(cls, capacity: int, columns: Sequence[str], data: np.ndarray) -> "RingBuffer":
+        """Build a buffer from rows ordered oldest first."""
+        buffer = cls(capacity, columns)
+        data = data[:, -capacity:]
+        size = data.shape[1]
+        buffer._data[:, :size] = data
+        buffer.size = size
+        buffer._next = size % capacity
+        return buffer
+
+
+class RollupTier:
+    """Downsampled tier of fixed-resolution buckets.
+
+    The open bucket is aggregated in plain floats and written to the ring when
+    a sample for a later bucket arrives, so each sample costs O(1).
+    """
+
+    COLUMNS = ("ts", "count", "sum", "min", "max")
+
+    def __init__(self, resolution: int, capacity: int):
+        """Initialize the tier.
+
+        Args:
+            resolution: Bucket width in seconds
+            capacity: Number of closed buckets kept
+        """
+        self.resolution = resolution
+        self.buckets = RingBuffer(capacity, self.COLUMNS)
+        self._open: Optional[List[float]] = None
+
+    def add(self, ts: float, value: float) -> None:
+        """Add a sample to its bucket."""
+        bucket = ts - (ts % self.resolution)
+        current = self._open
+        if current is not None and bucket == current[0]:
+            current[1] += 1
+            current[2] += value
+            if value < current[3]:
+                current[3] = value
+            if value > current[4]:
+                current[4] = value
+            return
+        if current is not None:
+            if bucket < current[0]:
+                return  # Late sample for an already closed bucket
+            self.buckets.append(*current)
+        self._open = [bucket, 1.0, value, value, value]
+
+    def rows(self) -> np.ndarray:
+        """Get closed and open buckets, oldest first."""
+        rows = self.buckets.ordered()
+        if self._open is not None:
+            rows = np.concatenate((rows, np.array(self._open, dtype=np.float64)[:, None]), axis=1)
+        return rows
+
+    def window(self, start: float, end: float) -> np.ndarray:
+        """Get buckets starting in ``[start - resolution, end]``."""
+        rows = self.rows()
+        lo = np.searchsorted(rows[0], start - self.resolution, side="right")
+        hi = np.searchsorted(rows[0], end, side="right")
+        return rows[:, lo:hi]
+
+    def covers(self, start: float) -> bool:
+        """Whether the tier still holds every bucket from ``start`` on."""
+        return self.buckets.covers(start - self.resolution)
+
+
+class TimeSeries:
+    """One metric's raw samples and rollup tiers."""
+
+    def __init__(self,
+                 raw_capacity: int = DEFAULT_RAW_CAPACITY,
+                 tiers: Iterable[Tuple[int, int]] = DEFAULT_TIERS):
+        """Initialize the series.
+
+        Args:
+            raw_capacity: Number of raw samples kept
+            tiers: (resolution seconds, bucket count) for each rollup tier
+        """
+        self.raw = RingBuffer(raw_capacity, ("ts", "value"))
+        self.tiers = [RollupTier(resolution, capacity) for resolution, capacity in tiers]
+
+    def append(self, ts: float, value: float) -> None:
+        """Append a sample to the raw buffer and every rollup tier."""
+        last = self.raw.last()
+        if last is None or ts >= last[0]:
+            self.raw.append(ts, value)
+        for tier in self.tiers:
+            tier.add(ts, value)
+
+    def _select(self, start: float, max_resolution: Optional[float] = None) -> Optional[RollupTier]:
+        """Pick the source for a window starting at ``start``.
+
+        Without ``max_resolution`` raw samples are preferred. With it, the
+        coarsest tier not coarser than ``max_resolution`` is preferred. When no
+        source reaches back to ``start``, the one with the longest history
+        is used.
+
+        Returns:
+            The chosen tier, or None for raw samples
+        """
+        covering = [t for t in self.tiers if t.covers(start)]
+        if max_resolution is not None:
+            fitting = [t for t in covering if t.resolution <= max_resolution]
+            if fitting:
+                return fitting[-1]
+        if self.raw.covers(start) or not self.tiers:
+            return None
+        if covering:
+            return covering[0]
+        return self.tiers[-1]
+
+    def _points(self, start: float, end: float,
+                max_resolution: Optional[float] = None) -> Tuple[str, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Get (source, timestamps, averages, minimums, maximums, counts) for a window."""
+        tier = self._select(start, max_resolution)
+        if tier is None:
+            rows = self.raw.window(start, end)
+            return "raw", rows[0], rows[1], rows[1], rows[1], np.ones_like(rows[1])
+        rows = tier.window(start, end)
+        return f"{tier.resolution}s", rows[0], rows[2] / rows[1], rows[3], rows[4], rows[1]
+
+    def query(self, start: float, end: float,
+              percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Aggregate a time range.
+
+        Percentiles are exact over raw samples; when the range is served from a
+        rollup tier they are computed over bucket averages.
+
+        Returns:
+            Dictionary with count, min, max, avg, pXX values and the source used
+        """
+        source, ts, avg, lo, hi, counts = self._points(start, end)
+        if not ts.size:
+            return {"count": 0, "source": source}
+        total = counts.sum()
+        result = {
+            "count": int(total),
+            "min": float(lo.min()),
+            "max": float(hi.max()),
+            "avg": float((avg * counts).sum() / total),
+            "source": source,
+        }
+        for q in percentiles:
+            result[f"p{q:g}"] = float(np.percentile(avg, q))
+        return result
+
+    def fetch(self, start: float, end: float, max_points: int = 500) -> Dict[str, List[float]]:
+        """Get a decimated series for plotting.
+
+        The window is served from the coarsest source finer than
+        ``(end - start) / max_points`` and then binned into at most
+        ``max_points`` points, keeping each bin's average, min and max.
+
+        Returns:
+            Dictionary with ``ts``, ``avg``, ``min`` and ``max`` lists
+        """
+        resolution = (end - start) / max_points if max_points else 0.0
+        _, ts, avg, lo, hi, counts = self._points(start, end, resolution)
+        if ts.size > max_points > 0:
+            edges = np.linspace(start, end, max_points + 1)
+            bins = np.clip(np.searchsorted(edges, ts, side="right") - 1, 0, max_points - 1)
+            starts = np.flatnonzero(np.r_[True, np.diff(bins) != 0])
+            ts = edges[bins[starts]]
+            avg = np.add.reduceat(avg * counts, starts) / np.add.reduceat(counts, starts)
+            lo = np.minimum.reduceat(lo, starts)
+            hi = np.maximum.reduceat(hi, starts)
+        return {"ts": ts.tolist(), "avg": avg.tolist(), "min": lo.tolist(), "max": hi.tolist()}
+
+
+class TimeSeriesStore:
+    """Thread-safe collection of named time series."""
+
+    def __init__(self,
+                 raw_capacity: int = DEFAULT_RAW_CAPACITY,
+                 tiers: Iterable[Tuple[int, int]] = DEFAULT_TIERS):
+        """Initialize the store.
+
+        Args:
+            raw_capacity: Raw samples kept per series
+            tiers: Rollup tiers as (resolution seconds, bucket count)
+        """
+        self.raw_capacity = raw_capacity
+        self.tiers = tuple(tuple(t) for t in tiers)
+        self._series: Dict[str, TimeSeries] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, value: float, ts: Optional[float] = None) -> None:
+        """Record one sample.
+
+        Args:
+            name: Series name
+            value: Sample value
+            ts: Epoch seconds (defaults to now)
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = TimeSeries(self.raw_capacity, self.tiers)
+                self._series[name] = series
+            series.append(ts, float(value))
+
+    def record_many(self, values: Dict[str, float], ts: Optional[float] = None) -> None:
+        """Record several series sampled at the same time."""
+        ts = time.time() if ts is None else ts
+        for name, value in values.items():
+            self.record(name, value, ts)
+
+    def names(self) -> List[str]:
+        """Get the names of all series."""
+        with self._lock:
+            return sorted(self._series)
+
+    def query(self, name: str, start: float, end: Optional[float] = None,
+              percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Aggregate a series over ``[start, end]`` (see ``TimeSeries.query``)."""
+        end = time.time() if end is None else end
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return {"count": 0}
+            return series.query(start, end, percentiles)
+
+    def fetch(self, name: str, start: float, end: Optional[float] = None,
+              max_points: int = 500) -> Dict[str, List[float]]:
+        """Get a decimated series for a window (see ``TimeSeries.fetch``)."""
+        end = time.time() if end is None else end
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return {"ts": [], "avg": [], "min": [], "max": []}
+            return series.fetch(start, end, max_points)
+
+    def window(self, name: str, start: float, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the raw (timestamps, values) held for a window."""
+        end = time.time() if end is None else end
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return np.empty(0), np.empty(0)
+            rows = series.raw.window(start, end).copy()
+        return rows[0], rows[1]
+
+    def snapshot(self, path: str) -> None:
+        """Write all series to a compressed ``.npz`` file."""
+        arrays = {}
+        with self._lock:
+            names = sorted(self._series)
+            for i, name in enumerate(names):
+                series = self._series[name]
+                arrays[f"s{i}_raw"] = series.raw.to_array()
+                for j, tier in enumerate(series.tiers):
+                    arrays[f"s{i}_t{j}"] = tier.rows().copy()
+        meta = {"names": names, "raw_capacity": self.raw_capacity, "tiers": self.tiers}
+        arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        logger.debug(f"Saved {len(names)} series to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "TimeSeriesStore":
+        """Load a store written by ``snapshot``."""
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            store = cls(meta["raw_capacity"], meta["tiers"])
+            for i, name in enumerate(meta["names"]):
+                series = TimeSeries(store.raw_capacity, store.tiers)
+                series.raw = RingBuffer.from_array(store.raw_capacity, ("ts", "value"), data[f"s{i}_raw"])
+                for j, tier in enumerate(series.tiers):
+                    rows = data[f"s{i}_t{j}"]
+                    if rows.shape[1]:
+                        tier.buckets = RingBuffer.from_array(tier.buckets.capacity, RollupTier.COLUMNS, rows[:, :-1])
+                        tier._open = rows[:, -1].tolist()
+                store._series[name] = series
+        return store
+
+
+# Process-wide store shared by monitoring, system sampling and the dashboard
+timeseries_store = TimeSeriesStore()
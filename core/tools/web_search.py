@@ -1,20 +1,49 @@
 # MIT License - Copyright (c) 2024 Wrench AI
 # For full license information, see the LICENSE file in the repo root.
 
-import os
+"""
+Web search with a shared result cache and concurrent provider fan-out.
+
+Key components:
+- SearchResult: Container for a single search hit
+- SearchCache: TTL-bounded LRU of normalized query -> results, optionally
+  persisted to SQLite so results survive restarts
+- SearchProvider implementations for DuckDuckGo, Brave, a placeholder
+  fallback and a local fake for tests and benchmarks
+- SearchService: Process-wide service that owns the cache and a pooled HTTP
+  session, runs blocking providers in a thread executor, and can race
+  providers against each other
+"""
+
+import asyncio
 import json
-import requests
-from typing import List, Dict, Any, Optional
-import aiohttp
 import logging
-from bs4 import BeautifulSoup
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Callable
+
+import aiohttp
+
+try:
+    from duckduckgo_search import ddg as duckduckgo_search
+    DUCKDUCKGO_AVAILABLE = True
+except ImportError:
+    duckduckgo_search = None
+    DUCKDUCKGO_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 
 class SearchResult:
     """Container for search results."""
     def __init__(self, title: str, url: str, snippet: str, source: str = "web"):
         """
         Initializes a SearchResult instance with title, URL, snippet, and source.
-        
+
         Args:
             title: The title of the search result.
             url: The URL of the search result.
@@ -37,128 +66,559 @@ class SearchResult:
             "source": self.source
         }
 
-async def search(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "SearchResult":
+        """Create a search result from its dictionary form."""
+        return cls(
+            title=data.get("title", ""),
+            url=data.get("url", ""),
+            snippet=data.get("snippet", ""),
+            source=data.get("source", "web")
+        )
+
+
+def normalize_query(query: str) -> str:
     """
-    Performs an asynchronous web search using multiple fallback strategies.
-    
-    Attempts to retrieve up to `max_results` results for the given query by first searching DuckDuckGo, then Brave Search, and finally a custom placeholder if all else fails. Returns a list of dictionaries containing the title, URL, snippet, and source for each result. Returns an empty list if all search methods fail.
+    Normalizes a query so trivially different spellings share a cache entry.
+
+    Lower-cases the query and collapses whitespace.
     """
-    try:
-        # First try DuckDuckGo
-        results = await _search_duckduckgo(query, max_results)
-        if results:
-            return [r.to_dict() for r in results]
-            
-        # Fallback to Brave Search
-        results = await _search_brave(query, max_results)
-        if results:
-            return [r.to_dict() for r in results]
-            
-        # Final fallback to custom implementation
-        results = await _search_custom(query, max_results)
-        return [r.to_dict() for r in results]
-        
-    except Exception as e:
-        logging.error(f"Search failed: {str(e)}")
-        return []
+    return re.sub(r"\s+", " ", query).strip().lower()
+
 
-async def _search_duckduckgo(query: str, max_results: int) -> List[SearchResult]:
+class SearchCache:
     """
-    Performs an asynchronous web search using DuckDuckGo and returns search results.
-    
-    Args:
-        query: The search query string.
-        max_results: The maximum number of results to retrieve.
-    
-    Returns:
-        A list of SearchResult objects containing the search results from DuckDuckGo.
-        Returns an empty list if the search fails.
+    TTL-bounded LRU cache of search results keyed by normalized query.
+
+    Each entry remembers how many results were requested, so a cached answer
+    for ``max_results=10`` also serves later requests for 5, but not the
+    other way round. When ``path`` is given, entries are written through to a
+    SQLite table and read back on a local miss.
     """
-    try:
-        from duckduckgo_search import ddg
-        
-        results = []
-        for r in ddg(query, max_results=max_results):
-            results.append(SearchResult(
-                title=r['title'],
-                url=r['link'],
-                snippet=r['snippet'],
-                source="duckduckgo"
-            ))
-        return results
-    except Exception as e:
-        logging.warning(f"DuckDuckGo search failed: {str(e)}")
-        return []
 
-async def _search_brave(query: str, max_results: int) -> List[SearchResult]:
+    def __init__(self,
+                 path: Optional[str] = None,
+                 ttl: float = 3600.0,
+                 max_entries: int = 1024,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initializes the cache.
+
+        Args:
+            path: Optional SQLite database file for persistence.
+            ttl: Seconds an entry stays valid.
+            max_entries: Maximum number of entries kept in memory.
+            clock: Wall-clock function, injectable for tests.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, List[Dict[str, str]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "query TEXT PRIMARY KEY, requested INTEGER NOT NULL, "
+                "results TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, query: str, max_results: int) -> Optional[List[SearchResult]]:
+        """
+        Returns cached results for a query, or None on a miss.
+
+        Args:
+            query: The search query string.
+            max_results: The number of results the caller wants.
+        """
+        key = normalize_query(query)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, requested, results FROM search_cache WHERE query = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1], json.loads(row[2]))
+                    self._store_local(key, entry)
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            created, requested, results = entry
+            if requested < max_results and len(results) >= requested:
+                # Cached answer was truncated to a smaller request
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [SearchResult.from_dict(r) for r in results[:max_results]]
+
+    def set(self, query: str, max_results: int, results: List[SearchResult]) -> None:
+        """
+        Stores results for a query.
+
+        Args:
+            query: The search query string.
+            max_results: The number of results that were requested.
+            results: The results returned by the provider.
+        """
+        key = normalize_query(query)
+        entry = (self.clock(), max_results, [r.to_dict() for r in results])
+        with self._lock:
+            self._store_local(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO search_cache (query, requested, results, created) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, entry[1], json.dumps(entry[2]), entry[0])
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Removes all entries, including persisted ones."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM search_cache")
+                self._db.commit()
+
+    def prune(self) -> int:
+        """
+        Deletes expired entries from memory and the database.
+
+        Returns:
+            The number of in-memory entries removed.
+        """
+        cutoff = self.clock() - self.ttl
+        with self._lock:
+            expired = [k for k, entry in self._entries.items() if entry[0] < cutoff]
+            for key in expired:
+                del self._entries[key]
+            if self._db is not None:
+                self._db.execute("DELETE FROM search_cache WHERE created < ?", (cutoff,))
+                self._db.commit()
+        return len(expired)
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store_local(self, key: str, entry: Tuple[float, int, List[Dict[str, str]]]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _drop(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM search_cache WHERE query = ?", (key,))
+            self._db.commit()
+
+
+class SearchProvider:
     """
-    Performs an asynchronous web search using the Brave Search API.
-    
-    Attempts to retrieve search results for the given query and returns a list of
-    SearchResult objects with source set to "brave". Returns an empty list if the
-    API key is missing, the API request fails, or an exception occurs.
-    
-    Args:
-        query: The search query string.
-        max_results: The maximum number of results to retrieve.
-    
-    Returns:
-        A list of SearchResult objects from Brave Search, or an empty list on failure.
+    Base class for search providers.
+
+    Providers return an empty list when they have nothing to offer; any
+    exception is treated the same way by the service.
     """
-    try:
-        # Get API key from secrets manager
+
+    name = "web"
+    uses_http = False
+
+    async def search(self, query: str, max_results: int,
+                     session: aiohttp.ClientSession) -> List[SearchResult]:
+        """
+        Searches for a query.
+
+        Args:
+            query: The search query string.
+            max_results: The maximum number of results to retrieve.
+            session: Pooled HTTP session owned by the service.
+
+        Returns:
+            A list of SearchResult objects.
+        """
+        raise NotImplementedError
+
+
+class DuckDuckGoProvider(SearchProvider):
+    """DuckDuckGo search; the client library is blocking, so it runs in a thread."""
+
+    name = "duckduckgo"
+
+    async def search(self, query: str, max_results: int,
+                     session: aiohttp.ClientSession) -> List[SearchResult]:
+        if not DUCKDUCKGO_AVAILABLE or duckduckgo_search is None:
+            return []
+        loop = asyncio.get_running_loop()
+        raw = await loop.run_in_executor(
+            None, lambda: duckduckgo_search(query, max_results=max_results)
+        )
+        return [
+            SearchResult(
+                title=r.get("title", ""),
+                url=r.get("href") or r.get("link", ""),
+                snippet=r.get("body") or r.get("snippet", ""),
+                source=self.name
+            )
+            for r in (raw or [])[:max_results]
+        ]
+
+
+class BraveProvider(SearchProvider):
+    """Brave Search API over the service's pooled HTTP session."""
+
+    name = "brave"
+    uses_http = True
+    endpoint = "https://api.search.brave.com/res/v1/web/search"
+
+    async def search(self, query: str, max_results: int,
+                     session: aiohttp.ClientSession) -> List[SearchResult]:
         from core.tools.secrets_manager import get_secret
         api_key = await get_secret("brave_search_api_key")
-        
         if not api_key:
             return []
-            
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                "X-Subscription-Token": api_key,
-                "Accept": "application/json"
-            }
-            
-            async with session.get(
-                f"https://api.search.brave.com/res/v1/web/search",
-                headers=headers,
-                params={"q": query, "count": max_results}
-            ) as response:
-                
-                if response.status != 200:
+
+        headers = {
+            "X-Subscription-Token": api_key,
+            "Accept": "application/json"
+        }
+        async with session.get(
+            self.endpoint,
+            headers=headers,
+            params={"q": query, "count": max_results}
+        ) as response:
+            if response.status != 200:
+                return []
+            data = await response.json()
+
+        return [
+            SearchResult(
+                title=item["title"],
+                url=item["url"],
+                snippet=item["description"],
+                source=self.name
+            )
+            for item in data.get("results", [])[:max_results]
+        ]
+
+
+class PlaceholderProvider(SearchProvider):
+    """Last-resort placeholder results; these are never cached."""
+
+    name = "placeholder"
+
+    async def search(self, query: str, max_results: int,
+                     session: Optional[aiohttp.ClientSession] = None) -> List[SearchResult]:
+        return [SearchResult(
+            title=f"Search result for: {query}",
+            url="https://example.com",
+            snippet="This is a placeholder result when other search methods fail.",
+            source=self.name
+        ) for _ in range(max_results)]
+
+
+class FakeSearchProvider(SearchProvider):
+    """
+    Local, deterministic provider for tests and benchmarks.
+
+    Returns synthetic results after a fixed latency and records every query
+    it receives.
+    """
+
+    def __init__(self, name: str = "fake", latency: float = 0.0,
+                 fail: bool = False, empty: bool = False):
+        """
+        Initializes the fake provider.
+
+        Args:
+            name: Provider name reported as the result source.
+            latency: Seconds to sleep before answering.
+            fail: Raise instead of answering.
+            empty: Answer with no results.
+        """
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.empty = empty
+        self.calls: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def search(self, query: str, max_results: int,
+                     session: Optional[aiohttp.ClientSession] = None) -> List[SearchResult]:
+        self.calls.append(query)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.fail:
+                raise RuntimeError(f"{self.name} provider failed")
+            if self.empty:
+                return []
+            slug = normalize_query(query).replace(" ", "-")
+            return [SearchResult(
+                title=f"{query} ({i + 1})",
+                url=f"https://{self.name}.test/{slug}/{i + 1}",
+                snippet=f"Result {i + 1} for {query} from {self.name}",
+                source=self.name
+            ) for i in range(max_results)]
+        finally:
+            self.in_flight -= 1
+
+
+class SearchService:
+    """
+    Search service shared by all agents in the process.
+
+    Queries are answered from the cache when possible. On a miss the providers
+    are tried in order (or raced concurrently when ``race`` is set) and the
+    first non-empty answer is cached. Concurrent requests for the same query
+    share one provider call.
+    """
+
+    def __init__(self,
+                 providers: Optional[Sequence[SearchProvider]] = None,
+                 cache: Optional[SearchCache] = None,
+                 fallback: Optional[SearchProvider] = None,
+                 race: bool = False,
+                 concurrency: int = 4,
+                 provider_timeout: float = 10.0,
+                 connection_limit: int = 20):
+        """
+        Initializes the service.
+
+        Args:
+            providers: Providers in preference order; defaults to DuckDuckGo then Brave.
+            cache: Result cache; defaults to an in-memory cache.
+            fallback: Provider used when all others come back empty.
+            race: Query providers concurrently and take the first good answer.
+            concurrency: Default concurrency for search_many.
+            provider_timeout: Seconds to wait for a single provider.
+            connection_limit: Size of the pooled HTTP connection limit.
+        """
+        self.providers = list(providers) if providers is not None else [DuckDuckGoProvider(), BraveProvider()]
+        self.cache = cache if cache is not None else SearchCache()
+        self.fallback = fallback if fallback is not None else PlaceholderProvider()
+        self.race = race
+        self.concurrency = concurrency
+        self.provider_timeout = provider_timeout
+        self.connection_limit = connection_limit
+        self.provider_calls: Dict[str, int] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+
+    async def search(self, query: str, max_results: int = 10) -> List[SearchResult]:
+        """
+        Searches for a query, using the cache when possible.
+
+        Args:
+            query: The search query string.
+            max_results: The maximum number of results to retrieve.
+
+        Returns:
+            A list of SearchResult objects.
+        """
+        cached = self.cache.get(query, max_results)
+        if cached is not None:
+            return cached
+
+        key = (normalize_query(query), max_results)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return list(await asyncio.shield(pending))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            results = await self._search_providers(query, max_results)
+            future.set_result(results)
+            return results
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so an unawaited future does not log a warning
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def search_many(self, queries: Sequence[str], max_results: int = 10,
+                          concurrency: Optional[int] = None) -> List[List[SearchResult]]:
+        """
+        Searches several queries with bounded concurrency.
+
+        Args:
+            queries: The search query strings.
+            max_results: The maximum number of results per query.
+            concurrency: Maximum searches in flight; defaults to the service setting.
+
+        Returns:
+            One result list per query, in input order.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def run(query: str) -> List[SearchResult]:
+            async with semaphore:
+                try:
+                    return await self.search(query, max_results)
+                except Exception as e:
+                    logger.error(f"Search failed for '{query}': {e}")
                     return []
-                    
-                data = await response.json()
-                results = []
-                
-                for item in data.get("results", []):
-                    results.append(SearchResult(
-                        title=item["title"],
-                        url=item["url"],
-                        snippet=item["description"],
-                        source="brave"
-                    ))
-                return results
-                
-    except Exception as e:
-        logging.warning(f"Brave search failed: {str(e)}")
+
+        return list(await asyncio.gather(*(run(q) for q in queries)))
+
+    async def close(self) -> None:
+        """Closes the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns cache and provider counters."""
+        return {
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "cache_entries": len(self.cache),
+            "provider_calls": dict(self.provider_calls),
+            "race": self.race
+        }
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connection_limit),
+                timeout=aiohttp.ClientTimeout(total=self.provider_timeout)
+            )
+        return self._session
+
+    async def _search_providers(self, query: str, max_results: int) -> List[SearchResult]:
+        session = self._get_session() if any(p.uses_http for p in self.providers) else None
+        if self.race and len(self.providers) > 1:
+            results = await self._race(query, max_results, session)
+        else:
+            results = []
+            for provider in self.providers:
+                results = await self._call(provider, query, max_results, session)
+                if results:
+                    break
+
+        if results:
+            self.cache.set(query, max_results, results)
+            return results
+        return await self._call(self.fallback, query, max_results, session)
+
+    async def _race(self, query: str, max_results: int,
+                    session: aiohttp.ClientSession) -> List[SearchResult]:
+        pending = {
+            asyncio.ensure_future(self._call(p, query, max_results, session))
+            for p in self.providers
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result():
+                        return task.result()
+            return []
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _call(self, provider: SearchProvider, query: str, max_results: int,
+                    session: Optional[aiohttp.ClientSession]) -> List[SearchResult]:
+        self.provider_calls[provider.name] = self.provider_calls.get(provider.name, 0) + 1
+        try:
+            return await asyncio.wait_for(
+                provider.search(query, max_results, session), self.provider_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"{provider.name} search timed out after {self.provider_timeout}s")
+        except Exception as e:
+            logger.warning(f"{provider.name} search failed: {str(e)}")
         return []
 
-async def _search_custom(query: str, max_results: int) -> List[SearchResult]:
+
+async def web_search(query: str, max_results: int = 10) -> List[SearchResult]:
     """
-    Returns placeholder search results as a fallback when other search methods fail.
-    
+    Searches the web through the shared search service.
+
     Args:
         query: The search query string.
-        max_results: The number of placeholder results to generate.
-    
+        max_results: The maximum number of results to retrieve.
+
     Returns:
-        A list of SearchResult objects containing generic placeholder content.
-    """
-    # This is a placeholder implementation
-    return [SearchResult(
-        title=f"Search result for: {query}",
-        url="https://example.com",
-        snippet="This is a placeholder result when other search methods fail.",
-        source="placeholder"
-    ) for _ in range(max_results)]
+        A list of SearchResult objects.
+    """
+    return await get_search_service().search(query, max_results)
+
+
+def sync_web_search(query: str, max_results: int = 10) -> List[SearchResult]:
+    """
+    Blocking variant of web_search for callers without an event loop.
+    """
+    return asyncio.run(_sync_search(query, max_results))
+
+
+async def _sync_search(query: str, max_results: int) -> List[SearchResult]:
+    # Each asyncio.run gets a fresh loop, so the service's session cannot be reused
+    service = get_search_service()
+    try:
+        return await service.search(query, max_results)
+    finally:
+        await service.close()
+
+
+async def search(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    """
+    Performs an asynchronous web search using multiple fallback strategies.
+
+    Attempts to retrieve up to `max_results` results for the given query by first searching DuckDuckGo, then Brave Search, and finally a custom placeholder if all else fails. Results are served from the shared cache when available. Returns a list of dictionaries containing the title, URL, snippet, and source for each result. Returns an empty list if all search methods fail.
+    """
+    try:
+        results = await web_search(query, max_results)
+        return [r.to_dict() for r in results]
+    except Exception as e:
+        logging.error(f"Search failed: {str(e)}")
+        return []
+
+
+# Global search service, configured from the environment:
+# SEARCH_CACHE_PATH  SQLite file for the persistent cache (memory only if unset)
+# SEARCH_CACHE_TTL   Cache TTL in seconds (default 3600)
+# SEARCH_RACE        "1"/"true" to race providers instead of trying them in order
+_search_service: Optional[SearchService] = None
+
+
+def get_search_service() -> SearchService:
+    """Returns the process-wide search service, creating it on first use."""
+    global _search_service
+    if _search_service is None:
+        cache = SearchCache(
+            path=os.getenv("SEARCH_CACHE_PATH") or None,
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+        )
+        race = os.getenv("SEARCH_RACE", "").lower() in ("1", "true", "yes")
+        _search_service = SearchService(cache=cache, race=race)
+    return _search_service
+
+
+def set_search_service(service: Optional[SearchService]) -> None:
+    """Replaces the process-wide search service (None resets to the default)."""
+    global _search_service
+    _search_service = service
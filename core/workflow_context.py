@@ -0,0 +1,251 @@
+"""Layered workflow context for multi-step agent loops.
+
+Workflow steps such as partner feedback loops and process steps used to rebuild
+the whole context dict after every agent call (``{**state, "previous_result": r}``),
+so context copies grew with iterations x context size. This module provides a
+copy-free alternative:
+
+- WorkflowContext: A read-only mapping made of a frozen base plus delta overlays
+- ContextBudget: Size budget applied when a context is serialized into a prompt
+- ContextMetrics: Per-step record of how many bytes of context were sent to agents
+"""
+
+import json
+import logging
+from collections import ChainMap, deque
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+PREVIOUS_RESULT_KEY = "previous_result"
+
+# Number of recent context sizes kept per step
+MAX_METRIC_SAMPLES = 256
+
+
+@dataclass
+class ContextBudget:
+    """Size budget for contexts serialized into LLM prompts."""
+    max_bytes: int = 64 * 1024       # Maximum serialized size of a prompt context
+    max_result_depth: int = 1        # Nested previous_result levels kept verbatim
+    summary_chars: int = 512         # Characters kept when summarizing a trimmed value
+
+
+@dataclass
+class ContextMetrics:
+    """Context size instrumentation for a single workflow step."""
+    step_id: str
+    calls: int = 0
+    total_bytes: int = 0
+    max_bytes: int = 0
+    trimmed: int = 0
+    samples: Deque[int] = field(default_factory=lambda: deque(maxlen=MAX_METRIC_SAMPLES))
+
+    def record(self, size: int, trimmed: bool = False) -> None:
+        """Record the size of one context sent to an agent."""
+        self.calls += 1
+        self.total_bytes += size
+        self.max_bytes = max(self.max_bytes, size)
+        self.samples.append(size)
+        if trimmed:
+            self.trimmed += 1
+        logger.debug(f"Step '{self.step_id}' context: {size} bytes (trimmed={trimmed})")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the metrics to a dictionary."""
+        return {
+            "step_id": self.step_id,
+            "calls": self.calls,
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "avg_bytes": self.total_bytes / self.calls if self.calls else 0,
+            "trimmed": self.trimmed,
+            "samples": list(self.samples),
+        }
+
+
+def _json_size(value: Any) -> int:
+    """Return the size in bytes of a value once JSON-encoded."""
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+def _summarize(value: Any, chars: int) -> str:
+    """Summarize a value as a truncated string."""
+    text = json.dumps(value, default=str)
+    if len(text) <= chars:
+        return text
+    return f"{text[:chars]}... [trimmed {len(text) - chars} chars]"
+
+
+class WorkflowContext(Mapping[str, Any]):
+    """Read-only, layered view over a workflow context.
+
+    The base mapping is wrapped in a read-only proxy and never copied. Steps write
+    deltas with ``child()``, which pushes a new overlay in O(1) and leaves the
+    parent untouched, so an agent that keeps a reference to an earlier context
+    still sees the values it was called with.
+    """
+
+    def __init__(self,
+                 base: Optional[Mapping[str, Any]] = None,
+                 budget: Optional[ContextBudget] = None,
+                 metrics: Optional[ContextMetrics] = None,
+                 _chain: Optional[ChainMap] = None,
+                 _parent_deltas: Optional[Dict[str, Any]] = None):
+        """Initialize the context
+
+        Args:
+            base: The workflow context to layer on top of (not copied)
+            budget: Optional size budget applied by ``to_prompt``
+            metrics: Optional metrics record updated by ``to_prompt``
+        """
+        if _chain is None:
+            if isinstance(base, WorkflowContext):
+                _chain = base._chain
+            else:
+                _chain = ChainMap(MappingProxyType(base if base is not None else {}))
+        self._chain = _chain
+        # Merged overlays, built from the parent's on first use instead of walking every layer
+        self._deltas: Optional[Dict[str, Any]] = None
+        self._parent_deltas = _parent_deltas
+        self.budget = budget
+        self.metrics = metrics
+
+    def child(self, delta: Optional[Mapping[str, Any]] = None, **values: Any) -> "WorkflowContext":
+        """Return a new context with a delta overlay on top of this one
+
+        Args:
+            delta: Optional mapping of values to overlay
+            **values: Additional values to overlay
+
+        Returns:
+            A new WorkflowContext sharing all existing layers
+        """
+        layer: Dict[str, Any] = dict(delta) if delta else {}
+        layer.update(values)
+        return WorkflowContext(
+            budget=self.budget,
+            metrics=self.metrics,
+            _chain=self._chain.new_child(layer),
+            _parent_deltas=self._deltas
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        return self._chain[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._chain)
+
+    def __len__(self) -> int:
+        return len(self._chain)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._chain
+
+    def __repr__(self) -> str:
+        return f"WorkflowContext(depth={self.depth}, keys={list(self._chain)})"
+
+    @property
+    def depth(self) -> int:
+        """Number of delta overlays above the base."""
+        return len(self._chain.maps) - 1
+
+    def history(self, key: str) -> List[Any]:
+        """Get every value written for a key, newest first."""
+        return [layer[key] for layer in self._chain.maps if key in layer]
+
+    def deltas(self) -> Dict[str, Any]:
+        """Get the merged overlays without the base."""
+        return dict(self._merged_deltas())
+
+    def _merged_deltas(self) -> Dict[str, Any]:
+        """Get the cached merged overlays, building them on first use."""
+        if self._deltas is None:
+            if self._parent_deltas is not None:
+                merged = dict(self._parent_deltas)
+                merged.update(self._chain.maps[0])
+            else:
+                merged = {}
+                for layer in reversed(self._chain.maps[:-1]):
+                    merged.update(layer)
+            self._deltas, self._parent_deltas = merged, None
+        return self._deltas
+
+    def compact(self) -> "WorkflowContext":
+        """Collapse all overlays into one, keeping the frozen base shared."""
+        base = self._chain.maps[-1]
+        return WorkflowContext(
+            budget=self.budget,
+            metrics=self.metrics,
+            _chain=ChainMap(self.deltas(), base)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the context as a plain (shallow) dictionary.
+
+        The base is read on every call so workflow updates stay visible; the
+        overlays come from the cached merge, so the cost does not grow with depth.
+        """
+        data = dict(self._chain.maps[-1])
+        data.update(self._merged_deltas())
+        return data
+
+    def size_bytes(self) -> int:
+        """Get the JSON-encoded size of the full context."""
+        return _json_size(self.to_dict())
+
+    def to_prompt(self, budget: Optional[ContextBudget] = None) -> Dict[str, Any]:
+        """Materialize the context for an agent call, applying the size budget
+
+        Nested ``previous_result`` chains deeper than ``max_result_depth`` are
+        replaced with summaries. If the result still exceeds ``max_bytes``, the
+        largest remaining values are summarized until it fits.
+
+        Args:
+            budget: Budget to apply (defaults to the context's own budget)
+
+        Returns:
+            A plain dictionary safe to serialize into an LLM prompt
+        """
+        budget = budget or self.budget
+        data = self.to_dict()
+        trimmed = False
+
+        if budget is not None:
+            data, trimmed = self._trim_result_chain(data, budget, 0)
+            size = _json_size(data)
+            if size > budget.max_bytes:
+                sizes = sorted(((_json_size(v), k) for k, v in data.items()), reverse=True)
+                for value_size, key in sizes:
+                    if size <= budget.max_bytes:
+                        break
+                    summary = _summarize(data[key], budget.summary_chars)
+                    size -= value_size - _json_size(summary)
+                    data[key] = summary
+                    trimmed = True
+        else:
+            size = None
+
+        if self.metrics is not None:
+            self.metrics.record(size if size is not None else _json_size(data), trimmed)
+        return data
+
+    @classmethod
+    def _trim_result_chain(cls, value: Any, budget: ContextBudget, depth: int):
+        """Summarize previous_result values nested beyond the budget depth."""
+        if not isinstance(value, Mapping):
+            return value, False
+        trimmed = False
+        result = {}
+        for key, item in value.items():
+            if key == PREVIOUS_RESULT_KEY:
+                if depth >= budget.max_result_depth:
+                    result[key] = _summarize(item, budget.summary_chars)
+                    trimmed = True
+                    continue
+                item, nested = cls._trim_result_chain(item, budget, depth + 1)
+                trimmed = trimmed or nested
+            result[key] = item
+        return result, trimmed
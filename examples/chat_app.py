@@ -9,6 +9,7 @@ import json
 from typing import Optional, List, Dict, Any, Union
 from pathlib import Path
 import argparse
+import base64
 import datetime
 import uuid
 
@@ -41,17 +42,32 @@ except ImportError:
     logging.warning("pydantic-ai is required for the chat app")
 
 class ChatManager:
-    """Manager for chat messages and sessions"""
+    """Manager for chat messages and sessions
     
-    def __init__(self, db_path: str = "chat_messages.db"):
+    Writes go through a group-commit writer: inserts issued within
+    ``commit_interval`` of each other are written with one executemany and
+    a single commit, instead of one commit per message. The database runs in
+    WAL mode, so reads are not blocked by the writer.
+    """
+    
+    def __init__(self, db_path: str = "chat_messages.db",
+                commit_interval: float = 0.005,
+                max_batch_size: int = 256):
         """Initialize the chat manager
         
         Args:
             db_path: Path to the SQLite database file
+            commit_interval: Seconds the writer waits to gather more writes into a batch
+            max_batch_size: Maximum writes per commit
         """
         self.db_path = db_path
         self.db = None
         self.connected = False
+        self.commit_interval = commit_interval
+        self.max_batch_size = max_batch_size
+        self.commits = 0
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
         self._check_requirements()
     
     def _check_requirements(self):
@@ -80,6 +96,11 @@ class ChatManager:
         try:
             self.db = await aiosqlite.connect(self.db_path)
             
+            # WAL lets readers proceed while a batch is being written; with WAL,
+            # NORMAL sync is durable across application crashes
+            await self.db.execute("PRAGMA journal_mode=WAL")
+            await self.db.execute("PRAGMA synchronous=NORMAL")
+            
             # Create tables if they don't exist
             await self.db.execute("""
             CREATE TABLE IF NOT EXISTS sessions (
@@ -100,8 +121,17 @@ class ChatManager:
             )
             """)
             
+            # Serves per-session history in order; rowid breaks created_at ties
+            await self.db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_messages_session_created
+            ON messages (session_id, created_at)
+            """)
+            
             await self.db.commit()
             
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer())
+            
             self.connected = True
             logging.info(f"Connected to SQLite database: {self.db_path}")
             return True
@@ -112,12 +142,76 @@ class ChatManager:
     
     async def disconnect(self):
         """Disconnect from the SQLite database"""
+        if self._writer_task:
+            await self.flush()
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
         if self.db:
             await self.db.close()
             self.db = None
             self.connected = False
             logging.info("Disconnected from SQLite database")
     
+    async def _write(self, sql: Optional[str], params: tuple = (), wait: bool = True):
+        """Queue a write for the group-commit writer
+        
+        Args:
+            sql: Statement to execute (None queues a barrier)
+            params: Statement parameters
+            wait: Wait until the write is committed
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((sql, params, future))
+        if wait:
+            await future
+    
+    async def flush(self):
+        """Wait until all queued writes are committed"""
+        if self.connected and self._write_queue is not None:
+            await self._write(None)
+    
+    async def _writer(self):
+        """Drain the write queue, committing each batch in one transaction"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._write_queue.get()]
+            deadline = loop.time() + self.commit_interval
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                # Consecutive writes of the same statement become one executemany
+                i = 0
+                while i < len(batch):
+                    sql = batch[i][0]
+                    j = i
+                    while j < len(batch) and batch[j][0] == sql:
+                        j += 1
+                    if sql is not None:
+                        await self.db.executemany(sql, [item[1] for item in batch[i:j]])
+                    i = j
+                await self.db.commit()
+                self.commits += 1
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+            except Exception as e:
+                logging.error(f"Failed to write {len(batch)} chat records: {e}")
+                await self.db.rollback()
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+    
     async def create_session(self, name: Optional[str] = None) -> str:
         """Create a new chat session
         
@@ -130,21 +224,22 @@ class ChatManager:
         session_id = str(uuid.uuid4())
         
         if self.connected:
-            await self.db.execute(
+            await self._write(
                 "INSERT INTO sessions (id, name) VALUES (?, ?)",
                 (session_id, name or f"Chat {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}")
             )
-            await self.db.commit()
             
         return session_id
     
-    async def add_message(self, session_id: str, role: str, content: str) -> str:
+    async def add_message(self, session_id: str, role: str, content: str,
+                          wait: bool = True) -> str:
         """Add a message to a session
         
         Args:
             session_id: Session ID
             role: Message role (user or assistant)
             content: Message content
+            wait: Wait until the message is committed
             
         Returns:
             Message ID
@@ -152,17 +247,48 @@ class ChatManager:
         message_id = str(uuid.uuid4())
         
         if self.connected:
-            await self.db.execute(
-                "INSERT INTO messages (id, session_id, role, content) VALUES (?, ?, ?, ?)",
-                (message_id, session_id, role, content)
+            # Microsecond timestamps keep messages in the order they were added
+            created_at = datetime.datetime.utcnow().isoformat(sep=" ")
+            await self._write(
+                "INSERT INTO messages (id, session_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (message_id, session_id, role, content, created_at),
+                wait=wait
             )
-            await self.db.commit()
             
         return message_id
     
+    @staticmethod
+    def _message_row(row) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "role": row[1],
+            "content": row[2],
+            "created_at": row[3]
+        }
+    
+    @staticmethod
+    def encode_cursor(created_at: str, rowid: int) -> str:
+        """Encode a keyset position as an opaque cursor"""
+        return base64.urlsafe_b64encode(f"{created_at}|{rowid}".encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """Decode a cursor into (created_at, rowid)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        try:
+            created_at, rowid = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+            return created_at, int(rowid)
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+    
     async def get_session_messages(self, session_id: str) -> List[Dict[str, Any]]:
         """Get all messages for a session
         
+        Prefer get_message_page or get_recent_messages for long sessions.
+        
         Args:
             session_id: Session ID
             
@@ -177,21 +303,71 @@ class ChatManager:
             SELECT id, role, content, created_at
             FROM messages
             WHERE session_id = ?
-            ORDER BY created_at
+            ORDER BY created_at, rowid
             """,
             (session_id,)
         ) as cursor:
             rows = await cursor.fetchall()
             
-        return [
-            {
-                "id": row[0],
-                "role": row[1],
-                "content": row[2],
-                "created_at": row[3]
-            }
-            for row in rows
-        ]
+        return [self._message_row(row) for row in rows]
+    
+    async def get_message_page(self, session_id: str, limit: int = 50,
+                               before: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of history, walking backwards from the newest message
+        
+        Uses keyset pagination on (created_at, rowid), so each page is an
+        index range scan regardless of how deep into the history it is.
+        
+        Args:
+            session_id: Session ID
+            limit: Maximum messages per page
+            before: Cursor from a previous page's next_cursor
+            
+        Returns:
+            {"messages": oldest-first page, "next_cursor": cursor for older messages or None}
+        """
+        if not self.connected:
+            return {"messages": [], "next_cursor": None}
+        
+        params: List[Any] = [session_id]
+        keyset = ""
+        if before:
+            created_at, rowid = self.decode_cursor(before)
+            keyset = "AND (created_at < ? OR (created_at = ? AND rowid < ?))"
+            params.extend([created_at, created_at, rowid])
+        params.append(limit + 1)
+        
+        async with self.db.execute(
+            f"""
+            SELECT id, role, content, created_at, rowid
+            FROM messages
+            WHERE session_id = ? {keyset}
+            ORDER BY created_at DESC, rowid DESC
+            LIMIT ?
+            """,
+            params
+        ) as cursor:
+            rows = await cursor.fetchall()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = self.encode_cursor(rows[-1][3], rows[-1][4]) if has_more else None
+        return {
+            "messages": [self._message_row(row) for row in reversed(rows)],
+            "next_cursor": next_cursor
+        }
+    
+    async def get_recent_messages(self, session_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the last N messages of a session, oldest first
+        
+        Args:
+            session_id: Session ID
+            limit: Number of messages
+            
+        Returns:
+            List of messages
+        """
+        return (await self.get_message_page(session_id, limit))["messages"]
     
     async def get_sessions(self) -> List[Dict[str, Any]]:
         """Get all chat sessions
@@ -227,7 +403,8 @@ class ChatApp:
                 model: str = "openai:gpt-4-turbo",
                 host: str = "127.0.0.1",
                 port: int = 8000,
-                db_path: str = "chat_messages.db"):
+                db_path: str = "chat_messages.db",
+                history_limit: int = 20):
         """Initialize the chat application
         
         Args:
@@ -235,6 +412,7 @@ class ChatApp:
             host: Host to bind the server to
             port: Port to bind the server to
             db_path: Path to the SQLite database file
+            history_limit: Number of recent messages sent to the model as history
         """
         if not HAS_FASTAPI:
             logging.error("fastapi and uvicorn are required for the chat app")
@@ -243,6 +421,7 @@ class ChatApp:
         self.model = model
         self.host = host
         self.port = port
+        self.history_limit = history_limit
         
         # Create FastAPI app
         self.app = FastAPI(title="Wrenchai Chat App")
@@ -297,9 +476,12 @@ class ChatApp:
             return {"session_id": session_id}
         
         @self.app.get("/api/sessions/{session_id}/messages")
-        async def get_session_messages(session_id: str):
-            messages = await self.chat_manager.get_session_messages(session_id)
-            return {"messages": messages}
+        async def get_session_messages(session_id: str, limit: int = 50, before: Optional[str] = None):
+            try:
+                page = await self.chat_manager.get_message_page(session_id, min(max(limit, 1), 500), before)
+            except ValueError as e:
+                return JSONResponse(status_code=400, content={"error": str(e)})
+            return page
         
         @self.app.websocket("/ws/chat/{session_id}")
         async def chat_websocket(websocket: WebSocket, session_id: str):
@@ -316,8 +498,8 @@ class ChatApp:
                     """
                 )
                 
-                # Get existing messages for this session
-                messages = await self.chat_manager.get_session_messages(session_id)
+                # Get recent messages for this session (not the full transcript)
+                messages = await self.chat_manager.get_recent_messages(session_id, self.history_limit)
                 
                 # Convert to format expected by agent
                 history = [
@@ -335,6 +517,7 @@ class ChatApp:
                     
                     # Add to history
                     history.append({"role": "user", "content": user_message})
+                    del history[:-self.history_limit]
                     
                     # Send initial response to indicate the assistant is thinking
                     await websocket.send_json({
@@ -356,6 +539,7 @@ class ChatApp:
                     
                     # Add to history
                     history.append({"role": "assistant", "content": response_text})
+                    del history[:-self.history_limit]
                     
                     # Send final message
                     await websocket.send_json({
@@ -942,6 +1126,8 @@ def main():
     parser.add_argument("--port", type=int, default=8000, help="Port to bind the server to")
     parser.add_argument("--model", default="openai:gpt-4-turbo", help="Model to use")
     parser.add_argument("--db-path", default="chat_messages.db", help="Path to the SQLite database file")
+    parser.add_argument("--history-limit", type=int, default=20,
+                        help="Number of recent messages sent to the model as history")
     
     args = parser.parse_args()
     
@@ -950,7 +1136,8 @@ def main():
         model=args.model,
         host=args.host,
         port=args.port,
-        db_path=args.db_path
+        db_path=args.db_path,
+        history_limit=args.history_limit
     )
     
     # Run the app
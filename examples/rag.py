@@ -6,7 +6,14 @@ import sys
 import logging
 import asyncio
 import json
-from typing import Optional, List, Dict, Any, Union, Tuple
+import hashlib
+import random
+import re
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Union, Tuple, Set, Iterable
 from pathlib import Path
 import argparse
 
@@ -36,6 +43,14 @@ except ImportError:
     HAS_PYDANTIC_AI = False
     logging.warning("pydantic-ai is not installed. RAG functionality will not work.")
 
+# Check for NumPy (optional - for the in-process vector index)
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logging.warning("numpy is not installed. The local vector index will not be available.")
+
 # Check for rich (optional - for better output formatting)
 try:
     from rich.console import Console
@@ -47,6 +62,258 @@ except ImportError:
     HAS_RICH = False
     logging.warning("rich is not installed. Output will use standard formatting.")
 
+EMBEDDING_DIM = 1536
+
+class StubEmbedder:
+    """Deterministic local embedder for offline runs and benchmarks
+    
+    Hashes word tokens into a fixed number of signed buckets and L2-normalizes
+    the result, so texts sharing words get similar vectors. An optional
+    per-request latency stands in for the network round trip.
+    """
+    
+    def __init__(self, dim: int = EMBEDDING_DIM, latency: float = 0.0):
+        """Initialize the stub
+        
+        Args:
+            dim: Embedding dimension
+            latency: Simulated seconds per embedding request
+        """
+        self.dim = dim
+        self.latency = latency
+        self.requests = 0
+    
+    def embed_text(self, text: str) -> List[float]:
+        """Embed a single text synchronously"""
+        vector = [0.0] * self.dim
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "big") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one simulated request"""
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self.embed_text(text) for text in texts]
+
+class OpenAIEmbedder:
+    """Batched OpenAI embeddings (one request per list of texts)"""
+    
+    def __init__(self, model: str = "text-embedding-3-small", client: Optional[Any] = None):
+        """Initialize the embedder
+        
+        Args:
+            model: OpenAI embedding model
+            client: AsyncOpenAI client (created on first use if omitted)
+        """
+        self.model = model
+        self.client = client
+        self.requests = 0
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in a single API call"""
+        if not HAS_OPENAI:
+            logging.error("openai is required for embedding generation")
+            raise ImportError("openai is required for embedding generation")
+        if self.client is None:
+            self.client = AsyncOpenAI()
+        self.requests += 1
+        response = await self.client.embeddings.create(model=self.model, input=texts)
+        # The API may return items out of order; index restores input order
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+def to_vector_literal(embedding: List[float]) -> str:
+    """Format an embedding as a pgvector literal"""
+    return "[" + ",".join(repr(float(v)) for v in embedding) + "]"
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings keyed by whitespace-normalized query text"""
+    
+    def __init__(self, max_size: int = 256):
+        """Initialize the cache
+        
+        Args:
+            max_size: Maximum number of cached query embeddings
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+    
+    @staticmethod
+    def key(query: str) -> str:
+        return " ".join(query.split()).lower()
+    
+    def get(self, query: str) -> Optional[List[float]]:
+        """Return the cached embedding for a query, if any"""
+        key = self.key(query)
+        embedding = self._entries.get(key)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return embedding
+    
+    def put(self, query: str, embedding: List[float]):
+        """Cache the embedding for a query"""
+        key = self.key(query)
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class NumpyVectorIndex:
+    """In-process L2 vector index used when Postgres is unavailable
+    
+    Searches exhaustively (flat) by default. With ``nlist`` > 0 it builds an
+    IVF index: vectors are clustered with k-means and a query scans only the
+    ``probes`` nearest clusters, mirroring pgvector's ivfflat. It implements
+    the document sink interface, so IngestionPipeline can fill it directly.
+    """
+    
+    def __init__(self, dim: int = EMBEDDING_DIM, nlist: int = 0, probes: int = 10, seed: int = 0):
+        """Initialize the index
+        
+        Args:
+            dim: Embedding dimension
+            nlist: Number of IVF clusters (0 for a flat index)
+            probes: Default number of clusters scanned per IVF query
+            seed: Seed for k-means initialisation
+        """
+        if not HAS_NUMPY:
+            raise ImportError("numpy is required for the local vector index")
+        self.dim = dim
+        self.nlist = nlist
+        self.probes = probes
+        self.seed = seed
+        self.docs: List[Dict[str, Any]] = []
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.centroids: Optional[Any] = None
+        self._lists: List[Any] = []
+        self._trained_size = 0
+    
+    def __len__(self) -> int:
+        return len(self.docs)
+    
+    def add(self, docs: List[Dict[str, Any]], embeddings: List[List[float]]):
+        """Add documents with their embeddings
+        
+        Args:
+            docs: Document dictionaries (title, section, content, ...)
+            embeddings: One embedding per document
+        """
+        if not docs:
+            return
+        start = len(self.docs)
+        for offset, doc in enumerate(docs):
+            self.docs.append({**doc, "id": doc.get("id", start + offset)})
+        self.vectors = np.vstack([self.vectors, np.asarray(embeddings, dtype=np.float32)])
+        if self.centroids is not None:
+            self._assign(start)
+    
+    def train(self, iterations: int = 10):
+        """Cluster the stored vectors into nlist IVF lists with k-means"""
+        n = len(self.docs)
+        if not self.nlist or n == 0:
+            return
+        k = min(self.nlist, n)
+        rng = np.random.default_rng(self.seed)
+        centroids = self.vectors[rng.choice(n, size=k, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._nearest(self.vectors, centroids, 1)[:, 0]
+            for c in range(k):
+                members = self.vectors[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+        self.centroids = centroids
+        self._trained_size = n
+        self._assign(0)
+    
+    def search(self, embedding: List[float], limit: int = 5,
+               probes: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Find the nearest documents to an embedding
+        
+        Args:
+            embedding: Query embedding
+            limit: Maximum number of results
+            probes: IVF clusters to scan (defaults to the index setting)
+            
+        Returns:
+            Documents with "distance" and "similarity" (1 - distance), nearest first
+        """
+        if not self.docs:
+            return []
+        if self.nlist and (self.centroids is None or len(self.docs) > 2 * self._trained_size):
+            self.train()
+        
+        query = np.asarray(embedding, dtype=np.float32)
+        if self.centroids is not None:
+            nearest_lists = self._nearest(query[None, :], self.centroids, probes or self.probes)[0]
+            candidates = np.concatenate([self._lists[c] for c in nearest_lists])
+        else:
+            candidates = np.arange(len(self.docs))
+        if len(candidates) == 0:
+            return []
+        
+        vectors = self.vectors if self.centroids is None else self.vectors[candidates]
+        distances = np.linalg.norm(vectors - query, axis=1)
+        top = np.argsort(distances)[:limit] if len(candidates) <= limit else \
+            np.argpartition(distances, limit)[:limit]
+        top = top[np.argsort(distances[top])]
+        return [
+            {**self.docs[candidates[i]], "distance": float(distances[i]),
+             "similarity": 1.0 - float(distances[i])}
+            for i in top
+        ]
+    
+    def _assign(self, start: int):
+        assignment = self._nearest(self.vectors, self.centroids, 1)[:, 0]
+        self._lists = [np.flatnonzero(assignment == c) for c in range(len(self.centroids))]
+    
+    @staticmethod
+    def _nearest(points, centroids, count: int):
+        # Squared L2 via ||p||^2 - 2 p.c + ||c||^2, without materialising differences
+        scores = (centroids ** 2).sum(axis=1)[None, :] - 2 * points @ centroids.T
+        count = min(count, centroids.shape[0])
+        if count == centroids.shape[0]:
+            return np.argsort(scores, axis=1)
+        nearest = np.argpartition(scores, count - 1, axis=1)[:, :count]
+        order = np.take_along_axis(scores, nearest, axis=1).argsort(axis=1)
+        return np.take_along_axis(nearest, order, axis=1)
+    
+    # Document sink interface (see IngestionPipeline)
+    
+    async def load_hashes(self) -> Dict[str, Set[str]]:
+        hashes: Dict[str, Set[str]] = {}
+        for doc in self.docs:
+            hashes.setdefault(doc["title"], set()).add(doc.get("content_hash"))
+        return hashes
+    
+    async def delete_stale(self, title: str, keep: Set[str]) -> int:
+        kept = [i for i, doc in enumerate(self.docs)
+                if doc["title"] != title or doc.get("content_hash") in keep]
+        removed = len(self.docs) - len(kept)
+        if removed:
+            self.docs = [self.docs[i] for i in kept]
+            self.vectors = self.vectors[kept]
+            if self.centroids is not None:
+                self._assign(0)
+        return removed
+    
+    async def write(self, rows: List[Tuple[str, str, str, str, List[float]]]):
+        self.add(
+            [{"title": r[0], "section": r[1], "content": r[2], "content_hash": r[3]} for r in rows],
+            [r[4] for r in rows]
+        )
+
 class RAGSystem:
     """Retrieval-Augmented Generation system"""
     
@@ -57,7 +324,11 @@ class RAGSystem:
                 db_user: str = "postgres",
                 db_password: str = "postgres",
                 model: str = "openai:gpt-4-turbo",
-                embedding_model: str = "text-embedding-3-small"):
+                embedding_model: str = "text-embedding-3-small",
+                embedder: Optional[Any] = None,
+                probes: int = 10,
+                query_cache_size: int = 256,
+                local_index: Optional[NumpyVectorIndex] = None):
         """Initialize the RAG system
         
         Args:
@@ -68,6 +339,10 @@ class RAGSystem:
             db_password: Database password
             model: AI model to use
             embedding_model: OpenAI embedding model to use
+            embedder: Batch embedder (defaults to OpenAI; pass StubEmbedder for offline runs)
+            probes: ivfflat lists scanned per query (higher is slower but more accurate)
+            query_cache_size: Number of query embeddings kept in the LRU cache
+            local_index: In-process index searched when Postgres is unavailable
         """
         self.db_config = {
             "host": db_host,
@@ -81,6 +356,10 @@ class RAGSystem:
         self.embedding_model = embedding_model
         self.conn = None
         self.openai_client = None
+        self.embedder = embedder
+        self.probes = probes
+        self.query_cache = QueryEmbeddingCache(query_cache_size)
+        self.local_index = local_index
         self._check_requirements()
     
     def _check_requirements(self):
@@ -116,6 +395,8 @@ class RAGSystem:
             # Initialize OpenAI client
             if HAS_OPENAI:
                 self.openai_client = AsyncOpenAI()
+                if self.embedder is None:
+                    self.embedder = OpenAIEmbedder(self.embedding_model, self.openai_client)
             
             logging.info("Connected to PostgreSQL database")
             return True
@@ -157,10 +438,18 @@ class RAGSystem:
                     title TEXT NOT NULL,
                     section TEXT NOT NULL,
                     content TEXT NOT NULL,
-                    embedding VECTOR(1536)
+                    embedding VECTOR(1536),
+                    content_hash TEXT
                 );
                 """)
                 
+                # Tables created before content hashing lack the column
+                await cur.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT;")
+                await cur.execute("""
+                CREATE INDEX IF NOT EXISTS documents_title_hash_idx
+                ON documents (title, content_hash);
+                """)
+                
                 # Create index on embedding
                 await cur.execute("""
                 CREATE INDEX IF NOT EXISTS documents_embedding_idx 
@@ -183,6 +472,9 @@ class RAGSystem:
         Returns:
             Embedding vector
         """
+        if self.embedder is not None:
+            return (await self.embedder.embed([text]))[0]
+        
         if not HAS_OPENAI:
             logging.error("openai is required for embedding generation")
             raise ImportError("openai is required for embedding generation")
@@ -194,6 +486,19 @@ class RAGSystem:
         
         return response.data[0].embedding
     
+    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Create embeddings for several texts in one request
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            Embedding vectors, in input order
+        """
+        if self.embedder is None:
+            self.embedder = OpenAIEmbedder(self.embedding_model, self.openai_client)
+        return await self.embedder.embed(texts)
+    
     async def add_document(self, title: str, section: str, content: str) -> int:
         """Add a document to the database
         
@@ -230,38 +535,69 @@ class RAGSystem:
             logging.error(f"Failed to add document: {e}")
             return -1
     
-    async def search_documents(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing cached embeddings of repeated queries
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Embedding vector
+        """
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = await self.create_embedding(query)
+            self.query_cache.put(query, embedding)
+        return embedding
+    
+    async def search_documents(self, query: str, limit: int = 5,
+                               probes: Optional[int] = None) -> List[Dict[str, Any]]:
         """Search for documents matching the query
         
+        Orders by the raw ``<->`` distance so pgvector can answer from the
+        ivfflat index instead of scanning the table. Falls back to the local
+        index when there is no database connection.
+        
         Args:
             query: Search query
             limit: Maximum number of results
+            probes: ivfflat lists to scan (defaults to the system setting)
             
         Returns:
             List of matching documents
         """
-        if not self.conn:
+        if not self.conn and self.local_index is None:
             logging.warning("Not connected to database.")
             return []
             
         try:
             # Create embedding for query
-            query_embedding = await self.create_embedding(query)
+            query_embedding = await self.embed_query(query)
             
-            # Search for documents
-            async with self.conn.cursor() as cur:
+            if not self.conn:
+                return self.local_index.search(query_embedding, limit, probes or self.probes)
+            
+            # Search for documents; probes is set per transaction so concurrent
+            # callers with different settings do not interfere
+            async with self.conn.transaction(), self.conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT set_config('ivfflat.probes', %s, true);",
+                    (str(probes or self.probes),)
+                )
                 await cur.execute(
                     """
                     SELECT id, title, section, content,
-                           1 - (embedding <-> %s) AS similarity
+                           embedding <-> %s::vector AS distance
                     FROM documents
-                    ORDER BY similarity DESC
+                    ORDER BY embedding <-> %s::vector
                     LIMIT %s;
                     """,
-                    (query_embedding, limit)
+                    (to_vector_literal(query_embedding), to_vector_literal(query_embedding), limit)
                 )
                 results = await cur.fetchall()
-                
+            
+            for row in results:
+                row["similarity"] = 1 - row["distance"]
             return results
         except Exception as e:
             logging.error(f"Failed to search documents: {e}")
@@ -334,61 +670,432 @@ class RAGSystem:
                 "sources": sources
             }
 
-async def build_database(docs_dir: str, rag_system: RAGSystem):
+@dataclass
+class Section:
+    """A markdown section queued for ingestion"""
+    title: str
+    section: str
+    content: str
+    content_hash: str
+
+def section_hash(title: str, section: str, content: str) -> str:
+    """Content hash identifying a section version"""
+    return hashlib.sha256(f"{title}\0{section}\0{content}".encode("utf-8")).hexdigest()
+
+@dataclass
+class IngestionStats:
+    """Counters and throughput for one ingestion run"""
+    files: int = 0
+    sections: int = 0
+    embedded: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    deleted: int = 0
+    written: int = 0
+    requests: int = 0
+    retries: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+    
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started (or until it finished)"""
+        return (self.finished or time.perf_counter()) - self.started
+    
+    @property
+    def sections_per_second(self) -> float:
+        """Sections processed (embedded or unchanged) per second"""
+        return self.sections / self.elapsed if self.elapsed > 0 else 0.0
+    
+    @property
+    def embeddings_per_second(self) -> float:
+        """Sections embedded and written per second"""
+        return self.written / self.elapsed if self.elapsed > 0 else 0.0
+    
+    def summary(self) -> str:
+        """One-line human readable summary"""
+        return (f"{self.files} files, {self.sections} sections: {self.written} embedded, "
+                f"{self.unchanged} unchanged, {self.deleted} stale removed, {self.failed} failed "
+                f"in {self.elapsed:.2f}s ({self.sections_per_second:.1f} sections/s, "
+                f"{self.embeddings_per_second:.1f} embeddings/s, {self.requests} requests, "
+                f"{self.retries} retries)")
+
+class PostgresDocumentSink:
+    """Bulk writer for the documents table"""
+    
+    def __init__(self, conn):
+        """Initialize the sink
+        
+        Args:
+            conn: Open psycopg AsyncConnection
+        """
+        self.conn = conn
+        self._lock = asyncio.Lock()
+    
+    async def load_hashes(self) -> Dict[str, Set[str]]:
+        """Content hashes already stored, grouped by document title"""
+        hashes: Dict[str, Set[str]] = {}
+        async with self._lock, self.conn.cursor() as cur:
+            await cur.execute("SELECT title, content_hash FROM documents;")
+            for row in await cur.fetchall():
+                hashes.setdefault(row["title"], set()).add(row["content_hash"])
+        return hashes
+    
+    async def delete_stale(self, title: str, keep: Set[str]) -> int:
+        """Delete rows of a document whose content hash is no longer current"""
+        async with self._lock, self.conn.cursor() as cur:
+            await cur.execute(
+                """
+                DELETE FROM documents
+                WHERE title = %s AND (content_hash IS NULL OR NOT (content_hash = ANY(%s)));
+                """,
+                (title, list(keep))
+            )
+            return cur.rowcount
+    
+    async def write(self, rows: List[Tuple[str, str, str, str, List[float]]]) -> None:
+        """Insert (title, section, content, content_hash, embedding) rows in one transaction"""
+        async with self._lock, self.conn.transaction(), self.conn.cursor() as cur:
+            await cur.executemany(
+                """
+                INSERT INTO documents (title, section, content, content_hash, embedding)
+                VALUES (%s, %s, %s, %s, %s);
+                """,
+                rows
+            )
+
+class MemoryDocumentSink:
+    """In-memory sink for offline runs and benchmarks"""
+    
+    def __init__(self):
+        self.rows: List[Tuple[str, str, str, str, List[float]]] = []
+        self.writes = 0
+    
+    async def load_hashes(self) -> Dict[str, Set[str]]:
+        hashes: Dict[str, Set[str]] = {}
+        for title, _, _, content_hash, _ in self.rows:
+            hashes.setdefault(title, set()).add(content_hash)
+        return hashes
+    
+    async def delete_stale(self, title: str, keep: Set[str]) -> int:
+        before = len(self.rows)
+        self.rows = [r for r in self.rows if r[0] != title or r[3] in keep]
+        return before - len(self.rows)
+    
+    async def write(self, rows: List[Tuple[str, str, str, str, List[float]]]) -> None:
+        self.writes += 1
+        self.rows.extend(rows)
+
+class IngestionPipeline:
+    """Streaming ingestion: read files -> split sections -> embed in batches -> bulk write
+    
+    Stages are connected by bounded queues, so at most a few batches are in
+    memory at once. Embedding batches run with bounded concurrency and retries;
+    sections whose content hash is already stored are skipped.
+    """
+    
+    def __init__(self,
+                embedder: Any,
+                sink: Any,
+                batch_size: int = 64,
+                concurrency: int = 4,
+                max_retries: int = 3,
+                retry_delay: float = 0.5,
+                write_batch_size: int = 256):
+        """Initialize the pipeline
+        
+        Args:
+            embedder: Object with an async embed(texts) -> vectors method
+            sink: Document sink (PostgresDocumentSink or MemoryDocumentSink)
+            batch_size: Texts per embedding request
+            concurrency: Embedding requests in flight
+            max_retries: Retries per failed embedding request
+            retry_delay: Base delay for exponential backoff between retries
+            write_batch_size: Rows per bulk insert
+        """
+        self.embedder = embedder
+        self.sink = sink
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.write_batch_size = write_batch_size
+        self.stats = IngestionStats()
+    
+    async def run(self, files: Iterable[Path], base_dir: Path) -> IngestionStats:
+        """Ingest markdown files
+        
+        Args:
+            files: Markdown files to ingest
+            base_dir: Directory titles are made relative to
+            
+        Returns:
+            Ingestion statistics
+        """
+        self.stats = IngestionStats()
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        
+        embedders = [
+            asyncio.create_task(self._embed_worker(embed_queue, write_queue))
+            for _ in range(self.concurrency)
+        ]
+        writer = asyncio.create_task(self._write_worker(write_queue))
+        try:
+            await self._produce(files, base_dir, embed_queue)
+            for _ in embedders:
+                await embed_queue.put(None)
+            await asyncio.gather(*embedders)
+            await write_queue.put(None)
+            await writer
+        finally:
+            for task in embedders + [writer]:
+                task.cancel()
+            self.stats.finished = time.perf_counter()
+        
+        logging.info(f"Ingestion complete: {self.stats.summary()}")
+        return self.stats
+    
+    async def _produce(self, files: Iterable[Path], base_dir: Path, embed_queue: asyncio.Queue):
+        stored = await self.sink.load_hashes()
+        batch: List[Section] = []
+        
+        for md_file in files:
+            content = await asyncio.to_thread(md_file.read_text)
+            title = str(md_file.relative_to(base_dir))
+            self.stats.files += 1
+            
+            current: Set[str] = set()
+            known = stored.get(title, set())
+            for section_title, section_content in split_markdown_into_sections(content):
+                if not section_content.strip():
+                    continue
+                content_hash = section_hash(title, section_title, section_content)
+                if content_hash in current:
+                    continue
+                current.add(content_hash)
+                self.stats.sections += 1
+                if content_hash in known:
+                    self.stats.unchanged += 1
+                    continue
+                batch.append(Section(title, section_title, section_content, content_hash))
+                if len(batch) >= self.batch_size:
+                    await embed_queue.put(batch)
+                    batch = []
+            
+            if known - current:
+                self.stats.deleted += await self.sink.delete_stale(title, current)
+        
+        if batch:
+            await embed_queue.put(batch)
+    
+    async def _embed_worker(self, embed_queue: asyncio.Queue, write_queue: asyncio.Queue):
+        while True:
+            batch = await embed_queue.get()
+            if batch is None:
+                return
+            embeddings = await self._embed_with_retries([s.content for s in batch])
+            if embeddings is None:
+                self.stats.failed += len(batch)
+                continue
+            self.stats.embedded += len(batch)
+            await write_queue.put([
+                (s.title, s.section, s.content, s.content_hash, embedding)
+                for s, embedding in zip(batch, embeddings)
+            ])
+    
+    async def _embed_with_retries(self, texts: List[str]) -> Optional[List[List[float]]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.stats.requests += 1
+                return await self.embedder.embed(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logging.error(f"Embedding batch of {len(texts)} failed after {attempt + 1} attempts: {e}")
+                    return None
+                self.stats.retries += 1
+                delay = self.retry_delay * (2 ** attempt) * (0.5 + random.random())
+                logging.warning(f"Embedding batch failed ({e}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+    
+    async def _write_worker(self, write_queue: asyncio.Queue):
+        pending: List[Tuple[str, str, str, str, List[float]]] = []
+        while True:
+            rows = await write_queue.get()
+            if rows is not None:
+                pending.extend(rows)
+            if pending and (rows is None or len(pending) >= self.write_batch_size):
+                await self.sink.write(pending)
+                self.stats.written += len(pending)
+                pending = []
+            if rows is None:
+                return
+
+def find_markdown_files(docs_dir: str) -> List[Path]:
+    """Markdown files under a directory, in a stable order"""
+    return sorted(Path(docs_dir).glob("**/*.md"))
+
+async def build_database(docs_dir: str, rag_system: RAGSystem,
+                         batch_size: int = 64, concurrency: int = 4) -> Optional[IngestionStats]:
     """Build the RAG database from documentation files
     
+    Only sections whose content changed since the last build are embedded.
+    
     Args:
         docs_dir: Directory containing documentation files
         rag_system: RAG system instance
+        batch_size: Texts per embedding request
+        concurrency: Embedding requests in flight
+        
+    Returns:
+        Ingestion statistics, or None if the database was unavailable
     """
     # Connect to database
     if not await rag_system.connect():
         logging.error("Failed to connect to database")
-        return
+        return None
     
     try:
         # Set up database schema
         if not await rag_system.setup_database():
             logging.error("Failed to set up database schema")
-            return
+            return None
             
         # Find all markdown files
-        docs_path = Path(docs_dir)
-        markdown_files = list(docs_path.glob("**/*.md"))
+        markdown_files = find_markdown_files(docs_dir)
         
         if not markdown_files:
             logging.warning(f"No markdown files found in {docs_dir}")
-            return
+            return None
             
         print(f"Found {len(markdown_files)} markdown files")
         
-        # Process each file
-        for md_file in markdown_files:
-            # Read file
-            content = md_file.read_text()
-            
-            # Split into sections
-            sections = split_markdown_into_sections(content)
-            
-            # Get relative path for title
-            rel_path = md_file.relative_to(docs_path)
-            
-            # Add each section
-            for section_title, section_content in sections:
-                doc_id = await rag_system.add_document(
-                    str(rel_path),
-                    section_title,
-                    section_content
-                )
-                
-                if doc_id >= 0:
-                    print(f"Added section '{section_title}' from {rel_path}")
-                
-        print("Database build complete")
+        if rag_system.embedder is None:
+            rag_system.embedder = OpenAIEmbedder(rag_system.embedding_model, rag_system.openai_client)
+        pipeline = IngestionPipeline(
+            rag_system.embedder,
+            PostgresDocumentSink(rag_system.conn),
+            batch_size=batch_size,
+            concurrency=concurrency
+        )
+        stats = await pipeline.run(markdown_files, Path(docs_dir))
+        
+        print(f"Database build complete: {stats.summary()}")
+        return stats
     finally:
         # Disconnect
         await rag_system.disconnect()
 
+async def benchmark_ingestion(docs_dir: str, batch_size: int = 64, concurrency: int = 4,
+                              latency: float = 0.05) -> Optional[IngestionStats]:
+    """Benchmark ingestion offline with the stub embedder and an in-memory sink
+    
+    Runs a cold build followed by a re-ingest of the unchanged tree.
+    
+    Args:
+        docs_dir: Directory containing documentation files
+        batch_size: Texts per embedding request
+        concurrency: Embedding requests in flight
+        latency: Simulated seconds per embedding request
+        
+    Returns:
+        Statistics of the cold build
+    """
+    markdown_files = find_markdown_files(docs_dir)
+    if not markdown_files:
+        logging.warning(f"No markdown files found in {docs_dir}")
+        return None
+    
+    sink = MemoryDocumentSink()
+    pipeline = IngestionPipeline(StubEmbedder(latency=latency), sink,
+                                 batch_size=batch_size, concurrency=concurrency)
+    cold = await pipeline.run(markdown_files, Path(docs_dir))
+    print(f"Cold build: {cold.summary()}")
+    warm = await pipeline.run(markdown_files, Path(docs_dir))
+    print(f"Re-ingest:  {warm.summary()}")
+    return cold
+
+async def benchmark_search(docs_dir: str, rag_system: Optional[RAGSystem] = None,
+                           queries: int = 100, limit: int = 10, nlist: int = 0,
+                           probes_options: Tuple[int, ...] = (1, 2, 4, 8, 16)) -> List[Dict[str, Any]]:
+    """Compare recall and latency of the vector search backends
+    
+    Embeds the tree with the stub embedder, uses section-title queries, and
+    takes the flat NumPy index as ground truth. Each IVF probes setting is
+    measured against it, and so is Postgres when ``rag_system`` can connect
+    (its table must hold the same tree, built with --stub-embeddings).
+    
+    Args:
+        docs_dir: Directory containing documentation files
+        rag_system: Optional RAG system for the Postgres backend
+        queries: Number of sampled queries
+        limit: Results per query (recall@limit)
+        nlist: IVF clusters (defaults to about sqrt(number of sections))
+        probes_options: probes values to measure
+        
+    Returns:
+        One row per backend/setting with recall and latency percentiles
+    """
+    markdown_files = find_markdown_files(docs_dir)
+    if not markdown_files:
+        logging.warning(f"No markdown files found in {docs_dir}")
+        return []
+    
+    embedder = StubEmbedder()
+    flat = NumpyVectorIndex()
+    await IngestionPipeline(embedder, flat).run(markdown_files, Path(docs_dir))
+    nlist = nlist or max(1, int(math.sqrt(len(flat))))
+    ivf = NumpyVectorIndex(nlist=nlist)
+    ivf.add(flat.docs, flat.vectors)
+    ivf.train()
+    
+    rng = random.Random(0)
+    sample = [rng.choice(flat.docs) for _ in range(queries)]
+    texts = [f"{doc['section']} {doc['content'][:200]}" for doc in sample]
+    embeddings = await embedder.embed(texts)
+    truth = [{(d["title"], d["section"]) for d in flat.search(e, limit)} for e in embeddings]
+    
+    def measure(name: str, setting: Any, results_and_times: List[Tuple[List[Dict[str, Any]], float]]):
+        recall = sum(
+            len({(d["title"], d["section"]) for d in found} & expected) / max(len(expected), 1)
+            for (found, _), expected in zip(results_and_times, truth)
+        ) / len(truth)
+        latencies = sorted(t * 1000 for _, t in results_and_times)
+        return {
+            "backend": name, "setting": setting, "recall": recall,
+            "p50_ms": latencies[len(latencies) // 2],
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        }
+    
+    def timed(fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - start
+    
+    rows = [measure("numpy-flat", "-", [timed(flat.search, e, limit) for e in embeddings])]
+    for probes in probes_options:
+        rows.append(measure(f"numpy-ivf (nlist={nlist})", f"probes={probes}",
+                            [timed(ivf.search, e, limit, probes) for e in embeddings]))
+    
+    if rag_system is not None and await rag_system.connect():
+        try:
+            rag_system.embedder = embedder
+            for probes in probes_options:
+                measured = []
+                for text in texts:
+                    start = time.perf_counter()
+                    found = await rag_system.search_documents(text, limit, probes)
+                    measured.append((found, time.perf_counter() - start))
+                rows.append(measure("postgres-ivfflat", f"probes={probes}", measured))
+        finally:
+            await rag_system.disconnect()
+    
+    print(f"{len(flat)} sections, {queries} queries, recall@{limit} against exact search")
+    for row in rows:
+        print(f"{row['backend']:<28} {row['setting']:<10} recall={row['recall']:.3f} "
+              f"p50={row['p50_ms']:.2f}ms p95={row['p95_ms']:.2f}ms")
+    return rows
+
 def split_markdown_into_sections(content: str) -> List[Tuple[str, str]]:
     """Split markdown content into sections
     
@@ -430,17 +1137,42 @@ def split_markdown_into_sections(content: str) -> List[Tuple[str, str]]:
     
     return sections
 
-async def search_and_answer(query: str, rag_system: RAGSystem):
+async def build_local_index(docs_dir: str, rag_system: RAGSystem, nlist: int = 0) -> Optional[NumpyVectorIndex]:
+    """Embed a documentation tree into an in-process vector index
+    
+    Args:
+        docs_dir: Directory containing documentation files
+        rag_system: RAG system whose embedder is used
+        nlist: IVF clusters (0 for a flat index)
+        
+    Returns:
+        The populated index, or None if there is nothing to index
+    """
+    markdown_files = find_markdown_files(docs_dir)
+    if not markdown_files or not HAS_NUMPY:
+        return None
+    if rag_system.embedder is None:
+        rag_system.embedder = OpenAIEmbedder(rag_system.embedding_model, rag_system.openai_client)
+    index = NumpyVectorIndex(nlist=nlist, probes=rag_system.probes)
+    await IngestionPipeline(rag_system.embedder, index).run(markdown_files, Path(docs_dir))
+    return index
+
+async def search_and_answer(query: str, rag_system: RAGSystem, docs_dir: Optional[str] = None):
     """Search for documents and answer a question
     
     Args:
         query: Search query
         rag_system: RAG system instance
+        docs_dir: Documentation to index locally if the database is unavailable
     """
-    # Connect to database
+    # Connect to database, falling back to an in-process index
     if not await rag_system.connect():
-        logging.error("Failed to connect to database")
-        return
+        if rag_system.local_index is None and docs_dir:
+            logging.warning(f"Database unavailable; indexing {docs_dir} in memory")
+            rag_system.local_index = await build_local_index(docs_dir, rag_system)
+        if rag_system.local_index is None:
+            logging.error("Failed to connect to database")
+            return
     
     try:
         # Get answer
@@ -471,7 +1203,7 @@ async def search_and_answer(query: str, rag_system: RAGSystem):
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description="RAG System")
-    parser.add_argument("action", choices=["build", "search"], help="Action to perform")
+    parser.add_argument("action", choices=["build", "search", "benchmark", "benchmark-search"], help="Action to perform")
     parser.add_argument("query", nargs="?", help="Search query (for search action)")
     parser.add_argument("--docs-dir", default="docs", help="Documentation directory (for build action)")
     parser.add_argument("--db-host", default="localhost", help="Database host")
@@ -479,26 +1211,48 @@ def main():
     parser.add_argument("--db-name", default="wrenchai", help="Database name")
     parser.add_argument("--db-user", default="postgres", help="Database user")
     parser.add_argument("--db-password", default="postgres", help="Database password")
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per embedding request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding requests in flight")
+    parser.add_argument("--stub-embeddings", action="store_true",
+                        help="Use the deterministic local embedder instead of OpenAI")
+    parser.add_argument("--stub-latency", type=float, default=0.05,
+                        help="Simulated seconds per stub embedding request")
+    parser.add_argument("--probes", type=int, default=10, help="ivfflat lists scanned per query")
+    parser.add_argument("--nlist", type=int, default=0,
+                        help="IVF clusters for the local index benchmark (default: sqrt of sections)")
+    parser.add_argument("--with-postgres", action="store_true",
+                        help="Include Postgres in the search benchmark")
     
     args = parser.parse_args()
     
+    if args.action == "benchmark":
+        asyncio.run(benchmark_ingestion(args.docs_dir, args.batch_size, args.concurrency, args.stub_latency))
+        return
+    
     # Create RAG system
     rag_system = RAGSystem(
         db_host=args.db_host,
         db_port=args.db_port,
         db_name=args.db_name,
         db_user=args.db_user,
-        db_password=args.db_password
+        db_password=args.db_password,
+        embedder=StubEmbedder(latency=args.stub_latency) if args.stub_embeddings else None,
+        probes=args.probes
     )
     
+    if args.action == "benchmark-search":
+        asyncio.run(benchmark_search(args.docs_dir, rag_system if args.with_postgres else None,
+                                     nlist=args.nlist))
+        return
+    
     if args.action == "build":
-        asyncio.run(build_database(args.docs_dir, rag_system))
+        asyncio.run(build_database(args.docs_dir, rag_system, args.batch_size, args.concurrency))
     elif args.action == "search":
         if not args.query:
             print("Error: Search query is required for search action")
             parser.print_help()
             sys.exit(1)
-        asyncio.run(search_and_answer(args.query, rag_system))
+        asyncio.run(search_and_answer(args.query, rag_system, args.docs_dir))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
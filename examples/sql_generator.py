@@ -5,7 +5,11 @@ import os
 import sys
 import logging
 import asyncio
-from typing import Optional, List, Dict, Any, Union
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Union, Set, Tuple
 from pydantic import BaseModel
 
 # Try to import SQL generator dependencies
@@ -51,6 +55,243 @@ class SQLDeps(PydanticAIDeps):
     """Dependencies for SQL generator"""
     conn: Optional[Any] = None  # PostgreSQL connection
 
+# Schema catalog queries
+COLUMNS_QUERY = """
+SELECT table_name, column_name, data_type
+FROM information_schema.columns
+WHERE table_schema = 'public'
+ORDER BY table_name, ordinal_position;
+"""
+
+FOREIGN_KEYS_QUERY = """
+SELECT cl.relname, att.attname, rcl.relname, ratt.attname
+FROM pg_constraint con
+JOIN pg_class cl ON cl.oid = con.conrelid
+JOIN pg_namespace n ON n.oid = cl.relnamespace
+JOIN pg_class rcl ON rcl.oid = con.confrelid
+CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, fattnum)
+JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = k.attnum
+JOIN pg_attribute ratt ON ratt.attrelid = con.confrelid AND ratt.attnum = k.fattnum
+WHERE con.contype = 'f' AND n.nspname = 'public';
+"""
+
+# One-row digest of the public schema's columns and constraints; it changes
+# on any DDL that affects what the prompt would contain
+SCHEMA_FINGERPRINT_QUERY = """
+SELECT md5(
+    coalesce((SELECT string_agg(c.relname || '.' || a.attname || ':' || a.atttypid::text, ','
+                                ORDER BY c.relname, a.attnum)
+              FROM pg_attribute a
+              JOIN pg_class c ON c.oid = a.attrelid
+              JOIN pg_namespace n ON n.oid = c.relnamespace
+              WHERE n.nspname = 'public' AND c.relkind IN ('r', 'v', 'm', 'p')
+                AND a.attnum > 0 AND NOT a.attisdropped), '')
+    || '|' ||
+    coalesce((SELECT string_agg(con.oid::text, ',' ORDER BY con.oid)
+              FROM pg_constraint con
+              JOIN pg_namespace n ON n.oid = con.connamespace
+              WHERE n.nspname = 'public' AND con.contype = 'f'), '')
+);
+"""
+
+# Question words that never identify a table
+QUESTION_STOPWORDS = {
+    "a", "all", "an", "and", "by", "each", "find", "for", "from", "get", "give", "how",
+    "in", "list", "many", "me", "of", "on", "or", "per", "show", "that", "the", "to",
+    "what", "where", "which", "who", "with",
+}
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt token estimate (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+def identifier_tokens(text: str) -> List[str]:
+    """Split text or snake/camel-case identifiers into lower-case word tokens"""
+    words = re.findall(r"[A-Za-z][a-z]*|[0-9]+", re.sub(r"([a-z])([A-Z])", r"\1 \2", text))
+    tokens = []
+    for word in words:
+        word = word.lower()
+        if len(word) > 3 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+@dataclass
+class TableInfo:
+    """Columns and foreign keys of one table"""
+    name: str
+    columns: List[Tuple[str, str]] = field(default_factory=list)
+    foreign_keys: List[Tuple[str, str, str]] = field(default_factory=list)
+    
+    def render(self) -> str:
+        """Render the table as a CREATE TABLE-style prompt fragment"""
+        lines = [f"{column} {data_type}" for column, data_type in self.columns]
+        lines.extend(
+            f"FOREIGN KEY ({column}) REFERENCES {ref_table}({ref_column})"
+            for column, ref_table, ref_column in self.foreign_keys
+        )
+        return f"\nTABLE {self.name} (\n  " + ",\n  ".join(lines) + "\n);"
+
+class SchemaCatalog:
+    """Cached schema catalog with relevance-ranked prompt context
+    
+    The catalog is loaded once and reused across requests. After ``ttl``
+    seconds a one-row fingerprint query checks for DDL changes; the full
+    catalog is only reloaded when the fingerprint differs.
+    """
+    
+    def __init__(self, ttl: float = 300.0, top_k: int = 5, max_neighbors: int = 5):
+        """Initialize the catalog
+        
+        Args:
+            ttl: Seconds before the schema fingerprint is re-checked
+            top_k: Most relevant tables included in the prompt
+            max_neighbors: Extra FK-neighbour tables included for joins
+        """
+        self.ttl = ttl
+        self.top_k = top_k
+        self.max_neighbors = max_neighbors
+        self.tables: Dict[str, TableInfo] = {}
+        self.fingerprint: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.loads = 0
+        self.full_schema_tokens = 0
+        self._neighbors: Dict[str, Set[str]] = {}
+        self._index: Dict[str, Dict[str, float]] = {}
+        self._idf: Dict[str, float] = {}
+    
+    def invalidate(self):
+        """Force a reload on next use"""
+        self.loaded_at = None
+        self.fingerprint = None
+    
+    async def refresh(self, conn) -> bool:
+        """Load the catalog if it is missing, or reload it if the schema changed
+        
+        Args:
+            conn: psycopg AsyncConnection
+            
+        Returns:
+            True if the catalog was (re)loaded
+        """
+        now = time.monotonic()
+        if self.loaded_at is not None and now - self.loaded_at < self.ttl:
+            return False
+        
+        async with conn.cursor() as cur:
+            await cur.execute(SCHEMA_FINGERPRINT_QUERY)
+            fingerprint = (await cur.fetchone())[0]
+            if self.loaded_at is not None and fingerprint == self.fingerprint:
+                self.loaded_at = now
+                return False
+            
+            await cur.execute(COLUMNS_QUERY)
+            columns = await cur.fetchall()
+            await cur.execute(FOREIGN_KEYS_QUERY)
+            foreign_keys = await cur.fetchall()
+        
+        self.load(columns, foreign_keys)
+        self.fingerprint = fingerprint
+        self.loaded_at = now
+        return True
+    
+    def load(self, columns: List[Tuple[str, str, str]], foreign_keys: List[Tuple[str, str, str, str]]):
+        """Build the catalog and its relevance index from catalog rows
+        
+        Args:
+            columns: (table, column, data_type) rows
+            foreign_keys: (table, column, referenced_table, referenced_column) rows
+        """
+        tables: Dict[str, TableInfo] = {}
+        for table_name, column_name, data_type in columns:
+            tables.setdefault(table_name, TableInfo(table_name)).columns.append((column_name, data_type))
+        
+        neighbors: Dict[str, Set[str]] = {name: set() for name in tables}
+        for table_name, column_name, ref_table, ref_column in foreign_keys:
+            if table_name in tables:
+                tables[table_name].foreign_keys.append((column_name, ref_table, ref_column))
+            if table_name in tables and ref_table in tables and ref_table != table_name:
+                neighbors[table_name].add(ref_table)
+                neighbors[ref_table].add(table_name)
+        
+        # Inverted index: token -> {table: weight}; table-name hits count triple
+        index: Dict[str, Dict[str, float]] = {}
+        for table in tables.values():
+            for token in identifier_tokens(table.name):
+                index.setdefault(token, {})[table.name] = 3.0
+            for column_name, _ in table.columns:
+                for token in identifier_tokens(column_name):
+                    postings = index.setdefault(token, {})
+                    postings[table.name] = max(postings.get(table.name, 0.0), 1.0)
+        
+        count = max(len(tables), 1)
+        self._idf = {token: math.log(1 + count / len(postings)) for token, postings in index.items()}
+        self._index = index
+        self._neighbors = neighbors
+        self.tables = tables
+        self.loads += 1
+        self.full_schema_tokens = estimate_tokens(self.render(list(tables)))
+    
+    def rank(self, question: str) -> List[Tuple[str, float]]:
+        """Score tables against a question
+        
+        Args:
+            question: Natural language question
+            
+        Returns:
+            (table, score) pairs with a positive score, best first
+        """
+        scores: Dict[str, float] = {}
+        for token in set(identifier_tokens(question)) - QUESTION_STOPWORDS:
+            if token.isdigit():
+                continue
+            for table_name, weight in self._index.get(token, {}).items():
+                scores[table_name] = scores.get(table_name, 0.0) + weight * self._idf[token]
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    
+    def select_tables(self, question: str, top_k: Optional[int] = None) -> List[str]:
+        """Pick the top-k relevant tables plus their FK neighbours
+        
+        Falls back to every table when nothing in the question matches.
+        
+        Args:
+            question: Natural language question
+            top_k: Override for the number of ranked tables
+            
+        Returns:
+            Table names to include in the prompt
+        """
+        ranked = self.rank(question)
+        if not ranked:
+            return list(self.tables)
+        
+        scores = dict(ranked)
+        selected = [name for name, _ in ranked[:top_k or self.top_k]]
+        neighbors = {n for name in selected for n in self._neighbors.get(name, ())} - set(selected)
+        neighbors = sorted(neighbors, key=lambda n: (-scores.get(n, 0.0), n))[:self.max_neighbors]
+        return selected + neighbors
+    
+    def render(self, table_names: List[str]) -> str:
+        """Render the given tables as schema text for the prompt"""
+        return "Database Schema:\n" + "".join(self.tables[name].render() for name in table_names)
+
+@dataclass
+class SchemaContextStats:
+    """Prompt-size accounting for the schema context"""
+    requests: int = 0
+    tables_total: int = 0
+    tables_included: int = 0
+    full_tokens: int = 0
+    prompt_tokens: int = 0
+    total_tokens_saved: int = 0
+    
+    @property
+    def tokens_saved(self) -> int:
+        """Tokens saved on the most recent request"""
+        return self.full_tokens - self.prompt_tokens
+
 class SQLGenerator:
     """SQL generator using Pydantic AI"""
     
@@ -60,7 +301,9 @@ class SQLGenerator:
                 db_name: str = "logs",
                 db_user: str = "postgres",
                 db_password: str = "postgres",
-                model: str = "openai:gpt-4-1106-preview"):
+                model: str = "openai:gpt-4-1106-preview",
+                schema_ttl: float = 300.0,
+                top_k_tables: int = 5):
         """Initialize the SQL generator
         
         Args:
@@ -70,6 +313,8 @@ class SQLGenerator:
             db_user: Database user
             db_password: Database password
             model: AI model to use
+            schema_ttl: Seconds between schema change checks
+            top_k_tables: Most relevant tables included in the prompt
         """
         self.db_config = {
             "host": db_host,
@@ -81,6 +326,8 @@ class SQLGenerator:
         
         self.model = model
         self.conn = None
+        self.catalog = SchemaCatalog(ttl=schema_ttl, top_k=top_k_tables)
+        self.schema_stats = SchemaContextStats()
         self._check_requirements()
     
     def _check_requirements(self):
@@ -120,9 +367,15 @@ class SQLGenerator:
             self.conn = None
             logging.info("Disconnected from PostgreSQL database")
     
-    async def get_schema_info(self) -> str:
+    async def get_schema_info(self, question: Optional[str] = None) -> str:
         """Get schema information from the database
         
+        The catalog is cached between calls. With a question, only the most
+        relevant tables and their join neighbours are included.
+        
+        Args:
+            question: Natural language question used to prune the schema
+            
         Returns:
             Schema information as a string
         """
@@ -131,28 +384,26 @@ class SQLGenerator:
             return ""
             
         try:
-            schema_query = """
-            SELECT table_name, column_name, data_type
-            FROM information_schema.columns
-            WHERE table_schema = 'public'
-            ORDER BY table_name, ordinal_position;
-            """
+            if await self.catalog.refresh(self.conn):
+                logging.info(f"Loaded schema catalog: {len(self.catalog.tables)} tables")
             
-            async with self.conn.cursor() as cur:
-                await cur.execute(schema_query)
-                rows = await cur.fetchall()
-                
-            tables = {}
-            for table_name, column_name, data_type in rows:
-                if table_name not in tables:
-                    tables[table_name] = []
-                tables[table_name].append(f"{column_name} {data_type}")
+            if question is None:
+                table_names = list(self.catalog.tables)
+            else:
+                table_names = self.catalog.select_tables(question)
+            schema_text = self.catalog.render(table_names)
             
-            schema_text = "Database Schema:\n"
-            for table, columns in tables.items():
-                schema_text += f"\nTABLE {table} (\n  "
-                schema_text += ",\n  ".join(columns)
-                schema_text += "\n);"
+            stats = self.schema_stats
+            stats.requests += 1
+            stats.tables_total = len(self.catalog.tables)
+            stats.tables_included = len(table_names)
+            stats.full_tokens = self.catalog.full_schema_tokens
+            stats.prompt_tokens = estimate_tokens(schema_text)
+            stats.total_tokens_saved += stats.tokens_saved
+            logging.info(
+                f"Schema context: {stats.tables_included}/{stats.tables_total} tables, "
+                f"~{stats.prompt_tokens} prompt tokens (saved ~{stats.tokens_saved})"
+            )
                 
             return schema_text
         except Exception as e:
@@ -210,7 +461,7 @@ class SQLGenerator:
             await self.connect()
             
         # Get schema information
-        schema_info = await self.get_schema_info()
+        schema_info = await self.get_schema_info(query)
         
         # Create agent
         agent = Agent[SQLDeps, Union[SQLResponse, SQLError]](
@@ -281,6 +532,11 @@ async def run_example(query: str, db_config: Optional[Dict[str, Any]] = None):
         print(f"Generating SQL for query: {query}")
         result = await generator.generate_sql(query)
         
+        stats = generator.schema_stats
+        if stats.requests:
+            print(f"Schema context: {stats.tables_included}/{stats.tables_total} tables, "
+                  f"~{stats.prompt_tokens} prompt tokens, ~{stats.tokens_saved} tokens saved")
+        
         # Display result
         if HAS_RICH and isinstance(result, SQLResponse):
             console.print("\n[bold green]Generated SQL:[/bold green]")
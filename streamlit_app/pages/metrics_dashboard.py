@@ -14,6 +14,9 @@ import logging
 # Import mock metrics data provider
 from streamlit_app.components.mock_metrics import MockRedisClient
 from streamlit_app.components.midnight_theme import apply_midnight_theme
+from streamlit_app.services.http_cache import get_client_metrics
+from core.tools.system_logger import SystemSampler
+from core.tools.timeseries_store import timeseries_store
 
 # Apply the midnight theme
 apply_midnight_theme()
@@ -23,6 +26,29 @@ logger = logging.getLogger(__name__)
 # Create a mock Redis client for metrics
 redis_client = MockRedisClient()
 
+# Seconds covered by each time range option
+TIME_RANGES = {
+    "Last Hour": 3600,
+    "Last Day": 86400,
+    "Last Week": 7 * 86400,
+}
+
+@st.cache_resource
+def get_system_sampler() -> SystemSampler:
+    """Start one process-wide resource sampler feeding the time-series store."""
+    sampler = SystemSampler(interval=1.0)
+    sampler.start()
+    return sampler
+
+def load_metric_history(name: str, seconds: int, max_points: int = 300) -> pd.DataFrame:
+    """Load a decimated metric series for the selected time window."""
+    series = timeseries_store.fetch(name, time.time() - seconds, max_points=max_points)
+    if not series["ts"]:
+        return pd.DataFrame(columns=["timestamp", "avg", "min", "max"])
+    df = pd.DataFrame(series)
+    df["timestamp"] = pd.to_datetime(df.pop("ts"), unit="s")
+    return df
+
 def load_system_metrics() -> Dict[str, Any]:
     """Load system metrics from Redis."""
     try:
@@ -207,6 +233,64 @@ def create_error_rate_chart(metrics: Dict[str, Any]) -> go.Figure:
     
     return fig
 
+def create_resource_history_chart(histories: Dict[str, pd.DataFrame]) -> go.Figure:
+    """Create resource usage history chart."""
+    fig = go.Figure()
+    colors = {"CPU": "#00CCFF", "Memory": "#7B42F6", "Disk": "#00FF9D"}
+    
+    for label, df in histories.items():
+        if df.empty:
+            continue
+        fig.add_trace(go.Scatter(
+            x=df["timestamp"],
+            y=df["avg"],
+            name=label,
+            mode="lines",
+            line={"color": colors.get(label, "#FFD600"), "width": 2}
+        ))
+    
+    fig.update_layout(
+        title={"text": "Resource Usage (%)", "font": {"color": "#F0F0F0"}},
+        yaxis={"range": [0, 100], "gridcolor": "#2A2A2A"},
+        height=300,
+        paper_bgcolor="#121212",
+        plot_bgcolor="#121212",
+        font={"color": "#F0F0F0"},
+        xaxis={"gridcolor": "#2A2A2A"}
+    )
+    
+    return fig
+
+def create_client_latency_chart(metrics: Dict[str, Any]) -> go.Figure:
+    """Create API client latency histogram chart."""
+    fig = go.Figure()
+    
+    bounds = metrics.get("bucket_bounds_ms", [])
+    labels = [f"≤{b}" for b in bounds] + [f">{bounds[-1]}" if bounds else "all"]
+    colors = ["#00CCFF", "#7B42F6", "#00FF9D", "#FFD600", "#FF453A"]
+    
+    for i, (endpoint, stats) in enumerate(metrics.get("endpoints", {}).items()):
+        fig.add_trace(go.Bar(
+            x=labels,
+            y=stats["buckets"],
+            name=endpoint,
+            marker_color=colors[i % len(colors)]
+        ))
+    
+    fig.update_layout(
+        title={"text": "Client Latency Histogram (ms)", "font": {"color": "#F0F0F0"}},
+        yaxis_title={"text": "Requests", "font": {"color": "#F0F0F0"}},
+        barmode="stack",
+        height=300,
+        paper_bgcolor="#121212",
+        plot_bgcolor="#121212",
+        font={"color": "#F0F0F0"},
+        xaxis={"gridcolor": "#2A2A2A"},
+        yaxis={"gridcolor": "#2A2A2A"}
+    )
+    
+    return fig
+
 def main():
     """Main dashboard function."""
     st.title("📊 System Metrics Dashboard")
@@ -255,6 +339,22 @@ def main():
         create_system_metrics_chart(metrics),
         use_container_width=True
     )
+    
+    # Resource history from the in-memory time-series store
+    get_system_sampler()
+    window = TIME_RANGES[time_range]
+    histories = {
+        "CPU": load_metric_history("system.cpu_percent", window),
+        "Memory": load_metric_history("system.memory_percent", window),
+        "Disk": load_metric_history("system.disk_percent", window),
+    }
+    if any(not df.empty for df in histories.values()):
+        st.plotly_chart(
+            create_resource_history_chart(histories),
+            use_container_width=True
+        )
+    else:
+        st.caption("Collecting resource history...")
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Agent metrics
@@ -392,6 +492,40 @@ def main():
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # API client cache and latency metrics (process-wide)
+    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+    st.subheader("🔌 API Client")
+    client_metrics = get_client_metrics()
+    
+    col9, col10, col11, col12 = st.columns(4)
+    col9.metric("Cache Hit Rate", f"{client_metrics['hit_rate']:.1%}")
+    col10.metric("Requests Sent", f"{client_metrics['requests']:,}")
+    col11.metric("Coalesced", f"{client_metrics['coalesced']:,}")
+    col12.metric("Revalidated (304)", f"{client_metrics['revalidated']:,}")
+    
+    if client_metrics["endpoints"]:
+        st.plotly_chart(
+            create_client_latency_chart(client_metrics),
+            use_container_width=True
+        )
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "endpoint": endpoint,
+                    "requests": stats["count"],
+                    "avg_ms": round(stats["avg_ms"], 1),
+                    "p50_ms": stats["p50_ms"],
+                    "p95_ms": stats["p95_ms"],
+                    "max_ms": round(stats["max_ms"], 1),
+                }
+                for endpoint, stats in client_metrics["endpoints"].items()
+            ]),
+            use_container_width=True
+        )
+    else:
+        st.caption("No API requests recorded yet.")
+    st.markdown('</div>', unsafe_allow_html=True)
+    
     # Auto-refresh logic
     if auto_refresh:
         time.sleep(refresh_interval)
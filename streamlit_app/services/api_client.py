@@ -18,6 +18,10 @@ import streamlit as st
 from streamlit_app.utils.session_state import StateKey, get_state, set_state
 from streamlit_app.utils.config_manager import get_config
 from streamlit_app.utils.user_preferences import get_api_credentials, get_api_state, update_api_state
+from streamlit_app.services.http_cache import (
+    ResponseCache, ClientMetrics, SharedTransport,
+    response_cache, client_metrics, get_shared_transport,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -51,7 +55,12 @@ class ApiError(Exception):
 
 
 class ApiClient:
-    """Base client for communicating with the WrenchAI API."""
+    """Base client for communicating with the WrenchAI API.
+
+    By default all instances send requests through one process-wide pooled
+    transport and share a GET response cache, so per-session clients are cheap
+    and connections are reused across Streamlit reruns.
+    """
     
     def __init__(
         self,
@@ -62,6 +71,9 @@ class ApiClient:
         retry_backoff: float = DEFAULT_RETRY_BACKOFF,
         verify_ssl: bool = True,
         auth_token: Optional[str] = None,
+        shared_pool: bool = True,
+        cache: Optional[ResponseCache] = None,
+        metrics: Optional[ClientMetrics] = None,
     ):
         """Initialize the API client.
         
@@ -73,6 +85,9 @@ class ApiClient:
             retry_backoff: Backoff multiplier for subsequent retries
             verify_ssl: Whether to verify SSL certificates
             auth_token: Authentication token (defaults to stored credentials)
+            shared_pool: Whether to use the process-wide pooled transport
+            cache: GET response cache (defaults to the shared cache)
+            metrics: Metrics collector (defaults to the shared collector)
         """
         # Get configuration
         config = get_config()
@@ -97,19 +112,31 @@ class ApiClient:
             self.auth_token = auth_token
         
         # Set up HTTP client
-        self.client = httpx.AsyncClient(
-            base_url=self.base_url,
-            timeout=self.timeout,
-            verify=self.verify_ssl,
-        )
+        self.shared_pool = shared_pool
+        if shared_pool:
+            self.transport: Optional[SharedTransport] = get_shared_transport(self.verify_ssl)
+            self.client = None
+        else:
+            self.transport = None
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                verify=self.verify_ssl,
+            )
+        self.cache = cache if cache is not None else response_cache
+        self.metrics = metrics if metrics is not None else client_metrics
         
         # Set up additional state
         self.last_request_time = None
         self.last_response_time = None
     
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Close the HTTP client.
+
+        The shared transport is left open because other sessions use it.
+        """
+        if self.client is not None:
+            await self.client.aclose()
     
     async def __aenter__(self):
         """Enter async context manager."""
@@ -144,6 +171,12 @@ class ApiClient:
             endpoint = endpoint[1:]
         return urljoin(self.base_url, endpoint)
     
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a single request through the shared pool or the own client."""
+        if self.transport is not None:
+            return await self.transport.request(method, url, **kwargs)
+        return await self.client.request(method=method, url=url, **kwargs)
+    
     async def _make_request(
         self,
         method: str,
@@ -189,9 +222,10 @@ class ApiClient:
         while attempts <= self.max_retries:
             try:
                 logger.debug(f"Making request: {method} {url}")
-                response = await self.client.request(
-                    method=method,
-                    url=url,
+                attempt_start = time.time()
+                response = await self._send(
+                    method,
+                    url,
                     params=params,
                     data=data,
                     json=json_data,
@@ -203,6 +237,11 @@ class ApiClient:
                 end_time = time.time()
                 response_time_ms = (end_time - start_time) * 1000
                 self.last_response_time = datetime.now()
+                self.metrics.record_request(
+                    endpoint,
+                    (end_time - attempt_start) * 1000,
+                    is_error=response.status_code >= 400,
+                )
                 
                 # Update API state with timing information
                 api_state.record_request(response_time_ms, is_error=False)
@@ -227,6 +266,8 @@ class ApiClient:
                         status_code=response.status_code
                     )
                     update_api_state(api_state)
+                    if method != "GET":
+                        self._invalidate_for(endpoint)
                     return response
                 
                 # Handle rate limiting (status code 429)
@@ -267,6 +308,7 @@ class ApiClient:
                 
             except (httpx.TimeoutException, httpx.ConnectError) as e:
                 last_exception = e
+                self.metrics.record_request(endpoint, (time.time() - attempt_start) * 1000, is_error=True)
                 error_msg = f"Request failed: {str(e)}"
                 logger.warning(f"{error_msg}. Attempt {attempts + 1}/{self.max_retries + 1}")
                 
@@ -292,31 +334,96 @@ class ApiClient:
         logger.error(error_msg)
         raise ApiError(message=error_msg)
     
+    def _invalidate_for(self, endpoint: str) -> None:
+        """Drop cached GET responses of the resource a write request touched.
+        
+        Args:
+            endpoint: Endpoint of the successful write request
+        """
+        resource = endpoint.split("?")[0].strip("/").split("/")[0]
+        if resource:
+            self.cache.invalidate(resource)
+    
     async def get(
         self,
         endpoint: str,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
         timeout: Optional[float] = None,
+        use_cache: bool = True,
     ) -> httpx.Response:
         """Send a GET request.
         
+        Fresh cached responses are returned without contacting the API, stale
+        ones are revalidated with their ETag, and identical concurrent requests
+        share a single round trip.
+        
         Args:
             endpoint: API endpoint path
             params: Query parameters
             headers: Additional headers
             timeout: Request timeout (overrides default)
+            use_cache: Whether to use the response cache and coalescing
             
         Returns:
             Response object
         """
-        return await self._make_request(
-            method="GET",
-            endpoint=endpoint,
-            params=params,
-            headers=headers,
-            timeout=timeout,
+        if not use_cache:
+            return await self._make_request(
+                method="GET",
+                endpoint=endpoint,
+                params=params,
+                headers=headers,
+                timeout=timeout,
+            )
+        
+        policy = self.cache.policy_for(endpoint)
+        key = self.cache.make_key(
+            self._build_url(endpoint),
+            params,
+            {**self._get_auth_headers(), **(headers or {})},
+            policy,
         )
+        
+        entry = self.cache.get(key)
+        if entry is not None and entry.fresh:
+            self.metrics.record_hit()
+            return entry.response
+        
+        future, is_leader = self.cache.join_inflight(key)
+        if not is_leader:
+            self.metrics.record_coalesced()
+            return await asyncio.wrap_future(future)
+        
+        self.metrics.record_miss()
+        try:
+            request_headers = dict(headers or {})
+            if entry is not None and policy.revalidate:
+                if entry.etag:
+                    request_headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    request_headers["If-Modified-Since"] = entry.last_modified
+            
+            response = await self._make_request(
+                method="GET",
+                endpoint=endpoint,
+                params=params,
+                headers=request_headers,
+                timeout=timeout,
+            )
+            
+            if response.status_code == 304 and entry is not None:
+                self.metrics.record_revalidated()
+                refreshed = self.cache.refresh(key, policy)
+                response = refreshed.response if refreshed is not None else entry.response
+            else:
+                self.cache.store(key, endpoint, response, policy)
+        except BaseException as e:
+            self.cache.finish_inflight(key, future, error=e)
+            raise
+        
+        self.cache.finish_inflight(key, future, response=response)
+        return response
     
     async def post(
         self,
@@ -20,6 +20,9 @@ logger = logging.getLogger(__name__)
 def create_api_client(use_session: bool = True) -> ApiClient:
     """Create an API client with the appropriate configuration.
     
+    Clients only hold per-session settings such as credentials; connections,
+    the GET response cache and metrics are shared process-wide.
+    
     Args:
         use_session: Whether to store the client in the session state
         
@@ -0,0 +1,499 @@
+"""Shared HTTP transport, response cache and client metrics.
+
+Streamlit reruns every page script on each interaction and pages drive the API
+client with ``asyncio.run``, so a per-session ``httpx.AsyncClient`` never keeps a
+connection alive for more than one rerun. This module provides process-wide
+pieces the API client builds on:
+
+- SharedTransport: One pooled (HTTP/2 when available) httpx client running on a
+  background event loop, usable from any thread or event loop
+- ResponseCache: TTL and ETag-aware GET response cache with per-endpoint
+  policies and in-flight request coalescing
+- ClientMetrics: Cache hit rate, coalescing counters and per-endpoint latency
+  histograms for the metrics dashboard
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Connection pool limits for the shared transport
+DEFAULT_POOL_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=30.0,
+)
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Path segments that look like resource IDs are folded into one label
+_ID_SEGMENT = re.compile(r"^([0-9]+|[0-9a-fA-F-]{16,}|[A-Za-z0-9_-]*[0-9][A-Za-z0-9_-]{7,})$")
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Caching policy for GET requests to an endpoint."""
+    ttl: float = 0.0            # Seconds a response is served without contacting the API
+    revalidate: bool = True     # Revalidate stale entries with If-None-Match / If-Modified-Since
+    shared: bool = False        # Share entries across credentials (public endpoints only)
+
+
+# Default policies, matched on the longest endpoint prefix
+DEFAULT_CACHE_POLICIES: Dict[str, CachePolicy] = {
+    "health": CachePolicy(ttl=5.0, shared=True),
+    "version": CachePolicy(ttl=300.0, shared=True),
+    "features": CachePolicy(ttl=300.0, shared=True),
+    "playbooks": CachePolicy(ttl=30.0),
+    "agents": CachePolicy(ttl=10.0),
+    "executions": CachePolicy(ttl=0.0),
+}
+
+DEFAULT_POLICY = CachePolicy()
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Normalize an endpoint path into a low-cardinality metrics label.
+
+    Args:
+        endpoint: API endpoint path
+
+    Returns:
+        The path with ID-like segments replaced by ``:id``
+    """
+    segments = [s for s in endpoint.split("?")[0].strip("/").split("/") if s]
+    return "/".join(":id" if _ID_SEGMENT.match(s) else s for s in segments) or "/"
+
+
+class ClientMetrics:
+    """Thread-safe counters and latency histograms for API client traffic."""
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all counters and histograms."""
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.revalidated = 0
+            self.coalesced = 0
+            self.invalidations = 0
+            self._latency: Dict[str, Dict[str, Any]] = {}
+
+    def record_request(self, endpoint: str, duration_ms: float, is_error: bool = False) -> None:
+        """Record one request that reached the API."""
+        label = endpoint_label(endpoint)
+        with self._lock:
+            self.requests += 1
+            if is_error:
+                self.errors += 1
+            stats = self._latency.get(label)
+            if stats is None:
+                stats = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                         "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+                self._latency[label] = stats
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if duration_ms <= bound:
+                    stats["buckets"][i] += 1
+                    break
+            else:
+                stats["buckets"][-1] += 1
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.cache_misses += 1
+
+    def record_revalidated(self) -> None:
+        with self._lock:
+            self.revalidated += 1
+
+    def record_coalesced(self) -> None:
+        with self._lock:
+            self.coalesced += 1
+
+    def record_invalidation(self, count: int) -> None:
+        with self._lock:
+            self.invalidations += count
+
+    @staticmethod
+    def _percentile(buckets, count: int, q: float) -> float:
+        """Estimate a percentile as the upper bound of the bucket containing it."""
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= rank:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a point-in-time copy of all metrics.
+
+        Returns:
+            Dictionary with counters, hit rate and per-endpoint latency stats
+        """
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            endpoints = {}
+            for label, stats in self._latency.items():
+                count = stats["count"]
+                endpoints[label] = {
+                    "count": count,
+                    "avg_ms": stats["total_ms"] / count if count else 0.0,
+                    "max_ms": stats["max_ms"],
+                    "p50_ms": self._percentile(stats["buckets"], count, 0.5),
+                    "p95_ms": self._percentile(stats["buckets"], count, 0.95),
+                    "buckets": list(stats["buckets"]),
+                }
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+                "revalidated": self.revalidated,
+                "coalesced": self.coalesced,
+                "invalidations": self.invalidations,
+                "bucket_bounds_ms": list(LATENCY_BUCKETS_MS),
+                "endpoints": endpoints,
+            }
+
+
+@dataclass
+class CacheEntry:
+    """A cached GET response."""
+    response: httpx.Response
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    path: str = ""
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+def _parse_max_age(cache_control: str) -> Optional[float]:
+    """Extract max-age (seconds) from a Cache-Control header."""
+    match = re.search(r"max-age=(\d+)", cache_control)
+    return float(match.group(1)) if match else None
+
+
+class ResponseCache:
+    """Process-wide GET response cache with in-flight request coalescing.
+
+    Entries are kept in LRU order and bounded by ``max_entries``. Lookups and
+    in-flight futures are guarded by a threading lock because Streamlit runs
+    each session in its own thread with its own event loop; followers wait on a
+    ``concurrent.futures.Future`` so coalescing works across those loops.
+    """
+
+    def __init__(self,
+                 policies: Optional[Mapping[str, CachePolicy]] = None,
+                 max_entries: int = 512,
+                 metrics: Optional[ClientMetrics] = None):
+        """Initialize the cache.
+
+        Args:
+            policies: Per-endpoint policies keyed by path prefix
+            max_entries: Maximum number of cached responses
+            metrics: Metrics collector (defaults to the shared one)
+        """
+        self.policies: Dict[str, CachePolicy] = dict(
+            DEFAULT_CACHE_POLICIES if policies is None else policies
+        )
+        self.max_entries = max_entries
+        self.metrics = metrics if metrics is not None else client_metrics
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def set_policy(self, prefix: str, policy: CachePolicy) -> None:
+        """Set the cache policy for an endpoint prefix."""
+        with self._lock:
+            self.policies[prefix.strip("/")] = policy
+
+    def policy_for(self, endpoint: str) -> CachePolicy:
+        """Get the policy for an endpoint using the longest matching prefix."""
+        path = endpoint.split("?")[0].strip("/")
+        best, best_len = DEFAULT_POLICY, -1
+        for prefix, policy in self.policies.items():
+            if (path == prefix or path.startswith(prefix + "/")) and len(prefix) > best_len:
+                best, best_len = policy, len(prefix)
+        return best
+
+    def make_key(self,
+                 url: str,
+                 params: Optional[Mapping[str, Any]] = None,
+                 headers: Optional[Mapping[str, str]] = None,
+                 policy: CachePolicy = DEFAULT_POLICY) -> str:
+        """Build a cache key for a GET request.
+
+        Credentials are folded into the key as a digest unless the policy is
+        shared, so one user's cached response is never served to another.
+        """
+        header_items = sorted(
+            (k.lower(), v) for k, v in (headers or {}).items()
+            if not (policy.shared and k.lower() == "authorization")
+        )
+        raw = json.dumps(
+            [url, sorted((params or {}).items()), header_items],
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Get an entry (fresh or stale) and mark it recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key: str, path: str, response: httpx.Response, policy: CachePolicy) -> None:
+        """Store a response if the policy and response headers allow it."""
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control or response.status_code != 200:
+            return
+        ttl = policy.ttl
+        max_age = _parse_max_age(cache_control)
+        if max_age is not None:
+            ttl = min(ttl, max_age) if ttl > 0 else 0.0
+        if "no-cache" in cache_control:
+            ttl = 0.0
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if ttl <= 0 and not (policy.revalidate and (etag or last_modified)):
+            return
+        entry = CacheEntry(
+            response=response,
+            expires_at=time.monotonic() + ttl,
+            etag=etag,
+            last_modified=last_modified,
+            path=path.split("?")[0].strip("/"),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key: str, policy: CachePolicy) -> Optional[CacheEntry]:
+        """Extend a stale entry after the API answered 304 Not Modified."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + policy.ttl
+            return entry
+
+    def invalidate(self, prefix: Optional[str] = None) -> int:
+        """Drop cached entries.
+
+        Args:
+            prefix: Endpoint path prefix to drop (all entries if None)
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            if prefix is None:
+                count = len(self._entries)
+                self._entries.clear()
+            else:
+                prefix = prefix.strip("/")
+                keys = [k for k, e in self._entries.items()
+                        if e.path == prefix or e.path.startswith(prefix + "/")]
+                for k in keys:
+                    del self._entries[k]
+                count = len(keys)
+        if count:
+            self.metrics.record_invalidation(count)
+        return count
+
+    def join_inflight(self, key: str) -> Tuple[concurrent.futures.Future, bool]:
+        """Join an identical in-flight request or become its leader.
+
+        Returns:
+            Tuple of (future, is_leader). The leader must resolve the future
+            with ``finish_inflight``; followers await it.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = concurrent.futures.Future()
+            self._inflight[key] = future
+            return future, True
+
+    def finish_inflight(self,
+                        key: str,
+                        future: concurrent.futures.Future,
+                        response: Optional[httpx.Response] = None,
+                        error: Optional[BaseException] = None) -> None:
+        """Resolve an in-flight future and stop coalescing on its key."""
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(response)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedTransport:
+    """A pooled httpx client that lives on its own background event loop.
+
+    Requests can be issued from any thread or event loop; they are scheduled on
+    the transport loop with ``run_coroutine_threadsafe``, so keep-alive and
+    HTTP/2 connections outlive individual ``asyncio.run`` calls.
+    """
+
+    def __init__(self,
+                 verify_ssl: bool = True,
+                 http2: bool = True,
+                 limits: httpx.Limits = DEFAULT_POOL_LIMITS,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """Initialize the transport (the loop is started lazily).
+
+        Args:
+            verify_ssl: Whether to verify SSL certificates
+            http2: Whether to negotiate HTTP/2 (requires the ``h2`` package)
+            limits: Connection pool limits
+            transport: Optional custom httpx transport (used by tests)
+        """
+        self.verify_ssl = verify_ssl
+        self.http2 = http2 and HTTP2_AVAILABLE and transport is None
+        self.limits = limits
+        self._transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        """Start the background loop and HTTP client if needed."""
+        if self._client is not None:
+            return
+        with self._lock:
+            if self._client is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="wrenchai-http", daemon=True
+            )
+            thread.start()
+            self._loop, self._thread = loop, thread
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                verify=self.verify_ssl,
+                transport=self._transport,
+            )
+            logger.debug(f"Started shared HTTP transport (http2={self.http2})")
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool.
+
+        Args:
+            method: HTTP method
+            url: Absolute request URL
+            **kwargs: Additional arguments for ``httpx.AsyncClient.request``
+
+        Returns:
+            The fully read response
+        """
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(
+            self._client.request(method, url, **kwargs), self._loop
+        )
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the background loop."""
+        with self._lock:
+            client, loop, thread = self._client, self._loop, self._thread
+            self._client = self._loop = self._thread = None
+        if client is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing shared HTTP transport: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+
+# Process-wide instances
+client_metrics = ClientMetrics()
+response_cache = ResponseCache(metrics=client_metrics)
+_transports: Dict[bool, SharedTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_shared_transport(verify_ssl: bool = True) -> SharedTransport:
+    """Get the process-wide transport for an SSL verification setting."""
+    with _transports_lock:
+        transport = _transports.get(verify_ssl)
+        if transport is None:
+            transport = SharedTransport(verify_ssl=verify_ssl)
+            _transports[verify_ssl] = transport
+        return transport
+
+
+def close_shared_transports() -> None:
+    """Close all process-wide transports."""
+    with _transports_lock:
+        transports = list(_transports.values())
+        _transports.clear()
+    for transport in transports:
+        transport.close()
+
+
+def get_client_metrics() -> Dict[str, Any]:
+    """Get a snapshot of the shared API client metrics."""
+    snapshot = client_metrics.snapshot()
+    snapshot["cache_entries"] = len(response_cache)
+    return snapshot
+
+
+atexit.register(close_shared_transports)
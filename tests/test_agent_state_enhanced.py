@@ -6,12 +6,14 @@ to ensure that it correctly handles state persistence, context passing, and work
 """
 
 import unittest
+import gc
 import sys
 import os
 import asyncio
 import tempfile
 import json
 import shutil
+import weakref
 from datetime import datetime
 from unittest.mock import patch, MagicMock, AsyncMock
 
@@ -24,7 +26,9 @@ from core.agents.agent_state_enhanced import (
     WorkflowState,
     ContextSnapshot,
     AgentStateEntry,
-    StateTransaction
+    StateTransaction,
+    StateQuotaExceededError,
+    _write_behind_managers
 )
 
 
@@ -445,6 +449,177 @@ class TestAsyncAgentStateManager(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(value1, "persist-value-1")
         self.assertEqual(value2, "persist-value-2")
 
+    
+    async def test_change_log_replay(self):
+        """Test that changes are appended to a log and replayed on load."""
+        await self.manager.set_state_entry(self.agent_id, "log-key", "value-1")
+        await self.manager.set_state_entry(self.agent_id, "log-key", "value-2")
+        await self.manager.delete_state_entry(self.agent_id, "log-key")
+        await self.manager.set_state_entry(self.agent_id, "log-key-2", "kept")
+        await self.manager.register_operation(self.agent_id, "logged-operation")
+        
+        log_path = os.path.join(self.temp_dir, f"{self.agent_id}.log")
+        self.assertTrue(os.path.exists(log_path))
+        
+        new_manager = AsyncAgentStateManager(self.temp_dir)
+        self.assertIsNone(await new_manager.get_state_entry(self.agent_id, "log-key"))
+        self.assertEqual(await new_manager.get_state_entry(self.agent_id, "log-key-2"), "kept")
+        history = await new_manager.get_operations_history(self.agent_id)
+        self.assertEqual([op["operation"] for op in history], ["logged-operation"])
+    
+    async def test_log_compaction(self):
+        """Test that the change log is folded into the snapshot."""
+        manager = AsyncAgentStateManager(self.temp_dir, compact_threshold=5)
+        for i in range(20):
+            await manager.set_state_entry(self.agent_id, f"key-{i}", i)
+        
+        log_path = os.path.join(self.temp_dir, f"{self.agent_id}.log")
+        if os.path.exists(log_path):
+            with open(log_path) as f:
+                self.assertLessEqual(len(f.readlines()), 10)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, f"{self.agent_id}.json")))
+        
+        new_manager = AsyncAgentStateManager(self.temp_dir)
+        entries = await new_manager.get_all_entries(self.agent_id, visibility="private")
+        self.assertEqual(entries, {f"key-{i}": i for i in range(20)})
+    
+    async def test_write_behind_coalesces_writes(self):
+        """Test that write-behind mode coalesces many sets into few records."""
+        manager = AsyncAgentStateManager(self.temp_dir, durability="write_behind", flush_interval=60)
+        for i in range(50):
+            await manager.set_state_entry(self.agent_id, "hot-key", i)
+        
+        log_path = os.path.join(self.temp_dir, f"{self.agent_id}.log")
+        self.assertFalse(os.path.exists(log_path))
+        
+        await manager.flush()
+        with open(log_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["op"] for r in records], ["set", "meta"])
+        
+        new_manager = AsyncAgentStateManager(self.temp_dir)
+        self.assertEqual(await new_manager.get_state_entry(self.agent_id, "hot-key"), 49)
+
+    async def test_failed_flush_keeps_changes_dirty(self):
+        """Test that changes whose append fails are retried by the next flush."""
+        manager = AsyncAgentStateManager(self.temp_dir, durability="write_behind", flush_interval=60)
+        await manager.set_state_entry(self.agent_id, "retry-key", "value")
+
+        with patch.object(manager, "_append_log", side_effect=OSError("disk full")):
+            await manager.flush()
+        self.assertIn("retry-key", manager._dirty[self.agent_id].keys)
+
+        await manager.flush()
+        self.assertNotIn(self.agent_id, manager._dirty)
+        new_manager = AsyncAgentStateManager(self.temp_dir)
+        self.assertEqual(await new_manager.get_state_entry(self.agent_id, "retry-key"), "value")
+
+    async def test_transaction_flushes_on_commit(self):
+        """Test that transactional changes are persisted together on commit."""
+        async with self.manager.transaction(self.agent_id) as transaction:
+            await transaction.set("tx-key-1", "tx-value-1")
+            await transaction.set("tx-key-2", "tx-value-2")
+            self.assertIn(self.agent_id, self.manager._dirty)
+        
+        self.assertNotIn(self.agent_id, self.manager._dirty)
+        new_manager = AsyncAgentStateManager(self.temp_dir)
+        self.assertEqual(await new_manager.get_state_entry(self.agent_id, "tx-key-2"), "tx-value-2")
+    
+    async def test_agents_do_not_share_locks(self):
+        """Test that a busy agent does not block other agents."""
+        lock = self.manager._get_agent_lock(self.agent_id)
+        async with lock:
+            await asyncio.wait_for(
+                self.manager.set_state_entry(self.agent_id2, "other-key", "other-value"),
+                timeout=1
+            )
+        self.assertEqual(await self.manager.get_state_entry(self.agent_id2, "other-key"), "other-value")
+
+    
+    async def test_expiry_sweeper(self):
+        """Test that the background sweeper removes expired entries."""
+        manager = AsyncAgentStateManager(self.temp_dir, sweep_interval=0.01)
+        await manager.set_state_entry(self.agent_id, "short-key", "short", ttl=0, tags=["tmp"])
+        await manager.set_state_entry(self.agent_id, "shared-short", "short", ttl=0, visibility="shared")
+        await manager.set_state_entry(self.agent_id, "long-key", "long", ttl=3600)
+        
+        await asyncio.sleep(0.1)
+        
+        state = await manager.get_agent_state(self.agent_id)
+        self.assertNotIn("short-key", state.entries)
+        self.assertNotIn("tmp", state.tags)
+        self.assertNotIn("shared-short", manager.shared_state)
+        self.assertIn("long-key", state.entries)
+        
+        # Expired entries are removed from disk as well
+        new_manager = AsyncAgentStateManager(self.temp_dir)
+        new_state = await new_manager.get_agent_state(self.agent_id)
+        self.assertNotIn("short-key", new_state.entries)
+        await manager.close()
+    
+    async def test_replaced_entry_not_swept(self):
+        """Test that replacing an entry with a later expiry keeps it."""
+        await self.manager.set_state_entry(self.agent_id, "key", "old", ttl=0)
+        await self.manager.set_state_entry(self.agent_id, "key", "new", ttl=3600)
+        
+        self.assertEqual(await self.manager.sweep_expired(), 0)
+        self.assertEqual(await self.manager.get_state_entry(self.agent_id, "key"), "new")
+    
+    async def test_tag_index(self):
+        """Test that tag lookups use the index and follow set/delete."""
+        await self.manager.set_state_entry(self.agent_id, "a", 1, tags=["x", "y"])
+        await self.manager.set_state_entry(self.agent_id, "b", 2, tags=["x"])
+        await self.manager.set_state_entry(self.agent_id, "c", 3, tags=["x"], visibility="shared")
+        
+        self.assertEqual(await self.manager.get_entries_by_tag(self.agent_id, "x"), {"a": 1, "b": 2})
+        self.assertEqual(
+            await self.manager.get_all_entries(self.agent_id, tags=["x", "y"]), {"a": 1}
+        )
+        self.assertEqual(
+            await self.manager.get_all_entries(self.agent_id, tags=["x"]), {"a": 1, "b": 2, "c": 3}
+        )
+        
+        await self.manager.delete_state_entry(self.agent_id, "a")
+        await self.manager.set_state_entry(self.agent_id, "b", 2, tags=["z"])
+        self.assertEqual(await self.manager.get_entries_by_tag(self.agent_id, "x"), {})
+        self.assertEqual(await self.manager.get_entries_by_tag(self.agent_id, "z"), {"b": 2})
+        
+        # Tag membership is a set per tag and survives a reload
+        state = await self.manager.get_agent_state(self.agent_id)
+        self.assertEqual(state.tags, {"z": {"b"}})
+        await self.manager.flush()
+        reloaded = AsyncAgentStateManager(self.temp_dir)
+        self.assertEqual((await reloaded.get_agent_state(self.agent_id)).tags, {"z": {"b"}})
+    
+    def test_write_behind_managers_flushed_weakly(self):
+        """Test that exit flushing tracks write-behind managers without keeping them alive."""
+        manager = AsyncAgentStateManager(self.temp_dir, durability="write_behind")
+        self.assertIn(manager, _write_behind_managers)
+        ref = weakref.ref(manager)
+        del manager
+        gc.collect()
+        self.assertIsNone(ref())
+    
+    async def test_memory_usage_and_cap(self):
+        """Test memory accounting per agent and the state size cap."""
+        manager = AsyncAgentStateManager(self.temp_dir, max_state_bytes=100)
+        await manager.set_state_entry(self.agent_id, "k", "x" * 20)
+        await manager.set_state_entry(self.agent_id2, "k", "x" * 40)
+        
+        usage = manager.get_memory_usage()
+        self.assertEqual(usage["agents"][self.agent_id]["entries"], 1)
+        self.assertGreater(usage["agents"][self.agent_id2]["bytes"], usage["agents"][self.agent_id]["bytes"])
+        self.assertEqual(usage["total_bytes"], sum(a["bytes"] for a in usage["agents"].values()))
+        
+        with self.assertRaises(StateQuotaExceededError):
+            await manager.set_state_entry(self.agent_id, "big", "x" * 200)
+        self.assertIsNone(await manager.get_state_entry(self.agent_id, "big"))
+        
+        # Replacing a value only counts the difference
+        await manager.set_state_entry(self.agent_id, "k", "x" * 80)
+        await manager.delete_state_entry(self.agent_id, "k")
+        self.assertEqual(manager.get_memory_usage(self.agent_id)["bytes"], 0)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""Tests for the shared API client transport, response cache and metrics."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from streamlit_app.services.api_client import ApiClient
+from streamlit_app.services.http_cache import (
+    CachePolicy, ClientMetrics, ResponseCache, SharedTransport, endpoint_label,
+)
+
+
+class FakeApi:
+    """Mock API that counts requests and supports ETag revalidation."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.etag = '"v1"'
+        self.lock = threading.Lock()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        with self.lock:
+            self.calls.append((request.method, request.url.path))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if request.method != "GET":
+            return httpx.Response(200, json={"ok": True})
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        return httpx.Response(200, json={"path": request.url.path}, headers={"ETag": self.etag})
+
+
+@pytest.fixture
+def fake_api():
+    """Create a fake API."""
+    return FakeApi(delay=0.05)
+
+
+@pytest.fixture
+def client(fake_api, monkeypatch):
+    """Create an API client on an isolated cache and mock transport."""
+    monkeypatch.setattr("streamlit_app.services.api_client.get_api_state", lambda: _NullState())
+    monkeypatch.setattr("streamlit_app.services.api_client.update_api_state", lambda state: None)
+    metrics = ClientMetrics()
+    cache = ResponseCache(
+        policies={"version": CachePolicy(ttl=60, shared=True), "playbooks": CachePolicy(ttl=0)},
+        metrics=metrics,
+    )
+    transport = SharedTransport(transport=httpx.MockTransport(fake_api.handler))
+    api = ApiClient(base_url="http://api.test", auth_token="token", cache=cache, metrics=metrics)
+    api.transport = transport
+    yield api
+    transport.close()
+
+
+class _NullState:
+    """API state stand-in that ignores all updates."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def test_endpoint_label_folds_ids():
+    """Test that ID-like path segments do not create new metric labels."""
+    assert endpoint_label("/playbooks/123/run") == "playbooks/:id/run"
+    assert endpoint_label("executions/3f2b9c1e-8d4a-4b7e-9a1c-2d3e4f5a6b7c") == "executions/:id"
+    assert endpoint_label("health") == "health"
+
+
+def test_policy_longest_prefix():
+    """Test that per-endpoint policies match on the longest prefix."""
+    cache = ResponseCache(policies={"agents": CachePolicy(ttl=10), "agents/status": CachePolicy(ttl=1)})
+    assert cache.policy_for("agents/status").ttl == 1
+    assert cache.policy_for("/agents/abc").ttl == 10
+    assert cache.policy_for("other").ttl == 0
+
+
+@pytest.mark.asyncio
+async def test_fresh_responses_are_served_from_cache(client, fake_api):
+    """Test that a TTL policy avoids repeated round trips."""
+    first = await client.get("version")
+    second = await client.get("version")
+
+    assert first.json() == second.json()
+    assert len(fake_api.calls) == 1
+    snapshot = client.metrics.snapshot()
+    assert snapshot["cache_hits"] == 1
+    assert snapshot["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_are_coalesced(client, fake_api):
+    """Test that identical in-flight GETs share one request."""
+    responses = await asyncio.gather(*(client.get("playbooks") for _ in range(5)))
+
+    assert all(r.json() == {"path": "/playbooks"} for r in responses)
+    assert len(fake_api.calls) == 1
+    assert client.metrics.snapshot()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_revalidated_with_etag(client, fake_api):
+    """Test that ETag entries are revalidated and reused on 304."""
+    first = await client.get("playbooks")
+    second = await client.get("playbooks")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert len(fake_api.calls) == 2
+    assert client.metrics.snapshot()["revalidated"] == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_resource(client, fake_api):
+    """Test that a successful write drops cached responses of the resource."""
+    await client.get("playbooks/abc")
+    assert len(client.cache) == 1
+
+    await client.post("playbooks/abc/execute", json_data={})
+
+    assert len(client.cache) == 0
+
+
+def test_transport_is_shared_across_event_loops(client, fake_api):
+    """Test that the pooled transport keeps working across asyncio.run calls."""
+    for _ in range(3):
+        response = asyncio.run(client.get("health", use_cache=False))
+        assert response.status_code == 200
+
+    assert len(fake_api.calls) == 3
+    assert client.metrics.snapshot()["endpoints"]["health"]["count"] == 3
@@ -0,0 +1,139 @@
+"""Route tests for the keyset-paginated listing and cost endpoints."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.api_routes import agents, costs, playbooks, tools
+from core.cost_meter import CostMeter, PricingTable, set_cost_meter
+from core.shared_registry import InMemoryRegistryStore, set_registry_store
+
+
+@pytest.fixture
+def client():
+    """Create a client over the agent, playbook and tool routers with a fresh registry store."""
+    set_registry_store(InMemoryRegistryStore())
+    for registry in (agents.agent_registry, agents.agent_tasks, playbooks.playbook_runs, tools.tool_executions):
+        registry.invalidate()
+    app = FastAPI()
+    for router in (agents.router, playbooks.router, tools.router):
+        app.include_router(router)
+    yield TestClient(app)
+    set_registry_store(None)
+
+
+def follow(client, url, limit=2):
+    """Page through a listing with cursors, returning every page's body."""
+    pages = [client.get(url, params={"limit": limit}).json()]
+    while pages[-1]["pagination"]["next_cursor"]:
+        cursor = pages[-1]["pagination"]["next_cursor"]
+        response = client.get(url, params={"limit": limit, "cursor": cursor})
+        assert response.status_code == 200
+        pages.append(response.json())
+    return pages
+
+
+def test_list_runs_follows_cursor(client):
+    """Test that runs are listed newest first across cursor pages."""
+    for i in range(5):
+        playbooks.playbook_runs[f"run{i}"] = {
+            "id": f"run{i}", "playbook": "research", "status": "completed",
+            "start_time": f"2026-01-01T00:00:0{i}",
+        }
+
+    pages = follow(client, "/api/playbooks/runs")
+    assert [[run["id"] for run in page["data"]] for page in pages] == [["run4", "run3"], ["run2", "run1"], ["run0"]]
+    assert [page["pagination"]["has_next"] for page in pages] == [True, True, False]
+    assert pages[-1]["pagination"]["total_count"] == 5 and pages[-1]["pagination"]["has_prev"]
+    assert isinstance(pages[0]["metadata"]["timestamp"], str)
+
+
+def test_list_executions_filters_by_status(client):
+    """Test that the status query parameter filters tool executions."""
+    for i in range(3):
+        tools.tool_executions[f"exec{i}"] = {
+            "id": f"exec{i}", "tool_id": "web_search", "status": "completed" if i else "running",
+            "created_at": f"2026-01-01T00:00:0{i}",
+        }
+
+    body = client.get("/api/tools/executions", params={"status": "completed"}).json()
+    assert [e["id"] for e in body["data"]] == ["exec2", "exec1"]
+    assert body["pagination"]["has_next"] is False
+
+
+def test_list_agents_and_tasks(client):
+    """Test agent and task listings, including their status filters."""
+    for i in range(3):
+        agents.agent_registry[f"agent{i}"] = {
+            "id": f"agent{i}", "type": "researcher", "status": "idle" if i else "busy",
+            "created_at": f"2026-01-01T00:00:0{i}",
+        }
+        agents.agent_tasks[f"task{i}"] = {
+            "id": f"task{i}", "agent_id": "agent1", "status": "completed",
+            "created_at": f"2026-01-01T00:00:0{i}",
+        }
+
+    body = client.get("/api/agents/list", params={"status": "idle"}).json()
+    assert [a["id"] for a in body["data"]] == ["agent2", "agent1"]
+    pages = follow(client, "/api/agents/agent1/tasks")
+    assert [t["id"] for page in pages for t in page["data"]] == ["task2", "task1", "task0"]
+
+
+@pytest.mark.parametrize("url", [
+    "/api/playbooks/runs", "/api/tools/executions", "/api/agents/list", "/api/agents/agent1/tasks",
+])
+def test_malformed_cursor_is_rejected(client, url):
+    """Test that a malformed cursor gets a 400 instead of a server error."""
+    agents.agent_registry["agent1"] = {"id": "agent1", "type": "researcher", "status": "idle"}
+
+    response = client.get(url, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "INVALID_CURSOR"
+
+
+@pytest.fixture
+def cost_client():
+    """Create a client over the cost router with a fresh meter."""
+    meter = CostMeter(PricingTable({"gpt-4o": {"input": 0.01, "output": 0.0}}, {"serpapi": {"per_call": 0.01}}))
+    set_cost_meter(meter)
+    app = FastAPI()
+    app.include_router(costs.router)
+    yield TestClient(app), meter
+    set_cost_meter(None)
+
+
+def test_cost_summary_and_aggregates(cost_client):
+    """Test the summary and per-dimension aggregate endpoints."""
+    client, meter = cost_client
+    meter.record_llm("gpt-4o", 1000, 0, workflow="research", agent="Researcher")
+    meter.record_tool("serpapi", workflow="research", agent="Researcher")
+
+    summary = client.get("/api/costs", params={"top": 5})
+    assert summary.status_code == 200
+    assert summary.json()["data"]["total"]["cost"] == pytest.approx(0.02)
+    agent_costs = client.get("/api/costs/agent").json()["data"]
+    assert agent_costs["Researcher"]["llm_calls"] == 1 and agent_costs["Researcher"]["tool_calls"] == 1
+    unknown = client.get("/api/costs/region")
+    assert unknown.status_code == 404 and unknown.json()["error"]["code"] == "UNKNOWN_DIMENSION"
+
+
+def test_budget_crud(cost_client):
+    """Test setting, listing and removing budgets, and rejecting invalid ones."""
+    client, meter = cost_client
+    meter.record_llm("gpt-4o", 1000, 0, workflow="research")
+
+    created = client.put("/api/costs/budgets", json={
+        "scope": "workflow", "key": "research", "limit": 0.005, "action": "warn", "window": 3600,
+    })
+    assert created.status_code == 200
+    assert created.json()["data"]["window"] == 3600 and created.json()["data"]["spent"] == 0.0
+    assert client.put("/api/costs/budgets", json={"scope": "region", "key": "eu", "limit": 1}).status_code == 400
+    assert client.put("/api/costs/budgets", json={"scope": "total", "limit": 1, "action": "panic"}).status_code == 400
+
+    meter.record_llm("gpt-4o", 1000, 0, workflow="research")
+    budgets = client.get("/api/costs/budgets").json()["data"]
+    assert [(b["key"], b["exceeded"]) for b in budgets] == [("research", True)]
+
+    assert client.delete("/api/costs/budgets/workflow/research").status_code == 200
+    missing = client.delete("/api/costs/budgets/workflow/research")
+    assert missing.status_code == 404 and missing.json()["error"]["code"] == "BUDGET_NOT_FOUND"
@@ -0,0 +1,142 @@
+"""Tests for the pub/sub backplane and cross-worker WebSocket delivery."""
+
+import asyncio
+import json
+
+import pytest
+
+import core.backplane
+from core.backplane import InMemoryBackplane, RedisBackplane, create_backplane
+from core.connection_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    """WebSocket stand-in that records sent frames."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_subscribers():
+    """Test that subscribers receive JSON round-tripped messages."""
+    backplane = InMemoryBackplane()
+    received = []
+
+    async def handler(message):
+        received.append(message)
+
+    await backplane.subscribe("events", handler)
+    await backplane.publish("events", {"n": 1, "tags": ("a", "b")})
+    await backplane.publish("other", {"n": 2})
+    await backplane.unsubscribe("events", handler)
+    await backplane.publish("events", {"n": 3})
+
+    assert received == [{"n": 1, "tags": ["a", "b"]}]
+
+
+def test_create_backplane_from_url():
+    """Test backplane selection by URL scheme."""
+    assert isinstance(create_backplane(None), InMemoryBackplane)
+    with pytest.raises(ValueError):
+        create_backplane("kafka://localhost")
+
+
+@pytest.mark.asyncio
+async def test_broadcast_routed_to_worker_holding_socket():
+    """Test that a broadcast on one worker reaches a socket held by another."""
+    backplane = InMemoryBackplane()
+    worker_a, worker_b = ConnectionManager(), ConnectionManager()
+    await worker_a.attach_backplane(backplane)
+    await worker_b.attach_backplane(backplane)
+
+    local, remote = FakeWebSocket(), FakeWebSocket()
+    await worker_a.connect(local, "session-1")
+    await worker_b.connect(remote, "session-1")
+
+    # Worker A runs the workflow; each socket receives the update exactly once
+    assert await worker_a.broadcast({"type": "progress_update", "progress": 50}, "session-1") == 1
+    await asyncio.sleep(0.02)
+
+    assert local.sent == [{"type": "progress_update", "progress": 50}]
+    assert remote.sent == [{"type": "progress_update", "progress": 50}]
+    assert worker_b.get_stats()["relayed"] == 1
+    assert worker_a.get_stats()["relayed"] == 0
+
+    await worker_a.close_all()
+    await worker_b.close_all()
+
+
+class FakePubSub:
+    """Pub/sub connection that replays a script of messages and errors."""
+
+    def __init__(self, script):
+        self.script = script
+        self.channels = []
+
+    async def subscribe(self, *channels):
+        self.channels.extend(channels)
+
+    async def unsubscribe(self, *channels):
+        pass
+
+    async def close(self):
+        pass
+
+    async def listen(self):
+        for item in self.script:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await asyncio.Event().wait()
+
+
+class FakeRedis:
+    """Redis client handing out scripted pub/sub connections."""
+
+    def __init__(self, scripts):
+        self.pubsubs = [FakePubSub(script) for script in scripts]
+        self.created = 0
+
+    def pubsub(self):
+        self.created += 1
+        return self.pubsubs[self.created - 1]
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_redis_reader_reconnects_after_errors(monkeypatch):
+    """Test that the Redis reader resubscribes with backoff instead of stopping."""
+    def message(n):
+        return {"type": "message", "channel": b"wrenchai:events", "data": json.dumps({"n": n})}
+
+    fake = FakeRedis([[message(1), ConnectionError("reset")], [ConnectionError("refused")], [message(2)]])
+    monkeypatch.setattr(core.backplane, "redis_asyncio", type("redis", (), {"from_url": staticmethod(lambda url: fake)}))
+    backplane = RedisBackplane("redis://test", reconnect_delay=0.01)
+    received = []
+
+    async def handler(msg):
+        received.append(msg["n"])
+
+    await backplane.subscribe("events", handler)
+    for _ in range(100):
+        if len(received) == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    assert received == [1, 2]
+    assert backplane.reconnects == 2
+    assert fake.pubsubs[2].channels == ["wrenchai:events"]
+    await backplane.close()
+
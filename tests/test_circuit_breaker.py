@@ -0,0 +1,133 @@
+"""Tests for the shared circuit breaker registry and retry budget."""
+
+import pytest
+
+from core.circuit_breaker import (
+    CircuitBreaker, CircuitBreakerConfig, CircuitBreakerRegistry, CircuitState,
+    RetryBudget, host_resource, llm_resource, step_resource, tool_resource,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Create a fake clock."""
+    return FakeClock()
+
+
+def test_resource_keys():
+    """Test the resource key helpers."""
+    assert llm_resource("openai", "gpt-4") == "llm:openai/gpt-4"
+    assert tool_resource("web_search") == "tool:web_search"
+    assert step_resource("wf", "fetch") == "step:wf/fetch"
+    assert host_resource("https://API.Example.com/v1/x") == "host:api.example.com"
+
+
+def test_breaker_opens_probes_and_closes(clock):
+    """Test closed -> open -> half-open -> closed with a single probe slot."""
+    breaker = CircuitBreaker(
+        "llm:test/open-close",
+        CircuitBreakerConfig(failure_threshold=3, recovery_time_ms=1000),
+        clock=clock,
+    )
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == pytest.approx(1.0)
+
+    clock.now = 1.0
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one probe in flight
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.get_metrics()["rejections"] == 2
+
+
+def test_failed_probe_reopens(clock):
+    """Test that a failed half-open probe re-opens the circuit."""
+    breaker = CircuitBreaker(
+        "llm:test/reopen",
+        CircuitBreakerConfig(failure_threshold=1, recovery_time_ms=500),
+        clock=clock,
+    )
+    breaker.record_failure()
+    clock.now = 0.5
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.times_opened == 2
+    assert breaker.retry_after() == pytest.approx(0.5)
+
+
+def test_retry_budget_caps_ratio(clock):
+    """Test that retries are limited to the configured fraction of requests."""
+    budget = RetryBudget(retry_ratio=0.1, min_retries_per_second=0, max_tokens=1, clock=clock)
+    assert budget.try_acquire()  # initial burst
+    assert not budget.try_acquire()
+
+    allowed = 0
+    for _ in range(100):
+        budget.record_request()
+        allowed += budget.try_acquire()
+
+    assert allowed == pytest.approx(10, abs=1)
+    metrics = budget.get_metrics()
+    assert metrics["retries_rejected"] > 0
+    assert metrics["retry_ratio"] <= 0.12
+
+
+def test_retry_budget_time_floor(clock):
+    """Test that the per-second floor refills an idle budget."""
+    budget = RetryBudget(retry_ratio=0.1, min_retries_per_second=2, max_tokens=5, clock=clock)
+    while budget.try_acquire():
+        pass
+
+    clock.now = 1.0
+
+    assert budget.tokens == pytest.approx(2.0)
+
+
+def test_registry_shares_breakers_and_reports(clock):
+    """Test that breakers are shared per resource and prefix overrides apply."""
+    registry = CircuitBreakerRegistry(shards=4, clock=clock)
+    registry.configure("tool:", CircuitBreakerConfig(failure_threshold=1))
+
+    assert registry.get("tool:search") is registry.get("tool:search")
+    registry.record_failure("tool:search")
+    registry.record_failure("llm:test/registry")
+
+    metrics = registry.get_metrics()
+    assert metrics["open"] == ["tool:search"]
+    assert metrics["breakers"]["llm:test/registry"]["state"] == "closed"
+    assert set(metrics["retry_budget"]) >= {"tokens", "retries_allowed", "retries_rejected"}
+    assert not registry.allow_request("tool:search")
+
+
+def test_prefix_configure_applies_to_existing_breakers(clock):
+    """Test that configuring a prefix updates breakers created before it."""
+    registry = CircuitBreakerRegistry(shards=4, clock=clock)
+    search, model = registry.get("tool:search"), registry.get("llm:test/model")
+    registry.configure("tool:search", CircuitBreakerConfig(failure_threshold=3))
+    registry.configure("tool:", CircuitBreakerConfig(failure_threshold=1))
+
+    assert search.config.failure_threshold == 3
+    assert registry.get("tool:fetch").config.failure_threshold == 1
+    assert model.config.failure_threshold != 1
+    registry.configure("", CircuitBreakerConfig(failure_threshold=7))
+    assert model.config.failure_threshold == 7 and search.config.failure_threshold == 3
@@ -0,0 +1,165 @@
+"""Tests for the backpressure-aware WebSocket connection manager."""
+
+import asyncio
+import json
+
+import pytest
+
+from core.connection_manager import ConnectionManager, OverflowPolicy, SLOW_CONSUMER_CLOSE_CODE
+
+
+class FakeWebSocket:
+    """WebSocket stand-in that records sent frames."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False, blocked: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+        self.sent = []
+        self.accepted = False
+        self.close_code = None
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, data: str):
+        await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("connection reset")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+async def drain(manager: ConnectionManager, timeout: float = 1.0):
+    """Wait until every connection's queue is empty."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while any(conn.queue_depth for conns in manager.connections.values() for conn in conns):
+        assert loop.time() < deadline
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(0.01)
+
+
+async def drain_fast(ws: FakeWebSocket, count: int):
+    """Wait until a socket has received ``count`` messages."""
+    for _ in range(200):
+        if len(ws.sent) >= count:
+            return
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_all_connections():
+    """Test fan-out to every connection of a client."""
+    manager = ConnectionManager()
+    sockets = [FakeWebSocket(), FakeWebSocket()]
+    for ws in sockets:
+        await manager.connect(ws, "client")
+
+    for i in range(3):
+        assert await manager.broadcast({"seq": i}, "client") == 2
+    await drain(manager)
+
+    for ws in sockets:
+        assert ws.accepted
+        assert [m["seq"] for m in ws.sent] == [0, 1, 2]
+    assert await manager.broadcast({"seq": 9}, "nobody") == 0
+    await manager.close_all()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_does_not_block_fast_one():
+    """Test that broadcast returns without waiting for a stalled socket."""
+    manager = ConnectionManager(max_queue=4, overflow_policy=OverflowPolicy.DROP_OLDEST)
+    fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+    await manager.connect(fast, "client")
+    slow_conn = await manager.connect(slow, "client")
+
+    for i in range(10):
+        await asyncio.wait_for(manager.broadcast({"seq": i}, "client"), 0.1)
+    await drain_fast(fast, 10)
+
+    assert [m["seq"] for m in fast.sent] == list(range(10))
+    stats = slow_conn.get_stats()
+    assert stats["queue_depth"] == 4
+    assert stats["dropped"] >= 5
+
+    slow.gate.set()
+    await drain(manager)
+    # The stalled send held seq 0; only the newest messages survived the queue
+    assert [m["seq"] for m in slow.sent] == [0, 6, 7, 8, 9]
+    await manager.close_all()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_replaces_queued_updates_by_key():
+    """Test that queued messages with the same key are replaced in place."""
+    manager = ConnectionManager(overflow_policy=OverflowPolicy.COALESCE)
+    ws = FakeWebSocket(blocked=True)
+    conn = await manager.connect(ws, "client")
+
+    await manager.broadcast({"item": "a", "progress": 0}, "client", key="a")
+    await asyncio.sleep(0.01)  # writer picks up the first message and blocks on it
+    for progress in (10, 20, 30):
+        await manager.broadcast({"item": "a", "progress": progress}, "client", key="a")
+    await manager.broadcast({"item": "b", "progress": 50}, "client", key="b")
+
+    assert conn.queue_depth == 2
+    assert conn.coalesced == 2
+
+    ws.gate.set()
+    await drain(manager)
+    assert ws.sent == [
+        {"item": "a", "progress": 0},
+        {"item": "a", "progress": 30},
+        {"item": "b", "progress": 50},
+    ]
+    await manager.close_all()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_slow_consumer():
+    """Test that an overflowing consumer is closed and evicted."""
+    manager = ConnectionManager(max_queue=2, overflow_policy=OverflowPolicy.DISCONNECT)
+    ws = FakeWebSocket(blocked=True)
+    await manager.connect(ws, "client")
+
+    for i in range(5):
+        await manager.broadcast({"seq": i}, "client")
+    await asyncio.sleep(0.01)
+    ws.gate.set()
+    await asyncio.sleep(0.05)
+
+    assert ws.close_code == SLOW_CONSUMER_CLOSE_CODE
+    assert "client" not in manager.connections
+    assert manager.get_stats()["evicted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dead_socket_is_evicted():
+    """Test that a failing send evicts the connection and records the error."""
+    manager = ConnectionManager()
+    dead, alive = FakeWebSocket(fail=True), FakeWebSocket()
+    dead_conn = await manager.connect(dead, "client")
+    await manager.connect(alive, "client")
+
+    await manager.broadcast({"seq": 1}, "client")
+    await drain(manager)
+
+    assert manager.active_connections == {"client": [alive]}
+    assert "connection reset" in dead_conn.last_error
+    assert await manager.broadcast({"seq": 2}, "client") == 1
+
+    stats = manager.get_stats()
+    assert stats["connections"] == 1
+    assert stats["per_client"]["client"][0]["send_latency_ms"]["p50"] is not None
+
+    await manager.disconnect(alive, "client")
+    await manager.disconnect(alive, "client")  # unknown sockets are ignored
+    assert manager.connections == {}
@@ -0,0 +1,143 @@
+"""Tests for inline cost metering, aggregates and budgets."""
+
+import asyncio
+
+import pytest
+
+from core.cost_meter import (
+    DEFAULT_PRICING_PATH,
+    BudgetAction,
+    BudgetExceededError,
+    CostMeter,
+    PricingTable,
+    budget_variance,
+    summarize_costs,
+)
+
+
+@pytest.fixture
+def meter():
+    """Create a meter with a small pricing table."""
+    pricing = PricingTable(
+        {"claude-3.5-sonnet": {"input": 0.003, "output": 0.015}, "gpt-4o": {"input": 0.0025, "output": 0.01}},
+        {"serpapi": {"per_call": 0.01}},
+    )
+    return CostMeter(pricing)
+
+
+def test_pricing_lookup_normalizes_model_ids():
+    """Test exact, provider-prefixed, dashed and dated model ids resolve to one price."""
+    pricing = PricingTable.load(DEFAULT_PRICING_PATH)
+
+    expected = pricing.llm_cost("claude-3.5-sonnet", 1000, 1000)
+    assert expected == pytest.approx(0.018)
+    assert pricing.llm_cost("anthropic:claude-3-5-sonnet", 1000, 1000) == expected
+    assert pricing.llm_cost("claude-3-5-sonnet-20241022", 1000, 1000) == expected
+    assert pricing.llm_cost("unknown-model", 1000, 1000) == 0.0
+    assert pricing.unpriced == {"unknown-model"}
+    assert pricing.tool_cost("serpapi", 3) == pytest.approx(0.03)
+
+
+def test_aggregates_per_dimension(meter):
+    """Test that each call updates the total and every attributed aggregate."""
+    meter.record_llm("claude-3.5-sonnet", 2000, 1000, workflow="research", execution_id="e1", agent="Researcher")
+    meter.record_llm("gpt-4o", 1000, 0, workflow="research", execution_id="e2", agent="Writer")
+    meter.record_tool("serpapi", calls=2, workflow="research", agent="Researcher")
+
+    assert meter.total.cost == pytest.approx(0.021 + 0.0025 + 0.02)
+    assert meter.spent("workflow", "research") == pytest.approx(meter.total.cost)
+    assert meter.spent("agent", "Researcher") == pytest.approx(0.041)
+    assert list(meter.get_aggregates("model")) == ["claude-3.5-sonnet", "gpt-4o"]
+    assert meter.get_aggregates("tool")["serpapi"]["tool_calls"] == 2
+    summary = meter.get_summary(top=1)
+    assert len(summary["recent"]) == 1 and list(summary["by"]["agent"]) == ["Researcher"]
+
+
+@pytest.mark.asyncio
+async def test_budgets_abort_throttle_and_scope(meter):
+    """Test that exceeded budgets refuse or delay only the calls they cover."""
+    meter.set_budget("workflow", "research", 0.01, action=BudgetAction.ABORT)
+    meter.set_budget("model", "gpt-4o", 0.001, action=BudgetAction.THROTTLE, throttle_delay=0.05)
+    await meter.admit(workflow="research")
+
+    meter.record_llm("claude-3.5-sonnet", 1000, 1000, workflow="research")
+    with pytest.raises(BudgetExceededError):
+        await meter.admit(workflow="research", model="claude-3.5-sonnet")
+    await meter.admit(workflow="other", model="claude-3.5-sonnet")
+
+    meter.record_llm("gpt-4o", 1000, 0, workflow="other")
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await meter.admit(workflow="other", model="gpt-4o")
+    assert loop.time() - start >= 0.05
+    assert [b["exceeded"] for b in meter.get_budgets()] == [True, True]
+
+    with pytest.raises(ValueError):
+        meter.set_budget("region", "eu", 1.0)
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_windowed_budget_restarts():
+    """Test that a windowed budget only counts spend since its window started."""
+    clock = FakeClock()
+    meter = CostMeter(PricingTable({"gpt-4o": {"input": 0.01, "output": 0.0}}), clock=clock)
+    meter.record_llm("gpt-4o", 1000, 0, workflow="research")
+    meter.set_budget("workflow", "research", 0.015, window=60)
+
+    meter.record_llm("gpt-4o", 1000, 0, workflow="research")
+    await meter.admit(workflow="research")
+    meter.record_llm("gpt-4o", 1000, 0, workflow="research")
+    clock.now += 30
+    # Re-applying the same budget (as every playbook run does) keeps the window
+    meter.set_budget("workflow", "research", 0.015, window=60)
+    with pytest.raises(BudgetExceededError):
+        await meter.admit(workflow="research")
+
+    clock.now += 30
+    await meter.admit(workflow="research")
+    assert meter.get_budgets()[0]["spent"] == 0.0 and meter.spent("workflow", "research") == pytest.approx(0.03)
+    with pytest.raises(ValueError):
+        meter.set_budget("workflow", "research", 1.0, window=0)
+
+
+def test_execution_scope_is_bounded(meter):
+    """Test that finished runs drop their budgets and old executions are evicted."""
+    meter.max_executions = 2
+    meter.set_budget("execution", "e1", 1.0)
+    meter.record_tool("serpapi", execution_id="e1")
+    meter.end_execution("e1")
+    assert meter.get_budgets() == [] and "e1" in meter.get_aggregates("execution")
+
+    meter.set_budget("execution", "e2", 1.0)
+    for execution_id in ("e2", "e1", "e3"):
+        meter.record_tool("serpapi", execution_id=execution_id)
+    assert set(meter.get_aggregates("execution")) == {"e1", "e3"}
+    assert meter.get_budgets() == []
+
+
+def test_report_arithmetic():
+    """Test cost report totals and period-prorated budget variance."""
+    total, breakdown = summarize_costs({
+        "compute": 3000.5,
+        "storage": {"buckets": 1000, "disks": [200.25, 100]},
+        "llm": {"cost": 50, "tokens": 123456},
+    })
+    assert breakdown == {"compute": 3000.5, "storage": 1300.25, "llm": 50.0}
+    assert total == 4350.75
+
+    variance = budget_variance(total, breakdown, {
+        "total": 60000, "allocated": {"compute": 24000, "storage": 12000}, "period": "annual",
+    }, period="monthly")
+    assert variance["total"] == {"budget": 5000.0, "actual": 4350.75, "variance": -649.25,
+                                 "variance_percent": -12.98, "status": "under budget"}
+    assert variance["categories"][0]["status"] == "over budget"
@@ -0,0 +1,148 @@
+"""Tests for the LLM response cache."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from core.llm_cache import (
+    CachedRunResult,
+    LLMCache,
+    LLMCacheMiss,
+    LLMCacheMode,
+    LLMCachePolicy,
+    MemoryCacheTier,
+    SQLiteCacheTier,
+    make_cache_key,
+)
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeModel:
+    """Counts calls and returns a run-result-like object with usage."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        usage = SimpleNamespace(input_tokens=100, output_tokens=20)
+        return SimpleNamespace(output={"answer": self.calls}, usage=lambda: usage)
+
+
+def run(cache, model, policy, prompt="Summarize the repo"):
+    """Run one cached call with fixed model, instructions and tools."""
+    return cache.run(model, policy, model="gpt-4o", system_prompt="You are helpful.",
+                     messages={"input": prompt, "history": []}, tools=["web_search"])
+
+
+def test_cache_key_normalization():
+    """Test that keys ignore formatting noise but not content changes."""
+    base = make_cache_key("gpt-4o", "Be brief.", {"b": 1, "a": "hi"}, ["x", "y"])
+
+    assert make_cache_key("gpt-4o", "Be brief.  \n\n", {"a": "hi  ", "b": 1}, ["y", "x"]) == base
+    assert make_cache_key("gpt-4o-mini", "Be brief.", {"b": 1, "a": "hi"}, ["x", "y"]) != base
+    assert make_cache_key("gpt-4o", "Be brief.", {"b": 1, "a": "hi"}, ["x"]) != base
+    assert make_cache_key("gpt-4o", "Be brief.", {"b": 1, "a": "hi"}, ["x", "y"], namespace="other") != base
+
+
+@pytest.mark.asyncio
+async def test_hits_save_tokens_and_ttl_expires():
+    """Test that repeats are served from the cache until the TTL passes."""
+    clock = FakeClock()
+    cache = LLMCache(clock=clock)
+    model = FakeModel()
+    policy = LLMCachePolicy(enabled=True, ttl=60)
+
+    first, hit = await run(cache, model, policy)
+    assert not hit
+    second, hit = await run(cache, model, policy)
+    assert hit and isinstance(second, CachedRunResult)
+    assert second.output == {"answer": 1} and second.usage().total_tokens == 0
+
+    clock.now += 61
+    third, hit = await run(cache, model, policy)
+    assert not hit and third.output == {"answer": 2}
+    assert model.calls == 2
+    assert cache.stats.hits == 1 and cache.stats.misses == 2
+    assert cache.stats.tokens_saved == 120
+
+
+@pytest.mark.asyncio
+async def test_disabled_policy_bypasses_cache():
+    """Test that playbooks that did not opt in always call the model."""
+    cache = LLMCache()
+    model = FakeModel()
+
+    for _ in range(2):
+        await run(cache, model, LLMCachePolicy.from_config(None))
+    assert model.calls == 2
+    assert cache.stats.hits == cache.stats.misses == 0
+    assert LLMCachePolicy.from_config(True).active
+    assert LLMCachePolicy.from_config({"mode": "off"}).active is False
+
+
+@pytest.mark.asyncio
+async def test_fallback_responses_keyed_by_served_model():
+    """Test that a response from a fallback model is never served as the primary's."""
+    cache = LLMCache()
+    model = FakeModel()
+    policy = LLMCachePolicy(enabled=True)
+
+    def run_served(served):
+        return cache.run(model, policy, model="gpt-4o", system_prompt="You are helpful.",
+                         messages={"input": "Summarize the repo", "history": []},
+                         tools=["web_search"], served_model=lambda: served)
+
+    _, hit = await run_served("claude-3-sonnet")
+    assert not hit
+    _, hit = await run(cache, model, policy)
+    assert not hit and model.calls == 2
+    _, hit = await run(cache, model, policy)
+    assert hit and model.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_persists_and_promotes(tmp_path):
+    """Test that entries survive a new cache on the same file and are promoted to memory."""
+    path = str(tmp_path / "llm.db")
+    policy = LLMCachePolicy(enabled=True)
+    await run(LLMCache([MemoryCacheTier(), SQLiteCacheTier(path)]), FakeModel(), policy)
+
+    memory = MemoryCacheTier(max_entries=1)
+    reopened = LLMCache([memory, SQLiteCacheTier(path)])
+    model = FakeModel()
+    result, hit = await run(reopened, model, policy)
+
+    assert hit and result.output == {"answer": 1}
+    assert model.calls == 0 and len(memory) == 1
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay(tmp_path):
+    """Test that recorded runs replay offline and unrecorded calls fail loudly."""
+    path = str(tmp_path / "recording.db")
+    recorder = LLMCache([SQLiteCacheTier(path)], clock=FakeClock())
+    model = FakeModel()
+    await run(recorder, model, LLMCachePolicy(enabled=True, mode=LLMCacheMode.RECORD))
+    await run(recorder, model, LLMCachePolicy(enabled=True, mode=LLMCacheMode.RECORD))
+    assert model.calls == 2  # record always calls the model
+
+    clock = FakeClock()
+    clock.now += 10 ** 6
+    replayer = LLMCache([SQLiteCacheTier(path)], clock=clock)
+    replay = LLMCachePolicy(enabled=True, mode=LLMCacheMode.REPLAY)
+    result, hit = await run(replayer, FakeModel(), replay)
+    assert hit and result.output == {"answer": 2}
+
+    with pytest.raises(LLMCacheMiss):
+        await run(replayer, FakeModel(), replay, prompt="never recorded")
+    assert replayer.stats.replay_misses == 1
@@ -0,0 +1,158 @@
+"""Tests for the LLM dispatch scheduler."""
+
+import asyncio
+
+import pytest
+
+from core.llm_scheduler import (
+    LLMPriority,
+    LLMScheduler,
+    ProviderLimits,
+    TokenBucket,
+    provider_for_model,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLLM:
+    """Records calls per model and tracks peak concurrency."""
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, model: str, tag: str = "") -> str:
+        self.calls.append((model, tag))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        return model
+
+
+def test_provider_for_model():
+    """Test that plain and provider-prefixed model ids map to providers."""
+    assert provider_for_model("claude-3-sonnet") == "anthropic"
+    assert provider_for_model("gpt-4o") == "openai"
+    assert provider_for_model("google-gla:gemini-2.5-flash") == "google"
+    assert provider_for_model("anthropic:claude-3-5-sonnet-latest") == "anthropic"
+
+
+def test_token_bucket_refill():
+    """Test consumption, wait estimates and continuous refill."""
+    clock = FakeClock()
+    bucket = TokenBucket(per_minute=600, clock=clock)  # 10 per second
+
+    bucket.consume(600)
+    assert bucket.wait_time(50) == pytest.approx(5.0)
+    clock.now += 5
+    assert bucket.wait_time(50) == 0
+    bucket.adjust(-1000)
+    assert bucket.level == bucket.capacity
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_per_provider():
+    """Test that each provider is capped separately."""
+    scheduler = LLMScheduler({"anthropic": ProviderLimits(max_concurrency=2),
+                              "openai": ProviderLimits(max_concurrency=3)})
+    claude, gpt = FakeLLM(), FakeLLM()
+
+    await asyncio.gather(
+        *[scheduler.run(claude, "claude-3-haiku") for _ in range(6)],
+        *[scheduler.run(gpt, "gpt-4o") for _ in range(6)],
+    )
+
+    assert claude.max_in_flight == 2 and gpt.max_in_flight == 3
+    stats = scheduler.get_stats()
+    assert stats["anthropic"]["completed"] == 6 and stats["anthropic"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_jump_batch_queue():
+    """Test that queued interactive requests are admitted before earlier batch ones."""
+    scheduler = LLMScheduler({"openai": ProviderLimits(max_concurrency=1)})
+    llm = FakeLLM(latency=0.01)
+
+    async def call(tag, priority):
+        return await scheduler.run(lambda model: llm(model, tag), "gpt-4o", priority=priority)
+
+    blocker = asyncio.create_task(call("first", LLMPriority.BATCH))
+    await asyncio.sleep(0)
+    batch = [asyncio.create_task(call(f"batch{i}", LLMPriority.BATCH)) for i in range(3)]
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(call("interactive", LLMPriority.INTERACTIVE))
+    await asyncio.gather(blocker, interactive, *batch)
+
+    assert [tag for _, tag in llm.calls][:2] == ["first", "interactive"]
+    wait = scheduler.get_stats()["openai"]["wait"]
+    assert wait["batch"]["admitted"] == 4 and wait["interactive"]["admitted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_admission():
+    """Test that a request waits until the tokens-per-minute budget refills."""
+    scheduler = LLMScheduler({"openai": ProviderLimits(tokens_per_minute=6000)}, completion_reserve=0)
+    llm = FakeLLM(latency=0)
+
+    await scheduler.run(llm, "gpt-4o", tokens=6000)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await scheduler.run(llm, "gpt-4o", tokens=20)  # 100 tokens/s refill
+    assert loop.time() - start >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_spills_to_fallback_when_saturated():
+    """Test that requests go to the fallback once the primary queue is saturated."""
+    scheduler = LLMScheduler({
+        "anthropic": ProviderLimits(max_concurrency=1, spill_queue_depth=2),
+        "openai": ProviderLimits(max_concurrency=4),
+    })
+    llm = FakeLLM(latency=0.02)
+
+    results = await asyncio.gather(
+        *[scheduler.run(llm, "claude-3-sonnet", fallback="gpt-4o") for _ in range(6)]
+    )
+
+    assert results.count("claude-3-sonnet") == 3  # one in flight, two queued
+    assert results.count("gpt-4o") == 3
+    stats = scheduler.get_stats()
+    assert stats["anthropic"]["spilled_out"] == 3 and stats["openai"]["spilled_in"] == 3
+
+
+def test_priority_from_config():
+    """Test that playbook priorities parse leniently and reject unknown classes."""
+    assert LLMPriority.from_config(None) is LLMPriority.INTERACTIVE
+    assert LLMPriority.from_config(" Batch ") is LLMPriority.BATCH
+    with pytest.raises(ValueError, match="llm_priority"):
+        LLMPriority.from_config("urgent")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_queue():
+    """Test that cancelling a queued request does not leak or block the queue."""
+    scheduler = LLMScheduler({"openai": ProviderLimits(max_concurrency=1)})
+    llm = FakeLLM(latency=0.05)
+
+    first = asyncio.create_task(scheduler.run(llm, "gpt-4o"))
+    await asyncio.sleep(0)
+    doomed = asyncio.create_task(scheduler.run(llm, "gpt-4o"))
+    await asyncio.sleep(0)
+    doomed.cancel()
+    await first
+    assert await scheduler.run(llm, "gpt-4o") == "gpt-4o"
+    assert scheduler.queue("gpt-4o").in_flight == 0 and len(llm.calls) == 2
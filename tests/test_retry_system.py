@@ -0,0 +1,355 @@
+"""Tests for the retry manager, retry monitor and shared circuit breakers."""
+
+import asyncio
+import os
+import random
+
+import pytest
+
+from core.circuit_breaker import CircuitBreakerConfig, CircuitBreakerRegistry, CircuitOpenError, RetryBudget
+from core.recovery_system import ErrorCategory
+from core.retry_system import (
+    BackoffStrategy, FailoverRetryStrategy, HedgedRetryStrategy, QuantileSketch, RetryManager, RetryMonitor,
+    RetryPolicy, RetryPolicyConfig, RetryReporter, RetryResult, RetrySegmentStore, StepRetryContext,
+)
+from core.state_manager import StateManager
+
+
+class FlakyCall:
+    """Callable that fails a fixed number of times before succeeding."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def call(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("transient")
+        return "ok"
+
+
+@pytest.fixture
+def retry_manager(tmp_path):
+    """Create a retry manager with its own breaker registry and no backoff."""
+    manager = RetryManager(StateManager(), os.path.join(tmp_path, "retry"))
+    manager.breakers = CircuitBreakerRegistry(
+        CircuitBreakerConfig(failure_threshold=2, recovery_time_ms=60000),
+        RetryBudget(retry_ratio=0.5, min_retries_per_second=0, max_tokens=2),
+    )
+    manager.register_policy("default", RetryPolicy(RetryPolicyConfig(
+        max_retries=3, initial_delay_ms=0, jitter=False, backoff_strategy=BackoffStrategy.CONSTANT
+    )))
+    return manager
+
+
+def transient(_):
+    return ErrorCategory.TRANSIENT
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast_across_workflows(retry_manager):
+    """Test that a breaker opened by one workflow rejects calls from another."""
+    failing = FlakyCall(failures=100)
+    with pytest.raises(ConnectionError):
+        await retry_manager.execute_with_retry(
+            "wf-1", "step", failing.call, transient, resource="llm:test/model"
+        )
+
+    other = FlakyCall(failures=0)
+    with pytest.raises(CircuitOpenError):
+        await retry_manager.execute_with_retry(
+            "wf-2", "step", other.call, transient, resource="llm:test/model"
+        )
+
+    assert failing.calls == 2
+    assert other.calls == 0
+    metrics = retry_manager.breakers.get_metrics()
+    assert metrics["open"] == ["llm:test/model"]
+
+
+@pytest.mark.asyncio
+async def test_policy_breaker_is_the_shared_breaker(retry_manager):
+    """Test that a circuit-breaking policy guards resource-less steps with a registry breaker."""
+    retry_manager.register_policy("guarded", RetryPolicy(RetryPolicyConfig(
+        max_retries=5, initial_delay_ms=0, jitter=False, backoff_strategy=BackoffStrategy.CONSTANT,
+        retry_circuit_breaker=True, circuit_breaker_threshold=2,
+    )))
+    retry_manager.assign_policy_to_step("wf-1", "fetch", "guarded")
+    failing = FlakyCall(failures=100)
+    with pytest.raises((ConnectionError, CircuitOpenError)):
+        await retry_manager.execute_with_retry("wf-1", "fetch", failing.call, transient)
+
+    breaker = retry_manager.breakers.find("step:wf-1/fetch")
+    assert breaker is not None and not breaker.allow_request()
+    assert failing.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_limits_retries(retry_manager):
+    """Test that retries stop once the process-wide budget is spent."""
+    retry_manager.breakers.configure("host:", CircuitBreakerConfig(failure_threshold=100))
+    flaky = FlakyCall(failures=100)
+
+    with pytest.raises(ConnectionError):
+        await retry_manager.execute_with_retry(
+            "wf", "step", flaky.call, transient, resource="host:api.example.com"
+        )
+
+    budget = retry_manager.breakers.retry_budget.get_metrics()
+    assert flaky.calls == 3  # first attempt plus two budgeted retries
+    assert budget["retries_allowed"] == 2
+    assert budget["retries_rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failover_skips_open_resource(retry_manager):
+    """Test that failover skips implementations whose breaker is open."""
+    retry_manager.breakers.configure("llm:", CircuitBreakerConfig(failure_threshold=1))
+    retry_manager.breakers.record_failure("llm:backup")
+    primary = FlakyCall(failures=100)
+    backup = FlakyCall(failures=0)
+    fallback = FlakyCall(failures=0)
+    retry_manager.register_strategy("failover", FailoverRetryStrategy(
+        failover_functions=[backup.call, fallback.call],
+        failover_resources=["llm:backup", "llm:fallback"],
+    ))
+    retry_manager.assign_strategy_to_step("wf", "step", "failover")
+
+    result, _ = await retry_manager.execute_with_retry(
+        "wf", "step", primary.call, transient, resource="llm:primary"
+    )
+
+    assert result == "ok"
+    assert backup.calls == 0
+    assert fallback.calls == 1
+
+
+def finish(monitor, workflow_id, step_id, execution_id, retries, result, delay_ms=0):
+    """Run a record through the monitor as the retry manager would."""
+    context = StepRetryContext(
+        workflow_id=workflow_id, step_id=step_id, execution_id=execution_id,
+        original_error=Exception("boom"), error_category=ErrorCategory.TRANSIENT,
+    )
+    monitor.start_monitoring(context)
+    context.retry_count = retries
+    context.total_delay_ms = delay_ms
+    for attempt in range(retries):
+        context.record_attempt(attempt, RetryResult.FAILED)
+    monitor.update_record(context, result)
+    return context
+
+
+def test_monitor_window_is_bounded_but_aggregates_are_not(tmp_path):
+    """Test that evicted records still count towards the aggregates."""
+    monitor = RetryMonitor(str(tmp_path), max_records=3)
+    for i in range(5):
+        finish(monitor, "wf", f"step-{i % 2}", f"exec-{i}", retries=i, result=RetryResult.SUCCESS)
+
+    assert [r.execution_id for r in monitor.get_records()] == ["exec-2", "exec-3", "exec-4"]
+    assert [r.execution_id for r in monitor.get_records_for_step("wf", "step-0")] == ["exec-2", "exec-4"]
+
+    stats = monitor.get_retry_statistics("wf")
+    assert stats["total_operations"] == 5
+    assert stats["total_retries"] == 10
+    assert stats["operations_with_retries"] == 4
+    assert stats["success_rate"] == 1.0
+    assert monitor.get_retry_statistics(step_id="step-0")["total_retries"] == 6
+
+
+def test_monitor_evicts_idle_aggregates(tmp_path):
+    """Test that per-workflow and per-step aggregates are LRU-bounded."""
+    monitor = RetryMonitor(str(tmp_path), max_records=2, max_aggregate_keys=3)
+    for i in range(10):
+        finish(monitor, f"wf-{i}", "step", f"exec-{i}", retries=1, result=RetryResult.SUCCESS)
+
+    assert list(monitor._workflow_aggregates) == ["wf-7", "wf-8", "wf-9"]
+    assert len(monitor._step_aggregates) == 3
+    assert monitor.get_retry_statistics("wf-9")["total_retries"] == 1
+    assert monitor.get_retry_statistics("wf-0")["total_operations"] == 0
+    assert monitor.get_retry_statistics()["total_operations"] == 10
+
+
+def test_monitor_replaces_counters_on_repeated_update(tmp_path):
+    """Test that updating a record twice does not double count it."""
+    monitor = RetryMonitor(str(tmp_path))
+    context = finish(monitor, "wf", "step", "exec", retries=2, result=RetryResult.MAX_RETRIES_EXCEEDED)
+
+    monitor.update_record(context, RetryResult.FAILED, Exception("final"))
+
+    stats = monitor.get_retry_statistics()
+    assert stats["total_operations"] == 1
+    assert stats["total_retries"] == 2
+    assert stats["results"] == {"failed": 1}
+    assert monitor.get_aggregate().error_categories == {"transient": 1}
+
+
+def test_segment_store_appends_and_compacts(tmp_path):
+    """Test JSONL persistence with segment rollover and compaction."""
+    monitor = RetryMonitor(str(tmp_path), max_segment_bytes=512)
+    for i in range(4):
+        context = finish(monitor, "wf", "step", f"exec-{i}", retries=1, result=RetryResult.FAILED)
+        monitor.update_record(context, RetryResult.FAILED, Exception("again"))
+
+    store = RetrySegmentStore(str(tmp_path))
+    assert len(store.segments()) > 1
+    assert len(list(store.iter_records())) == 8
+
+    assert monitor.compact() == 4
+    latest = RetrySegmentStore(str(tmp_path)).latest_records()
+    assert len(RetrySegmentStore(str(tmp_path)).segments()) == 1
+    assert latest["exec-3"]["final_error"] == "again"
+    monitor.close()
+
+
+def test_reporter_uses_aggregates(tmp_path):
+    """Test that summary reports come from aggregates rather than raw records."""
+    monitor = RetryMonitor(str(tmp_path), max_records=1)
+    finish(monitor, "wf", "a", "exec-1", retries=3, result=RetryResult.SUCCESS, delay_ms=300)
+    finish(monitor, "wf", "b", "exec-2", retries=1, result=RetryResult.FAILED, delay_ms=100)
+
+    report = RetryReporter(monitor).generate_summary_report("wf")
+
+    assert [s["step_id"] for s in report["most_retried_steps"]] == ["a", "b"]
+    assert report["most_retried_steps"][0]["success_rate"] == 1.0
+    assert report["statistics"]["average_delay_ms"] == 200
+    assert report["error_categories"] == {"transient": 2}
+
+
+def test_quantile_sketch_relative_error():
+    """Test that sketch percentiles stay within the configured accuracy."""
+    rng = random.Random(7)
+    values = sorted(rng.expovariate(1 / 500) for _ in range(5000))
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.03)
+
+
+class SlowCall:
+    """Async callable that sleeps before returning a label."""
+
+    def __init__(self, delay: float, label: str):
+        self.delay = delay
+        self.label = label
+        self.started = 0
+        self.cancelled = 0
+
+    async def call(self):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.label
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_and_cancels_slow_primary(retry_manager):
+    """Test that a slow primary is raced by a hedge and the loser is cancelled."""
+    primary = SlowCall(5.0, "primary")
+    backup = SlowCall(0.0, "backup")
+    retry_manager.register_strategy("hedged", HedgedRetryStrategy(
+        hedge_functions=[backup.call], initial_hedge_delay_ms=20
+    ))
+    retry_manager.assign_strategy_to_step("wf", "llm", "hedged")
+
+    result, status = await retry_manager.execute_with_retry("wf", "llm", primary.call, transient)
+
+    assert (result, status) == ("backup", RetryResult.SUCCESS)
+    await asyncio.sleep(0)
+    assert primary.cancelled == 1
+    stats = retry_manager.retry_monitor.get_retry_statistics("wf", "llm")
+    assert stats["hedged_attempts"] == 1
+    assert stats["hedge_win_rate"] == 1.0
+    assert retry_manager.breakers.retry_budget.retries_allowed == 1
+
+
+class FailingCall(SlowCall):
+    """Async callable that sleeps and then raises."""
+
+    async def call(self):
+        await super().call()
+        raise ConnectionError(self.label)
+
+
+@pytest.mark.asyncio
+async def test_breakers_credit_the_resource_that_won(retry_manager):
+    """Test that a hedge win does not count as a success of the primary resource."""
+    primary = FailingCall(0.03, "primary")
+    backup = SlowCall(0.1, "backup")
+    retry_manager.register_strategy("hedged", HedgedRetryStrategy(
+        hedge_functions=[backup.call], hedge_resources=["llm:backup"], initial_hedge_delay_ms=10
+    ))
+    retry_manager.assign_strategy_to_step("wf", "llm", "hedged")
+
+    result, _ = await retry_manager.execute_with_retry("wf", "llm", primary.call, transient, resource="llm:primary")
+
+    assert result == "backup"
+    assert retry_manager.breakers.get("llm:primary").failures == 1
+    assert retry_manager.breakers.get("llm:primary").successes == 0
+    assert retry_manager.breakers.get("llm:backup").successes == 1
+
+    slow = SlowCall(5.0, "primary")
+    backup.delay = 0.0
+    await retry_manager.execute_with_retry("wf", "llm", slow.call, transient, resource="llm:primary")
+    assert retry_manager.breakers.get("llm:primary").successes == 0
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(retry_manager):
+    """Test that attempts faster than the hedge delay never launch a hedge."""
+    primary = SlowCall(0.0, "primary")
+    backup = SlowCall(0.0, "backup")
+    retry_manager.register_strategy("hedged", HedgedRetryStrategy(
+        hedge_functions=[backup.call], initial_hedge_delay_ms=500
+    ))
+    retry_manager.assign_strategy_to_step("wf", "llm", "hedged")
+
+    result, _ = await retry_manager.execute_with_retry("wf", "llm", primary.call, transient)
+
+    assert result == "primary"
+    assert backup.started == 0
+    assert retry_manager.retry_monitor.get_retry_statistics()["hedged_attempts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hedging_respects_retry_budget(retry_manager):
+    """Test that no hedge is launched once the retry budget is spent."""
+    while retry_manager.breakers.retry_budget.try_acquire():
+        pass
+    primary = SlowCall(0.1, "primary")
+    backup = SlowCall(0.0, "backup")
+    retry_manager.register_strategy("hedged", HedgedRetryStrategy(
+        hedge_functions=[backup.call], initial_hedge_delay_ms=10
+    ))
+    retry_manager.assign_strategy_to_step("wf", "llm", "hedged")
+
+    result, _ = await retry_manager.execute_with_retry("wf", "llm", primary.call, transient)
+
+    assert result == "primary"
+    assert backup.started == 0
+
+
+def test_hedge_delay_is_learned_from_latencies():
+    """Test that the hedge delay follows the configured latency percentile."""
+    strategy = HedgedRetryStrategy(hedge_percentile=0.9, min_samples=10, min_hedge_delay_ms=1)
+
+    assert strategy.get_hedge_delay_ms("wf", "llm") == 2000
+    for latency in range(1, 101):
+        strategy.record_latency("wf", "llm", float(latency))
+
+    assert strategy.get_hedge_delay_ms("wf", "llm") == 91.0
+
+
+def test_hedge_latencies_are_bounded_per_step():
+    """Test that latency windows are kept for a bounded number of steps."""
+    strategy = HedgedRetryStrategy(max_latency_keys=2)
+    for step in ("a", "b", "a", "c"):
+        strategy.record_latency("wf", step, 10.0)
+
+    assert list(strategy._latencies) == [("wf", "a"), ("wf", "c")]
@@ -0,0 +1,281 @@
+"""Tests for shared registries with a local read-through cache."""
+
+import asyncio
+import copy
+import threading
+
+import pytest
+
+from core.shared_registry import (
+    InMemoryRegistryStore,
+    RedisRegistryStore,
+    SQLRegistryStore,
+    SharedRegistry,
+    create_registry_store,
+    decode_cursor,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CopyingStore(InMemoryRegistryStore):
+    """Store that copies records like a networked store would."""
+
+    def get(self, namespace, key):
+        return copy.deepcopy(super().get(namespace, key))
+
+    def set(self, namespace, key, value, index=None):
+        super().set(namespace, key, copy.deepcopy(value), index)
+
+    def items(self, namespace):
+        return copy.deepcopy(super().items(namespace))
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def workers(clock):
+    """Two registries (one per simulated worker) over the same store."""
+    store = CopyingStore()
+    return (
+        SharedRegistry("runs", store, cache_ttl=1.0, clock=clock),
+        SharedRegistry("runs", store, cache_ttl=1.0, clock=clock),
+    )
+
+
+def test_records_visible_across_workers(workers):
+    """Test that a record created on one worker is found on another."""
+    worker_a, worker_b = workers
+    worker_a["run-1"] = {"status": "pending"}
+
+    assert "run-1" in worker_b
+    assert worker_b["run-1"] == {"status": "pending"}
+    assert len(worker_b) == 1 and list(worker_b) == ["run-1"]
+    assert "missing" not in worker_b
+    assert worker_b.get("missing") is None
+
+
+def test_cache_serves_reads_until_ttl(workers, clock):
+    """Test that cached reads are served locally until they expire."""
+    worker_a, worker_b = workers
+    worker_a["run-1"] = {"status": "pending"}
+    assert worker_b["run-1"]["status"] == "pending"
+
+    worker_a.patch("run-1", status="running")
+    assert worker_b["run-1"]["status"] == "pending"  # still cached
+    assert worker_b.hits >= 1
+
+    clock.now += 1.5
+    assert worker_b["run-1"]["status"] == "running"
+
+
+def test_save_and_patch_publish_changes(workers, clock):
+    """Test that in-place edits are shared only after save."""
+    worker_a, worker_b = workers
+    worker_a["agent-1"] = {"status": "running", "tasks": {}}
+
+    record = worker_a["agent-1"]
+    record["tasks"]["t1"] = {"status": "pending"}
+    clock.now += 2
+    assert worker_b["agent-1"]["tasks"] == {}
+
+    worker_a.save("agent-1")
+    clock.now += 2
+    assert worker_b["agent-1"]["tasks"] == {"t1": {"status": "pending"}}
+
+    assert worker_b.patch("missing", status="x") is None
+    del worker_b["agent-1"]
+    assert "agent-1" not in worker_a
+    with pytest.raises(KeyError):
+        del worker_a["agent-1"]
+
+
+def test_in_memory_store_keeps_references():
+    """Test that the default store behaves like a plain dict."""
+    registry = SharedRegistry("runs", InMemoryRegistryStore())
+    registry["run-1"] = {"status": "pending"}
+    registry["run-1"]["status"] = "completed"
+
+    assert registry.values() == [{"status": "completed"}]
+    assert isinstance(create_registry_store("memory://"), InMemoryRegistryStore)
+    with pytest.raises(ValueError):
+        create_registry_store("ftp://nowhere")
+
+
+def fill(registry, count=25):
+    """Add tasks alternating between two agents and two statuses."""
+    for i in range(count):
+        registry[f"task-{i:03d}"] = {
+            "id": f"task-{i:03d}",
+            "agent_id": f"agent-{i % 2}",
+            "status": "completed" if i % 3 else "failed",
+            "created_at": f"2024-01-01T00:00:{i:02d}",
+        }
+
+
+def redis_store(**kwargs):
+    """Redis store over an in-process fake server."""
+    fakeredis = pytest.importorskip("fakeredis")
+    store = RedisRegistryStore("redis://localhost", **kwargs)
+    store._redis = fakeredis.FakeRedis()
+    return store
+
+
+@pytest.mark.parametrize("store_factory", [
+    lambda: InMemoryRegistryStore(),
+    lambda: SQLRegistryStore("sqlite://"),
+    redis_store,
+], ids=["memory", "sqlite", "redis"])
+def test_keyset_pagination_with_filters(store_factory):
+    """Test newest-first keyset pages with indexed filters on every store kind."""
+    tasks = SharedRegistry("agent_tasks", store_factory(), index_fields={"owner": "agent_id"})
+    fill(tasks)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = tasks.page(limit=4, cursor=cursor, owner="agent-0")
+        seen.extend(t["id"] for t in page)
+        if cursor is None:
+            break
+
+    expected = [f"task-{i:03d}" for i in range(24, -1, -2)]
+    assert seen == expected
+    assert tasks.count(owner="agent-0") == 13
+    assert tasks.count(owner="agent-0", status="failed") == 5
+    assert len(tasks) == 25
+
+    # Page-number clients still work through the offset path
+    page, _ = tasks.page(limit=4, offset=4, owner="agent-0")
+    assert [t["id"] for t in page] == expected[4:8]
+
+    with pytest.raises(ValueError):
+        tasks.page(agent_id="agent-0")
+    with pytest.raises(ValueError):
+        tasks.page(cursor="not-a-cursor")
+
+
+def test_sql_store_persists_records(tmp_path):
+    """Test that records survive a new store on the same database."""
+    url = f"sqlite:///{tmp_path / 'runs.db'}"
+    runs = SharedRegistry("playbook_runs", SQLRegistryStore(url), created_field="start_time")
+    runs["run-1"] = {"run_id": "run-1", "status": "pending", "start_time": "2024-01-01T00:00:00"}
+    runs.patch("run-1", status="completed")
+    assert runs.patch("run-2", status="completed") is None
+
+    reopened = SharedRegistry("playbook_runs", SQLRegistryStore(url))
+    assert reopened["run-1"]["status"] == "completed"
+    assert reopened.count(status="completed") == 1
+
+    page, cursor = reopened.page(limit=1)
+    assert page[0]["run_id"] == "run-1" and cursor is None
+    del reopened["run-1"]
+    assert "run-1" not in runs.store.keys("playbook_runs")
+
+
+def test_redis_store_indexes_and_expires(clock):
+    """Test that the Redis store reindexes on update and expires only finished records."""
+    store = redis_store(ttl=60, clock=clock)
+    runs = SharedRegistry("runs", store, clock=clock)
+    for i in range(3):
+        runs[f"run-{i}"] = {"status": "running", "created_at": f"2024-01-01T00:00:0{i}"}
+    runs.patch("run-0", status="completed")
+    runs["run-1"] = {"status": "failed", "created_at": "2024-01-01T00:00:01"}
+
+    assert runs.count(status="running") == 1 and runs.count(status="completed") == 1
+    assert [r["status"] for r in runs.page()[0]] == ["running", "failed", "completed"]
+
+    clock.now += 61
+    runs["run-3"] = {"status": "pending", "created_at": "2024-01-01T00:00:03"}
+    assert sorted(runs) == ["run-2", "run-3"] and store.evicted == 2
+    assert [r["status"] for r in runs.page()[0]] == ["pending", "running"]
+    assert runs.count(status="completed") == 0 and not store._redis.zcard("wrenchai:registry:runs:expiry")
+    del runs["run-2"]
+    assert runs.count(status="running") == 0 and len(runs) == 1
+
+
+def test_hot_set_is_bounded(clock):
+    """Test TTL eviction of finished records from the in-memory store and the local cache."""
+    store = InMemoryRegistryStore(ttl=60, clock=clock)
+    registry = SharedRegistry("runs", store, cache_ttl=5, clock=clock, max_cached=3)
+    agents = SharedRegistry("agents", store, clock=clock, terminal_statuses=())
+
+    for i in range(5):
+        registry[f"run-{i}"] = {"status": "completed" if i < 3 else "running"}
+    agents["agent-1"] = {"status": "error"}
+    assert len(registry._cache) == 3
+
+    clock.now += 30
+    registry["run-4"] = {"status": "completed"}
+    clock.now += 40
+    registry["run-5"] = {"status": "pending"}
+
+    assert sorted(registry) == ["run-3", "run-4", "run-5"]
+    assert store.evicted == 3
+    assert set(registry._cache) == {"run-5"}
+    assert decode_cursor(registry.page(limit=1)[1]) == ("", "run-5")
+
+    clock.now += 1000
+    assert sorted(registry) == ["run-3", "run-5"]
+    assert list(agents) == ["agent-1"]
+
+
+def test_page_with_count_scans_once():
+    """Test that a page and its total come from a single scan of the store."""
+    class CountingStore(InMemoryRegistryStore):
+        scans = 0
+
+        def items(self, namespace):
+            self.scans += 1
+            return super().items(namespace)
+
+    store = CountingStore()
+    tasks = SharedRegistry("tasks", store, index_fields={"owner": "agent_id"})
+    for i in range(5):
+        tasks[f"task-{i}"] = {"agent_id": "agent-1", "status": "running", "created_at": f"2024-01-0{i + 1}"}
+
+    records, cursor, total = tasks.page_with_count(limit=2, owner="agent-1")
+    assert [r["created_at"] for r in records] == ["2024-01-05", "2024-01-04"]
+    assert total == 5 and cursor is not None
+    assert store.scans == 1
+
+
+class ThreadRecordingStore(SQLRegistryStore):
+    """SQL store that records which threads its reads run on."""
+
+    def __init__(self, url):
+        super().__init__(url)
+        self.threads = set()
+
+    def get(self, namespace, key):
+        self.threads.add(threading.get_ident())
+        return super().get(namespace, key)
+
+
+@pytest.mark.asyncio
+async def test_async_methods_keep_blocking_stores_off_the_loop():
+    """Test that async methods run blocking store calls in worker threads."""
+    store = ThreadRecordingStore("sqlite://")
+    runs = SharedRegistry("runs", store, cache_ttl=0)
+
+    await runs.aset("run-1", {"status": "pending", "created_at": "2024-01-01"})
+    assert await runs.acontains("run-1") and not await runs.acontains("run-2")
+    updated = await asyncio.gather(*(runs.apatch("run-1", **{f"step_{i}": i}) for i in range(3)))
+    assert updated[-1]["status"] == "pending"
+    assert await runs.apatch("run-2", status="failed") is None
+
+    page, _ = await runs.apage(limit=5, status="pending")
+    assert [r["status"] for r in page] == ["pending"] and await runs.acount() == 1
+    assert threading.get_ident() not in store.threads
+    assert await runs.adelete("run-1") and await runs.aget("run-1", "gone") == "gone"
+
@@ -0,0 +1,78 @@
+"""Tests for stream frame coalescing, compression and binary framing."""
+
+import gzip
+import zlib
+
+import pytest
+
+from core.stream_framing import BinaryFrameCodec, FrameCoalescer, StreamCompressor
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_coalescer_releases_by_size_and_age():
+    """Test that frames are released at max_bytes or after the interval."""
+    clock = FakeClock()
+    coalescer = FrameCoalescer(interval_ms=16, max_bytes=8, clock=clock)
+
+    assert coalescer.add("abc") is None
+    assert coalescer.add("def") is None
+    assert coalescer.add("gh") == ["abc", "def", "gh"]
+    assert coalescer.time_until_due() is None
+
+    coalescer.add("x")
+    clock.now = 0.010
+    assert coalescer.time_until_due() == pytest.approx(0.006)
+    clock.now = 0.020
+    assert coalescer.add("y") == ["x", "y"]
+
+
+@pytest.mark.parametrize("method,decompress", [
+    ("gzip", lambda data: gzip.decompress(data)),
+    ("deflate", lambda data: zlib.decompress(data)),
+])
+def test_compressor_frames_decode_incrementally(method, decompress):
+    """Test that every compressed frame can be decoded before the stream ends."""
+    compressor = StreamCompressor(method)
+    decoder = zlib.decompressobj(31 if method == "gzip" else 15)
+
+    first = compressor.compress(b"hello ")
+    assert decoder.decompress(first) == b"hello "
+
+    rest = compressor.compress(b"world" * 100) + compressor.finish()
+    assert decompress(first + rest) == b"hello " + b"world" * 100
+    assert compressor.bytes_out < compressor.bytes_in
+
+
+def test_compressor_rejects_unknown_method():
+    """Test that unsupported methods fail fast."""
+    with pytest.raises(ValueError):
+        StreamCompressor("lz4")
+
+
+def test_length_prefixed_round_trip():
+    """Test encoding and decoding length-prefixed frames, including partial input."""
+    codec = BinaryFrameCodec("length_prefixed")
+    data = (
+        codec.encode("started")
+        + codec.encode("chunk", "héllo")
+        + codec.encode("chunk", {"tool": "search"})
+        + codec.encode("chunk", b"\x00\x01")
+        + codec.encode("complete")
+    )
+
+    frames, rest = codec.decode(data[:-3])
+    assert frames == [("started", ""), ("chunk", "héllo"), ("chunk", {"tool": "search"}), ("chunk", b"\x00\x01")]
+    assert len(rest) == 3
+
+    frames, rest = codec.decode(rest + data[-3:])
+    assert frames == [("complete", "")]
+    assert rest == b""
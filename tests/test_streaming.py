@@ -0,0 +1,105 @@
+"""Tests for coalesced, compressed and binary-framed stream processing."""
+
+import asyncio
+import json
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.stream_framing import BinaryFrameCodec
+from core.streaming import (
+    StreamCompression, StreamFormat, StreamProcessor, StreamingConfig, StreamingService,
+)
+
+
+async def tokens(count: int, delay: float = 0.0):
+    """Yield numbered tokens, optionally pausing between them."""
+    for i in range(count):
+        if delay:
+            await asyncio.sleep(delay)
+        yield f"t{i} "
+
+
+async def collect(processor, source):
+    return [frame async for frame in processor.process_stream(source)]
+
+
+@pytest.mark.asyncio
+async def test_json_coalescing_batches_tokens_into_frames():
+    """Test that a burst of tokens becomes a few size-bounded frames."""
+    config = StreamingConfig(format=StreamFormat.JSON, coalesce=True, coalesce_max_bytes=64)
+    processor = StreamProcessor(config)
+
+    output = await collect(processor, tokens(100))
+
+    events = [json.loads(line) for line in output]
+    chunks = [e for e in events if e["event"] == "chunk"]
+    assert events[0]["event"] == "started" and events[-1]["event"] == "complete"
+    assert 1 < len(chunks) < 20
+    assert "".join(c["delta"] for c in chunks) == "".join(f"t{i} " for i in range(100))
+    assert processor.total_processed == 100
+
+
+@pytest.mark.asyncio
+async def test_coalescing_flushes_on_interval_when_source_stalls():
+    """Test that a slow source still gets frames released after the interval."""
+    config = StreamingConfig(format=StreamFormat.TEXT, coalesce=True, coalesce_interval_ms=5)
+    processor = StreamProcessor(config)
+
+    output = await collect(processor, tokens(3, delay=0.03))
+
+    assert output[1:-1] == ["t0 ", "t1 ", "t2 "]
+
+
+@pytest.mark.asyncio
+async def test_gzip_compression_is_applied_per_frame():
+    """Test that output is gzip-compressed and headers advertise it."""
+    config = StreamingConfig(format=StreamFormat.SSE, compression=StreamCompression.GZIP, coalesce=True)
+    processor = StreamProcessor(config)
+
+    output = await collect(processor, tokens(50))
+
+    assert all(isinstance(frame, bytes) for frame in output)
+    text = zlib.decompress(b"".join(output), 31).decode()
+    assert text.startswith("event: started")
+    assert "event: complete" in text
+    assert config.get_headers()["Content-Encoding"] == "gzip"
+    assert "gzip" not in config.content_type
+
+
+def test_compressed_sse_response_decodes():
+    """Test that a gzip SSE response from the service is really gzip-encoded SSE."""
+    app = FastAPI()
+    service = StreamingService()
+
+    @app.get("/stream")
+    async def stream():
+        config = StreamingConfig(format=StreamFormat.SSE, compression=StreamCompression.GZIP, coalesce=True)
+        return service.create_sse_response(tokens(50), config)
+
+    with TestClient(app) as client:
+        response = client.get("/stream")
+
+    assert response.headers["content-encoding"] == "gzip"
+    events = [block for block in response.text.split("\n\n") if block]
+    assert events[0].startswith("event: started") and events[-1].startswith("event: complete")
+    deltas = [json.loads(e.split("data: ", 1)[1])["delta"] for e in events if e.startswith("event: chunk")]
+    assert "".join(deltas) == "".join(f"t{i} " for i in range(50))
+    assert not service.active_streams
+
+
+@pytest.mark.asyncio
+async def test_binary_length_prefixed_framing():
+    """Test binary framing for WebSocket consumers."""
+    config = StreamingConfig(format=StreamFormat.BINARY, coalesce=True, binary_framing="length_prefixed")
+    processor = StreamProcessor(config)
+
+    output = await collect(processor, tokens(10))
+
+    frames, rest = BinaryFrameCodec("length_prefixed").decode(b"".join(output))
+    assert rest == b""
+    assert frames[0] == ("started", "")
+    assert frames[1] == ("chunk", "".join(f"t{i} " for i in range(10)))
+    assert frames[-1] == ("complete", "")
@@ -0,0 +1,164 @@
+"""Tests for the base logger and its batching queue handler."""
+
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+from core.tools.base_logger import BaseLogger, BatchingQueueHandler, LogConfig
+
+
+class SlowListHandler(logging.Handler):
+    """Handler that collects records and can block the writer thread."""
+
+    def __init__(self, gate=None):
+        super().__init__()
+        self.gate = gate
+        self.records = []
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.records.append(record)
+
+
+@pytest.fixture
+def async_logger(tmp_path):
+    """Create an async-mode logger writing JSON to a temporary file."""
+    config = LogConfig(
+        log_file="test.log",
+        log_dir=str(tmp_path),
+        console_output=False,
+        async_mode=True,
+        log_level="DEBUG",
+    )
+    logger = BaseLogger("test.async_logger", config=config, log_type="test")
+    yield logger
+    logger.close()
+
+
+def test_async_logger_writes_json_records(async_logger, tmp_path):
+    """Test that queued records are written as JSON lines after a flush."""
+    for i in range(10):
+        async_logger.info("record", step=i)
+
+    assert async_logger.flush()
+
+    lines = (tmp_path / "test.log").read_text().splitlines()
+    assert len(lines) == 10
+    first = json.loads(lines[0])
+    assert first["message"] == "record"
+    assert first["step"] == 0
+    assert first["log_type"] == "test"
+
+    stats = async_logger.get_queue_stats()
+    assert stats["queued"] == stats["written"] == 10
+    assert stats["dropped"] == 0
+
+
+def test_log_does_not_mutate_extra(async_logger):
+    """Test that the caller's extra dict is left untouched."""
+    extra = {"key": "value"}
+    async_logger.info("record", extra=extra)
+
+    assert extra == {"key": "value"}
+
+
+def test_full_queue_drops_and_samples_debug():
+    """Test DEBUG sampling under backpressure and drops when the queue is full."""
+    gate = threading.Event()
+    target = SlowListHandler(gate)
+    handler = BatchingQueueHandler(
+        [target], queue_size=10, batch_size=1, backpressure_ratio=0.5,
+        debug_sample_rate=2, block_timeout=0.01
+    )
+    logger = logging.getLogger("test.backpressure")
+    logger.handlers = [handler]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    try:
+        for i in range(30):
+            logger.info("info %d", i)
+        for i in range(10):
+            logger.debug("debug %d", i)
+        logger.error("error while full")
+
+        stats = handler.get_stats()
+        assert stats["dropped"] > 0
+        assert stats["sampled_out"] == 5
+        assert stats["queue_depth"] <= 11
+    finally:
+        gate.set()
+        assert handler.flush()
+        handler.close()
+
+    assert len(target.records) == handler.get_stats()["written"]
+
+
+def test_warning_waits_for_space_without_blocking_emitters():
+    """Test that a WARNING waiting for space releases the handler lock until the writer drains."""
+    gate = threading.Event()
+    target = SlowListHandler(gate)
+    handler = BatchingQueueHandler([target], queue_size=2, batch_size=1, block_timeout=5)
+    logger = logging.getLogger("test.wait_for_space")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    try:
+        logger.info("blocks the writer")
+        while handler.get_stats()["queue_depth"]:
+            time.sleep(0.001)
+        for i in range(2):
+            logger.info("info %d", i)
+        waiter = threading.Thread(target=logger.error, args=("error while full",))
+        waiter.start()
+        waiter.join(0.05)
+        assert waiter.is_alive()
+
+        logger.info("dropped without waiting")
+        assert handler.get_stats()["dropped"] >= 1
+        gate.set()
+        waiter.join(5)
+        assert not waiter.is_alive()
+        assert handler.flush()
+    finally:
+        gate.set()
+        handler.close()
+
+    assert "error while full" in [r.getMessage() for r in target.records]
+
+
+def test_written_excludes_filtered_records():
+    """Test that records rejected by every handler's filters are not counted as written."""
+    target = SlowListHandler()
+    target.addFilter(lambda record: "secret" not in record.msg)
+    handler = BatchingQueueHandler([target])
+    logger = logging.getLogger("test.filtered")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    try:
+        logger.info("public")
+        logger.info("secret")
+        assert handler.flush()
+        stats = handler.get_stats()
+    finally:
+        handler.close()
+
+    assert stats["queued"] == 2
+    assert stats["written"] == len(target.records) == 1
+    assert stats["filtered"] == 1
+
+
+def test_sync_mode_has_no_queue(tmp_path):
+    """Test that the default synchronous mode writes immediately."""
+    config = LogConfig(log_file="sync.log", log_dir=str(tmp_path), console_output=False)
+    logger = BaseLogger("test.sync_logger", config=config)
+
+    logger.info("record")
+
+    assert logger.get_queue_stats() == {}
+    assert json.loads((tmp_path / "sync.log").read_text())["message"] == "record"
+    logger.close()
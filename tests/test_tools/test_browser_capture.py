@@ -0,0 +1,113 @@
+"""Tests for BrowserState ring buffers, cursor-based fetch and NDJSON export."""
+
+import json
+
+import pytest
+
+from core.tools.browser_tools import (
+    BrowserState,
+    CaptureRing,
+    ConsoleLog,
+    LogLevel,
+    NetworkRequest,
+    NetworkRequestType,
+    browser_operation,
+    browser_state,
+    handle_network_request,
+    handle_network_response,
+)
+
+
+def make_request(i, status=200, url=None, success=True):
+    """Build a completed network request."""
+    return NetworkRequest(
+        request_id=f"req{i}",
+        type=NetworkRequestType.FETCH,
+        method="GET",
+        url=url or f"https://app.test/api/items/{i}",
+        status=status,
+        success=success,
+    )
+
+
+def test_ring_evicts_oldest_and_keeps_sequence():
+    """Test that a full ring drops its oldest entries while sequence numbers keep counting."""
+    ring = CaptureRing(maxlen=3)
+    for i in range(5):
+        ring.append(i)
+
+    assert list(ring) == [2, 3, 4]
+    assert (ring.first_seq, ring.last_seq) == (3, 5)
+    assert list(ring.since(3)) == [(4, 3), (5, 4)]
+    assert list(ring.since(0)) == [(3, 2), (4, 3), (5, 4)]
+
+    ring.clear()
+    assert list(ring.since(0)) == [] and ring.append("x") == 6
+
+
+def test_incremental_fetch_with_cursor():
+    """Test paging through console events and resuming from the returned cursor."""
+    state = BrowserState(max_logs=50)
+    for i in range(5):
+        state.add_console_log(ConsoleLog(level=LogLevel.INFO, message=f"m{i}", source="app.js"))
+
+    page = state.get_events("console", since=0, limit=3)
+    assert [e["message"] for e in page["events"]] == ["m0", "m1", "m2"]
+    assert page["has_more"] and page["next_cursor"] == 3
+
+    state.add_console_log(ConsoleLog(level=LogLevel.ERROR, message="boom", source="app.js"))
+    rest = state.get_events("console", since=page["next_cursor"], limit=10)
+    assert [e["seq"] for e in rest["events"]] == [4, 5, 6]
+    assert not rest["has_more"]
+    assert state.get_events("console", since=rest["next_cursor"])["events"] == []
+    assert [e["message"] for e in state.get_events("console_errors")["events"]] == ["boom"]
+
+
+def test_filters_and_dropped_count():
+    """Test level, URL pattern and status filters, and reporting of evicted events."""
+    state = BrowserState(max_logs=4)
+    statuses = [200, 404, 500, 200, 503, 201]
+    for i, status in enumerate(statuses):
+        url = f"https://cdn.test/{i}.png" if i == 3 else None
+        state.add_network_request(make_request(i, status=status, url=url))
+
+    page = state.get_events("network", status="5xx")
+    assert [e["status"] for e in page["events"]] == [500, 503]
+    assert page["dropped"] == 2 and page["next_cursor"] == 6
+    assert [e["status"] for e in state.get_events("network", url="*/api/*", status=[200, 201])["events"]] == [201]
+    assert [e["status"] for e in state.get_events("network", url="*.png")["events"]] == [200]
+
+    with pytest.raises(ValueError):
+        state.get_events("dom")
+
+
+def test_ndjson_export_pages():
+    """Test that NDJSON export pages through a stream with cursors."""
+    state = BrowserState()
+    for i in range(5):
+        state.add_network_request(make_request(i))
+
+    first = state.export_events("network", limit=2)
+    lines = [json.loads(line) for line in first["data"].splitlines()]
+    assert [line["request_id"] for line in lines] == ["req0", "req1"]
+    assert isinstance(lines[0]["timestamp"], str) and lines[0]["type"] == "fetch"
+
+    second = state.export_events("network", since=first["next_cursor"], limit=10)
+    assert second["count"] == 3 and not second["has_more"]
+
+
+@pytest.mark.asyncio
+async def test_pending_responses_matched_by_url():
+    """Test that responses complete the oldest pending request to the same URL."""
+    browser_state.clear_logs()
+    handle_network_request("GET", "https://app.test/a")
+    handle_network_request("GET", "https://app.test/a")
+    handle_network_response("https://app.test/a", 200, 12.5)
+    handle_network_response("https://app.test/a", 304, 3.0)
+    handle_network_response("https://app.test/a", 500, 1.0)  # no pending request left
+
+    result = await browser_operation("get_events", stream="network", status=304)
+    assert result["success"]
+    assert [e["status"] for e in result["events"]] == [304]
+    assert [r.status for r in browser_state.network_success_logs] == [200, 304]
+    browser_state.clear_logs()
@@ -0,0 +1,95 @@
+"""Tests for the monitoring tool collection engine."""
+
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.tools.monitoring_tool import (
+    Alert, AlertSeverity, MetricConfig, MetricData, MonitoringTool,
+)
+
+_ids = itertools.count()
+
+
+def metric_name(prefix: str) -> str:
+    """Prometheus metric names are global, so give every test its own."""
+    return f"test_{prefix}_{next(_ids)}"
+
+
+@pytest.fixture
+def tool(tmp_path):
+    """Create a monitoring tool backed by a SQLite database."""
+    tool = MonitoringTool(alert_capacity=5, alert_suppression_window=60)
+    tool.configure_database(f"sqlite:///{tmp_path / 'metrics.db'}")
+    yield tool
+    tool.dispose_engines()
+
+
+def test_database_metrics_share_one_engine_and_round_trip(tool):
+    """Test that due DB metrics are collected together on a pooled engine."""
+    names = [metric_name("db") for _ in range(3)]
+    for i, name in enumerate(names):
+        tool.add_metric(MetricConfig(name=name, description="db", query=f"SELECT {i + 1}", interval=10))
+
+    collected = tool.collect_due()
+
+    assert sorted(collected) == sorted(names)
+    assert len(tool._engines) == 1
+    assert [tool.metrics[n].last_value for n in names] == [1.0, 2.0, 3.0]
+    stats = tool.get_collection_stats()
+    assert all(stats[n]["collections"] == 1 and stats[n]["errors"] == 0 for n in names)
+
+
+def test_batch_falls_back_to_individual_queries(tool):
+    """Test that a failing combined query falls back to per-metric queries."""
+    good = metric_name("good")
+    bad = metric_name("bad")
+    tool.add_metric(MetricConfig(name=good, description="good", query="SELECT 5"))
+    tool.add_metric(MetricConfig(name=bad, description="bad", query="SELECT * FROM missing_table"))
+
+    tool.collect_due()
+
+    assert tool.metrics[good].last_value == 5.0
+    assert tool.get_collection_stats()[bad]["errors"] == 1
+
+
+def test_timer_heap_schedules_by_interval(tool):
+    """Test that metrics are only collected when their next due time arrives."""
+    fast = metric_name("fast")
+    slow = metric_name("slow")
+    tool.add_metric(MetricConfig(name=fast, description="fast", query="SELECT 1", interval=1))
+    tool.add_metric(MetricConfig(name=slow, description="slow", query="SELECT 1", interval=10))
+    start = max(due for due, _, _ in tool._schedule)
+
+    assert sorted(tool.collect_due(start)) == sorted([fast, slow])
+    assert tool.collect_due(start + 0.5) == []
+    assert tool.collect_due(start + 1) == [fast]
+    assert sorted(tool.collect_due(start + 10)) == sorted([fast, slow])
+    assert tool._next_due_in(start + 10) == pytest.approx(1.0)
+
+
+def test_alerts_are_deduplicated_and_bounded(tool):
+    """Test alert suppression windows and the bounded alert ring."""
+    name = metric_name("alert")
+    tool.add_metric(MetricConfig(name=name, description="alert", threshold=10))
+    handled = []
+    tool.add_alert_handler(handled.append)
+    now = datetime.now()
+
+    for i in range(3):
+        tool._check_threshold(MetricData(timestamp=now + timedelta(seconds=i), metric_name=name, value=20 + i))
+
+    assert len(handled) == 1
+    assert tool.alerts_suppressed == 2
+    assert handled[0].metadata["repeat_count"] == 2
+    assert handled[0].metadata["last_value"] == 22
+
+    later = now + timedelta(seconds=120)
+    tool._check_threshold(MetricData(timestamp=later, metric_name=name, value=30))
+    assert len(handled) == 2
+
+    for i in range(10):
+        tool.alerts.append(Alert(timestamp=later, metric_name=f"other_{i}", message="m",
+                                 value=1, threshold=0, severity=AlertSeverity.INFO))
+    assert len(tool.get_alerts()) == 5
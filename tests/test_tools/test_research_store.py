@@ -0,0 +1,109 @@
+"""Tests for the SQLite research knowledge-base store."""
+
+import json
+
+import pytest
+
+from core.tools.research_store import (
+    MinHasher,
+    ResearchStore,
+    normalize_research_query,
+    open_research_store,
+)
+
+
+def make_findings(query, urls):
+    """Build a findings dict with one source per URL."""
+    return {
+        "query": query,
+        "sources": [{"title": f"Title {u}", "url": u, "snippet": "..."} for u in urls],
+        "information": [f"{query} uses event loops"],
+        "patterns": [],
+        "recommendations": ["prefer structured concurrency"],
+    }
+
+
+@pytest.fixture
+def store():
+    """Create an in-memory store."""
+    store = ResearchStore()
+    yield store
+    store.close()
+
+
+def test_normalized_and_near_duplicate_reuse(store):
+    """Test that reworded and rephrased queries hit stored research."""
+    store.upsert_topic("Python asyncio best practices for web scrapers",
+                       make_findings("asyncio", ["https://a.test"]))
+
+    assert normalize_research_query("The best practices: python asyncio") == \
+        normalize_research_query("asyncio python best practice")
+    assert store.find_topic("asyncio best practices python web scrapers") is not None
+    assert store.find_topic("best practices for Python asyncio web scraper") is not None
+    assert store.find_topic("Python asyncio best practices for web crawlers") is not None
+    assert store.find_topic("Rust embedded HAL drivers") is None
+
+
+def test_minhash_similarity_tracks_overlap():
+    """Test that signature similarity is higher for overlapping queries."""
+    hasher = MinHasher()
+    base = hasher.signature("kubernetes autoscaling with custom metrics")
+    close = hasher.signature("kubernetes autoscaling using custom metrics")
+    far = hasher.signature("french pastry recipes")
+
+    assert hasher.similarity(base, base) == 1.0
+    assert hasher.similarity(base, close) > hasher.similarity(base, far)
+    assert len(hasher.band_keys(base)) == hasher.bands
+
+
+def test_upserts_are_incremental_and_sources_deduplicated(store):
+    """Test topic replacement, URL dedup across topics and citations."""
+    store.upsert_topic("vector databases", make_findings("vector databases", ["https://a.test", "https://b.test"]))
+    store.upsert_topic("vector databases", make_findings("vector databases", ["https://b.test", "https://c.test"]))
+    store.upsert_topic("graph databases", make_findings("graph databases", ["https://b.test"]))
+
+    assert store.stats() == {"topics": 2, "sources": 3, "citations": 3}
+    assert [s["url"] for s in store.find_topic("vector databases")["sources"]] == ["https://b.test", "https://c.test"]
+    assert store.get_source("https://b.test")["used_for"] == ["vector databases", "graph databases"]
+    assert store.has_source("https://a.test") and not store.has_source("https://z.test")
+    assert store.citations(limit=1)[0]["query"] == "graph databases"
+
+
+def test_full_text_search(store):
+    """Test FTS over stored findings."""
+    store.upsert_topic("python concurrency", make_findings("python concurrency", ["https://a.test"]))
+    store.upsert_topic("sourdough baking", {"sources": [], "information": ["hydration ratios"]})
+
+    assert [t["query"] for t in store.search_topics("structured")] == ["python concurrency"]
+    assert [t["query"] for t in store.search_topics("hydration")] == ["sourdough baking"]
+    assert store.search_topics("the of") == []
+
+
+def test_legacy_json_migration(tmp_path):
+    """Test that a JSON knowledge base is imported into a sibling database once."""
+    legacy = tmp_path / "kb.json"
+    legacy.write_text(json.dumps({
+        "topics": {"edge caching": make_findings("edge caching", ["https://cdn.test"])},
+        "sources": {},
+        "citations": [],
+    }))
+
+    store = open_research_store(str(legacy))
+    assert (tmp_path / "kb.db").exists()
+    assert store.find_topic("Edge caching")["sources"][0]["url"] == "https://cdn.test"
+    store.close()
+
+    reopened = open_research_store(str(legacy))
+    assert reopened.stats()["citations"] == 1
+    reopened.close()
+
+
+def test_db_path_imports_sibling_json(tmp_path):
+    """Test that opening a new .db next to a legacy JSON knowledge base upgrades it."""
+    (tmp_path / "research_knowledge_base.json").write_text(json.dumps({
+        "topics": {"edge caching": make_findings("edge caching", ["https://cdn.test"])},
+    }))
+
+    store = open_research_store(str(tmp_path / "research_knowledge_base.db"))
+    assert store.find_topic("edge caching") is not None
+    store.close()
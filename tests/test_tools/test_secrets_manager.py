@@ -0,0 +1,111 @@
+"""Tests for the secrets manager cache and the file-backed keyring."""
+
+import asyncio
+import threading
+import time
+
+import keyring
+import pytest
+
+from core.tools.file_keyring import FileKeyring, use_file_keyring
+from core.tools.secrets_manager import SecretsManager, SecretNotFoundError
+
+
+class CountingKeyring(FileKeyring):
+    """File keyring that counts (and slows down) password lookups."""
+
+    def __init__(self, path, delay=0.0):
+        super().__init__(path)
+        self.delay = delay
+        self.get_calls = 0
+        self.threads = set()
+
+    def get_password(self, service, username):
+        self.get_calls += 1
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return super().get_password(service, username)
+
+
+@pytest.fixture
+def file_keyring(tmp_path):
+    """Install a counting file keyring for the duration of a test."""
+    previous = keyring.get_keyring()
+    backend = CountingKeyring(str(tmp_path / "keyring.json"), delay=0.05)
+    keyring.set_keyring(backend)
+    yield backend
+    keyring.set_keyring(previous)
+
+
+@pytest.fixture
+def manager():
+    """Create a secrets manager for testing."""
+    return SecretsManager(service_name="test-service", cache_ttl=60)
+
+
+def test_file_keyring_round_trip(tmp_path):
+    """Test storing, reading and deleting with the file keyring."""
+    previous = keyring.get_keyring()
+    try:
+        backend = use_file_keyring(str(tmp_path / "nested" / "keyring.json"))
+        keyring.set_password("svc", "user", "secret")
+        assert keyring.get_password("svc", "user") == "secret"
+        assert FileKeyring(backend.path).get_password("svc", "user") == "secret"
+
+        keyring.delete_password("svc", "user")
+        assert keyring.get_password("svc", "user") is None
+        with pytest.raises(keyring.errors.PasswordDeleteError):
+            keyring.delete_password("svc", "user")
+    finally:
+        keyring.set_keyring(previous)
+
+
+@pytest.mark.asyncio
+async def test_get_secret_is_cached(file_keyring, manager):
+    """Test that repeated lookups are served from the cache off the event loop."""
+    await manager.store_secret("api_key", "value-1")
+
+    assert await manager.get_secret("api_key") == "value-1"
+    assert await manager.get_secret("api_key") == "value-1"
+
+    assert file_keyring.get_calls == 1
+    assert threading.get_ident() not in file_keyring.threads
+    assert manager.get_cache_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced(file_keyring, manager):
+    """Test that concurrent lookups of the same secret share one keyring call."""
+    await manager.store_secret("api_key", "value-1")
+
+    values = await asyncio.gather(*(manager.get_secret("api_key") for _ in range(10)))
+
+    assert values == ["value-1"] * 10
+    assert file_keyring.get_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_cache(file_keyring, manager):
+    """Test that update and delete invalidate cached values."""
+    await manager.store_secret("api_key", "value-1")
+    assert await manager.get_secret("api_key") == "value-1"
+
+    await manager.update_secret("api_key", "value-2")
+    assert await manager.get_secret("api_key") == "value-2"
+
+    await manager.delete_secret("api_key")
+    with pytest.raises(SecretNotFoundError):
+        await manager.get_secret("api_key")
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_expiry(file_keyring):
+    """Test that cached secrets expire after the TTL."""
+    manager = SecretsManager(service_name="test-service", cache_ttl=0.01)
+    await manager.store_secret("api_key", "value-1")
+
+    await manager.get_secret("api_key")
+    await asyncio.sleep(0.02)
+    await manager.get_secret("api_key")
+
+    assert file_keyring.get_calls == 2
@@ -0,0 +1,82 @@
+"""Tests for the in-memory time-series store."""
+
+import numpy as np
+import pytest
+
+from core.tools.timeseries_store import RingBuffer, TimeSeriesStore
+
+
+@pytest.fixture
+def store():
+    """Create a small store: 100 raw samples, 10s and 60s rollups."""
+    return TimeSeriesStore(raw_capacity=100, tiers=((10, 50), (60, 100)))
+
+
+def test_ring_buffer_wraps_in_order():
+    """Test that the ring keeps the newest rows in chronological order."""
+    ring = RingBuffer(3, ("ts", "value"))
+    for i in range(5):
+        ring.append(float(i), float(i * 10))
+
+    assert ring.ordered()[0].tolist() == [2.0, 3.0, 4.0]
+    assert ring.window(3, 4)[1].tolist() == [30.0, 40.0]
+    assert not ring.covers(1.0)
+
+
+def test_query_raw_aggregates(store):
+    """Test min/max/avg/percentiles over raw samples."""
+    for i in range(100):
+        store.record("cpu", float(i), ts=1000.0 + i)
+
+    result = store.query("cpu", 1000.0, 1099.0)
+
+    assert result["source"] == "raw"
+    assert result["count"] == 100
+    assert result["min"] == 0.0 and result["max"] == 99.0
+    assert result["avg"] == pytest.approx(49.5)
+    assert result["p50"] == pytest.approx(np.percentile(np.arange(100), 50))
+
+
+def test_query_falls_back_to_rollups(store):
+    """Test that ranges older than the raw buffer are served from rollups."""
+    for i in range(400):
+        store.record("cpu", float(i % 10), ts=1000.0 + i)
+
+    result = store.query("cpu", 1000.0, 1399.0)
+
+    assert result["source"] == "10s"
+    assert result["count"] == 400
+    assert result["min"] == 0.0 and result["max"] == 9.0
+    assert result["avg"] == pytest.approx(4.5)
+
+    for i in range(400, 1000):
+        store.record("cpu", 1.0, ts=1000.0 + i)
+    assert store.query("cpu", 1000.0, 1999.0)["source"] == "60s"
+
+
+def test_fetch_is_decimated(store):
+    """Test that dashboard fetches return at most max_points bins."""
+    for i in range(100):
+        store.record("mem", float(i), ts=1000.0 + i)
+
+    series = store.fetch("mem", 1000.0, 1099.0, max_points=10)
+
+    assert len(series["ts"]) == 10
+    assert series["min"][0] == 0.0
+    assert series["max"][-1] == 99.0
+    assert np.mean(series["avg"]) == pytest.approx(49.5)
+
+
+def test_snapshot_round_trip(store, tmp_path):
+    """Test saving and loading a snapshot."""
+    for i in range(150):
+        store.record("cpu", float(i), ts=1000.0 + i)
+    path = str(tmp_path / "metrics.npz")
+
+    store.snapshot(path)
+    loaded = TimeSeriesStore.load(path)
+
+    assert loaded.names() == ["cpu"]
+    assert loaded.query("cpu", 1000.0, 1149.0) == store.query("cpu", 1000.0, 1149.0)
+    loaded.record("cpu", 1.0, ts=1150.0)
+    assert loaded.query("cpu", 1100.0, 1150.0)["count"] == 51
@@ -0,0 +1,103 @@
+"""Tests for the shared web search service, its cache and provider fan-out."""
+
+import asyncio
+
+import pytest
+
+from core.tools.web_search import (
+    FakeSearchProvider,
+    SearchCache,
+    SearchService,
+    normalize_query,
+)
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_cache_serves_normalized_queries():
+    """Test that equivalent queries hit the cache and smaller requests reuse it."""
+    provider = FakeSearchProvider()
+    service = SearchService(providers=[provider])
+
+    first = await service.search("Python  asyncio", max_results=5)
+    again = await service.search("  python asyncio ", max_results=3)
+    bigger = await service.search("python asyncio", max_results=8)
+
+    assert normalize_query("Python  asyncio") == "python asyncio"
+    assert [r.url for r in again] == [r.url for r in first[:3]]
+    assert len(bigger) == 8
+    assert provider.calls == ["Python  asyncio", "python asyncio"]
+    assert service.get_stats()["cache_hits"] == 1
+
+
+def test_cache_ttl_and_persistence(tmp_path):
+    """Test that entries expire after the TTL and survive a new cache on the same file."""
+    clock = FakeClock()
+    path = str(tmp_path / "search.db")
+    cache = SearchCache(path=path, ttl=60, clock=clock)
+    results = asyncio.run(FakeSearchProvider().search("query", 2))
+    cache.set("query", 2, results)
+
+    reopened = SearchCache(path=path, ttl=60, clock=clock)
+    assert [r.url for r in reopened.get("QUERY", 2)] == [r.url for r in results]
+
+    clock.now += 61
+    assert reopened.get("query", 2) is None
+    assert SearchCache(path=path, ttl=60, clock=clock).get("query", 1) is None
+    cache.close()
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_fallback_order_and_placeholder_not_cached():
+    """Test in-order fallback past failing providers and the uncached placeholder."""
+    broken, empty, good = FakeSearchProvider("broken", fail=True), FakeSearchProvider("empty", empty=True), FakeSearchProvider("good")
+    service = SearchService(providers=[broken, empty, good])
+    results = await service.search("topic", 2)
+    assert [r.source for r in results] == ["good", "good"]
+
+    nothing = SearchService(providers=[FakeSearchProvider("empty", empty=True)])
+    assert [r.source for r in await nothing.search("topic", 2)] == ["placeholder"] * 2
+    assert len(nothing.cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_race_returns_first_good_answer():
+    """Test that race mode answers with the fastest non-empty provider."""
+    slow = FakeSearchProvider("slow", latency=0.5)
+    fast_empty = FakeSearchProvider("fast_empty", empty=True)
+    fast = FakeSearchProvider("fast", latency=0.01)
+    service = SearchService(providers=[slow, fast_empty, fast], race=True)
+
+    start = asyncio.get_running_loop().time()
+    results = await service.search("race me", 3)
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert {r.source for r in results} == {"fast"}
+    assert elapsed < 0.3
+    await asyncio.sleep(0.01)
+    assert slow.in_flight == 0  # loser was cancelled
+
+
+@pytest.mark.asyncio
+async def test_search_many_bounds_concurrency_and_dedups():
+    """Test batched follow-ups run concurrently up to the limit and share duplicates."""
+    provider = FakeSearchProvider(latency=0.02)
+    service = SearchService(providers=[provider])
+
+    queries = [f"follow up {i}" for i in range(6)] + ["Follow Up 0"]
+    batches = await service.search_many(queries, max_results=2, concurrency=3)
+
+    assert len(batches) == 7 and all(len(b) == 2 for b in batches)
+    assert batches[-1][0].url == batches[0][0].url
+    assert provider.max_in_flight == 3
+    assert len(provider.calls) == 6
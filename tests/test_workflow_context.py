@@ -0,0 +1,112 @@
+"""Tests for the layered workflow context."""
+
+import pytest
+
+from core.workflow_context import MAX_METRIC_SAMPLES, WorkflowContext, ContextBudget, ContextMetrics
+
+
+@pytest.fixture
+def base_context():
+    """Create a workflow context dictionary for testing."""
+    return {"input": {"query": "test"}, "output": {}, "state": {"step1": {"value": 1}}}
+
+
+def test_child_overlays_without_copying(base_context):
+    """Test that child contexts overlay deltas and leave parents untouched."""
+    ctx = WorkflowContext(base_context)
+    first = ctx.child(previous_result={"n": 1})
+    second = first.child(previous_result={"n": 2})
+
+    assert second["previous_result"] == {"n": 2}
+    assert first["previous_result"] == {"n": 1}
+    assert "previous_result" not in ctx
+    assert second["input"] is base_context["input"]
+    assert second.depth == 2
+    assert second.history("previous_result") == [{"n": 2}, {"n": 1}]
+    assert second.deltas() == {"previous_result": {"n": 2}}
+
+
+def test_base_is_read_only_but_live(base_context):
+    """Test that the base cannot be written through but reflects workflow updates."""
+    ctx = WorkflowContext(base_context)
+
+    with pytest.raises(TypeError):
+        ctx._chain.maps[-1]["input"] = None
+
+    base_context["state"]["step2"] = {"value": 2}
+    assert "step2" in ctx["state"]
+
+
+def test_compact_collapses_overlays(base_context):
+    """Test that compacting keeps values and shares the base."""
+    ctx = WorkflowContext(base_context).child(a=1).child(b=2).child(a=3)
+    compacted = ctx.compact()
+
+    assert compacted.depth == 1
+    assert compacted.to_dict() == ctx.to_dict()
+
+
+def test_to_prompt_trims_nested_previous_results(base_context):
+    """Test that nested previous_result chains are summarized."""
+    budget = ContextBudget(max_result_depth=1, summary_chars=10)
+    nested = {"previous_result": {"previous_result": {"data": "x" * 100}}}
+    ctx = WorkflowContext(base_context, budget=budget).child(previous_result=nested)
+
+    prompt = ctx.to_prompt()
+
+    inner = prompt["previous_result"]["previous_result"]
+    assert isinstance(inner, str)
+    assert "trimmed" in inner
+    # The original context is never modified
+    assert ctx["previous_result"] is nested
+
+
+def test_to_prompt_respects_max_bytes(base_context):
+    """Test that the largest values are summarized to fit the budget."""
+    budget = ContextBudget(max_bytes=512, summary_chars=32)
+    ctx = WorkflowContext(base_context, budget=budget).child(big="y" * 4096)
+
+    prompt = ctx.to_prompt()
+
+    assert prompt["big"].endswith("chars]")
+    assert prompt["input"] == {"query": "test"}
+
+
+def test_to_prompt_records_metrics(base_context):
+    """Test that context bytes are recorded per call."""
+    metrics = ContextMetrics(step_id="loop")
+    ctx = WorkflowContext(base_context, budget=ContextBudget(), metrics=metrics)
+
+    ctx.to_prompt()
+    ctx.child(previous_result={"n": 1}).to_prompt()
+
+    data = metrics.to_dict()
+    assert data["calls"] == 2
+    assert data["samples"][1] > data["samples"][0]
+    assert data["max_bytes"] == data["samples"][1]
+
+
+def test_metrics_samples_are_bounded():
+    """Test that per-step metrics keep only the most recent sizes."""
+    metrics = ContextMetrics(step_id="loop")
+    for size in range(MAX_METRIC_SAMPLES + 10):
+        metrics.record(size)
+
+    data = metrics.to_dict()
+    assert data["calls"] == MAX_METRIC_SAMPLES + 10
+    assert len(data["samples"]) == MAX_METRIC_SAMPLES
+    assert data["samples"][0] == 10
+
+
+def test_materialization_is_incremental_and_live(base_context):
+    """Test that overlays merge from the parent's cache while base updates stay visible."""
+    ctx = WorkflowContext(base_context)
+    for n in range(50):
+        ctx.to_prompt()
+        ctx = ctx.child(previous_result={"n": n}, **{f"k{n % 3}": n})
+
+    assert ctx.to_dict() == dict(ctx._chain)
+    assert ctx.deltas() == {"k0": 48, "k1": 49, "k2": 47, "previous_result": {"n": 49}}
+    base_context["late"] = True
+    assert ctx.to_dict()["late"] is True
+    assert ctx.compact().to_dict() == ctx.to_dict()